@@ -22,6 +22,7 @@ import bpy
 
 from . import ui, prop, hud
 from . import operators
+from . import original_appearance, live_cache_store, frame_dispatcher, incremental_animation, snapshot_engine
 
 # Main classes - debug operators excluded to avoid import issues
 classes = (
@@ -65,6 +66,7 @@ if _ADV:
 def menu_func_export(self, context):
     self.layout.operator(operator.ExportP6.bl_idname, text="P6 (.xml)")
     self.layout.operator(operator.ExportMSP.bl_idname, text="Microsoft Project (.xml)")
+    self.layout.operator(operator.ExportAnimationEvents.bl_idname, text="4D Animation Events (.json)")
 
 
 def menu_func_import(self, context):
@@ -122,6 +124,11 @@ def register():
     bpy.types.TextCurve.BIMDateTextProperties = bpy.props.PointerProperty(type=prop.BIMDateTextProperties)
     bpy.types.TOPBAR_MT_file_export.append(menu_func_export)
     bpy.types.TOPBAR_MT_file_import.append(menu_func_import)
+    original_appearance.register()
+    live_cache_store.register()
+    frame_dispatcher.register()
+    incremental_animation.register()
+    snapshot_engine.register()
 
     # Initialize GN system integration
     try:
@@ -200,6 +207,12 @@ def unregister():
     except Exception as e:
         print(f"⚠️ GN system cleanup failed during addon unregistration: {e}")
 
+    original_appearance.unregister()
+    live_cache_store.unregister()
+    frame_dispatcher.unregister()
+    incremental_animation.unregister()
+    snapshot_engine.unregister()
+
     # Unregister operators from operators module first
     operators.unregister()
     
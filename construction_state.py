@@ -0,0 +1,240 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# Vectorized Construction State Engine.
+# The task tree of a work schedule is flattened once into task date arrays and
+# (task, product) output and input pairs over a product index. The state of
+# every product at a date (to build, in construction, completed, to demolish,
+# in demolition, demolished) is then a vectorized date comparison scattered
+# into one boolean mask per state, with the same rules as the recursive
+# Sequence.process_task_status, visualization range included.
+# Evaluated states are kept as packed bitmaps over the product index in a
+# memory-bounded LRU, so jumping back to a known date costs no evaluation.
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from bonsai.bim.module.sequence import date_frames, frame_table
+
+STATE_KEYS = ("TO_BUILD", "IN_CONSTRUCTION", "COMPLETED", "TO_DEMOLISH", "IN_DEMOLITION", "DEMOLISHED")
+# Row of a task state in the masks: outputs use 0-2, inputs the same state + 3
+INPUT_OFFSET = 3
+
+TASK_SKIPPED = -1
+
+# Memory budget of the cached state bitmaps
+DEFAULT_BITMAP_BUDGET_BYTES = 16 * 1024 * 1024
+
+
+def iter_schedule_tasks(root_tasks: Iterable[Any]):
+    """Every task of the tree (through IsNestedBy) once, nested tasks before their parent"""
+    seen = set()
+
+    def walk(task):
+        if task.id() in seen:
+            return
+        seen.add(task.id())
+        for rel in task.IsNestedBy or []:
+            for related_object in rel.RelatedObjects:
+                yield from walk(related_object)
+        yield task
+
+    for task in root_tasks:
+        yield from walk(task)
+
+
+class ConstructionStateIndex:
+    """Dated tasks of a work schedule with their output and input products as index pairs"""
+
+    def __init__(self, task_ids: np.ndarray, task_start: np.ndarray, task_finish: np.ndarray, products: List[Any],
+                 output_pairs: Tuple[np.ndarray, np.ndarray], input_pairs: Tuple[np.ndarray, np.ndarray]) -> None:
+        self.task_ids = task_ids
+        self.task_start = task_start
+        self.task_finish = task_finish
+        # Product entities; masks and pairs refer to their position
+        self.products = products
+        self.output_task, self.output_product = output_pairs
+        self.input_task, self.input_product = input_pairs
+
+    @property
+    def product_count(self) -> int:
+        return len(self.products)
+
+    @classmethod
+    def build(cls, root_tasks: Iterable[Any], task_dates: Callable[[Any], Tuple[Any, Any]],
+              task_outputs: Callable[[Any], Iterable[Any]], task_inputs: Callable[[Any], Iterable[Any]]) -> "ConstructionStateIndex":
+        """
+        Walks the task tree once. Tasks without start or finish date are left out, as the
+        recursive implementation ignores them (their nested tasks are still included).
+        """
+        product_index: Dict[int, int] = {}
+        products: List[Any] = []
+        task_ids, starts, finishes = [], [], []
+        output_task, output_product, input_task, input_product = [], [], [], []
+
+        def index_of(product) -> int:
+            i = product_index.get(product.id())
+            if i is None:
+                i = product_index[product.id()] = len(products)
+                products.append(product)
+            return i
+
+        for task in iter_schedule_tasks(root_tasks):
+            start, finish = task_dates(task)
+            if not start or not finish:
+                continue
+            t = len(task_ids)
+            task_ids.append(task.id())
+            starts.append(date_frames.to_datetime64(start))
+            finishes.append(date_frames.to_datetime64(finish))
+            for output in task_outputs(task) or []:
+                output_task.append(t)
+                output_product.append(index_of(output))
+            for input in task_inputs(task) or []:
+                input_task.append(t)
+                input_product.append(index_of(input))
+
+        return cls(
+            np.array(task_ids, dtype=np.int64),
+            np.array(starts, dtype="datetime64[s]"),
+            np.array(finishes, dtype="datetime64[s]"),
+            products,
+            (np.array(output_task, dtype=np.int64), np.array(output_product, dtype=np.int64)),
+            (np.array(input_task, dtype=np.int64), np.array(input_product, dtype=np.int64)),
+        )
+
+    def task_states(self, date, viz_start=None, viz_finish=None) -> np.ndarray:
+        """frame_table.STATE_* of every task at date, TASK_SKIPPED for tasks starting after viz_finish"""
+        date = date_frames.to_datetime64(date)
+        states = np.where(
+            date < self.task_start,
+            frame_table.STATE_BEFORE_START,
+            np.where(date <= self.task_finish, frame_table.STATE_ACTIVE, frame_table.STATE_AFTER_END),
+        ).astype(np.int8)
+        skipped = np.zeros(len(self.task_ids), dtype=bool)
+        if viz_finish:
+            skipped = self.task_start > date_frames.to_datetime64(viz_finish)
+        if viz_start:
+            # Finished before the visualization range: shown as completed / demolished
+            states[~skipped & (self.task_finish < date_frames.to_datetime64(viz_start))] = frame_table.STATE_AFTER_END
+        states[skipped] = TASK_SKIPPED
+        return states
+
+    def evaluate(self, date, viz_start=None, viz_finish=None) -> np.ndarray:
+        """(6, products) boolean masks in STATE_KEYS order; a product of several tasks can be in several states"""
+        states = self.task_states(date, viz_start, viz_finish)
+        masks = np.zeros((len(STATE_KEYS), self.product_count), dtype=bool)
+        for task, product, offset in (
+            (self.output_task, self.output_product, 0),
+            (self.input_task, self.input_product, INPUT_OFFSET),
+        ):
+            pair_states = states[task]
+            kept = pair_states != TASK_SKIPPED
+            masks[pair_states[kept] + offset, product[kept]] = True
+        return masks
+
+    def to_sets(self, masks: np.ndarray, convert: Optional[Callable[[Any], Any]] = None) -> Dict[str, set]:
+        """State sets of product entities, or of convert(entity) (e.g. their Blender objects)"""
+        result = {}
+        for key, mask in zip(STATE_KEYS, masks):
+            products = [self.products[i] for i in np.flatnonzero(mask).tolist()]
+            result[key] = {convert(product) for product in products} if convert else set(products)
+        return result
+
+
+class StateBitmapCache:
+    """
+    LRU of evaluated state masks, packed 8 products per byte, for the dates of one index.
+    Bounded by a memory budget; an entry is 6 * ceil(products / 8) bytes.
+    """
+
+    def __init__(self, budget_bytes: int = DEFAULT_BITMAP_BUDGET_BYTES) -> None:
+        self.budget_bytes = budget_bytes
+        self.index: Optional[ConstructionStateIndex] = None
+        self.bitmaps: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self.nbytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+    def _attach(self, index: ConstructionStateIndex) -> None:
+        # Bitmaps refer to the product positions of one index
+        if index is not self.index:
+            self.clear()
+            self.index = index
+
+    def get(self, index: ConstructionStateIndex, key: Hashable) -> Optional[np.ndarray]:
+        """Unpacked (6, products) masks of key, None when not cached"""
+        self._attach(index)
+        bitmap = self.bitmaps.get(key)
+        if bitmap is None:
+            self.stats["misses"] += 1
+            return None
+        self.bitmaps.move_to_end(key)
+        self.stats["hits"] += 1
+        return np.unpackbits(bitmap, axis=1, count=index.product_count).astype(bool)
+
+    def put(self, index: ConstructionStateIndex, key: Hashable, masks: np.ndarray) -> None:
+        self._attach(index)
+        bitmap = np.packbits(masks, axis=1)
+        if bitmap.nbytes > self.budget_bytes:
+            return
+        old = self.bitmaps.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        while self.bitmaps and self.nbytes + bitmap.nbytes > self.budget_bytes:
+            _, evicted = self.bitmaps.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.stats["evicted"] += 1
+        self.bitmaps[key] = bitmap
+        self.nbytes += bitmap.nbytes
+
+    def evaluate(self, index: ConstructionStateIndex, key: Hashable, date, viz_start=None, viz_finish=None) -> np.ndarray:
+        """Cached masks of key, evaluated and cached on a miss"""
+        masks = self.get(index, key)
+        if masks is None:
+            masks = index.evaluate(date, viz_start, viz_finish)
+            self.put(index, key, masks)
+        return masks
+
+    def clear(self) -> None:
+        self.index = None
+        self.bitmaps.clear()
+        self.nbytes = 0
+
+    def format_stats(self) -> str:
+        return (
+            f"🗂️ Construction state bitmaps: {len(self.bitmaps)} dates cached ({self.nbytes / 1024:.1f} KB),"
+            f" hits={self.stats['hits']} misses={self.stats['misses']} evicted={self.stats['evicted']}"
+        )
+
+
+# Global instance
+_state_bitmap_cache = None
+
+
+def get_state_bitmap_cache() -> StateBitmapCache:
+    global _state_bitmap_cache
+    if _state_bitmap_cache is None:
+        _state_bitmap_cache = StateBitmapCache()
+    return _state_bitmap_cache
+
+
+def invalidate_state_bitmap_cache() -> None:
+    if _state_bitmap_cache is not None:
+        _state_bitmap_cache.clear()
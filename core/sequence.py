@@ -233,6 +233,7 @@ def contract_all_tasks(sequence: type[tool.Sequence]) -> None:
 
 def remove_task(ifc: type[tool.Ifc], sequence: type[tool.Sequence], task: ifcopenshell.entity_instance) -> None:
     ifc.run("sequence.remove_task", task=task)
+    sequence.invalidate_schedule_state_indexes()
     work_schedule = sequence.get_active_work_schedule()
     sequence.load_task_tree(work_schedule)
     sequence.load_task_properties()
@@ -360,6 +361,7 @@ def edit_task_time(
     sequence.load_task_properties(task=task)
     sequence.disable_editing_task_time()
     resource.load_resource_properties()
+    sequence.request_incremental_animation_update()
 
 
 def assign_predecessor(ifc: type[tool.Ifc], sequence: type[tool.Sequence], task: ifcopenshell.entity_instance) -> None:
@@ -397,6 +399,7 @@ def assign_products(
 ) -> None:
     for product in products or spatial.get_selected_products() or []:
         ifc.run("sequence.assign_product", relating_product=product, related_object=task)
+    sequence.invalidate_schedule_state_indexes()
     outputs = sequence.get_task_outputs(task)
     sequence.load_task_outputs(outputs)
 
@@ -410,6 +413,7 @@ def unassign_products(
 ) -> None:
     for product in products or spatial.get_selected_products() or []:
         ifc.run("sequence.unassign_product", relating_product=product, related_object=task)
+    sequence.invalidate_schedule_state_indexes()
     outputs = sequence.get_task_outputs(task)
     sequence.load_task_outputs(outputs)
 
@@ -423,6 +427,7 @@ def assign_input_products(
 ) -> None:
     for product in products or spatial.get_selected_products() or []:
         ifc.run("sequence.assign_process", relating_process=task, related_object=product)
+    sequence.invalidate_schedule_state_indexes()
     inputs = sequence.get_task_inputs(task)
     sequence.load_task_inputs(inputs)
 
@@ -436,6 +441,7 @@ def unassign_input_products(
 ) -> None:
     for product in products or spatial.get_selected_products() or []:
         ifc.run("sequence.unassign_process", relating_process=task, related_object=product)
+    sequence.invalidate_schedule_state_indexes()
     inputs = sequence.get_task_inputs(task)
     sequence.load_task_inputs(inputs)
 
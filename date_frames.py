@@ -0,0 +1,117 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# Vectorized Date -> Frame Conversion for 4D Animation.
+# One converter shared by the frame builders, the task bars, the product-frame
+# table and the construction state and snapshot indexes:
+# dates of the whole schedule go in as one datetime64 array and come out as
+# frame arrays, using the range and total frames from get_animation_settings
+# (the FRAME_SPEED / DURATION_SPEED / MULTIPLIER_SPEED modes only differ in
+# total_frames).
+
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Tuple
+
+import numpy as np
+
+_NAT = np.datetime64("NaT", "s")
+
+
+def to_datetime64(value) -> np.datetime64:
+    """datetime / date / ISO string / None -> datetime64[s] (NaT when unknown)"""
+    if value is None:
+        return _NAT
+    if isinstance(value, np.datetime64):
+        return value.astype("datetime64[s]")
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return _NAT
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    try:
+        if value.tzinfo is not None:
+            value = value.replace(tzinfo=None)
+        return np.datetime64(value, "s")
+    except Exception:
+        return _NAT
+
+
+def as_datetime64_array(values: Iterable[Any]) -> np.ndarray:
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[s]")
+    return np.array([to_datetime64(v) for v in values], dtype="datetime64[s]")
+
+
+class DateFrameConverter:
+    """Maps dates to animation frames for a visualisation range"""
+
+    def __init__(self, start, finish, start_frame: int = 1, total_frames: int = 250) -> None:
+        self.start = to_datetime64(start)
+        self.finish = to_datetime64(finish)
+        self.start_frame = int(start_frame)
+        self.total_frames = int(total_frames)
+        self.end_frame = self.start_frame + self.total_frames
+        if np.isnat(self.start) or np.isnat(self.finish):
+            self.duration_seconds = 0.0
+        else:
+            self.duration_seconds = float((self.finish - self.start) / np.timedelta64(1, "s"))
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "DateFrameConverter":
+        """Accepts get_animation_settings() dicts and the task bar viz_start/viz_finish/end_frame dicts"""
+        start = settings.get("start", settings.get("viz_start"))
+        finish = settings.get("finish", settings.get("viz_finish"))
+        start_frame = int(settings.get("start_frame", 1))
+        if "total_frames" in settings:
+            total_frames = int(settings["total_frames"])
+        else:
+            total_frames = int(settings.get("end_frame", start_frame + 250)) - start_frame
+        return cls(start, finish, start_frame, total_frames)
+
+    @property
+    def is_valid(self) -> bool:
+        return self.duration_seconds > 0
+
+    def progress(self, dates) -> np.ndarray:
+        """0..1 position of every date in the visualisation range (NaN for NaT)"""
+        dates = as_datetime64_array(dates)
+        if not self.is_valid:
+            return np.where(np.isnat(dates), np.nan, 0.0)
+        seconds = (dates - self.start) / np.timedelta64(1, "s")
+        return seconds.astype(np.float64) / self.duration_seconds
+
+    def to_frames(self, dates, clamp: bool = False, rounding: bool = False) -> np.ndarray:
+        """Frame of every date. rounding=True rounds half to even like round()."""
+        frames = self.start_frame + self.progress(dates) * self.total_frames
+        if rounding:
+            frames = np.rint(frames)
+        if clamp:
+            frames = np.clip(frames, self.start_frame, self.end_frame)
+        return frames
+
+    def task_frames(self, starts, finishes, clamp: bool = False, rounding: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Start and finish frame arrays for the whole schedule in one call"""
+        dates = np.concatenate([as_datetime64_array(starts), as_datetime64_array(finishes)])
+        frames = self.to_frames(dates, clamp=clamp, rounding=rounding)
+        half = len(frames) // 2
+        return frames[:half], frames[half:]
+
+    def to_frame(self, value, clamp: bool = False, rounding: bool = False) -> float:
+        return float(self.to_frames([value], clamp=clamp, rounding=rounding)[0])
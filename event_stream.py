@@ -0,0 +1,208 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# Frame-Indexed Animation Event Stream.
+# Compiles the {frame: {action: [objects]}} plan of Sequence.build_animation_plan
+# into sorted (frame, object index, visibility, color index) state changes with a
+# per-frame offset index, so moving from frame A to frame B only touches the
+# objects that change state in between. bim.export_animation_events writes it
+# as JSON for players outside Blender.
+
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EVENT_STREAM_FORMAT_VERSION = 1
+
+# Value of the visibility / color_index columns when the event doesn't change that attribute
+UNCHANGED = -1
+HIDDEN = 0
+VISIBLE = 1
+
+
+class _Track:
+    """Events of one attribute grouped by object: rows of object i are offsets[i]:offsets[i+1], sorted by frame"""
+
+    def __init__(self, obj_index: np.ndarray, frame: np.ndarray, value: np.ndarray, object_count: int) -> None:
+        order = np.lexsort((frame, obj_index))
+        self.frame = frame[order]
+        self.value = value[order]
+        counts = np.bincount(obj_index, minlength=object_count) if len(obj_index) else np.zeros(object_count, dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    def values_at(self, obj_indices: np.ndarray, frame: float) -> np.ndarray:
+        """
+        Value of every object at a frame, evaluated like a constant-interpolation F-curve:
+        the last event at or before the frame, the first event before any, UNCHANGED without events.
+        """
+        result = np.full(len(obj_indices), UNCHANGED, dtype=np.int32)
+        for i, obj_index in enumerate(obj_indices.tolist()):
+            lo, hi = self.offsets[obj_index], self.offsets[obj_index + 1]
+            if lo == hi:
+                continue
+            pos = int(np.searchsorted(self.frame[lo:hi], frame, side="right")) - 1
+            result[i] = self.value[lo + max(pos, 0)]
+        return result
+
+
+class AnimationEventStream:
+    """Sorted state-change events of the 4D animation with a per-frame offset index"""
+
+    def __init__(self, objects: List[Any], colors: np.ndarray, frame: np.ndarray, obj_index: np.ndarray,
+                 visibility: np.ndarray, color_index: np.ndarray) -> None:
+        self.objects = objects
+        self.colors = colors
+        self.frame = frame
+        self.obj_index = obj_index
+        self.visibility = visibility
+        self.color_index = color_index
+        # Events of frames[i] are offsets[i]:offsets[i+1]
+        self.frames, first_events = np.unique(frame, return_index=True)
+        self.offsets = np.append(first_events, len(frame)).astype(np.int64)
+
+        has_visibility = visibility != UNCHANGED
+        has_color = color_index != UNCHANGED
+        self._visibility_track = _Track(obj_index[has_visibility], frame[has_visibility], visibility[has_visibility], len(objects))
+        self._color_track = _Track(obj_index[has_color], frame[has_color], color_index[has_color], len(objects))
+
+    @classmethod
+    def from_animation_plan(cls, animation_plan: Dict[Any, Dict[str, List]]) -> "AnimationEventStream":
+        """
+        Compiles a Sequence.build_animation_plan() plan. Within one frame the plan is applied like the
+        keyframe writer does: HIDE, then REVEAL, then SET_COLOR, the last write winning.
+        """
+        objects: List[Any] = []
+        object_lookup: Dict[int, int] = {}
+        colors: List[Tuple[float, float, float, float]] = []
+        color_lookup: Dict[Tuple[float, float, float, float], int] = {}
+
+        def object_index(obj) -> int:
+            key = obj.as_pointer() if hasattr(obj, "as_pointer") else id(obj)
+            index = object_lookup.get(key)
+            if index is None:
+                index = len(objects)
+                objects.append(obj)
+                object_lookup[key] = index
+            return index
+
+        def color_index(color) -> int:
+            color = tuple(round(float(c), 6) for c in color)
+            if len(color) < 4:
+                color = color[:3] + (1.0,)
+            index = color_lookup.get(color)
+            if index is None:
+                index = len(colors)
+                colors.append(color)
+                color_lookup[color] = index
+            return index
+
+        frames: List[float] = []
+        obj_indices: List[int] = []
+        visibilities: List[int] = []
+        color_indices: List[int] = []
+        for frame in sorted(animation_plan.keys()):
+            frame_actions = animation_plan[frame]
+            # (visibility, color_index) per object for this frame
+            changes: Dict[int, List[int]] = {}
+            for obj in frame_actions.get("HIDE", []):
+                changes.setdefault(object_index(obj), [UNCHANGED, UNCHANGED])[0] = HIDDEN
+            for obj in frame_actions.get("REVEAL", []):
+                changes.setdefault(object_index(obj), [UNCHANGED, UNCHANGED])[0] = VISIBLE
+            for obj, color in frame_actions.get("SET_COLOR", []):
+                changes.setdefault(object_index(obj), [UNCHANGED, UNCHANGED])[1] = color_index(color)
+            for index in sorted(changes):
+                frames.append(float(frame))
+                obj_indices.append(index)
+                visibilities.append(changes[index][0])
+                color_indices.append(changes[index][1])
+
+        return cls(
+            objects,
+            np.asarray(colors, dtype=np.float32).reshape(-1, 4),
+            np.asarray(frames, dtype=np.float64),
+            np.asarray(obj_indices, dtype=np.int32),
+            np.asarray(visibilities, dtype=np.int8),
+            np.asarray(color_indices, dtype=np.int32),
+        )
+
+    # --- Queries --------------------------------------------------------
+
+    def __len__(self) -> int:
+        return int(len(self.frame))
+
+    def events_between(self, frame_a: float, frame_b: float) -> slice:
+        """Event rows with frame_a < frame <= frame_b (frames sorted, so a contiguous slice)"""
+        lo, hi = sorted((frame_a, frame_b))
+        start = int(self.offsets[np.searchsorted(self.frames, lo, side="right")])
+        end = int(self.offsets[np.searchsorted(self.frames, hi, side="right")])
+        return slice(start, end)
+
+    def changed_objects(self, frame_a: float, frame_b: float) -> np.ndarray:
+        """Indices of the objects with at least one event between the two frames"""
+        return np.unique(self.obj_index[self.events_between(frame_a, frame_b)])
+
+    def state_at(self, frame: float, obj_indices: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(visibility, color_index) of the given objects (all by default) at a frame"""
+        if obj_indices is None:
+            obj_indices = np.arange(len(self.objects), dtype=np.int32)
+        return (
+            self._visibility_track.values_at(obj_indices, frame),
+            self._color_track.values_at(obj_indices, frame),
+        )
+
+    def transition(self, frame_a: float, frame_b: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (obj_indices, visibility, color_index) of the objects whose state differs between
+        frame_a and frame_b, with their state at frame_b. Works in both scrub directions.
+        """
+        candidates = self.changed_objects(frame_a, frame_b)
+        if not len(candidates):
+            empty = np.zeros(0, dtype=np.int32)
+            return empty, empty, empty
+        visibility_a, color_a = self.state_at(frame_a, candidates)
+        visibility_b, color_b = self.state_at(frame_b, candidates)
+        changed = (visibility_a != visibility_b) | (color_a != color_b)
+        return candidates[changed], visibility_b[changed], color_b[changed]
+
+    # --- Export -------------------------------------------------------
+
+    def to_dict(self, object_keys: Sequence[str], frame_range: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+        """
+        JSON-ready stream: object_keys name the objects (e.g. IFC GlobalIds) in stream order,
+        the events of frames[i] are offsets[i]:offsets[i+1] of the object/visibility/color columns
+        """
+        if len(object_keys) != len(self.objects):
+            raise ValueError("One key per object of the stream is required")
+        data = {
+            "version": EVENT_STREAM_FORMAT_VERSION,
+            "objects": list(object_keys),
+            "colors": [[round(c, 6) for c in color] for color in self.colors.tolist()],
+            "frames": self.frames.tolist(),
+            "offsets": self.offsets.tolist(),
+            "object": self.obj_index.tolist(),
+            "visibility": self.visibility.tolist(),
+            "color": self.color_index.tolist(),
+        }
+        if frame_range is not None:
+            data["frame_start"], data["frame_end"] = int(frame_range[0]), int(frame_range[1])
+        return data
+
+    def export_json(self, filepath: str, object_keys: Sequence[str], frame_range: Optional[Tuple[int, int]] = None) -> None:
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(object_keys, frame_range), f)
@@ -0,0 +1,352 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# Unified Frame Change Dispatcher for 4D Handlers.
+# A single frame_change_post handler builds one FrameContext per frame (frame,
+# previous frame, frame -> date mapping, changed products) and fans it out to
+# named subscribers (schedule texts, live colors, ...). Values are computed
+# lazily and at most once per frame whatever the number of subscribers; every
+# subscriber is timed and can be switched off without unregistering it.
+# With adaptive playback, frames are skipped while the subscribers take longer
+# than the playback frame budget, and the final frame is always applied once
+# playback stops.
+
+import math
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import bpy
+from bpy.app.handlers import persistent
+
+# Subscriber names of the 4D handlers
+SUBSCRIBER_LIVE_COLORS = "live_colors"
+SUBSCRIBER_SCHEDULE_TEXTS = "schedule_texts"
+SUBSCRIBER_LOCAL_TEXTS = "local_schedule_texts"
+
+# Lower runs first: object state before the texts describing it
+ORDER_OBJECTS = 10
+ORDER_TEXTS = 50
+
+# Adaptive playback: smoothing of the measured dispatch cost, largest stride between
+# applied frames and polling interval of the landing timer
+ADAPTIVE_COST_SMOOTHING = 0.3
+ADAPTIVE_MAX_STRIDE = 8
+ADAPTIVE_LANDING_INTERVAL = 0.1
+
+
+class FrameContext:
+    """Per-frame values shared by every subscriber of one dispatch"""
+
+    def __init__(self, dispatcher: "FrameChangeDispatcher", scene, depsgraph, frame: int, previous_frame: Optional[int]) -> None:
+        self.dispatcher = dispatcher
+        self.scene = scene
+        self.depsgraph = depsgraph
+        self.frame = frame
+        self.previous_frame = previous_frame
+        self._values: Dict[Any, Any] = {}
+
+    def once(self, key, compute: Callable[[], Any]) -> Any:
+        """compute() the first time key is asked for during this frame, the stored value afterwards"""
+        if key not in self._values:
+            self._values[key] = compute()
+        return self._values[key]
+
+    def date_for(self, start_date: datetime, finish_date: datetime, start_frame: int, total_frames: int) -> datetime:
+        """Date shown at this frame for a timeline; subscribers sharing a timeline share the result"""
+        key = ("date", start_date, finish_date, int(start_frame), int(total_frames))
+        return self.once(key, lambda: frame_to_date(self.frame, start_date, finish_date, start_frame, total_frames))
+
+    @property
+    def date(self) -> Optional[datetime]:
+        """Date of the timeline set with FrameChangeDispatcher.set_timeline, None without one"""
+        timeline = self.dispatcher.timeline
+        if not timeline:
+            return None
+        return self.date_for(timeline["start_date"], timeline["finish_date"], timeline["start_frame"], timeline["total_frames"])
+
+    @property
+    def changed_products(self):
+        """Products whose state changed since the last dispatched frame, from the registered provider"""
+        provider = self.dispatcher.changed_products_provider
+        if provider is None:
+            return None
+        return self.once("changed_products", lambda: provider(self))
+
+
+def frame_to_date(frame: int, start_date: datetime, finish_date: datetime, start_frame: int, total_frames: int) -> datetime:
+    """Linear frame -> date mapping of the 4D animation, clamped to the timeline"""
+    start_frame = int(start_frame)
+    total_frames = int(total_frames)
+    if frame < start_frame:
+        progress = 0.0
+    elif frame > start_frame + total_frames:
+        progress = 1.0
+    else:
+        progress = (frame - start_frame) / float(total_frames or 1)
+    return start_date + (finish_date - start_date) * progress
+
+
+def is_animation_playing() -> bool:
+    try:
+        return any(window.screen.is_animation_playing for window in bpy.context.window_manager.windows)
+    except Exception:
+        return False
+
+
+class FrameSubscriber:
+    def __init__(self, name: str, callback: Callable[[FrameContext], None], order: int) -> None:
+        self.name = name
+        self.callback = callback
+        self.order = order
+        self.enabled = True
+        self.stats = {"calls": 0, "time": 0.0, "last_time": 0.0, "max_time": 0.0, "errors": 0}
+
+
+class FrameChangeDispatcher:
+    """Single frame_change_post handler fanning out to the registered 4D subscribers"""
+
+    def __init__(self) -> None:
+        self.subscribers: Dict[str, FrameSubscriber] = {}
+        self._ordered: List[FrameSubscriber] = []
+        self.timeline: Optional[Dict[str, Any]] = None
+        self.changed_products_provider: Optional[Callable[[FrameContext], Any]] = None
+        self.previous_frame: Optional[int] = None
+        self.stats = {"dispatches": 0, "time": 0.0}
+        # Adaptive playback, None follows the scene setting
+        self.adaptive: Optional[bool] = None
+        self.cost = 0.0
+        self.stride = 1
+        self.pending_frame: Optional[int] = None
+        self._landing_scheduled = False
+        self.playback_stats = {"skipped": 0, "applied": 0, "total_skipped": 0, "last_skipped": 0}
+
+    # --- Subscribers ----------------------------------------------------
+
+    def subscribe(self, name: str, callback: Callable[[FrameContext], None], order: int = ORDER_TEXTS) -> None:
+        """Adds or replaces a subscriber; keeps its enabled switch and timings when replaced"""
+        subscriber = self.subscribers.get(name)
+        if subscriber is None:
+            subscriber = self.subscribers[name] = FrameSubscriber(name, callback, order)
+        else:
+            subscriber.callback = callback
+            subscriber.order = order
+        self._sort()
+        self.install()
+
+    def unsubscribe(self, name: str) -> None:
+        if self.subscribers.pop(name, None) is not None:
+            self._sort()
+        if not self.subscribers:
+            self.uninstall()
+
+    def is_subscribed(self, name: str) -> bool:
+        return name in self.subscribers
+
+    def set_enabled(self, name: str, enabled: bool) -> bool:
+        subscriber = self.subscribers.get(name)
+        if subscriber is None:
+            return False
+        subscriber.enabled = bool(enabled)
+        return True
+
+    def _sort(self) -> None:
+        self._ordered = sorted(self.subscribers.values(), key=lambda s: s.order)
+
+    # --- Shared per-frame inputs ----------------------------------------
+
+    def set_timeline(self, settings: Optional[Dict[str, Any]]) -> None:
+        """Frame -> date timeline of the animation (animation settings dict), None to clear"""
+        if not settings or not settings.get("start") or not settings.get("finish"):
+            self.timeline = None
+            return
+        self.timeline = {
+            "start_date": settings["start"],
+            "finish_date": settings["finish"],
+            "start_frame": int(settings.get("start_frame", 1)),
+            "total_frames": int(settings.get("total_frames", 250)),
+        }
+
+    def set_changed_products_provider(self, provider: Optional[Callable[[FrameContext], Any]]) -> None:
+        self.changed_products_provider = provider
+
+    # --- Dispatch -------------------------------------------------------
+
+    def is_adaptive(self, scene) -> bool:
+        if self.adaptive is not None:
+            return self.adaptive
+        return bool(getattr(getattr(scene, "BIMAnimationProperties", None), "adaptive_playback", False))
+
+    def on_frame_change(self, scene, depsgraph=None) -> Optional[FrameContext]:
+        """frame_change_post entry point: dispatches, or skips the frame when playback is falling behind"""
+        if not self.is_adaptive(scene) or not is_animation_playing():
+            return self.dispatch(scene, depsgraph)
+        frame = int(scene.frame_current)
+        if self.previous_frame is not None and self.pending_frame is not None:
+            # Frames since the last applied one; a wrap-around to the start always applies
+            elapsed = frame - self.previous_frame
+            if 0 < elapsed < self.stride:
+                self.pending_frame = frame
+                self.playback_stats["skipped"] += 1
+                self._schedule_landing()
+                return None
+        self.pending_frame = frame
+        self._schedule_landing()
+        return self.dispatch(scene, depsgraph, measure_budget=True)
+
+    def _frame_budget(self, scene) -> float:
+        fps = scene.render.fps / (scene.render.fps_base or 1.0)
+        return 1.0 / fps if fps > 0 else 1.0 / 24.0
+
+    def _schedule_landing(self) -> None:
+        if not self._landing_scheduled:
+            self._landing_scheduled = True
+            bpy.app.timers.register(self._land, first_interval=ADAPTIVE_LANDING_INTERVAL)
+
+    def _land(self):
+        """Timer: once playback stops, applies the frame playback stopped on and reports skipped frames"""
+        if is_animation_playing():
+            return ADAPTIVE_LANDING_INTERVAL
+        self._landing_scheduled = False
+        scene = bpy.context.scene
+        if scene is not None and (self.previous_frame != scene.frame_current or self.playback_stats["skipped"]):
+            self.dispatch(scene)
+        stats = self.playback_stats
+        if stats["skipped"]:
+            print(
+                f"⏩ Adaptive playback: skipped {stats['skipped']} of {stats['skipped'] + stats['applied']} frames"
+                f" (stride {self.stride}, {self.cost * 1000:.1f}ms per applied frame)"
+            )
+        stats["total_skipped"] += stats["skipped"]
+        stats["last_skipped"] = stats["skipped"]
+        stats["skipped"] = 0
+        stats["applied"] = 0
+        self.pending_frame = None
+        self.stride = 1
+        return None
+
+    def dispatch(self, scene, depsgraph=None, measure_budget: bool = False) -> FrameContext:
+        started = time.perf_counter()
+        frame = int(scene.frame_current)
+        context = FrameContext(self, scene, depsgraph, frame, self.previous_frame)
+        for subscriber in self._ordered:
+            if not subscriber.enabled:
+                continue
+            subscriber_start = time.perf_counter()
+            try:
+                subscriber.callback(context)
+            except Exception as e:
+                subscriber.stats["errors"] += 1
+                print(f"❌ Frame subscriber '{subscriber.name}' failed: {e}")
+            elapsed = time.perf_counter() - subscriber_start
+            stats = subscriber.stats
+            stats["calls"] += 1
+            stats["time"] += elapsed
+            stats["last_time"] = elapsed
+            stats["max_time"] = max(stats["max_time"], elapsed)
+        self.previous_frame = frame
+        elapsed = time.perf_counter() - started
+        self.stats["dispatches"] += 1
+        self.stats["time"] += elapsed
+        if measure_budget:
+            # Apply one frame out of `stride` so the applied frames fit in the playback budget
+            self.cost += (elapsed - self.cost) * ADAPTIVE_COST_SMOOTHING if self.cost else elapsed
+            self.stride = min(max(1, math.ceil(self.cost / self._frame_budget(scene))), ADAPTIVE_MAX_STRIDE)
+            self.playback_stats["applied"] += 1
+        return context
+
+    def install(self) -> None:
+        if frame_change_dispatch_handler not in bpy.app.handlers.frame_change_post:
+            bpy.app.handlers.frame_change_post.append(frame_change_dispatch_handler)
+
+    def uninstall(self) -> None:
+        if frame_change_dispatch_handler in bpy.app.handlers.frame_change_post:
+            bpy.app.handlers.frame_change_post.remove(frame_change_dispatch_handler)
+        self.previous_frame = None
+        self.pending_frame = None
+
+    def reset(self) -> None:
+        """Drops every subscriber and shared input, e.g. when another file is loaded"""
+        self.subscribers.clear()
+        self._sort()
+        self.timeline = None
+        self.changed_products_provider = None
+        self.uninstall()
+
+    def reset_stats(self) -> None:
+        self.stats = {"dispatches": 0, "time": 0.0}
+        self.playback_stats = {"skipped": 0, "applied": 0, "total_skipped": 0, "last_skipped": 0}
+        for subscriber in self.subscribers.values():
+            subscriber.stats = {"calls": 0, "time": 0.0, "last_time": 0.0, "max_time": 0.0, "errors": 0}
+
+    def format_stats(self) -> List[str]:
+        lines = [f"🎞️ Frame dispatcher: {self.stats['dispatches']} frames, {self.stats['time']:.3f}s"]
+        if self.playback_stats["total_skipped"] or self.playback_stats["skipped"]:
+            lines.append(
+                f"   adaptive playback: {self.playback_stats['total_skipped'] + self.playback_stats['skipped']} frames skipped"
+                f" (last playback: {self.playback_stats['last_skipped']})"
+            )
+        for subscriber in self._ordered:
+            stats = subscriber.stats
+            average = stats["time"] / stats["calls"] * 1000 if stats["calls"] else 0.0
+            state = "on " if subscriber.enabled else "off"
+            lines.append(
+                f"   [{state}] {subscriber.name:<22} calls={stats['calls']:<6} avg={average:7.2f}ms"
+                f" max={stats['max_time'] * 1000:7.2f}ms errors={stats['errors']}"
+            )
+        return lines
+
+
+# Global instance
+_frame_dispatcher = None
+
+
+def get_frame_dispatcher() -> FrameChangeDispatcher:
+    global _frame_dispatcher
+    if _frame_dispatcher is None:
+        _frame_dispatcher = FrameChangeDispatcher()
+    return _frame_dispatcher
+
+
+# Not persistent: like the 4D frame handlers it replaces, it is dropped when another file is loaded
+def frame_change_dispatch_handler(scene, depsgraph=None):
+    if _frame_dispatcher is not None:
+        _frame_dispatcher.on_frame_change(scene, depsgraph)
+
+
+@persistent
+def frame_dispatcher_load_handler(*args):
+    # The subscribers and the per-frame caches they read belong to the previous file
+    from bonsai.bim.module.sequence import interval_index, schedule_text_tables, scrub_prefetch
+    if _frame_dispatcher is not None:
+        _frame_dispatcher.reset()
+    interval_index.invalidate_live_interval_index()
+    scrub_prefetch.invalidate_scrub_prefetcher()
+    schedule_text_tables.invalidate_schedule_text_tables()
+
+
+def register() -> None:
+    if frame_dispatcher_load_handler not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(frame_dispatcher_load_handler)
+
+
+def unregister() -> None:
+    if frame_dispatcher_load_handler in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(frame_dispatcher_load_handler)
+    if _frame_dispatcher is not None:
+        _frame_dispatcher.reset()
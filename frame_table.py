@@ -0,0 +1,441 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# Columnar Product-Frame Table for 4D Animation.
+# Stores one row per (product, task) assignment in NumPy columns instead of
+# Dict[int, List[dict]] with live IFC entities and datetimes. The frame builders,
+# the animation planners, the incremental update and the live-update cache all
+# read the same table through the accessors below.
+
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from bonsai.bim.module.sequence import date_frames
+
+# Relationship codes stored in the "relationship" column
+REL_OUTPUT = 0
+REL_INPUT = 1
+RELATIONSHIP_NAMES = ("output", "input")
+RELATIONSHIP_CODES = {name: code for code, name in enumerate(RELATIONSHIP_NAMES)}
+
+# State boundary layout of the "states" column: (n, 3, 2) -> [state][start, end]
+STATE_NAMES = ("before_start", "active", "after_end")
+STATE_BEFORE_START = 0
+STATE_ACTIVE = 1
+STATE_AFTER_END = 2
+
+
+class ProductFrameTableBuilder:
+    """Accumulates product frame rows in plain lists and freezes them into a ProductFrameTable"""
+
+    def __init__(self, animation_start: int = 1, animation_end: int = 250) -> None:
+        self.animation_start = int(animation_start)
+        self.animation_end = int(animation_end)
+        self._product_id: List[int] = []
+        self._task_id: List[int] = []
+        self._relationship: List[int] = []
+        self._started: List[int] = []
+        self._completed: List[int] = []
+        self._start_frame: List[int] = []
+        self._finish_frame: List[int] = []
+        self._states: List[tuple] = []
+        self._start_date: List[Any] = []
+        self._finish_date: List[Any] = []
+        self._type_code: List[int] = []
+        self._priority: List[bool] = []
+        self._type_names: List[str] = []
+        self._type_lookup: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._product_id)
+
+    def _type_code_for(self, predefined_type: Optional[str]) -> int:
+        name = predefined_type or "NOTDEFINED"
+        code = self._type_lookup.get(name)
+        if code is None:
+            code = len(self._type_names)
+            self._type_names.append(name)
+            self._type_lookup[name] = code
+        return code
+
+    def add(
+        self,
+        product_id: int,
+        task_id: int,
+        relationship: str,
+        started: int,
+        completed: int,
+        start_frame: int,
+        finish_frame: int,
+        states: Dict[str, tuple],
+        start_date=None,
+        finish_date=None,
+        predefined_type: Optional[str] = None,
+        priority: bool = False,
+    ) -> None:
+        """Adds one product/task row. Missing states are stored as empty ranges (end < start)."""
+        empty = (self.animation_start, self.animation_start - 1)
+        self._product_id.append(int(product_id))
+        self._task_id.append(int(task_id or 0))
+        self._relationship.append(RELATIONSHIP_CODES.get(relationship, REL_OUTPUT))
+        self._started.append(int(started))
+        self._completed.append(int(completed))
+        self._start_frame.append(int(start_frame))
+        self._finish_frame.append(int(finish_frame))
+        self._states.append(tuple(tuple(int(f) for f in states.get(name, empty)) for name in STATE_NAMES))
+        self._start_date.append(date_frames.to_datetime64(start_date))
+        self._finish_date.append(date_frames.to_datetime64(finish_date))
+        self._type_code.append(self._type_code_for(predefined_type))
+        self._priority.append(bool(priority))
+
+    def add_frame_data(self, product_id: int, frame_data: Dict[str, Any]) -> None:
+        """Adds a row from a legacy frame_data dict"""
+        task = frame_data.get("task")
+        task_id = frame_data.get("task_id")
+        if task_id is None and task is not None:
+            try:
+                task_id = task.id()
+            except Exception:
+                task_id = 0
+        states = frame_data.get("states", {})
+        active = states.get("active", (self.animation_start, self.animation_start - 1))
+        start_frame = frame_data.get("start_frame", active[0])
+        finish_frame = frame_data.get("finish_frame", active[1])
+        predefined_type = frame_data.get("type")
+        if predefined_type is None and task is not None:
+            predefined_type = getattr(task, "PredefinedType", None)
+        self.add(
+            product_id,
+            task_id,
+            frame_data.get("relationship", "output"),
+            frame_data.get("STARTED", start_frame),
+            frame_data.get("COMPLETED", finish_frame),
+            start_frame,
+            finish_frame,
+            states,
+            start_date=frame_data.get("start_date"),
+            finish_date=frame_data.get("finish_date"),
+            predefined_type=predefined_type,
+            priority=frame_data.get("consider_start_active", False),
+        )
+
+    def build(self) -> "ProductFrameTable":
+        n = len(self._product_id)
+        product_id = np.asarray(self._product_id, dtype=np.int64)
+        # Stable sort keeps the per-product insertion order of the frame builder
+        order = np.argsort(product_id, kind="stable")
+        states = np.asarray(self._states, dtype=np.int32).reshape(n, 3, 2)
+        return ProductFrameTable(
+            product_id=product_id[order],
+            task_id=np.asarray(self._task_id, dtype=np.int64)[order],
+            relationship=np.asarray(self._relationship, dtype=np.int8)[order],
+            started=np.asarray(self._started, dtype=np.int32)[order],
+            completed=np.asarray(self._completed, dtype=np.int32)[order],
+            start_frame=np.asarray(self._start_frame, dtype=np.int32)[order],
+            finish_frame=np.asarray(self._finish_frame, dtype=np.int32)[order],
+            states=states[order],
+            start_date=np.asarray(self._start_date, dtype="datetime64[s]")[order],
+            finish_date=np.asarray(self._finish_date, dtype="datetime64[s]")[order],
+            type_code=np.asarray(self._type_code, dtype=np.int16)[order],
+            priority=np.asarray(self._priority, dtype=bool)[order],
+            type_names=tuple(self._type_names),
+            animation_start=self.animation_start,
+            animation_end=self.animation_end,
+        )
+
+
+class ProductFrameTable:
+    """
+    Columnar product-frame table, rows grouped by product_id.
+
+    Behaves as a read-only Mapping[int, List[dict]] so existing consumers that
+    index `product_frames[product_id]` keep working; frame dicts are materialized
+    on demand. New code should use the columnar accessors instead.
+    """
+
+    def __init__(
+        self,
+        product_id: np.ndarray,
+        task_id: np.ndarray,
+        relationship: np.ndarray,
+        started: np.ndarray,
+        completed: np.ndarray,
+        start_frame: np.ndarray,
+        finish_frame: np.ndarray,
+        states: np.ndarray,
+        start_date: np.ndarray,
+        finish_date: np.ndarray,
+        type_code: np.ndarray,
+        priority: np.ndarray,
+        type_names: tuple = ("NOTDEFINED",),
+        animation_start: int = 1,
+        animation_end: int = 250,
+    ) -> None:
+        self.product_id = product_id
+        self.task_id = task_id
+        self.relationship = relationship
+        self.started = started
+        self.completed = completed
+        self.start_frame = start_frame
+        self.finish_frame = finish_frame
+        self.states = states
+        self.start_date = start_date
+        self.finish_date = finish_date
+        self.type_code = type_code
+        self.priority = priority
+        self.type_names = type_names
+        self.animation_start = int(animation_start)
+        self.animation_end = int(animation_end)
+        # Resolves task_id -> IFC entity when legacy dicts are materialized
+        self.task_resolver: Optional[Callable[[int], Any]] = None
+
+        # Per-product row ranges: rows of products[i] are offsets[i]:offsets[i+1]
+        self.products, first_rows = np.unique(product_id, return_index=True)
+        self.offsets = np.append(first_rows, len(product_id)).astype(np.int64)
+
+    # --- Construction ---------------------------------------------------
+
+    @classmethod
+    def empty(cls, animation_start: int = 1, animation_end: int = 250) -> "ProductFrameTable":
+        return ProductFrameTableBuilder(animation_start, animation_end).build()
+
+    @classmethod
+    def from_product_frames(cls, product_frames, animation_start: Optional[int] = None, animation_end: Optional[int] = None) -> "ProductFrameTable":
+        """Converts a legacy Dict[int, List[dict]] (or returns an existing table unchanged)"""
+        if isinstance(product_frames, ProductFrameTable):
+            return product_frames
+        if animation_start is None or animation_end is None:
+            all_bounds = [
+                bound
+                for frame_data_list in product_frames.values()
+                for frame_data in frame_data_list
+                for bound in frame_data.get("states", {}).values()
+            ]
+            animation_start = min((b[0] for b in all_bounds), default=1) if animation_start is None else animation_start
+            animation_end = max((b[1] for b in all_bounds), default=250) if animation_end is None else animation_end
+        builder = ProductFrameTableBuilder(animation_start, animation_end)
+        for product_id, frame_data_list in product_frames.items():
+            for frame_data in frame_data_list:
+                builder.add_frame_data(int(product_id), frame_data)
+        table = builder.build()
+        # Keep live entities reachable for legacy consumers of a converted dict
+        task_entities = {
+            frame_data.get("task").id(): frame_data.get("task")
+            for frame_data_list in product_frames.values()
+            for frame_data in frame_data_list
+            if frame_data.get("task") is not None and hasattr(frame_data.get("task"), "id")
+        }
+        if task_entities:
+            table.task_resolver = task_entities.get
+        return table
+
+    # --- Columnar accessors ---------------------------------------------
+
+    @property
+    def row_count(self) -> int:
+        return int(len(self.product_id))
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(getattr(self, name).nbytes for name in (
+            "product_id", "task_id", "relationship", "started", "completed", "start_frame",
+            "finish_frame", "states", "start_date", "finish_date", "type_code", "priority",
+            "products", "offsets",
+        )))
+
+    def product_index(self, product_id: int) -> int:
+        """Position of product_id in self.products, or -1"""
+        i = int(np.searchsorted(self.products, product_id))
+        if i < len(self.products) and self.products[i] == product_id:
+            return i
+        return -1
+
+    def rows_for_product(self, product_id: int) -> slice:
+        i = self.product_index(product_id)
+        if i < 0:
+            return slice(0, 0)
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def row_product_index(self) -> np.ndarray:
+        """Index into self.products for every row"""
+        return np.repeat(np.arange(len(self.products)), np.diff(self.offsets))
+
+    def task_ids(self) -> np.ndarray:
+        return np.unique(self.task_id)
+
+    def rows_for_tasks(self, task_ids) -> np.ndarray:
+        """Boolean row mask for the given task ids"""
+        return np.isin(self.task_id, np.asarray(list(task_ids), dtype=np.int64))
+
+    def products_for_tasks(self, task_ids) -> np.ndarray:
+        return np.unique(self.product_id[self.rows_for_tasks(task_ids)])
+
+    def diff_products(self, other: "ProductFrameTable") -> np.ndarray:
+        """Product ids whose frame rows differ between this table and other (added and removed included)"""
+        changed = np.setxor1d(self.products, other.products)
+        common = np.intersect1d(self.products, other.products)
+        if not len(common):
+            return changed
+
+        a_index = np.searchsorted(self.products, common)
+        b_index = np.searchsorted(other.products, common)
+        a_counts = self.offsets[a_index + 1] - self.offsets[a_index]
+        b_counts = other.offsets[b_index + 1] - other.offsets[b_index]
+        count_changed = a_counts != b_counts
+
+        same_count = ~count_changed
+        counts = a_counts[same_count]
+        a_rows = _expand_ranges(self.offsets[a_index[same_count]], counts)
+        b_rows = _expand_ranges(other.offsets[b_index[same_count]], counts)
+        row_changed = np.zeros(len(a_rows), dtype=bool)
+        for name in ("task_id", "relationship", "started", "completed", "start_frame", "finish_frame", "priority"):
+            row_changed |= getattr(self, name)[a_rows] != getattr(other, name)[b_rows]
+        row_changed |= (self.states[a_rows] != other.states[b_rows]).reshape(len(a_rows), -1).any(axis=1)
+
+        row_owner = np.repeat(np.arange(len(counts)), counts)
+        rows_changed = common[same_count][np.unique(row_owner[row_changed])]
+        return np.union1d(changed, np.union1d(common[count_changed], rows_changed))
+
+    def window_culling(self, viz_start, viz_finish) -> tuple:
+        """
+        (before, after) product id arrays: products whose every row finishes before viz_start,
+        and products whose every row starts after viz_finish. Priority rows and rows without
+        dates intersect any window.
+        """
+        viz_start = date_frames.to_datetime64(viz_start)
+        viz_finish = date_frames.to_datetime64(viz_finish)
+        if not len(self.products) or np.isnat(viz_start) or np.isnat(viz_finish):
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        row_before = (self.finish_date < viz_start) & ~self.priority
+        row_after = (self.start_date > viz_finish) & ~self.priority
+        starts = self.offsets[:-1]
+        before = np.logical_and.reduceat(row_before, starts)
+        after = np.logical_and.reduceat(row_after, starts)
+        return self.products[before], self.products[after]
+
+    def row_states(self) -> List[List[List[int]]]:
+        """
+        [start, end] frames of the STATE_NAMES states for every row, as Python lists for per-row
+        consumers. Priority rows only keep their active range, like frame_data(); their other
+        states are empty (end < start).
+        """
+        states = self.states.copy()
+        empty = (self.animation_start, self.animation_start - 1)
+        states[self.priority, STATE_BEFORE_START] = empty
+        states[self.priority, STATE_AFTER_END] = empty
+        return states.tolist()
+
+    def resolve_task(self, task_id: int) -> Any:
+        """IFC task entity of a task id through task_resolver, None when it can't be resolved"""
+        if not self.task_resolver or not task_id:
+            return None
+        try:
+            return self.task_resolver(int(task_id))
+        except Exception:
+            return None
+
+    def frame_data(self, row: int, resolve_task: bool = True) -> Dict[str, Any]:
+        """Materializes one row as a legacy frame_data dict"""
+        task_id = int(self.task_id[row])
+        task = self.resolve_task(task_id) if resolve_task else None
+        is_priority = bool(self.priority[row])
+        state_rows = self.states[row]
+        if is_priority:
+            states = {"active": (int(state_rows[STATE_ACTIVE, 0]), int(state_rows[STATE_ACTIVE, 1]))}
+        else:
+            states = {name: (int(state_rows[i, 0]), int(state_rows[i, 1])) for i, name in enumerate(STATE_NAMES)}
+        frame_data = {
+            "task": task,
+            "task_id": task_id,
+            "type": self.type_names[int(self.type_code[row])] if self.type_names else "NOTDEFINED",
+            "relationship": RELATIONSHIP_NAMES[int(self.relationship[row])],
+            "start_date": self.start_date[row].astype(object),
+            "finish_date": self.finish_date[row].astype(object),
+            "STARTED": int(self.started[row]),
+            "COMPLETED": int(self.completed[row]),
+            "start_frame": int(self.start_frame[row]),
+            "finish_frame": int(self.finish_frame[row]),
+            "states": states,
+        }
+        if is_priority:
+            frame_data["consider_start_active"] = True
+        return frame_data
+
+    def iter_frame_data(self, product_id: int) -> Iterator[Dict[str, Any]]:
+        rows = self.rows_for_product(product_id)
+        for row in range(rows.start, rows.stop):
+            yield self.frame_data(row)
+
+    # --- Read-only Mapping[int, List[dict]] protocol --------------------
+
+    def __len__(self) -> int:
+        return int(len(self.products))
+
+    def __bool__(self) -> bool:
+        return len(self.products) > 0
+
+    def __contains__(self, product_id) -> bool:
+        try:
+            return self.product_index(int(product_id)) >= 0
+        except (TypeError, ValueError):
+            return False
+
+    def __getitem__(self, product_id) -> List[Dict[str, Any]]:
+        try:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            raise KeyError(product_id)
+        if self.product_index(product_id) < 0:
+            raise KeyError(product_id)
+        return list(self.iter_frame_data(product_id))
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.products.tolist())
+
+    def get(self, product_id, default=None):
+        try:
+            return self[product_id]
+        except KeyError:
+            return default
+
+    def keys(self) -> List[int]:
+        return self.products.tolist()
+
+    def values(self) -> Iterator[List[Dict[str, Any]]]:
+        for product_id in self.products.tolist():
+            yield list(self.iter_frame_data(product_id))
+
+    def items(self) -> Iterator[tuple]:
+        for product_id in self.products.tolist():
+            yield product_id, list(self.iter_frame_data(product_id))
+
+
+def _expand_ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenated row indices of the ranges starts[i]:starts[i] + counts[i]"""
+    total = int(counts.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    range_starts = np.cumsum(counts) - counts
+    return np.repeat(starts, counts) + (np.arange(total) - np.repeat(range_starts, counts))
+
+
+def as_frame_table(product_frames, animation_start: Optional[int] = None, animation_end: Optional[int] = None) -> ProductFrameTable:
+    """Returns product_frames as a ProductFrameTable, converting legacy dicts when needed"""
+    return ProductFrameTable.from_product_frames(product_frames, animation_start, animation_end)
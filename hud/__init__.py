@@ -19,6 +19,7 @@ import blf
 from .text_hud import TextHUD
 from .timeline_hud import TimelineHUD  
 from .legend_hud import LegendHUD
+from .text_metrics import text_dimensions
 
 # Global handler reference - maintained for compatibility
 _hud_draw_handler = None
@@ -74,12 +75,17 @@ class ScheduleHUD:
             self.font_id = 0
 
     def get_active_colortype_legend_data(self, include_hidden=False):
-        """Delegate to legend_hud for compatibility with 3D Legend HUD"""
+        """Legend data shared with the legend HUD and the 3D Legend HUD"""
         return self.legend_hud.get_active_colortype_legend_data(include_hidden)
     
     def invalidate_legend_cache(self):
         """Invalidates the legend data cache to force an update"""
         self.legend_hud.invalidate_legend_cache()
+
+    def free_hud_layers(self):
+        """Releases the offscreen textures of the static HUD layers"""
+        self.timeline_hud.scale_layer.free()
+        self.legend_hud.layer.free()
     
     def get_camera_props(self):
         """Helper to get camera properties"""
@@ -136,10 +142,7 @@ class ScheduleHUD:
                 self.timeline_hud.draw(data, timeline_settings, viewport_width, viewport_height)
             
             if legend_settings.get('enabled', False):
-                print(f"🎨 LEGEND HUD: Drawing with {len(self.legend_hud.get_active_colortype_legend_data())} legend items")
                 self.legend_hud.draw(data, legend_settings, viewport_width, viewport_height)
-            else:
-                print(f"🙈 LEGEND HUD: Disabled - enable_legend_hud={getattr(self.get_camera_props(), 'enable_legend_hud', 'NOT_FOUND')}")
 
         except Exception as e:
             print(f"Bonsai HUD draw error: {e}")
@@ -283,259 +286,241 @@ class ScheduleHUD:
             return {}, {}, {}
 
     def _get_schedule_data(self):
-        """Extracts data from the current schedule - COMPLETE v60 IMPLEMENTATION"""
+        """
+        Extracts data from the current schedule. The schedule context is cached per
+        schedule/date source/settings and the result per frame, so redraws reuse them.
+        """
         try:
             import bonsai.tool as tool
+            from .schedule_data import get_hud_schedule_data
 
-            # Obtener propiedades
             work_props = tool.Sequence.get_work_schedule_props()
-            anim_props = tool.Sequence.get_animation_props()
-
-            # CRITICAL: Check if synchronization mode is enabled
-            # Fechas de visualización (rango seleccionado por usuario)
-            viz_start = tool.Sequence.get_start_date()
-            viz_finish = tool.Sequence.get_finish_date()
-            print(f"📅 HUD: Using visualization range: {viz_start} to {viz_finish}")
-            
-              # full_schedule_start y full_schedule_end SIEMPRE representarán el rango unificado completo para el fondo del HUD.
-            full_schedule_start, full_schedule_end = None, None
-            try:
-                active_schedule = tool.Sequence.get_active_work_schedule()
-                if active_schedule:
-                    # Siempre obtenemos el rango unificado para el fondo de la línea de tiempo.
-                    unified_start, unified_end = self._get_unified_schedule_range(active_schedule)
-                    if unified_start and unified_end:
-                        full_schedule_start, full_schedule_end = unified_start, unified_end
-                        print(f"📊 HUD: Usando rango unificado para la barra de tiempo: {full_schedule_start.strftime('%Y-%m-%d')} -> {full_schedule_end.strftime('%Y-%m-%d')}")
-
-                # Fallback si no se pudo obtener el rango unificado.
-                if not (full_schedule_start and full_schedule_end):
-                    full_schedule_start, full_schedule_end = viz_start, viz_finish
-                    if full_schedule_start:
-                         print(f"⚠️ HUD: Usando rango de visualización como fallback para la barra de tiempo.")
-
-            except Exception as e:
-                print(f"⚠️ Error obteniendo el rango unificado del cronograma: {e}")
-                # Fallback final si todo falla
-                full_schedule_start, full_schedule_end = viz_start, viz_finish
-          
-            # --- IMPROVED MODE DETECTION LOGIC ---
-            # Usar múltiples fuentes para determinar el modo snapshot de forma fiable
-            snapshot_date = getattr(work_props, 'visualisation_start', None)
-            is_snapshot_ui_active = getattr(work_props, 'should_show_snapshot_ui', False)
-            is_snapshot_flag_active = bpy.context.scene.get("is_snapshot_mode", False)
-            
-            is_snapshot_mode = (
-                (is_snapshot_ui_active and snapshot_date and snapshot_date.strip() not in ('', '-')) or
-                is_snapshot_flag_active
-            )
-            
-            if is_snapshot_mode:
-                print(f"🎬 SNAPSHOT MODE: Using date {snapshot_date}")
-            else:
-                print(f"🎞️ ANIMATION MODE: Range {viz_start} to {viz_finish}")
-                
-            # NEW: Snapshot support - use specific date
-            if is_snapshot_mode:
-                # En modo Snapshot, usar SIEMPRE el rango unificado para Timeline HUD
-                if snapshot_date and snapshot_date.strip() not in ('', '-'):
-                    try:
-                        from datetime import datetime
-                        current_date = datetime.fromisoformat(snapshot_date.replace('Z', '+00:00'))
-                        
-                        # CRITICAL: For snapshots, ALWAYS use unified range for Timeline HUD
-                        if active_schedule:
-                            unified_start, unified_end = self._get_unified_schedule_range(active_schedule)
-                            if unified_start and unified_end:
-                                print(f"📊 SNAPSHOT: Using unified range {unified_start.strftime('%Y-%m-%d')} → {unified_end.strftime('%Y-%m-%d')}")
-                                full_schedule_start, full_schedule_end = unified_start, unified_end
-                            else:
-                                print("⚠️ SNAPSHOT: No unified range found, using fallback")
-                        
-                        if full_schedule_start and full_schedule_end:
-                
-                            # Convertir a fechas para cálculos precisos
-                            cd_d = current_date.date()
-                            fss_d = full_schedule_start.date()
-                            fse_d = full_schedule_end.date()
-
-                            delta_days = (cd_d - fss_d).days
-                            
-                            if cd_d < fss_d:
-                                day_from_schedule = 0
-                                week_number = 0
-                                progress_pct = 0
-                            else:
-                                day_from_schedule = max(1, delta_days + 1)
-                                week_number = max(1, (delta_days // 7) + 1)
-                                total_schedule_days = (fse_d - fss_d).days
-                                
-                                if delta_days <= 0:
-                                    progress_pct = 0
-                                elif cd_d >= fse_d or total_schedule_days <= 0:
-                                    progress_pct = 100
-                                else:
-                                    progress_pct = (delta_days / total_schedule_days) * 100
-                                    progress_pct = round(progress_pct)
-
-                            total_days_full_schedule = (fse_d - fss_d).days + 1
-
-                            print("🎬 SNAPSHOT MODE: Metrics calculated directly.")
-                            return {
-                                'full_schedule_start': full_schedule_start,
-                                'full_schedule_end': full_schedule_end,
-                                'current_date': current_date,
-                                'start_date': current_date,
-                                'finish_date': current_date,
-                                'current_frame': -1,
-                                'total_days': total_days_full_schedule,
-                                'elapsed_days': day_from_schedule,
-                                'week_number': int(max(0, week_number)),
-                                'progress_pct': progress_pct,
-                                'day_of_week': current_date.strftime('%A'),
-                                'schedule_name': active_schedule.Name if active_schedule else 'No Schedule',
-                                'is_snapshot': True,
-                            }
-                        # Fallback: ensure unified range is always available for snapshots
-                        if not full_schedule_start or not full_schedule_end:
-                            print("⚠️ SNAPSHOT: No unified range found, calculating fallback range")
-                            # Use current snapshot date as both start and end if no range is available
-                            full_schedule_start = current_date
-                            full_schedule_end = current_date
-                            
-                        print("🎬 SNAPSHOT MODE: Animation disabled for HUD Schedule and Timeline (fallback)")
-                        return {
-                            'full_schedule_start': full_schedule_start,
-                            'full_schedule_end': full_schedule_end,
-                            'current_date': current_date,
-                            'start_date': current_date,
-                            'finish_date': current_date,
-                            'current_frame': -1,  # FIXED: Disable frame animation for snapshots
-                            'total_days': 1,
-                            'elapsed_days': 1,
-                            'week_number': 1,
-                            'progress_pct': 100,
-                            'day_of_week': current_date.strftime('%A'),
-                            'schedule_name': active_schedule.Name if active_schedule else 'No Schedule',
-                            'is_snapshot': True,
-                        }
-                    except Exception as e:
-                        print(f"❌ Error procesando snapshot: {e}")
-    
-            # --- NORMAL ANIMATION LOGIC (if not snapshot) ---
             scene = bpy.context.scene
+            cache = get_hud_schedule_data()
+            context_key = (
+                getattr(work_props, 'active_work_schedule_id', 0),
+                getattr(work_props, 'date_source_type', 'SCHEDULE'),
+                getattr(work_props, 'visualisation_start', None),
+                getattr(work_props, 'visualisation_finish', None),
+                getattr(work_props, 'should_show_snapshot_ui', False),
+                bool(scene.get("is_snapshot_mode", False)),
+            )
+            context = cache.get_context(context_key, self._compute_schedule_context)
+
             current_frame = scene.frame_current
             start_frame = scene.frame_start
             end_frame = scene.frame_end
+            # Snapshot data does not depend on the frame
+            frame_key = ("snapshot",) if context['snapshot_date'] else (current_frame, start_frame, end_frame)
+            return cache.get_frame_data(
+                frame_key, lambda: self._compute_frame_data(context, current_frame, start_frame, end_frame)
+            )
+        except Exception as e:
+            print(f"Error getting schedule data: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
 
-            # 1. CALCULAR LA FECHA ACTUAL DE LA ANIMACIÓN (CURRENT_DATE)
-            # Se basa en el rango de visualización que elegiste manualmente (Start Date y Finish Date en la UI).
-            if end_frame > start_frame and viz_start and viz_finish:
-                progress = (current_frame - start_frame) / (end_frame - start_frame)
-                progress = max(0.0, min(1.0, progress))
-                duration = viz_finish - viz_start
-                current_date = viz_start + (duration * progress)
-            elif viz_start:
-                current_date = viz_start
-            else:
-                from datetime import datetime
-                current_date = datetime.now()
-                print("⚠️ Sin fechas de visualización configuradas, usando fecha actual")
+    def _compute_schedule_context(self):
+        """Date ranges and mode of the active schedule; walks the task tree, computed once per context key"""
+        import bonsai.tool as tool
 
-            # --- LÓGICA CORREGIDA PARA CONTADORES CON REFERENCIA ABSOLUTA ---
-            day_from_schedule = 0
-            week_number = 0
-            progress_pct = 0
-            total_days_in_schedule = (full_schedule_end - full_schedule_start).days + 1 if full_schedule_start and full_schedule_end else 1
+        work_props = tool.Sequence.get_work_schedule_props()
+
+        # Fechas de visualización (rango seleccionado por usuario)
+        viz_start = tool.Sequence.get_start_date()
+        viz_finish = tool.Sequence.get_finish_date()
 
+        # full_schedule_start y full_schedule_end SIEMPRE representarán el rango unificado completo para el fondo del HUD.
+        full_schedule_start, full_schedule_end = None, None
+        active_schedule = None
+        try:
+            active_schedule = tool.Sequence.get_active_work_schedule()
             if active_schedule:
-                # 2. OBTENER EL RANGO DE FECHAS REAL DEL TIPO DE CRONOGRAMA ACTIVO (Schedule, Actual, etc.)
-                #    Esta será nuestra referencia absoluta para los contadores.
-                reference_start, reference_finish = tool.Sequence.guess_date_range(active_schedule)
-
-                if reference_start and reference_finish:
-                    print(f"🎯 HUD Counters: Using absolute reference range {reference_start.strftime('%Y-%m-%d')} to {reference_finish.strftime('%Y-%m-%d')}")
-                    
-                    cd_d = current_date.date()
-                    ref_start_d = reference_start.date()
-                    ref_finish_d = reference_finish.date()
-
-                    # 3. CALCULAR EL PROGRESO, DÍA Y SEMANA RELATIVO A LA REFERENCIA ABSOLUTA
-                    delta_days = (cd_d - ref_start_d).days
-
-                    if cd_d < ref_start_d:
-                        # La animación está en una fecha anterior al inicio del cronograma de referencia.
-                        day_from_schedule = 0
-                        week_number = 0
+                # Siempre obtenemos el rango unificado para el fondo de la línea de tiempo.
+                unified_start, unified_end = self._get_unified_schedule_range(active_schedule)
+                if unified_start and unified_end:
+                    full_schedule_start, full_schedule_end = unified_start, unified_end
+
+            # Fallback si no se pudo obtener el rango unificado.
+            if not (full_schedule_start and full_schedule_end):
+                full_schedule_start, full_schedule_end = viz_start, viz_finish
+                if full_schedule_start:
+                    print(f"⚠️ HUD: Usando rango de visualización como fallback para la barra de tiempo.")
+
+        except Exception as e:
+            print(f"⚠️ Error obteniendo el rango unificado del cronograma: {e}")
+            # Fallback final si todo falla
+            full_schedule_start, full_schedule_end = viz_start, viz_finish
+
+        # --- IMPROVED MODE DETECTION LOGIC ---
+        # Usar múltiples fuentes para determinar el modo snapshot de forma fiable
+        snapshot_date_str = getattr(work_props, 'visualisation_start', None)
+        is_snapshot_ui_active = getattr(work_props, 'should_show_snapshot_ui', False)
+        is_snapshot_flag_active = bpy.context.scene.get("is_snapshot_mode", False)
+
+        is_snapshot_mode = (
+            (is_snapshot_ui_active and snapshot_date_str and snapshot_date_str.strip() not in ('', '-')) or
+            is_snapshot_flag_active
+        )
+
+        snapshot_date = None
+        if is_snapshot_mode and snapshot_date_str and snapshot_date_str.strip() not in ('', '-'):
+            try:
+                from datetime import datetime
+                snapshot_date = datetime.fromisoformat(snapshot_date_str.replace('Z', '+00:00'))
+            except Exception as e:
+                print(f"❌ Error procesando snapshot: {e}")
+
+        # Rango de referencia del tipo de cronograma activo (Schedule, Actual, etc.) para los contadores
+        reference_start, reference_finish = None, None
+        if active_schedule and not snapshot_date:
+            reference_start, reference_finish = tool.Sequence.guess_date_range(active_schedule)
+
+        if snapshot_date:
+            print(f"🎬 HUD: SNAPSHOT MODE, date {snapshot_date_str}")
+        else:
+            print(f"🎞️ HUD: ANIMATION MODE, range {viz_start} to {viz_finish}")
+
+        return {
+            'viz_start': viz_start,
+            'viz_finish': viz_finish,
+            'full_schedule_start': full_schedule_start,
+            'full_schedule_end': full_schedule_end,
+            'reference_start': reference_start,
+            'reference_finish': reference_finish,
+            'snapshot_date': snapshot_date,
+            'has_schedule': active_schedule is not None,
+            'schedule_name': active_schedule.Name if active_schedule else 'No Schedule',
+        }
+
+    def _compute_frame_data(self, context, current_frame, start_frame, end_frame):
+        """HUD data at a frame (or at the snapshot date) from the cached schedule context"""
+        viz_start = context['viz_start']
+        viz_finish = context['viz_finish']
+        full_schedule_start = context['full_schedule_start']
+        full_schedule_end = context['full_schedule_end']
+        schedule_name = context['schedule_name']
+
+        # NEW: Snapshot support - use specific date
+        current_date = context['snapshot_date']
+        if current_date:
+            if full_schedule_start and full_schedule_end:
+
+                # Convertir a fechas para cálculos precisos
+                cd_d = current_date.date()
+                fss_d = full_schedule_start.date()
+                fse_d = full_schedule_end.date()
+
+                delta_days = (cd_d - fss_d).days
+
+                if cd_d < fss_d:
+                    day_from_schedule = 0
+                    week_number = 0
+                    progress_pct = 0
+                else:
+                    day_from_schedule = max(1, delta_days + 1)
+                    week_number = max(1, (delta_days // 7) + 1)
+                    total_schedule_days = (fse_d - fss_d).days
+
+                    if delta_days <= 0:
                         progress_pct = 0
+                    elif cd_d >= fse_d or total_schedule_days <= 0:
+                        progress_pct = 100
                     else:
-                        # La animación ha alcanzado o pasado la fecha de inicio de referencia.
-                        day_from_schedule = max(1, delta_days + 1)
-                        week_number = max(1, (delta_days // 7) + 1)
-
-                        total_reference_days = (ref_finish_d - ref_start_d).days
-                        
-                        if delta_days < 0:
-                            progress_pct = 0
-                        elif cd_d >= ref_finish_d or total_reference_days <= 0:
-                            progress_pct = 100
-                        else:
-                            # EL PROGRESO SE CALCULA SOBRE LA DURACIÓN TOTAL DEL CRONOGRAMA DE REFERENCIA
-                            progress_pct = (delta_days / total_reference_days) * 100
-                            progress_pct = round(progress_pct)
-                    
-                    total_days_in_schedule = (ref_finish_d - ref_start_d).days + 1
-
-                    return {
-                        'full_schedule_start': full_schedule_start,
-                        'full_schedule_end': full_schedule_end,
-                        'current_date': current_date,
-                        'start_date': viz_start,
-                        'finish_date': viz_finish,
-                        'current_frame': current_frame,
-                        'total_days': total_days_in_schedule,
-                        'elapsed_days': day_from_schedule,
-                        'week_number': int(max(0, week_number)),
-                        'progress_pct': progress_pct,
-                        'day_of_week': current_date.strftime('%A'),
-                        'schedule_name': active_schedule.Name if active_schedule else 'No Schedule',
-                        'is_snapshot': False,
-                    }
-            else:
-                print(f"⚠️ Sin fechas de cronograma completo, usando fallback")
-
-                # FALLBACK: Use logic based only on selected range
-                if viz_start and viz_finish:
-                    viz_start_d = viz_start.date()
-                    viz_finish_d = viz_finish.date()
-                    
-                    # Calculate total_days and elapsed_days consistently
-                    total_days = (viz_finish_d - viz_start_d).days + 1
-                    elapsed_days = (current_date - viz_start).days + 1
-                    elapsed_days = max(1, min(total_days, elapsed_days))
-                else:
-                    # Sin fechas de rango, usar valores por defecto
-                    total_days = 1
-                    elapsed_days = 1
-                    print("⚠️ Sin fechas de rango seleccionado, usando valores por defecto")
-
-                # Calculate week_number and progress_pct
-                if end_frame > start_frame:
-                    frame_progress = (current_frame - start_frame) / (end_frame - start_frame)
-                    frame_progress = max(0.0, min(1.0, frame_progress))
-                    
-                    # WEEK: from the start of the range (starting at W1)
-                    # Use elapsed_days for consistency
-                    week_number = max(1, ((elapsed_days - 1) // 7) + 1)
-                    
-                    # PROGRESS: based on frame progress
-                    progress_pct = round(frame_progress * 100)
-                    progress_pct = max(0, min(100, progress_pct))
-                else:
-                    # Si no hay animación, estamos en el día 1, semana 1, 0% progreso
-                    week_number = 1
+                        progress_pct = (delta_days / total_schedule_days) * 100
+                        progress_pct = round(progress_pct)
+
+                total_days_full_schedule = (fse_d - fss_d).days + 1
+
+                return {
+                    'full_schedule_start': full_schedule_start,
+                    'full_schedule_end': full_schedule_end,
+                    'current_date': current_date,
+                    'start_date': current_date,
+                    'finish_date': current_date,
+                    'current_frame': -1,
+                    'total_days': total_days_full_schedule,
+                    'elapsed_days': day_from_schedule,
+                    'week_number': int(max(0, week_number)),
+                    'progress_pct': progress_pct,
+                    'day_of_week': current_date.strftime('%A'),
+                    'schedule_name': schedule_name,
+                    'is_snapshot': True,
+                }
+            # Fallback: use current snapshot date as both start and end if no range is available
+            return {
+                'full_schedule_start': current_date,
+                'full_schedule_end': current_date,
+                'current_date': current_date,
+                'start_date': current_date,
+                'finish_date': current_date,
+                'current_frame': -1,  # FIXED: Disable frame animation for snapshots
+                'total_days': 1,
+                'elapsed_days': 1,
+                'week_number': 1,
+                'progress_pct': 100,
+                'day_of_week': current_date.strftime('%A'),
+                'schedule_name': schedule_name,
+                'is_snapshot': True,
+            }
+
+        # --- NORMAL ANIMATION LOGIC (if not snapshot) ---
+        # 1. CALCULAR LA FECHA ACTUAL DE LA ANIMACIÓN (CURRENT_DATE)
+        # Se basa en el rango de visualización que elegiste manualmente (Start Date y Finish Date en la UI).
+        if end_frame > start_frame and viz_start and viz_finish:
+            progress = (current_frame - start_frame) / (end_frame - start_frame)
+            progress = max(0.0, min(1.0, progress))
+            duration = viz_finish - viz_start
+            current_date = viz_start + (duration * progress)
+        elif viz_start:
+            current_date = viz_start
+        else:
+            from datetime import datetime
+            current_date = datetime.now()
+
+        # --- LÓGICA CORREGIDA PARA CONTADORES CON REFERENCIA ABSOLUTA ---
+        day_from_schedule = 0
+        week_number = 0
+        progress_pct = 0
+
+        if context['has_schedule']:
+            # 2. RANGO DE FECHAS REAL DEL TIPO DE CRONOGRAMA ACTIVO (Schedule, Actual, etc.)
+            #    Esta será nuestra referencia absoluta para los contadores.
+            reference_start = context['reference_start']
+            reference_finish = context['reference_finish']
+
+            if reference_start and reference_finish:
+                cd_d = current_date.date()
+                ref_start_d = reference_start.date()
+                ref_finish_d = reference_finish.date()
+
+                # 3. CALCULAR EL PROGRESO, DÍA Y SEMANA RELATIVO A LA REFERENCIA ABSOLUTA
+                delta_days = (cd_d - ref_start_d).days
+
+                if cd_d < ref_start_d:
+                    # La animación está en una fecha anterior al inicio del cronograma de referencia.
+                    day_from_schedule = 0
+                    week_number = 0
                     progress_pct = 0
-                
+                else:
+                    # La animación ha alcanzado o pasado la fecha de inicio de referencia.
+                    day_from_schedule = max(1, delta_days + 1)
+                    week_number = max(1, (delta_days // 7) + 1)
+
+                    total_reference_days = (ref_finish_d - ref_start_d).days
+
+                    if delta_days < 0:
+                        progress_pct = 0
+                    elif cd_d >= ref_finish_d or total_reference_days <= 0:
+                        progress_pct = 100
+                    else:
+                        # EL PROGRESO SE CALCULA SOBRE LA DURACIÓN TOTAL DEL CRONOGRAMA DE REFERENCIA
+                        progress_pct = (delta_days / total_reference_days) * 100
+                        progress_pct = round(progress_pct)
+
+                total_days_in_schedule = (ref_finish_d - ref_start_d).days + 1
+
                 return {
                     'full_schedule_start': full_schedule_start,
                     'full_schedule_end': full_schedule_end,
@@ -543,20 +528,63 @@ class ScheduleHUD:
                     'start_date': viz_start,
                     'finish_date': viz_finish,
                     'current_frame': current_frame,
-                    'total_days': total_days,
-                    'elapsed_days': elapsed_days,
+                    'total_days': total_days_in_schedule,
+                    'elapsed_days': day_from_schedule,
                     'week_number': int(max(0, week_number)),
                     'progress_pct': progress_pct,
                     'day_of_week': current_date.strftime('%A'),
-                    'schedule_name': active_schedule.Name if active_schedule else 'No Schedule',
-                    'is_snapshot': False, # No es snapshot si llegamos aquí
+                    'schedule_name': schedule_name,
+                    'is_snapshot': False,
                 }
-        except Exception as e:
-            print(f"Error getting schedule data: {e}")
-            import traceback
-            traceback.print_exc()
             return None
 
+        # FALLBACK: Use logic based only on selected range
+        if viz_start and viz_finish:
+            viz_start_d = viz_start.date()
+            viz_finish_d = viz_finish.date()
+
+            # Calculate total_days and elapsed_days consistently
+            total_days = (viz_finish_d - viz_start_d).days + 1
+            elapsed_days = (current_date - viz_start).days + 1
+            elapsed_days = max(1, min(total_days, elapsed_days))
+        else:
+            # Sin fechas de rango, usar valores por defecto
+            total_days = 1
+            elapsed_days = 1
+
+        # Calculate week_number and progress_pct
+        if end_frame > start_frame:
+            frame_progress = (current_frame - start_frame) / (end_frame - start_frame)
+            frame_progress = max(0.0, min(1.0, frame_progress))
+
+            # WEEK: from the start of the range (starting at W1)
+            # Use elapsed_days for consistency
+            week_number = max(1, ((elapsed_days - 1) // 7) + 1)
+
+            # PROGRESS: based on frame progress
+            progress_pct = round(frame_progress * 100)
+            progress_pct = max(0, min(100, progress_pct))
+        else:
+            # Si no hay animación, estamos en el día 1, semana 1, 0% progreso
+            week_number = 1
+            progress_pct = 0
+
+        return {
+            'full_schedule_start': full_schedule_start,
+            'full_schedule_end': full_schedule_end,
+            'current_date': current_date,
+            'start_date': viz_start,
+            'finish_date': viz_finish,
+            'current_frame': current_frame,
+            'total_days': total_days,
+            'elapsed_days': elapsed_days,
+            'week_number': int(max(0, week_number)),
+            'progress_pct': progress_pct,
+            'day_of_week': current_date.strftime('%A'),
+            'schedule_name': schedule_name,
+            'is_snapshot': False, # No es snapshot si llegamos aquí
+        }
+
     def _get_unified_schedule_range(self, work_schedule):
         """
         Calculate the unified date range by analyzing ALL 4 schedule types
@@ -835,7 +863,7 @@ class ScheduleHUD:
         blf.size(self.font_id, font_size)
 
         # Calculate text width for alignment
-        text_width, text_height = blf.dimensions(self.font_id, text)
+        text_width, text_height = text_dimensions(self.font_id, font_size, text)
 
         # Adjust X position according to alignment
         text_alignment = settings.get('text_alignment', 'LEFT')
@@ -896,8 +924,8 @@ class ScheduleHUD:
         """
         Calcula el rango de fechas unificado analizando TODOS los 4 tipos de cronograma.
         Devuelve el inicio más temprano y el fin más tardío de todos ellos.
+        El árbol de tareas se recorre una sola vez para los 4 tipos.
         """
-        from datetime import datetime
         import ifcopenshell.util.sequence
 
         if not work_schedule:
@@ -906,25 +934,21 @@ class ScheduleHUD:
         all_starts = []
         all_finishes = []
 
-        # Analizar todos los tipos de cronograma: SCHEDULE, ACTUAL, EARLY, LATE
-        for schedule_type in ["SCHEDULE", "ACTUAL", "EARLY", "LATE"]:
-            start_attr = f"{schedule_type.capitalize()}Start"
-            finish_attr = f"{schedule_type.capitalize()}Finish"
+        def get_all_tasks_recursive(tasks):
+            result = []
+            for task in tasks:
+                result.append(task)
+                nested = ifcopenshell.util.sequence.get_nested_tasks(task)
+                if nested:
+                    result.extend(get_all_tasks_recursive(nested))
+            return result
 
-            root_tasks = ifcopenshell.util.sequence.get_root_tasks(work_schedule)
+        all_tasks = get_all_tasks_recursive(ifcopenshell.util.sequence.get_root_tasks(work_schedule))
 
-            def get_all_tasks_recursive(tasks):
-                result = []
-                for task in tasks:
-                    result.append(task)
-                    nested = ifcopenshell.util.sequence.get_nested_tasks(task)
-                    if nested:
-                        result.extend(get_all_tasks_recursive(nested))
-                return result
-
-            all_tasks = get_all_tasks_recursive(root_tasks)
-
-            for task in all_tasks:
+        # Analizar todos los tipos de cronograma: SCHEDULE, ACTUAL, EARLY, LATE
+        attributes = [(f"{t.capitalize()}Start", f"{t.capitalize()}Finish") for t in ["SCHEDULE", "ACTUAL", "EARLY", "LATE"]]
+        for task in all_tasks:
+            for start_attr, finish_attr in attributes:
                 start_date = ifcopenshell.util.sequence.derive_date(task, start_attr, is_earliest=True)
                 if start_date:
                     all_starts.append(start_date)
@@ -941,7 +965,6 @@ class ScheduleHUD:
 
         print(f"✅ UNIFIED HUD: Timeline range spans {unified_start.strftime('%Y-%m-%d')} to {unified_finish.strftime('%Y-%m-%d')}")
         return unified_start, unified_finish
-        
 
 
 def draw_hud_callback():
@@ -1216,6 +1239,7 @@ def unregister_hud_handler():
             print(f"🔴 Error removing HUD handler: {e}")
         _hud_draw_handler = None
     _hud_enabled = False
+    schedule_hud.free_hud_layers()
 
 def is_hud_enabled():
     """Checks if the HUD is active"""
@@ -0,0 +1,163 @@
+# Bonsai - OpenBIM Blender Add-on
+# Legend Data Provider for 4D Animation
+# Copyright (C) 2024
+
+"""Legend data shared by the viewport HUD, the legend HUD and the 3D legend.
+
+The entries (name and start / active / end colors of every ColorType of the
+active group) are computed once per animation group stack and ColorType
+definitions. The entries shown in the legend are filtered from them once per
+visibility toggle string. Redraws and the 3D legend operators reuse both.
+"""
+
+from typing import Dict, List, Optional
+
+import bpy
+
+# Colors of a state when the ColorType has none
+_FALLBACK_COLORS = {
+    'start': (1.0, 1.0, 1.0, 1.0),        # White
+    'in_progress': (0.0, 1.0, 0.0, 1.0),  # Green
+    'end': (0.0, 0.8, 0.0, 1.0),          # Dark green
+}
+
+_COLOR_FIELDS = {
+    'start': 'start_color',
+    'in_progress': 'in_progress_color',
+    'active': 'in_progress_color',  # Alias
+    'end': 'end_color',
+    'finished': 'end_color',  # Alias
+}
+
+
+def colortype_color_for_state(colortype_data: dict, state: str) -> tuple:
+    """RGBA color of a ColorType for a state (start / in_progress / end)"""
+    color = colortype_data.get(_COLOR_FIELDS.get(state, 'in_progress_color'))
+    # Ensure valid RGBA format
+    if isinstance(color, (list, tuple)) and len(color) >= 3:
+        if len(color) == 3:
+            return (*color, 1.0)
+        return tuple(color[:4])
+    return _FALLBACK_COLORS.get(state, (0.5, 0.5, 0.5, 1.0))
+
+
+class LegendDataProvider:
+    """Legend entries of the active ColorType group, cached per group stack, definitions and visibility toggles"""
+
+    def __init__(self):
+        self.entries_key = None
+        self.entries: Optional[List[Dict]] = None
+        self.visible_key = None
+        self.visible: Optional[List[Dict]] = None
+        self.last_active_group = None
+        self.stats = {"builds": 0, "hits": 0}
+
+    def get(self, include_hidden: bool = False) -> List[Dict]:
+        """Legend entries sorted by name; without the hidden ColorTypes unless include_hidden"""
+        import bonsai.tool as tool
+
+        anim_props = tool.Sequence.get_animation_props()
+        group_stack = tuple(
+            (getattr(item, 'group', ''), bool(getattr(item, 'enabled', False)))
+            for item in getattr(anim_props, 'animation_group_stack', None) or []
+        )
+        if not group_stack:
+            return []
+
+        # The first enabled group is the active one, DEFAULT when none is enabled
+        active_group = next((group for group, enabled in group_stack if enabled), None)
+        if active_group is None:
+            active_group = "DEFAULT"
+        if not active_group:
+            return []
+
+        camera_props = getattr(anim_props, 'camera_orbit', None)
+        if self.last_active_group != active_group:
+            # A new active group shows all its ColorTypes: clear the hidden ones
+            print(f"🔄 Legend: active group changed from '{self.last_active_group}' to '{active_group}'")
+            self.last_active_group = active_group
+            if camera_props:
+                try:
+                    camera_props.legend_hud_visible_colortypes = ""
+                except Exception as e:
+                    print(f"⚠️ Could not auto-clear visible colortypes: {e}")
+
+        entries_key = (group_stack, hash(str(bpy.context.scene.get("BIM_AnimationColorSchemesSets", ""))))
+        if self.entries is None or self.entries_key != entries_key:
+            self.entries = self._build_entries(active_group)
+            self.entries_key = entries_key
+            self.visible_key = None
+            self.stats["builds"] += 1
+        else:
+            self.stats["hits"] += 1
+        if include_hidden:
+            return self.entries
+
+        # legend_hud_visible_colortypes holds the HIDDEN ColorTypes
+        hidden_str = getattr(camera_props, 'legend_hud_visible_colortypes', '') if camera_props else ''
+        if self.visible is None or self.visible_key != hidden_str:
+            hidden = {name.strip() for name in hidden_str.split(',') if name.strip()}
+            self.visible = [entry for entry in self.entries if entry['name'] not in hidden]
+            self.visible_key = hidden_str
+        return self.visible
+
+    def _build_entries(self, active_group: str) -> List[Dict]:
+        try:
+            from ..prop.color_manager_prop import UnifiedColorTypeManager
+        except ImportError:
+            from ..prop import UnifiedColorTypeManager
+
+        context = bpy.context
+        if active_group == "DEFAULT":
+            # Ensure ALL default colortypes are loaded
+            try:
+                UnifiedColorTypeManager.ensure_default_colortypes(context)
+                UnifiedColorTypeManager._invalidate_cache(context)
+            except Exception as e:
+                print(f"⚠️ Could not ensure DEFAULT colortypes: {e}")
+
+        try:
+            group_colortypes = UnifiedColorTypeManager.get_group_colortypes(context, active_group)
+        except Exception as e:
+            print(f"❌ Error extracting colortype data: {e}")
+            return []
+
+        entries = [
+            {
+                'name': colortype_name,
+                'start_color': colortype_color_for_state(colortype_data, 'start'),
+                'active_color': colortype_color_for_state(colortype_data, 'in_progress'),
+                'end_color': colortype_color_for_state(colortype_data, 'end'),
+                'group': active_group,
+                'active': True,  # It's in the active stack
+            }
+            for colortype_name, colortype_data in (group_colortypes or {}).items()
+        ]
+        # Sort alphabetically for consistent display
+        entries.sort(key=lambda entry: entry['name'])
+        print(f"🎨 Legend data: {len(entries)} colortypes from active group '{active_group}'")
+        return entries
+
+    def invalidate(self):
+        self.entries_key = None
+        self.entries = None
+        self.visible_key = None
+        self.visible = None
+        # Group tracking is reset too, so the next active group is detected again
+        self.last_active_group = None
+
+
+# Global instance
+_legend_data_provider = None
+
+
+def get_legend_data_provider() -> LegendDataProvider:
+    global _legend_data_provider
+    if _legend_data_provider is None:
+        _legend_data_provider = LegendDataProvider()
+    return _legend_data_provider
+
+
+def invalidate_legend_data():
+    if _legend_data_provider is not None:
+        _legend_data_provider.invalidate()
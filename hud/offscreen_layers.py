@@ -0,0 +1,189 @@
+# Bonsai - OpenBIM Blender Add-on
+# Offscreen HUD Layers for 4D Animation
+# Copyright (C) 2024
+
+"""Static HUD layers rendered offscreen.
+
+A layer renders the draw calls of a static HUD part (timeline scale, legend)
+once into an offscreen texture covering only the part's bounding box, then
+blits that texture at the box on every redraw. The layer is re-rendered only
+when its content key or its bounds change. Where offscreen rendering is not
+available, the layer draws its content directly, as before.
+
+The HUD handler runs in every 3D view region, so a HUD part keeps one layer
+per viewport size (OffscreenLayerSet): regions of different sizes don't
+re-render each other's texture, regions of the same size share it.
+
+The content is blended over transparent black, so the texture holds
+premultiplied colors and is composited with ALPHA_PREMULT. The content must
+draw with ALPHA blending, as the HUD components already do.
+"""
+
+import math
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+import gpu
+from gpu_extras.presets import draw_texture_2d
+
+# Pixels added around the bounds for line widths and antialiased edges
+BOUNDS_PADDING = 2
+# Viewport sizes a layer set keeps a texture for
+MAX_LAYERS_PER_SET = 4
+
+Bounds = Tuple[float, float, float, float]
+
+
+def freeze(value):
+    """Hashable copy of HUD settings (dicts, lists and Blender property arrays) for layer keys"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, str) or not hasattr(value, '__iter__'):
+        return value
+    return tuple(freeze(item) for item in value)
+
+
+def pixel_projection(width: int, height: int, x: int = 0, y: int = 0):
+    """Projection of the region pixels x..x + width, y..y + height, as in POST_PIXEL draw callbacks"""
+    from mathutils import Matrix
+    return Matrix((
+        (2.0 / width, 0.0, 0.0, -1.0 - 2.0 * x / width),
+        (0.0, 2.0 / height, 0.0, -1.0 - 2.0 * y / height),
+        (0.0, 0.0, 1.0, 0.0),
+        (0.0, 0.0, 0.0, 1.0),
+    ))
+
+
+def pixel_rect(bounds: Bounds, padding: int = BOUNDS_PADDING) -> Tuple[int, int, int, int]:
+    """(x, y, width, height) of the whole pixels covering bounds (xmin, ymin, xmax, ymax) plus padding"""
+    xmin, ymin, xmax, ymax = bounds
+    x = int(math.floor(xmin)) - padding
+    y = int(math.floor(ymin)) - padding
+    return x, y, int(math.ceil(xmax)) + padding - x, int(math.ceil(ymax)) + padding - y
+
+
+class OffscreenLayer:
+    """Offscreen texture of a static HUD part, rendered once per content key and bounds"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.offscreen = None
+        self.size: Optional[Tuple[int, int]] = None
+        # Region pixel rect (x, y, width, height) the texture was rendered for
+        self.rect: Optional[Tuple[int, int, int, int]] = None
+        self.key: Optional[Hashable] = None
+        # Offscreen creation failed (no GPU backend): draw directly from then on
+        self.unavailable = False
+        self.stats = {"renders": 0, "blits": 0, "direct": 0}
+
+    def draw(self, key: Hashable, bounds: Bounds, draw_content: Callable[[], None]) -> None:
+        """
+        Blits the layer at bounds (xmin, ymin, xmax, ymax in region pixels), rendering
+        draw_content() into it first when key or bounds changed
+        """
+        rect = pixel_rect(bounds)
+        if not self.ensure_offscreen(rect[2], rect[3]):
+            draw_content()
+            self.stats["direct"] += 1
+            return
+        if self.key is None or self.key != key or self.rect != rect:
+            self.render(draw_content, rect)
+            self.key = key
+            self.rect = rect
+        self.blit(rect)
+
+    def ensure_offscreen(self, width: int, height: int) -> bool:
+        if self.unavailable or width <= 0 or height <= 0:
+            return False
+        if self.offscreen is not None and self.size == (width, height):
+            return True
+        self.free()
+        try:
+            self.offscreen = gpu.types.GPUOffScreen(width, height)
+        except Exception as e:
+            print(f"⚠️ HUD layer '{self.name}': offscreen rendering not available, drawing directly ({e})")
+            self.unavailable = True
+            return False
+        self.size = (width, height)
+        return True
+
+    def render(self, draw_content: Callable[[], None], rect: Tuple[int, int, int, int]) -> None:
+        x, y, width, height = rect
+        with self.offscreen.bind():
+            framebuffer = gpu.state.active_framebuffer_get()
+            framebuffer.clear(color=(0.0, 0.0, 0.0, 0.0))
+            with gpu.matrix.push_pop(), gpu.matrix.push_pop_projection():
+                gpu.matrix.load_identity()
+                gpu.matrix.load_projection_matrix(pixel_projection(width, height, x, y))
+                draw_content()
+        gpu.state.blend_set('NONE')
+        self.stats["renders"] += 1
+
+    def blit(self, rect: Tuple[int, int, int, int]) -> None:
+        x, y, width, height = rect
+        gpu.state.blend_set('ALPHA_PREMULT')
+        draw_texture_2d(self.offscreen.texture_color, (x, y), width, height)
+        gpu.state.blend_set('NONE')
+        self.stats["blits"] += 1
+
+    def invalidate(self) -> None:
+        """Re-renders the layer on its next draw"""
+        self.key = None
+
+    def free(self) -> None:
+        if self.offscreen is not None:
+            try:
+                self.offscreen.free()
+            except Exception:
+                pass
+        self.offscreen = None
+        self.size = None
+        self.rect = None
+        self.key = None
+
+
+class OffscreenLayerSet:
+    """One OffscreenLayer of a HUD part per viewport size, least recently used sizes freed first"""
+
+    def __init__(self, name: str, max_layers: int = MAX_LAYERS_PER_SET):
+        self.name = name
+        self.max_layers = max_layers
+        self.layers: "OrderedDict[Tuple[int, int], OffscreenLayer]" = OrderedDict()
+        self.unavailable = False
+
+    def layer_for(self, viewport_width: int, viewport_height: int) -> OffscreenLayer:
+        size = (viewport_width, viewport_height)
+        layer = self.layers.get(size)
+        if layer is not None:
+            self.layers.move_to_end(size)
+            return layer
+        layer = self.layers[size] = OffscreenLayer(self.name)
+        # Offscreen support doesn't change between regions
+        layer.unavailable = self.unavailable
+        while len(self.layers) > self.max_layers:
+            _, evicted = self.layers.popitem(last=False)
+            evicted.free()
+        return layer
+
+    def draw(self, key: Hashable, viewport_width: int, viewport_height: int, bounds: Bounds,
+             draw_content: Callable[[], None]) -> None:
+        layer = self.layer_for(viewport_width, viewport_height)
+        layer.draw(key, bounds, draw_content)
+        self.unavailable = self.unavailable or layer.unavailable
+
+    @property
+    def stats(self):
+        totals = {"renders": 0, "blits": 0, "direct": 0}
+        for layer in self.layers.values():
+            for name, value in layer.stats.items():
+                totals[name] += value
+        return totals
+
+    def invalidate(self) -> None:
+        for layer in self.layers.values():
+            layer.invalidate()
+
+    def free(self) -> None:
+        for layer in self.layers.values():
+            layer.free()
+        self.layers.clear()
@@ -0,0 +1,67 @@
+# Bonsai - OpenBIM Blender Add-on
+# Schedule Data Cache of the HUD for 4D Animation
+# Copyright (C) 2024
+
+"""Cached schedule data of the HUD.
+
+The schedule context (unified and reference date ranges, visualization range,
+snapshot mode) walks the task tree and is computed once per schedule / date
+source / settings key. The per-frame fields (current date, day, week,
+progress) are computed once per frame. Viewport redraws in between reuse both;
+schedule edits invalidate the context explicitly.
+"""
+
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class HUDScheduleDataCache:
+    """Schedule context per settings key and the HUD data of the last frame"""
+
+    def __init__(self):
+        self.context_key: Optional[Hashable] = None
+        self.context: Optional[Dict[str, Any]] = None
+        self.frame_key: Optional[Hashable] = None
+        self.frame_data: Optional[Dict[str, Any]] = None
+        self.stats = {"context_builds": 0, "frame_builds": 0, "hits": 0}
+
+    def get_context(self, key: Hashable, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Schedule context of key, recomputed when the key changes or after invalidate()"""
+        if self.context is None or self.context_key != key:
+            self.context = compute()
+            self.context_key = key
+            self.frame_key = None
+            self.frame_data = None
+            self.stats["context_builds"] += 1
+        return self.context
+
+    def get_frame_data(self, key: Hashable, compute: Callable[[], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """HUD data of a frame of the current context, computed once per frame key"""
+        if self.frame_key == key and self.frame_data is not None:
+            self.stats["hits"] += 1
+            return self.frame_data
+        self.frame_data = compute()
+        self.frame_key = key
+        self.stats["frame_builds"] += 1
+        return self.frame_data
+
+    def invalidate(self):
+        self.context_key = None
+        self.context = None
+        self.frame_key = None
+        self.frame_data = None
+
+
+# Global instance
+_hud_schedule_data = None
+
+
+def get_hud_schedule_data() -> HUDScheduleDataCache:
+    global _hud_schedule_data
+    if _hud_schedule_data is None:
+        _hud_schedule_data = HUDScheduleDataCache()
+    return _hud_schedule_data
+
+
+def invalidate_hud_schedule_data():
+    if _hud_schedule_data is not None:
+        _hud_schedule_data.invalidate()
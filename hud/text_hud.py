@@ -5,6 +5,7 @@
 import blf
 import gpu
 from gpu_extras.batch import batch_for_shader
+from .text_metrics import text_dimensions
 
 
 class TextHUD:
@@ -13,6 +14,9 @@ class TextHUD:
     def __init__(self, font_id):
         """Initialize TextHUD with shared font"""
         self.font_id = font_id
+        # Layout of the last lines drawn, recomputed when they or the sizes change
+        self._layout_key = None
+        self._layout = None
         print(f"📝 TextHUD initialized with font_id={font_id}")
     
     def draw(self, data, settings, viewport_width, viewport_height):
@@ -34,9 +38,9 @@ class TextHUD:
             blf.size(self.font_id, font_size)
             
             # Calculate dimensions for background
-            line_dims = [blf.dimensions(self.font_id, line) for line in lines_to_draw]
-            max_width = max(w for w, h in line_dims) if line_dims else 0
-            total_text_height = sum(h for w, h in line_dims) + max(0, len(lines_to_draw) - 1) * (settings.get('spacing', 0.02) * viewport_height)
+            line_dims, max_width, total_text_height = self.get_layout(
+                lines_to_draw, font_size, settings.get('spacing', 0.02) * viewport_height
+            )
             
             # Draw background with effects
             self.draw_background_with_effects(
@@ -55,6 +59,17 @@ class TextHUD:
             import traceback
             traceback.print_exc()
     
+    def get_layout(self, lines, font_size, spacing):
+        """Line dimensions, width and height of the text block, computed once per lines / size change"""
+        key = (tuple(lines), font_size, spacing)
+        if self._layout_key != key:
+            line_dims = [text_dimensions(self.font_id, font_size, line) for line in lines]
+            max_width = max(w for w, h in line_dims) if line_dims else 0
+            total_text_height = sum(h for w, h in line_dims) + max(0, len(lines) - 1) * spacing
+            self._layout = (line_dims, max_width, total_text_height)
+            self._layout_key = key
+        return self._layout
+    
     def calculate_position(self, viewport_width, viewport_height, settings):
         """Calculate position of the HUD in pixels"""
         margin_h = int(viewport_width * settings.get('margin_h', 0.02))
@@ -210,6 +225,8 @@ class TextHUD:
             # Get text settings
             text_color = settings.get('text_color', (1.0, 1.0, 1.0, 1.0))
             shadow_enabled = settings.get('text_shadow_enabled', False)
+            # Text width for right alignment
+            text_width = text_dimensions(self.font_id, int(settings.get('scale', 1.0) * 16), text)[0]
             
             # Draw shadow if enabled
             if shadow_enabled:
@@ -223,8 +240,6 @@ class TextHUD:
                 # Draw shadow text
                 blf.color(self.font_id, *shadow_color)
                 if alignment == 'RIGHT':
-                    # Calculate text width for right alignment
-                    text_width = blf.dimensions(self.font_id, text)[0]
                     blf.position(self.font_id, shadow_x - text_width, shadow_y, 0)
                 else:
                     blf.position(self.font_id, shadow_x, shadow_y, 0)
@@ -233,8 +248,6 @@ class TextHUD:
             # Draw main text
             blf.color(self.font_id, *text_color)
             if alignment == 'RIGHT':
-                # Calculate text width for right alignment
-                text_width = blf.dimensions(self.font_id, text)[0]
                 blf.position(self.font_id, x - text_width, y, 0)
             else:
                 blf.position(self.font_id, x, y, 0)
@@ -0,0 +1,68 @@
+# Bonsai - OpenBIM Blender Add-on
+# Text Metrics Cache for 4D Animation
+# Copyright (C) 2024
+
+"""Cached blf text dimensions for HUD layout.
+
+HUD layout (backgrounds, alignment, legend rows) measures the same strings
+at the same sizes on every redraw. Measured dimensions are kept per
+(font id, size, string) in a bounded LRU. On a miss the font is set to the
+requested size, which is the size the caller draws with.
+"""
+
+from collections import OrderedDict
+from typing import Hashable, Tuple
+
+import blf
+
+DEFAULT_MAX_ENTRIES = 2048
+
+
+class TextMetricsCache:
+    """LRU of blf.dimensions per (font id, size, string)"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+    def dimensions(self, font_id: int, size: float, text: str) -> Tuple[float, float]:
+        key = (font_id, size, text)
+        dims = self.entries.get(key)
+        if dims is not None:
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return dims
+        blf.size(font_id, size)
+        dims = tuple(blf.dimensions(font_id, text))
+        self.entries[key] = dims
+        self.stats["misses"] += 1
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats["evicted"] += 1
+        return dims
+
+    def clear(self):
+        self.entries.clear()
+
+
+# Global instance
+_text_metrics = None
+
+
+def get_text_metrics() -> TextMetricsCache:
+    global _text_metrics
+    if _text_metrics is None:
+        _text_metrics = TextMetricsCache()
+    return _text_metrics
+
+
+def text_dimensions(font_id: int, size: float, text: str) -> Tuple[float, float]:
+    """blf.dimensions of text at size, cached"""
+    return get_text_metrics().dimensions(font_id, size, text)
+
+
+def invalidate_text_metrics():
+    """Drops the cached dimensions, e.g. after a font is (re)loaded"""
+    if _text_metrics is not None:
+        _text_metrics.clear()
@@ -5,8 +5,147 @@
 import blf
 import gpu
 from gpu_extras.batch import batch_for_shader
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from math import cos, pi, sin
 from dateutil.relativedelta import relativedelta
+from .offscreen_layers import MAX_LAYERS_PER_SET, OffscreenLayerSet
+from .text_metrics import text_dimensions
+
+
+def rect_vertices(x, y, w, h, radius=0.0):
+    """Triangles of a rectangle, with rounded corners (a fan around the center) when radius > 0"""
+    # Limit the radius to half the smaller dimension
+    radius = min(radius, min(w, h) / 2.0)
+    if radius <= 0:
+        return [(x, y), (x + w, y), (x + w, y + h), (x, y + h)], [(0, 1, 2), (2, 3, 0)]
+
+    # Number of segments for the rounded corners (more = smoother)
+    segments = max(4, int(radius / 2))
+    vertices = []
+    # Lower left, lower right, upper right and upper left corners
+    corners = (
+        (x + radius, y + radius, pi),
+        (x + w - radius, y + radius, pi * 1.5),
+        (x + w - radius, y + h - radius, 0.0),
+        (x + radius, y + h - radius, pi / 2),
+    )
+    for center_x, center_y, start_angle in corners:
+        for i in range(segments + 1):
+            angle = start_angle + i * (pi / 2) / segments
+            vertices.append((center_x + radius * cos(angle), center_y + radius * sin(angle)))
+
+    center = len(vertices)
+    vertices.append((x + w / 2, y + h / 2))
+    indices = [(center, i, (i + 1) % center) for i in range(center)]
+    return vertices, indices
+
+
+def union_bounds(boxes):
+    """(xmin, ymin, xmax, ymax) enclosing all boxes, None without any"""
+    if not boxes:
+        return None
+    return (
+        min(box[0] for box in boxes), min(box[1] for box in boxes),
+        max(box[2] for box in boxes), max(box[3] for box in boxes),
+    )
+
+
+class TimelineGeometry:
+    """
+    Static geometry of a timeline layout. Rectangles and lines are merged into one
+    batch per color (and line width), labels keep their positions, so drawing the
+    whole scale costs a few draw calls whatever the schedule length.
+    """
+
+    def __init__(self, key=None):
+        self.key = key
+        self.shader = gpu.shader.from_builtin('UNIFORM_COLOR')
+        self.fills = []
+        self.lines = []
+        self.labels = []
+        self._fill_groups = {}
+        self._line_groups = {}
+        # Extent of the lines (xmin, ymin, xmax, ymax), taken before finish() drops the vertices
+        self._line_extent = None
+        self._scale_bounds = None
+
+    def add_fill(self, vertices, indices, color):
+        group_vertices, group_indices = self._fill_groups.setdefault(tuple(color), ([], []))
+        offset = len(group_vertices)
+        group_vertices.extend(vertices)
+        group_indices.extend(tuple(i + offset for i in triangle) for triangle in indices)
+
+    def add_rect(self, x, y, w, h, color, radius=0.0):
+        if w <= 0 or h <= 0:
+            return
+        vertices, indices = rect_vertices(x, y, w, h, radius)
+        self.add_fill(vertices, indices, color)
+
+    def add_line(self, x, y, height, color, width=1.0):
+        """Vertical line"""
+        self._line_groups.setdefault((tuple(color), width), []).extend(((x, y), (x, y + height)))
+
+    def add_label(self, text, x, y, size, color):
+        self.labels.append((text, x, y, size, tuple(color)))
+
+    def finish(self):
+        """Turns the collected geometry into batches"""
+        for color, (vertices, indices) in self._fill_groups.items():
+            self.fills.append((batch_for_shader(self.shader, 'TRIS', {"pos": vertices}, indices=indices), color))
+        line_boxes = []
+        for (color, width), vertices in self._line_groups.items():
+            self.lines.append((batch_for_shader(self.shader, 'LINES', {"pos": vertices}), color, width))
+            xs = [x for x, _ in vertices]
+            ys = [y for _, y in vertices]
+            line_boxes.append((min(xs) - width, min(ys), max(xs) + width, max(ys)))
+        self._line_extent = union_bounds(line_boxes)
+        self._fill_groups = {}
+        self._line_groups = {}
+        return self
+
+    def draw_fills(self):
+        gpu.state.blend_set('ALPHA')
+        self.shader.bind()
+        for batch, color in self.fills:
+            self.shader.uniform_float("color", color)
+            batch.draw(self.shader)
+
+    def draw_lines(self):
+        gpu.state.blend_set('ALPHA')
+        self.shader.bind()
+        for batch, color, width in self.lines:
+            gpu.state.line_width_set(width)
+            self.shader.uniform_float("color", color)
+            batch.draw(self.shader)
+        gpu.state.line_width_set(1.0)
+
+    def draw_labels(self, font_id):
+        size = None
+        for text, x, y, label_size, color in self.labels:
+            if label_size != size:
+                blf.size(font_id, label_size)
+                size = label_size
+            blf.color(font_id, *color)
+            blf.position(font_id, x, y, 0)
+            blf.draw(font_id, text)
+
+    def draw(self, font_id):
+        self.draw_fills()
+        self.draw_lines()
+        self.draw_labels(font_id)
+        gpu.state.blend_set('NONE')
+
+    def scale_bounds(self, font_id):
+        """(xmin, ymin, xmax, ymax) of the lines and labels, None without any"""
+        if self._scale_bounds is None:
+            boxes = [self._line_extent] if self._line_extent else []
+            for text, x, y, size, _ in self.labels:
+                text_w, text_h = text_dimensions(font_id, size, text)
+                # Descenders reach below the baseline
+                boxes.append((x, y - size * 0.3, x + text_w, y + max(text_h, size)))
+            self._scale_bounds = union_bounds(boxes)
+        return self._scale_bounds
 
 
 class TimelineHUD:
@@ -15,51 +154,41 @@ class TimelineHUD:
     def __init__(self, font_id):
         """Initialize TimelineHUD with shared font"""
         self.font_id = font_id
+        # Scale of the last layout per viewport size, rebuilt when its key changes
+        self.geometries = OrderedDict()
+        self.stats = {"builds": 0, "hits": 0}
+        # Marks and labels of the scale, rendered once per geometry and viewport size
+        self.scale_layer = OffscreenLayerSet("timeline scale")
         print(f"📊 TimelineHUD initialized with font_id={font_id}")
     
     def draw(self, data, settings, viewport_width, viewport_height):
-        """Timeline HUD estilo Synchro 4D Pro con una sola barra background"""
-        """Synchro 4D Pro style Timeline HUD with a single background bar"""
-        print(f"\n🎬 === TIMELINE HUD DRAW START ===")
-        print(f"🎬 Viewport: {viewport_width}x{viewport_height}")
-        print(f"🎬 Settings enabled: {settings.get('enabled', False)}")
-        print(f"🎬 Data received: {list(data.keys()) if data else 'None'}")
-        print(f"🎬 Is snapshot: {data.get('is_snapshot', False) if data else 'Unknown'}")
-        print(f"🎬 Font ID at start: {self.font_id}")
-        
+        """
+        Synchro 4D Pro style Timeline HUD with a single background bar.
+        The background and the scale (marks and labels) are persistent batches keyed by
+        viewport, layout, date range and zoom; the scale is rendered once per key into an
+        offscreen layer. Only the progress bar and the playhead are drawn per frame.
+        """
+        if not data:
+            return
+
         # Verificar datos necesarios - CORREGIDO: usar rangos seleccionados
         full_start = data.get('full_schedule_start')
         full_end = data.get('full_schedule_end')
         viz_start = data.get('viz_start') or data.get('start_date')
         viz_finish = data.get('viz_finish') or data.get('finish_date')
         current_date = data.get('current_date')
-        
-        print(f"🎬 Data keys: {list(data.keys())}")
-        print(f"🎬 Timeline data valid: full_start={full_start is not None}, viz_start={viz_start is not None}, current_date={current_date is not None}")
-
-        # DEBUG: Mostrar rangos
-        print(f"📅 Timeline HUD Ranges:")
-        if full_start and full_end:
-            print(f"   Full Schedule: {full_start.strftime('%Y-%m-%d')} → {full_end.strftime('%Y-%m-%d')}")
-        if viz_start and viz_finish:
-            print(f"   Selected Range: {viz_start.strftime('%Y-%m-%d')} → {viz_finish.strftime('%Y-%m-%d')}")
-        if current_date:
-            print(f"   Current Date: {current_date.strftime('%Y-%m-%d')}")
 
         # FIXED: Handle both animation mode (needs viz range) and snapshot mode (needs current_date)
         if data.get('is_snapshot', False):
             # Snapshot mode: only need current_date and schedule range
             if not (current_date and full_start and full_end):
-                print("❌ Timeline HUD (Snapshot): Missing current_date or schedule range")
                 return
             # For snapshot, use full schedule range as display range
             viz_start = full_start
             viz_finish = full_end
-            print(f"🎬 Timeline HUD: Using full schedule range for snapshot")
         else:
             # Animation mode: need viz range and current_date
             if not (viz_start and viz_finish and current_date):
-                print("❌ Timeline HUD (Animation): Missing required viz_start, viz_finish or current_date")
                 return
         
         # Configuration
@@ -67,7 +196,6 @@ class TimelineHUD:
         color_text = settings.get('color_text', (1.0, 1.0, 1.0, 1.0))
         color_indicator = settings.get('color_indicator', (1.0, 1.0, 1.0, 1.0))
         progress_color = settings.get('color_progress')
-        bar_h = settings.get('height', 40.0)
         border_radius = settings.get('border_radius', 0.0)
 
         # Viewport geometry and positioning
@@ -105,40 +233,40 @@ class TimelineHUD:
         else:  # > 2 años
             zoom_level = 'FULL'
 
-        # ====== DRAW ELEMENTS ======
-        try:
-            gpu.state.blend_set('ALPHA')
-        except Exception:
-            pass
+        # Week and day numbers count from the full schedule / selected range start
+        key = (
+            viewport_width, viewport_height, x_start, y_start, bar_w, bar_h,
+            display_start, display_end, zoom_level, tuple(color_background), tuple(color_text), border_radius,
+            full_start, data.get('viz_start') or data.get('start_date'),
+        )
+        geometry = self.get_geometry((viewport_width, viewport_height), key, lambda: self.build_geometry(
+            key, x_start, y_start, bar_w, int(bar_h), display_start, display_end, zoom_level,
+            color_background, color_text, border_radius, data,
+        ))
 
-        # 1. Draw background bar (now occupies the full width of the widget)
-        if border_radius > 0:
-            self.draw_rounded_rect(x_start, y_start, bar_w, int(bar_h), color_background, border_radius)
-        else:
-            self.draw_gpu_rect(x_start, y_start, bar_w, int(bar_h), color_background)
+        # ====== DRAW ELEMENTS ======
+        # 1. Background bar (occupies the full width of the widget)
+        geometry.draw_fills()
 
         # 1.5. Draw progress bar if enabled
         if settings.get('show_progress_bar', True):
             # FIXED: For snapshots, disable animated progress bar
             if data.get('is_snapshot', False):
                 # For snapshots, show static progress bar only if date is within range
-                if viz_start <= current_date <= viz_finish:
-                    progress_x_end = date_to_x(current_date)
-                    progress_width = progress_x_end - x_start
-                    if progress_width > 0:
-                        self.draw_gpu_rect(x_start, y_start, int(progress_width), int(bar_h), progress_color)
+                show_progress = viz_start <= current_date <= viz_finish
             else:
                 # Normal animated behavior for non-snapshot mode
-                if current_date > viz_start:
-                    progress_x_end = date_to_x(current_date)
-                    progress_width = progress_x_end - x_start
-                    
-                    if progress_width > 0:
-                        self.draw_gpu_rect(x_start, y_start, int(progress_width), int(bar_h), progress_color)
+                show_progress = current_date > viz_start
+            if show_progress:
+                progress_width = date_to_x(current_date) - x_start
+                if progress_width > 0:
+                    self.draw_gpu_rect(x_start, y_start, int(progress_width), int(bar_h), progress_color)
 
-        # 2. Draw indicator lines and texts
-        self.draw_synchro_timeline_marks(x_start, y_start, bar_w, int(bar_h), 
-                                       display_start, display_end, zoom_level, color_text, data)
+        # 2. Indicator lines and texts
+        bounds = geometry.scale_bounds(self.font_id)
+        if bounds:
+            self.scale_layer.draw(geometry.key, viewport_width, viewport_height, bounds,
+                                  lambda: self.draw_scale(geometry))
 
         # 3. Draw current date indicator (vertical line with diamond)
         x_current = date_to_x(current_date)
@@ -149,92 +277,38 @@ class TimelineHUD:
         except Exception:
             pass
 
-    def draw_gpu_rect(self, x, y, w, h, color):
-        """Draws a simple rectangle using the GPU module."""
-        vertices = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
-        indices = [(0, 1, 2), (2, 3, 0)]
-        shader = gpu.shader.from_builtin('UNIFORM_COLOR')
-        batch = batch_for_shader(shader, 'TRIS', {"pos": vertices}, indices=indices)
-        gpu.state.blend_set('ALPHA')
-        shader.bind()
-        shader.uniform_float("color", color)
-        batch.draw(shader)
+    def get_geometry(self, viewport_size, key, build):
+        """Persistent scale geometry of key, built on the first draw of a layout in a viewport size"""
+        geometry = self.geometries.get(viewport_size)
+        if geometry is None or geometry.key != key:
+            geometry = self.geometries[viewport_size] = build()
+            self.stats["builds"] += 1
+            while len(self.geometries) > MAX_LAYERS_PER_SET:
+                self.geometries.popitem(last=False)
+        else:
+            self.stats["hits"] += 1
+        self.geometries.move_to_end(viewport_size)
+        return geometry
+
+    def invalidate_geometry(self):
+        self.geometries.clear()
+        self.scale_layer.invalidate()
+
+    def draw_scale(self, geometry):
+        geometry.draw_lines()
+        geometry.draw_labels(self.font_id)
         gpu.state.blend_set('NONE')
 
-    def draw_rounded_rect(self, x, y, w, h, color, radius):
-        """Draws a rectangle with rounded corners using approximation with multiple triangles."""
+    def build_geometry(self, key, x_start, y_start, bar_w, bar_h, display_start, display_end, zoom_level,
+                       color_background, color_text, border_radius, data):
+        geometry = TimelineGeometry(key)
+        geometry.add_rect(x_start, y_start, bar_w, bar_h, color_background, border_radius)
         try:
-            from math import cos, sin
-            # Limit the radius to half the smaller dimension
-            max_radius = min(w, h) / 2.0
-            radius = min(radius, max_radius)
-            
-            if radius <= 0:
-                # If the radius is 0 or negative, draw a normal rectangle
-                self.draw_gpu_rect(x, y, w, h, color)
-                return
-            
-            vertices = []
-            indices = []
-            
-            # Number of segments for the rounded corners (more = smoother)
-            segments = max(4, int(radius / 2))  # Adjust according to radius size
-            
-            # Center of the rectangle to facilitate calculations
-            center_x = x + w / 2
-            center_y = y + h / 2
-            
-            # Create vertices for a rounded rectangle
-            # Lower left corner
-            for i in range(segments + 1):
-                angle = 3.14159 + i * (3.14159 / 2) / segments  # 180° to 270°
-                vx = x + radius + radius * cos(angle)
-                vy = y + radius + radius * sin(angle)
-                vertices.append((vx, vy))
-            
-            # Lower right corner
-            for i in range(segments + 1):
-                angle = 3.14159 * 1.5 + i * (3.14159 / 2) / segments  # 270° to 360°
-                vx = x + w - radius + radius * cos(angle)
-                vy = y + radius + radius * sin(angle)
-                vertices.append((vx, vy))
-            
-            # Upper right corner
-            for i in range(segments + 1):
-                angle = 0 + i * (3.14159 / 2) / segments  # 0° to 90°
-                vx = x + w - radius + radius * cos(angle)
-                vy = y + h - radius + radius * sin(angle)
-                vertices.append((vx, vy))
-            
-            # Upper left corner
-            for i in range(segments + 1):
-                angle = 3.14159 / 2 + i * (3.14159 / 2) / segments  # 90° to 180°
-                vx = x + radius + radius * cos(angle)
-                vy = y + h - radius + radius * sin(angle)
-                vertices.append((vx, vy))
-            
-            # Create triangles using the center as a common point
-            center_vertex_index = len(vertices)
-            vertices.append((center_x, center_y))
-            
-            # Connect all perimeter vertices with the center
-            total_perimeter_vertices = len(vertices) - 1
-            for i in range(total_perimeter_vertices):
-                next_i = (i + 1) % total_perimeter_vertices
-                indices.append((center_vertex_index, i, next_i))
-            
-            # Draw the rounded rectangle
-            shader = gpu.shader.from_builtin('UNIFORM_COLOR')
-            batch = batch_for_shader(shader, 'TRIS', {"pos": vertices}, indices=indices)
-            gpu.state.blend_set('ALPHA')
-            shader.bind()
-            shader.uniform_float("color", color)
-            batch.draw(shader)
-            
+            self.build_synchro_timeline_marks(geometry, x_start, y_start, bar_w, bar_h,
+                                              display_start, display_end, zoom_level, color_text, data)
         except Exception as e:
-            print(f"Error drawing rounded rectangle: {e}")
-            # Fallback to normal rectangle
-            self.draw_gpu_rect(x, y, w, h, color)
+            print(f"❌ Error building synchro timeline marks: {e}")
+        return geometry.finish()
 
     def draw_current_date_indicator(self, x, y_start, bar_h, color_indicator):
         """Draws the current date indicator as a vertical line with diamond"""
@@ -272,280 +346,127 @@ class TimelineHUD:
         except Exception as e:
             print(f"❌ Error drawing current date indicator: {e}")
 
-    def draw_synchro_timeline_marks(self, x_start, y_start, bar_w, bar_h, start_date, end_date, zoom_level, color_text, data=None):
-        """Draws Synchro 4D Pro style timestamps with lines and texts"""
-        try:
-            import os
-            import locale
-            import bpy
-            
-            duration_seconds = (end_date - start_date).total_seconds()
-            if duration_seconds <= 0:
-                return
+    def build_synchro_timeline_marks(self, geometry, x_start, y_start, bar_w, bar_h, start_date, end_date, zoom_level, color_text, data=None):
+        """Adds the Synchro 4D Pro style year, month, day and week marks with their texts to geometry"""
+        import locale
+        from datetime import time
 
-            def date_to_x(date):
-                progress = (date - start_date).total_seconds() / duration_seconds
-                return int(x_start + progress * bar_w)
+        data = data or {}
+        duration_seconds = (end_date - start_date).total_seconds()
+        if duration_seconds <= 0:
+            return
 
-            # Configure font
-            blf.size(self.font_id, 10)
-            blf.color(self.font_id, *color_text)
-            
-            # Force locale to English for consistent month names
-            original_locale = locale.getlocale(locale.LC_TIME)
-            try:
-                try:
-                    locale.setlocale(locale.LC_TIME, 'en_US.UTF-8')
-                except locale.Error:
-                    locale.setlocale(locale.LC_TIME, 'C')
+        def date_to_x(date):
+            progress = (date - start_date).total_seconds() / duration_seconds
+            return int(x_start + progress * bar_w)
 
-                # ====== DRAW YEARS WITH CHANGE INDICATORS ======
-                current_year = start_date.year
-                end_year = end_date.year
-                
-                print(f"🗺️ Dibujando años desde {current_year} hasta {end_year}")
-                print(f"🗺️ Rango de fechas: {start_date.strftime('%Y-%m-%d')} → {end_date.strftime('%Y-%m-%d')}")
-                print(f"🗺️ Timeline coordinates: x_start={x_start}, bar_w={bar_w}, y_start={y_start}, bar_h={bar_h}")
-                
-                years_drawn = 0
-                # Extend the loop by one year to draw the final marker
-                for year in range(current_year, end_year + 2):
-                    # Calculate the effective start date of the year within the timeline
-                    if year == current_year:
-                        # For the first year, use the timeline start date
-                        year_effective_start = start_date
-                        # Normalizar también el primer año para una alineación perfecta.
-                        from datetime import time
-                        year_effective_start = datetime.combine(start_date.date(), time.min)
-                    else:
-                        # For subsequent years, use January 1
-                        year_effective_start = datetime(year, 1, 1)
-                    
-                    # Only process if the year appears in the timeline
-                    if year_effective_start <= end_date:
-                        year_x = date_to_x(year_effective_start)
-                        print(f"🗺️ Año {year}: fecha_efectiva={year_effective_start.strftime('%Y-%m-%d')}, x={year_x}")
-                        
-                        # Check if it is within the visible area
-                        if x_start <= year_x <= x_start + bar_w:
-                            print(f"🗺️ ✅ Dibujando año {year} en x={year_x}")
-                            
-                            # Vertical year line (full height)
-                            year_line_color = (color_text[0], color_text[1], color_text[2], 0.8)
-                            self.draw_timeline_line(year_x, y_start, bar_h, year_line_color, 2.0)
-                            
-                            # YEAR TEXT with distinctive yellow color
-                            year_text = str(year)
-                            
-                            # Configure font for years (white color like lines and texts)
-                            blf.size(self.font_id, 12)
-                            year_color = color_text  # Usar el mismo color que otros textos (blanco)
-                            blf.color(self.font_id, *year_color)
-                            
-                            # Text position (just above the bar)
-                            text_x = year_x + 4
-                            text_y = y_start + bar_h + 4
-                            
-                            # Renderizar texto de año
-                            blf.position(self.font_id, text_x, text_y, 0)
-                            blf.draw(self.font_id, year_text)
-                            print(f"🗺️ ✅ Año {year} dibujado en ({text_x}, {text_y})")
-                            years_drawn += 1
-                            
-                            # Restore original configuration
-                            blf.size(self.font_id, 10)
-                            blf.color(self.font_id, *color_text)
-                            
-                        else:
-                            print(f"🗺️ ❌ Año {year} fuera del área visible (x={year_x})")
-                    else:
-                        print(f"🗺️ Año {year} fuera del rango temporal")
-                
-                print(f"🗺️ Total años dibujados: {years_drawn}")
+        def is_visible(x):
+            return x_start <= x <= x_start + bar_w
 
-                # ====== DRAW MONTHS ======
-                current_month = datetime(start_date.year, start_date.month, 1)
-                # Extend the loop by one month to ensure the final marker is drawn
-                loop_end_month = end_date + relativedelta(months=1)
-                
-                # Loop until the marker is past the end date's extended boundary
-                while current_month <= loop_end_month:
-                    month_x = date_to_x(current_month)
-                    
-                    if x_start <= month_x <= x_start + bar_w:
-                        # Vertical month line (3/4 height)
-                        line_height = bar_h * 0.75
-                        month_line_color = (color_text[0], color_text[1], color_text[2], 0.6)
-                        self.draw_timeline_line(month_x, y_start, line_height, month_line_color, 1.5)
-                        
-                        # Month text (positioned at the top of the bar)
-                        month_text = current_month.strftime('%b')  # Jan, Feb, etc.
-                        text_dims = blf.dimensions(self.font_id, month_text)
-                        text_x = month_x + 4
-                        text_y = y_start + bar_h - 18  # Movido más abajo para evitar solapamiento
-                        blf.color(self.font_id, color_text[0], color_text[1], color_text[2], color_text[3])
-                        blf.position(self.font_id, text_x, text_y, 0)
-                        blf.draw(self.font_id, month_text)
-                    
-                    # Advance to the next month
-                    if current_month.month == 12:
-                        current_month = datetime(current_month.year + 1, 1, 1)
-                    else:
-                        current_month = datetime(current_month.year, current_month.month + 1, 1)
-
-                # ====== DIBUJAR DÍAS ======
-                # Solo mostrar días si el zoom es muy detallado (e.g., <= 2 semanas)
-                if zoom_level == 'DETAILED':
-                    # Normalizar la fecha de inicio a medianoche para alinear las marcas de día.
-                    from datetime import time
-                    normalized_start_date = datetime.combine(start_date.date(), time.min)
-                    current_day_date = normalized_start_date
-                    day_counter = 0
-                    # Extend the loop by one day to ensure the final marker is drawn
-                    loop_end_day = end_date + timedelta(days=1)
-                    
-                    # Use the START date as a reference point for Day 0/1
-                    reference_start = data.get('viz_start') or data.get('start_date') or start_date
-                    full_start = data.get('full_schedule_start')
-                    
-                    # If there is a full schedule, use that as a reference for the day counter
-                    if full_start and full_start <= reference_start:
-                        actual_day_ref = full_start
-                    else:
-                        actual_day_ref = reference_start
-                    # Loop until the marker is past the end date's extended boundary
-                    while current_day_date <= loop_end_day:
-                        day_x = date_to_x(current_day_date)
-                        
-                        if x_start <= day_x <= x_start + bar_w:
-                            # Vertical day line (1/4 height)
-                            line_height = bar_h * 0.25
-                            day_line_color = (color_text[0], color_text[1], color_text[2], 0.2) # Color más claro
-                            self.draw_timeline_line(day_x, y_start, line_height, day_line_color, 0.5) # Línea más fina
-                            
-                            # Day text (D + number)
-                            delta_days_from_ref = (current_day_date.date() - actual_day_ref.date()).days
-                            day_number_display = max(1, delta_days_from_ref + 1) # Días comienzan en 1
-                            day_text = f"D{day_number_display}"
-                            
-                            text_x = day_x + 1
-                            text_y = y_start + 2 # Muy abajo en la barra, debajo de las semanas
-                            
-                            blf.color(self.font_id, color_text[0], color_text[1], color_text[2], color_text[3])
-                            blf.position(self.font_id, text_x, text_y, 0)
-                            blf.draw(self.font_id, day_text)
-                        
-                        current_day_date += timedelta(days=1)
-                        day_counter += 1
-
-                # ====== DRAW WEEKS (always visible with adaptive logic) ======
-                # Show weeks at all zoom levels but with different frequencies
-                duration_days = (end_date - start_date).days
-                if duration_days <= 365:  # <= 1 año: mostrar todas las semanas
-                    week_interval = 1
-                    show_week_text = True
-                elif duration_days <= 730:  # <= 2 años: mostrar cada 2 semanas
-                    week_interval = 2 
-                    show_week_text = True
-                else:  # > 2 años: mostrar cada 4 semanas (solo líneas, sin texto)
-                    week_interval = 4
-                    show_week_text = False
-                
-                # Decidimos la altura del texto de la semana según si los días son visibles
-                days_are_visible = (zoom_level == 'DETAILED')
-                if days_are_visible:
-                    y_pos_weeks = y_start + 15  # Posición elevada para no solapar con los días
+        text_rgb = tuple(color_text[:3])
+
+        # Force locale to English for consistent month names
+        original_locale = locale.getlocale(locale.LC_TIME)
+        try:
+            try:
+                locale.setlocale(locale.LC_TIME, 'en_US.UTF-8')
+            except locale.Error:
+                locale.setlocale(locale.LC_TIME, 'C')
+
+            # ====== YEARS WITH CHANGE INDICATORS ======
+            # Extend the loop by one year to draw the final marker
+            for year in range(start_date.year, end_date.year + 2):
+                if year == start_date.year:
+                    # The first year starts at the (normalized) timeline start
+                    year_effective_start = datetime.combine(start_date.date(), time.min)
                 else:
-                    y_pos_weeks = y_start + 5   # Posición original, más abajo
-                
-                # Use the START date as a reference point for Week 0/1
-                reference_start = data.get('viz_start') or data.get('start_date') or start_date
-                full_start = data.get('full_schedule_start')
-                
-                # CRITICAL: Use full schedule as reference if it exists
-                if full_start:
-                    actual_start = full_start
-                    print(f"🔄 Usando cronograma completo como referencia: {actual_start.strftime('%Y-%m-%d')}")
+                    year_effective_start = datetime(year, 1, 1)
+                if year_effective_start > end_date:
+                    continue
+                year_x = date_to_x(year_effective_start)
+                if is_visible(year_x):
+                    # Vertical year line (full height), text just above the bar
+                    geometry.add_line(year_x, y_start, bar_h, text_rgb + (0.8,), 2.0)
+                    geometry.add_label(str(year), year_x + 4, y_start + bar_h + 4, 12, color_text)
+
+            # ====== MONTHS ======
+            current_month = datetime(start_date.year, start_date.month, 1)
+            # Extend the loop by one month to ensure the final marker is drawn
+            loop_end_month = end_date + relativedelta(months=1)
+            while current_month <= loop_end_month:
+                month_x = date_to_x(current_month)
+                if is_visible(month_x):
+                    # Vertical month line (3/4 height), text at the top of the bar
+                    geometry.add_line(month_x, y_start, bar_h * 0.75, text_rgb + (0.6,), 1.5)
+                    geometry.add_label(current_month.strftime('%b'), month_x + 4, y_start + bar_h - 18, 10, color_text)
+                current_month += relativedelta(months=1)
+
+            # Use the START date as a reference point for Day / Week 0/1
+            reference_start = data.get('viz_start') or data.get('start_date') or start_date
+            full_start = data.get('full_schedule_start')
+
+            # ====== DÍAS ======
+            # Solo mostrar días si el zoom es muy detallado (e.g., <= 2 semanas)
+            if zoom_level == 'DETAILED':
+                # If there is a full schedule, use that as a reference for the day counter
+                if full_start and full_start <= reference_start:
+                    actual_day_ref = full_start
                 else:
-                    actual_start = reference_start
-                    print(f"🔄 Usando rango seleccionado como referencia: {actual_start.strftime('%Y-%m-%d')}")
-                
-                # Empezar desde la fecha de START configurada (no desde lunes ISO)
-                # Normalizar la fecha de inicio a medianoche para que los marcadores de semana
-                # se alineen con el comienzo del día, eliminando desfases por la hora.
-                from datetime import time
-                normalized_start_date = datetime.combine(actual_start.date(), time.min)
-                week_start_date = normalized_start_date
-                week_counter = 0
-                
-                print(f"🔄 Timeline weeks aligned from START date: {week_start_date.strftime('%Y-%m-%d')}")
-                
-                # Draw vertical lines every 7 days from the START date
-                while week_start_date <= end_date:
-                    week_x = date_to_x(week_start_date)
-                    
-                    if x_start <= week_x <= x_start + bar_w and week_counter % week_interval == 0:
-                        if show_week_text:
-                            # Vertical week line ALIGNED with the indicator
-                            line_height = bar_h * 0.5
-                            week_line_color = (color_text[0], color_text[1], color_text[2], 0.4)
-                            self.draw_timeline_line(week_x, y_start, line_height, week_line_color, 1.0)
-                            
-                            # Week text PERFECTLY ALIGNED with the vertical line
-                            try:
-                                # LÓGICA IDÉNTICA al Viewport HUD para garantizar sincronización perfecta
-                                if full_start:
-                                    # Con cronograma completo: usar la MISMA lógica exacta que get_schedule_data()
-                                    week_date = week_start_date.date()
-                                    fss_d = full_start.date()
-                                    
-                                    delta_days = (week_date - fss_d).days
-                                    if week_date < fss_d:
-                                        week_number_display = 0
-                                    else:
-                                        week_number_display = max(1, (delta_days // 7) + 1)
-                                    
-                                    week_text = f"W{week_number_display}"
-                                    
-                                else:
-                                    # Sin cronograma completo: usar rango seleccionado
-                                    ref_start_d = reference_start.date()
-                                    week_date = week_start_date.date()
-                                    
-                                    delta_days = (week_date - ref_start_d).days
-                                    if week_date < ref_start_d:
-                                        week_number_display = 0
-                                    else:
-                                        week_number_display = max(1, (delta_days // 7) + 1)
-                                    
-                                    week_text = f"W{week_number_display}"
-                                    
-                            except Exception as e:
-                                print(f"❌ Error calculando semana sincronizada: {e}")
-                                week_text = f"W{week_counter}"
-                                
-                            # POSITION EXACTLY ALIGNED with the vertical line
-                            text_x = week_x + 1  # Muy cerca de la línea para alineación perfecta
-                            text_y = y_pos_weeks  # Posicionado más abajo para evitar solapamiento con meses
-                            
-                            blf.color(self.font_id, color_text[0], color_text[1], color_text[2], color_text[3])
-                            blf.position(self.font_id, text_x, text_y, 0)
-                            blf.draw(self.font_id, week_text)
-                    
-                    # Next week start date (every 7 days)
-                    week_start_date += timedelta(days=7)
-                    week_counter += 1
+                    actual_day_ref = reference_start
+                # Normalizar la fecha de inicio a medianoche para alinear las marcas de día.
+                current_day_date = datetime.combine(start_date.date(), time.min)
+                # Extend the loop by one day to ensure the final marker is drawn
+                loop_end_day = end_date + timedelta(days=1)
+                while current_day_date <= loop_end_day:
+                    day_x = date_to_x(current_day_date)
+                    if is_visible(day_x):
+                        # Vertical day line (1/4 height), text at the bottom of the bar
+                        geometry.add_line(day_x, y_start, bar_h * 0.25, text_rgb + (0.2,), 0.5)
+                        day_number_display = max(1, (current_day_date.date() - actual_day_ref.date()).days + 1)
+                        geometry.add_label(f"D{day_number_display}", day_x + 1, y_start + 2, 10, color_text)
+                    current_day_date += timedelta(days=1)
 
-            finally:
-                # Restore original locale
-                try:
-                    if original_locale[0]:
-                        locale.setlocale(locale.LC_TIME, original_locale)
-                except Exception:
-                    pass
-                    
-        except Exception as e:
-            print(f"❌ Error drawing synchro timeline marks: {e}")
+            # ====== WEEKS (always visible with adaptive logic) ======
+            duration_days = (end_date - start_date).days
+            if duration_days <= 365:  # <= 1 año: mostrar todas las semanas
+                week_interval = 1
+                show_week_text = True
+            elif duration_days <= 730:  # <= 2 años: mostrar cada 2 semanas
+                week_interval = 2
+                show_week_text = True
+            else:  # > 2 años: sin semanas
+                week_interval = 4
+                show_week_text = False
+            if not show_week_text:
+                return
+
+            # Week text above the day texts when days are visible
+            y_pos_weeks = y_start + 15 if zoom_level == 'DETAILED' else y_start + 5
+
+            # CRITICAL: Use full schedule as reference if it exists (same numbering as the viewport HUD)
+            actual_start = full_start or reference_start
+            week_ref = actual_start.date()
+            # Weeks start at the START date normalized to midnight (not at ISO Mondays)
+            week_start_date = datetime.combine(week_ref, time.min)
+            week_counter = 0
+            while week_start_date <= end_date:
+                week_x = date_to_x(week_start_date)
+                if is_visible(week_x) and week_counter % week_interval == 0:
+                    # Vertical week line (1/2 height) aligned with its text
+                    geometry.add_line(week_x, y_start, bar_h * 0.5, text_rgb + (0.4,), 1.0)
+                    delta_days = (week_start_date.date() - week_ref).days
+                    week_number_display = 0 if delta_days < 0 else max(1, (delta_days // 7) + 1)
+                    geometry.add_label(f"W{week_number_display}", week_x + 1, y_pos_weeks, 10, color_text)
+                week_start_date += timedelta(days=7)
+                week_counter += 1
+
+        finally:
+            # Restore original locale
+            try:
+                if original_locale[0]:
+                    locale.setlocale(locale.LC_TIME, original_locale)
+            except Exception:
+                pass
 
     def draw_timeline_line(self, x, y, height, color, width=1.0):
         """Draws a vertical line on the timeline"""
@@ -660,21 +581,26 @@ class TimelineHUD:
                 print("⚠️ Timeline: Missing date range data")
                 return
             
-            # Draw different timeline levels based on settings
+            # Draw different timeline levels based on settings, one batch per bar color
+            geometry = TimelineGeometry()
             if settings.get('show_years', True):
-                self.draw_year_bars(full_start, full_end, current_date, x, y, width, height, settings)
+                self.draw_year_bars(full_start, full_end, current_date, x, y, width, height, settings, geometry)
             
             if settings.get('show_months', True):
-                self.draw_month_bars(full_start, full_end, current_date, x, y, width, height, settings)
+                self.draw_month_bars(full_start, full_end, current_date, x, y, width, height, settings, geometry)
             
             if settings.get('show_weeks', True):
-                self.draw_week_bars(full_start, full_end, current_date, x, y, width, height, settings)
+                self.draw_week_bars(full_start, full_end, current_date, x, y, width, height, settings, geometry)
+            geometry.finish().draw(self.font_id)
                 
         except Exception as e:
             print(f"❌ Error drawing timeline bars: {e}")
     
-    def draw_year_bars(self, full_start, full_end, current_date, x, y, width, height, settings):
-        """Draw year-level timeline bars"""
+    def draw_year_bars(self, full_start, full_end, current_date, x, y, width, height, settings, geometry=None):
+        """Draw year-level timeline bars, or add them to geometry"""
+        own_geometry = geometry is None
+        if own_geometry:
+            geometry = TimelineGeometry()
         try:
             total_days = (full_end - full_start).days
             if total_days <= 0:
@@ -719,13 +645,13 @@ class TimelineHUD:
                         year_color = settings.get('year_future_color', (0.2, 0.4, 0.8, 0.6))
                     
                     # Draw year bar
-                    self.draw_bar(bar_x, year_y, bar_width, year_height, year_color)
+                    geometry.add_rect(bar_x, year_y, bar_width, year_height, year_color)
                     
                     # Draw year label if enabled
                     if settings.get('show_year_labels', True) and bar_width > 30:
                         label_x = bar_x + 4
                         label_y = year_y + year_height + 4
-                        self.draw_timeline_label(str(current_year), label_x, label_y, settings.get('year_text_color', (1.0, 1.0, 1.0, 1.0)))
+                        geometry.add_label(str(current_year), label_x, label_y, 12, settings.get('year_text_color', (1.0, 1.0, 1.0, 1.0)))
                     
                     current_year += 1
                     
@@ -736,9 +662,14 @@ class TimelineHUD:
                     
         except Exception as e:
             print(f"❌ Error in draw_year_bars: {e}")
+        if own_geometry:
+            geometry.finish().draw(self.font_id)
     
-    def draw_month_bars(self, full_start, full_end, current_date, x, y, width, height, settings):
-        """Draw month-level timeline bars"""
+    def draw_month_bars(self, full_start, full_end, current_date, x, y, width, height, settings, geometry=None):
+        """Draw month-level timeline bars, or add them to geometry"""
+        own_geometry = geometry is None
+        if own_geometry:
+            geometry = TimelineGeometry()
         try:
             total_days = (full_end - full_start).days
             if total_days <= 0:
@@ -781,14 +712,14 @@ class TimelineHUD:
                         month_color = settings.get('month_future_color', (0.1, 0.3, 0.6, 0.5))
                     
                     # Draw month bar
-                    self.draw_bar(bar_x, month_y, bar_width, month_height, month_color)
+                    geometry.add_rect(bar_x, month_y, bar_width, month_height, month_color)
                     
                     # Draw month label if enabled and bar is wide enough
                     if settings.get('show_month_labels', True) and bar_width > 20:
                         month_name = current.strftime('%b')
                         label_x = bar_x + 2
                         label_y = month_y + month_height / 2 - 6
-                        self.draw_timeline_label(month_name, label_x, label_y, settings.get('month_text_color', (1.0, 1.0, 1.0, 0.9)))
+                        geometry.add_label(month_name, label_x, label_y, 12, settings.get('month_text_color', (1.0, 1.0, 1.0, 0.9)))
                     
                     # Move to next month
                     if current.month == 12:
@@ -802,9 +733,14 @@ class TimelineHUD:
                     
         except Exception as e:
             print(f"❌ Error in draw_month_bars: {e}")
+        if own_geometry:
+            geometry.finish().draw(self.font_id)
     
-    def draw_week_bars(self, full_start, full_end, current_date, x, y, width, height, settings):
-        """Draw week-level timeline bars"""
+    def draw_week_bars(self, full_start, full_end, current_date, x, y, width, height, settings, geometry=None):
+        """Draw week-level timeline bars, or add them to geometry"""
+        own_geometry = geometry is None
+        if own_geometry:
+            geometry = TimelineGeometry()
         try:
             total_days = (full_end - full_start).days
             if total_days <= 0:
@@ -850,13 +786,13 @@ class TimelineHUD:
                         week_color = settings.get('week_future_color', (0.0, 0.2, 0.4, 0.4))
                     
                     # Draw week bar
-                    self.draw_bar(bar_x, week_y, bar_width, week_height, week_color)
+                    geometry.add_rect(bar_x, week_y, bar_width, week_height, week_color)
                     
                     # Draw week label if enabled and bar is wide enough
                     if settings.get('show_week_labels', True) and bar_width > 15:
                         label_x = bar_x + 1
                         label_y = week_y + week_height / 2 - 4
-                        self.draw_timeline_label(f"W{week_number}", label_x, label_y, settings.get('week_text_color', (1.0, 1.0, 1.0, 0.8)), small=True)
+                        geometry.add_label(f"W{week_number}", label_x, label_y, 10, settings.get('week_text_color', (1.0, 1.0, 1.0, 0.8)))
                     
                     current += timedelta(days=7)
                     week_number += 1
@@ -869,6 +805,8 @@ class TimelineHUD:
                     
         except Exception as e:
             print(f"❌ Error in draw_week_bars: {e}")
+        if own_geometry:
+            geometry.finish().draw(self.font_id)
     
     def draw_bar(self, x, y, width, height, color):
         """Draw a single timeline bar"""
@@ -924,66 +862,7 @@ class TimelineHUD:
     def draw_rounded_rect(self, x, y, w, h, color, radius):
         """Draws a rectangle with rounded corners using approximation with multiple triangles."""
         try:
-            from math import cos, sin
-            # Limit the radius to half the smaller dimension
-            max_radius = min(w, h) / 2.0
-            radius = min(radius, max_radius)
-            
-            if radius <= 0:
-                # If the radius is 0 or negative, draw a normal rectangle
-                self.draw_gpu_rect(x, y, w, h, color)
-                return
-            
-            vertices = []
-            indices = []
-            
-            # Number of segments for the rounded corners (more = smoother)
-            segments = max(4, int(radius / 2))  # Adjust according to radius size
-            
-            # Center of the rectangle to facilitate calculations
-            center_x = x + w / 2
-            center_y = y + h / 2
-            
-            # Create vertices for a rounded rectangle
-            # Lower left corner
-            for i in range(segments + 1):
-                angle = 3.14159 + i * (3.14159 / 2) / segments  # 180° to 270°
-                vx = x + radius + radius * cos(angle)
-                vy = y + radius + radius * sin(angle)
-                vertices.append((vx, vy))
-            
-            # Lower right corner
-            for i in range(segments + 1):
-                angle = 3.14159 * 1.5 + i * (3.14159 / 2) / segments  # 270° to 360°
-                vx = x + w - radius + radius * cos(angle)
-                vy = y + radius + radius * sin(angle)
-                vertices.append((vx, vy))
-            
-            # Upper right corner
-            for i in range(segments + 1):
-                angle = 0 + i * (3.14159 / 2) / segments  # 0° to 90°
-                vx = x + w - radius + radius * cos(angle)
-                vy = y + h - radius + radius * sin(angle)
-                vertices.append((vx, vy))
-            
-            # Upper left corner
-            for i in range(segments + 1):
-                angle = 3.14159 / 2 + i * (3.14159 / 2) / segments  # 90° to 180°
-                vx = x + radius + radius * cos(angle)
-                vy = y + h - radius + radius * sin(angle)
-                vertices.append((vx, vy))
-            
-            # Create triangles using the center as a common point
-            center_vertex_index = len(vertices)
-            vertices.append((center_x, center_y))
-            
-            # Connect all perimeter vertices with the center
-            total_perimeter_vertices = len(vertices) - 1
-            for i in range(total_perimeter_vertices):
-                next_i = (i + 1) % total_perimeter_vertices
-                indices.append((center_vertex_index, i, next_i))
-            
-            # Draw the rounded rectangle
+            vertices, indices = rect_vertices(x, y, w, h, radius)
             shader = gpu.shader.from_builtin('UNIFORM_COLOR')
             batch = batch_for_shader(shader, 'TRIS', {"pos": vertices}, indices=indices)
             gpu.state.blend_set('ALPHA')
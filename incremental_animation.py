@@ -0,0 +1,166 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# Incremental 4D Animation State.
+# Keeps the product-frame table and per-task ColorType signatures of the last
+# compiled animation so schedule edits can be diffed against it and only the
+# affected products re-keyframed.
+
+from typing import Any, Dict, Optional, Set
+
+import bpy
+import numpy as np
+from bpy.app.handlers import persistent
+
+from bonsai.bim.module.sequence import frame_table
+
+# Keyframing path of the full build, which the incremental update re-keys products through:
+# apply_ColorType_animation (animate_objects_with_ColorTypes) or
+# _plan_state_animation_optimized (animate_objects_with_ColorTypes_optimized)
+APPEARANCE_STANDARD = "standard"
+APPEARANCE_OPTIMIZED = "optimized"
+
+
+def _freeze(value):
+    if isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        return value
+    try:
+        return tuple(_freeze(v) for v in value)
+    except TypeError:
+        return repr(value)
+
+
+def colortype_signature(colortype) -> Optional[tuple]:
+    """Hashable snapshot of every setting of a ColorType (RNA PropertyGroup or loaded group entry)"""
+    if colortype is None:
+        return None
+    if hasattr(colortype, "bl_rna"):
+        names = [prop.identifier for prop in colortype.bl_rna.properties if prop.identifier != "rna_type"]
+    else:
+        names = [name for name in dir(colortype) if not name.startswith("_")]
+    signature = []
+    for name in sorted(names):
+        value = getattr(colortype, name, None)
+        if callable(value):
+            continue
+        signature.append((name, _freeze(value)))
+    return tuple(signature)
+
+
+class CompiledAnimationState:
+    """Last compiled 4D animation: product-frame table, settings and ColorType signatures per task"""
+
+    def __init__(self) -> None:
+        self.table: Optional[frame_table.ProductFrameTable] = None
+        self.settings: Dict[str, Any] = {}
+        self.work_schedule_id: Optional[int] = None
+        # Name of the Sequence frame builder the animation was compiled with
+        self.frame_builder = "get_animation_product_frames_enhanced"
+        self.appearance = APPEARANCE_STANDARD
+        self.active_group: Optional[str] = None
+        self.colortype_signatures: Dict[int, Optional[tuple]] = {}
+        self.update_pending = False
+        self.stats = {
+            "incremental_updates": 0,
+            "products_rewritten": 0,
+            "last_products_rewritten": 0,
+            "last_update_time": 0.0,
+        }
+
+    @property
+    def is_valid(self) -> bool:
+        return self.table is not None
+
+    def store(self, table, settings: Dict[str, Any], work_schedule_id: int, active_group: str,
+              colortype_signatures: Dict[int, Optional[tuple]], frame_builder: Optional[str] = None,
+              appearance: Optional[str] = None) -> None:
+        """Stores a compile; frame_builder and appearance are kept from the previous one when not given"""
+        self.table = frame_table.as_frame_table(table)
+        self.settings = dict(settings)
+        self.work_schedule_id = work_schedule_id
+        if frame_builder:
+            self.frame_builder = frame_builder
+        if appearance:
+            self.appearance = appearance
+        self.active_group = active_group
+        self.colortype_signatures = dict(colortype_signatures)
+
+    def changed_colortype_tasks(self, colortype_signatures: Dict[int, Optional[tuple]]) -> Set[int]:
+        """Task ids whose resolved ColorType differs from the stored compile"""
+        task_ids = set(self.colortype_signatures) | set(colortype_signatures)
+        return {
+            task_id for task_id in task_ids
+            if self.colortype_signatures.get(task_id) != colortype_signatures.get(task_id)
+        }
+
+    def affected_products(self, new_table, colortype_signatures: Dict[int, Optional[tuple]]) -> np.ndarray:
+        """Products whose frame rows changed plus products of tasks whose ColorType changed"""
+        new_table = frame_table.as_frame_table(new_table)
+        changed = self.table.diff_products(new_table)
+        changed_tasks = self.changed_colortype_tasks(colortype_signatures)
+        if changed_tasks:
+            changed = np.union1d(changed, self.table.products_for_tasks(changed_tasks))
+            changed = np.union1d(changed, new_table.products_for_tasks(changed_tasks))
+        return changed.astype(np.int64)
+
+    def record_update(self, product_count: int, elapsed: float) -> None:
+        self.stats["incremental_updates"] += 1
+        self.stats["products_rewritten"] += int(product_count)
+        self.stats["last_products_rewritten"] = int(product_count)
+        self.stats["last_update_time"] = elapsed
+
+    def clear(self) -> None:
+        self.table = None
+        self.settings = {}
+        self.work_schedule_id = None
+        self.active_group = None
+        self.colortype_signatures = {}
+        self.update_pending = False
+
+
+# Global instance
+_compiled_animation = None
+
+
+def get_compiled_animation() -> CompiledAnimationState:
+    global _compiled_animation
+    if _compiled_animation is None:
+        _compiled_animation = CompiledAnimationState()
+    return _compiled_animation
+
+
+def invalidate_compiled_animation() -> None:
+    if _compiled_animation is not None:
+        _compiled_animation.clear()
+
+
+@persistent
+def compiled_animation_load_handler(*args):
+    # The compiled animation belongs to the previous file; step ids of another file can match its tasks
+    invalidate_compiled_animation()
+
+
+def register() -> None:
+    if compiled_animation_load_handler not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(compiled_animation_load_handler)
+
+
+def unregister() -> None:
+    if compiled_animation_load_handler in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(compiled_animation_load_handler)
+    invalidate_compiled_animation()
@@ -0,0 +1,172 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# Product State Interval Index for Live Updates.
+# Every non-empty (row, state) frame range of a ProductFrameTable becomes an
+# interval. Sorted boundary frames answer "which products change state between
+# frame A and frame B" with a binary search plus the changes themselves, and
+# per-product interval ranges answer "what is the state of these products at F"
+# without scanning the others.
+
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from bonsai.bim.module.sequence import frame_table
+
+NO_STATE = -1
+
+
+class ProductIntervalIndex:
+    """Interval index over the before_start / active / after_end ranges of a ProductFrameTable"""
+
+    def __init__(self, table: frame_table.ProductFrameTable) -> None:
+        self.table = table
+        self.products = table.products
+        n_rows = table.row_count
+
+        starts = table.states[:, :, 0].reshape(-1).astype(np.int64)
+        ends = table.states[:, :, 1].reshape(-1).astype(np.int64)
+        valid = ends >= starts
+        # Intervals stay in (row, state) order, so the first match of a product is the
+        # one the legacy live handler picked: first frame_data, then state order
+        self.interval_row = np.repeat(np.arange(n_rows, dtype=np.int64), 3)[valid]
+        self.interval_state = np.tile(np.arange(3, dtype=np.int8), n_rows)[valid]
+        self.interval_start = starts[valid]
+        self.interval_end = ends[valid]
+        self.interval_product = table.row_product_index()[self.interval_row] if n_rows else np.zeros(0, dtype=np.int64)
+        # Intervals of products[i] are product_offsets[i]:product_offsets[i+1]
+        self.product_offsets = np.searchsorted(
+            self.interval_product, np.arange(len(self.products) + 1)
+        ).astype(np.int64)
+
+        # Membership of a product changes when one of its intervals starts (start) or ends (end + 1)
+        boundary_frame = np.concatenate([self.interval_start, self.interval_end + 1])
+        boundary_product = np.concatenate([self.interval_product, self.interval_product])
+        order = np.argsort(boundary_frame, kind="stable")
+        self.boundary_frame = boundary_frame[order]
+        self.boundary_product = boundary_product[order]
+
+        # Playback bookkeeping of the live handler
+        self.applied_frame: Optional[int] = None
+        self.applied_group: Optional[str] = None
+        self.colortypes: Dict[Any, Any] = {}
+        self.objects: Dict[int, Any] = {}
+
+    def __len__(self) -> int:
+        return int(len(self.interval_start))
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(a.nbytes for a in (
+            self.interval_row, self.interval_state, self.interval_start, self.interval_end,
+            self.interval_product, self.product_offsets, self.boundary_frame, self.boundary_product,
+        )))
+
+    def changed_products(self, frame_a: int, frame_b: int) -> np.ndarray:
+        """Product indices whose interval membership differs between two frames (either scrub direction)"""
+        lo, hi = sorted((int(frame_a), int(frame_b)))
+        first = np.searchsorted(self.boundary_frame, lo, side="right")
+        last = np.searchsorted(self.boundary_frame, hi, side="right")
+        return np.unique(self.boundary_product[first:last])
+
+    def state_at(self, product_indices: np.ndarray, frame: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (row, state) of each given product at a frame: the table row and state code
+        (frame_table.STATE_*) of its first interval containing the frame, NO_STATE when none does.
+        """
+        product_indices = np.asarray(product_indices, dtype=np.int64)
+        rows = np.full(len(product_indices), NO_STATE, dtype=np.int64)
+        states = np.full(len(product_indices), NO_STATE, dtype=np.int8)
+        if not len(product_indices):
+            return rows, states
+
+        lo = self.product_offsets[product_indices]
+        counts = self.product_offsets[product_indices + 1] - lo
+        total = int(counts.sum())
+        if not total:
+            return rows, states
+        owner = np.repeat(np.arange(len(product_indices)), counts)
+        intervals = np.repeat(lo, counts) + (np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts))
+
+        contains = (self.interval_start[intervals] <= frame) & (frame <= self.interval_end[intervals])
+        hit_owner = owner[contains]
+        hit_interval = intervals[contains]
+        first_owner, first_pos = np.unique(hit_owner, return_index=True)
+        rows[first_owner] = self.interval_row[hit_interval[first_pos]]
+        states[first_owner] = self.interval_state[hit_interval[first_pos]]
+        return rows, states
+
+    def take_changes(self, frame: int, active_group: Optional[str] = None) -> np.ndarray:
+        """
+        Products to re-evaluate when playback reaches a frame: all of them on the first call or after
+        a ColorType group switch, else only those whose state changed since the last applied frame.
+        """
+        if self.applied_frame is None or active_group != self.applied_group:
+            if active_group != self.applied_group:
+                self.colortypes.clear()
+            changed = np.arange(len(self.products), dtype=np.int64)
+        else:
+            changed = self.changed_products(self.applied_frame, frame)
+        self.applied_frame = int(frame)
+        self.applied_group = active_group
+        return changed
+
+    def reset_playback(self) -> None:
+        """Forces the next take_changes to re-evaluate every product"""
+        self.applied_frame = None
+        self.colortypes.clear()
+
+
+class LiveIntervalIndexCache:
+    """Interval index of the animation the live handler plays, rebuilt when its source changes"""
+
+    def __init__(self) -> None:
+        self.index: Optional[ProductIntervalIndex] = None
+        self.source_key = None
+
+    def get(self, source_key, build_table) -> Optional[ProductIntervalIndex]:
+        """Index for source_key; build_table() is only called when the source changed"""
+        if self.index is None or source_key != self.source_key:
+            table = build_table()
+            if table is None or not len(table):
+                self.clear()
+                return None
+            self.index = ProductIntervalIndex(frame_table.as_frame_table(table))
+            self.source_key = source_key
+        return self.index
+
+    def clear(self) -> None:
+        self.index = None
+        self.source_key = None
+
+
+# Global instance
+_live_interval_index = None
+
+
+def get_live_interval_index_cache() -> LiveIntervalIndexCache:
+    global _live_interval_index
+    if _live_interval_index is None:
+        _live_interval_index = LiveIntervalIndexCache()
+    return _live_interval_index
+
+
+def invalidate_live_interval_index() -> None:
+    if _live_interval_index is not None:
+        _live_interval_index.clear()
@@ -0,0 +1,307 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# Bulk F-Curve Writer for 4D Animation.
+# Groups keyframe operations by object and writes each F-curve with one
+# keyframe_points.add(n) and foreach_set() call instead of one
+# obj.keyframe_insert() RNA call per keyframe.
+
+import bpy
+import time
+import hashlib
+from array import array
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Blender's BEZT_IPO_CONST enum value for keyframe_points.foreach_set("interpolation", ...)
+INTERPOLATION_CONSTANT = 0
+
+VISIBILITY_DATA_PATHS = ("hide_viewport", "hide_render")
+
+
+class BulkKeyframeWriter:
+    """Collects visibility/color keyframes per object and writes the Actions directly"""
+
+    def __init__(self) -> None:
+        # obj pointer -> (obj, {(data_path, index): {frame: value}})
+        self._channels: Dict[int, Tuple[Any, Dict[Tuple[str, int], Dict[float, float]]]] = {}
+        self.stats: Dict[str, Any] = {}
+        # Objects that get keys outside the writer must keep their own Action
+        self._unique: set = set()
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def clear(self) -> None:
+        self._channels.clear()
+        self._unique.clear()
+
+    def keep_unique(self, obj) -> None:
+        """Excludes an object from Action sharing"""
+        self._unique.add(obj.as_pointer())
+
+    def discard(self, obj) -> None:
+        """Drops the keys queued for an object, like animation_data_clear() before re-keying it"""
+        self._channels.pop(obj.as_pointer(), None)
+
+    def _object_channels(self, obj) -> Dict[Tuple[str, int], Dict[float, float]]:
+        entry = self._channels.get(obj.as_pointer())
+        if entry is None:
+            entry = (obj, {})
+            self._channels[obj.as_pointer()] = entry
+        return entry[1]
+
+    def add(self, obj, data_path: str, frame, value, index: int = 0) -> None:
+        """Adds a keyframe. Like keyframe_insert, a later key on the same frame replaces the earlier one."""
+        self._object_channels(obj).setdefault((data_path, index), {})[float(frame)] = float(value)
+
+    def add_visibility(self, obj, frame, hide: bool) -> None:
+        channels = self._object_channels(obj)
+        for data_path in VISIBILITY_DATA_PATHS:
+            channels.setdefault((data_path, 0), {})[float(frame)] = 1.0 if hide else 0.0
+
+    def add_color(self, obj, frame, color: Iterable[float]) -> None:
+        channels = self._object_channels(obj)
+        color = list(color)
+        if len(color) < 4:
+            color = color[:3] + [1.0]
+        for index in range(4):
+            channels.setdefault(("color", index), {})[float(frame)] = float(color[index])
+
+    def add_operations(self, visibility_ops: List[Dict[str, Any]], color_ops: List[Dict[str, Any]]) -> None:
+        """Adds the {'obj', 'frame', 'hide'} / {'obj', 'frame', 'color'} op lists used by the animation planners"""
+        for op in visibility_ops:
+            self.add_visibility(op['obj'], op['frame'], op['hide'])
+        for op in color_ops:
+            self.add_color(op['obj'], op['frame'], op['color'])
+
+    def add_animation_plan(self, animation_plan: Dict[int, Dict[str, List]]) -> None:
+        """Adds a {frame: {action: [objects]}} plan from Sequence.build_animation_plan in frame order"""
+        for frame in sorted(animation_plan.keys()):
+            frame_actions = animation_plan[frame]
+            for obj in frame_actions.get("HIDE", []):
+                self.add_visibility(obj, frame, True)
+            for obj in frame_actions.get("REVEAL", []):
+                self.add_visibility(obj, frame, False)
+            for obj, color in frame_actions.get("SET_COLOR", []):
+                self.add_color(obj, frame, color)
+
+    def compile_object(self, obj) -> Dict[Tuple[str, int], Tuple[List[float], List[float]]]:
+        """Sorted (frames, values) per channel of one object"""
+        entry = self._channels.get(obj.as_pointer())
+        if entry is None:
+            return {}
+        compiled = {}
+        for key, keys_by_frame in sorted(entry[1].items()):
+            frames = sorted(keys_by_frame)
+            compiled[key] = (frames, [keys_by_frame[f] for f in frames])
+        return compiled
+
+    def write(self, replace_existing: bool = True, share_identical: bool = False) -> Dict[str, Any]:
+        """
+        Creates one Action per object and fills its F-curves in bulk. Returns write statistics.
+        With replace_existing=False, keys already on the object's F-curves are kept unless
+        a new key lands on the same frame.
+        With share_identical=True, objects whose compiled timelines hash the same are
+        assigned one shared Action (only when replacing existing animation).
+        """
+        start_time = time.time()
+        share_identical = share_identical and replace_existing
+        objects_written = 0
+        objects_shared = 0
+        fcurves_written = 0
+        keyframes_written = 0
+        shared_actions: Dict[str, Any] = {}
+
+        for pointer, (obj, _) in self._channels.items():
+            compiled = self.compile_object(obj)
+            if not compiled:
+                continue
+
+            timeline_hash = None
+            if share_identical and pointer not in self._unique:
+                timeline_hash = timeline_digest(compiled)
+                shared = shared_actions.get(timeline_hash)
+                if shared is not None:
+                    _assign_shared_action(obj, *shared)
+                    objects_written += 1
+                    objects_shared += 1
+                    continue
+
+            action = self._prepare_action(obj, replace_existing)
+            if timeline_hash is not None:
+                action.name = f"4D_Shared_{timeline_hash[:12]}"
+            for (data_path, index), (frames, values) in compiled.items():
+                fcurve = _ensure_fcurve(action, obj, data_path, index)
+                if not replace_existing and len(fcurve.keyframe_points):
+                    frames, values = _merge_existing_keys(fcurve, frames, values)
+                _fill_fcurve(fcurve, frames, values)
+                fcurves_written += 1
+                keyframes_written += len(frames)
+            objects_written += 1
+            if timeline_hash is not None:
+                shared_actions[timeline_hash] = (action, getattr(obj.animation_data, "action_slot", None))
+
+        elapsed = time.time() - start_time
+        self.stats = {
+            "objects": objects_written,
+            "actions": objects_written - objects_shared,
+            "shared_objects": objects_shared,
+            "fcurves": fcurves_written,
+            "keyframes": keyframes_written,
+            "time": elapsed,
+            "keyframes_per_second": keyframes_written / elapsed if elapsed > 0 else 0,
+        }
+        print(f"[INFO] BULK KEYFRAMES: {keyframes_written} keyframes on {fcurves_written} F-curves "
+              f"({objects_written} objects, {self.stats['actions']} actions) in {elapsed:.3f}s")
+        return self.stats
+
+    def _prepare_action(self, obj, replace_existing: bool):
+        if replace_existing and obj.animation_data:
+            obj.animation_data_clear()
+        anim_data = obj.animation_data or obj.animation_data_create()
+        action = anim_data.action
+        if action is None:
+            action = bpy.data.actions.new(name=f"{obj.name}Action")
+            anim_data.action = action
+        return action
+
+
+def timeline_digest(compiled: Dict[Tuple[str, int], Tuple[List[float], List[float]]]) -> str:
+    """Stable hash of a compiled per-channel timeline"""
+    digest = hashlib.sha1()
+    for (data_path, index), (frames, values) in compiled.items():
+        digest.update(f"{data_path}[{index}]:{len(frames)};".encode())
+        digest.update(array("d", frames).tobytes())
+        digest.update(array("d", values).tobytes())
+    return digest.hexdigest()
+
+
+def _assign_shared_action(obj, action, action_slot) -> None:
+    if obj.animation_data:
+        obj.animation_data_clear()
+    anim_data = obj.animation_data_create()
+    anim_data.action = action
+    # Blender 4.4+ layered actions: every sharing object uses the same slot
+    if action_slot is not None and hasattr(anim_data, "action_slot"):
+        anim_data.action_slot = action_slot
+
+
+def _ensure_fcurve(action, obj, data_path: str, index: int):
+    # Blender 4.4+ layered actions
+    if hasattr(action, "fcurve_ensure_for_datablock"):
+        return action.fcurve_ensure_for_datablock(obj, data_path, index=index)
+    fcurve = action.fcurves.find(data_path, index=index)
+    if fcurve is None:
+        fcurve = action.fcurves.new(data_path, index=index)
+    return fcurve
+
+
+def _merge_existing_keys(fcurve, frames: List[float], values: List[float]) -> Tuple[List[float], List[float]]:
+    points = fcurve.keyframe_points
+    co = [0.0] * (2 * len(points))
+    points.foreach_get("co", co)
+    merged = dict(zip(co[0::2], co[1::2]))
+    merged.update(zip(frames, values))
+    merged_frames = sorted(merged)
+    return merged_frames, [merged[f] for f in merged_frames]
+
+
+def _fill_fcurve(fcurve, frames: List[float], values: List[float]) -> None:
+    points = fcurve.keyframe_points
+    if len(points):
+        points.clear()
+    n = len(frames)
+    points.add(n)
+    co = [0.0] * (2 * n)
+    co[0::2] = frames
+    co[1::2] = values
+    points.foreach_set("co", co)
+    points.foreach_set("interpolation", [INTERPOLATION_CONSTANT] * n)
+    fcurve.update()
+
+
+def benchmark_keyframe_throughput(object_count: int = 200, keys_per_object: int = 20) -> Dict[str, Dict[str, float]]:
+    """
+    Writes the same visibility + color timeline with obj.keyframe_insert() and with
+    BulkKeyframeWriter on temporary objects and returns keyframes/second for both paths.
+    """
+    collection = bpy.data.collections.new("4D_KeyframeBenchmark")
+    bpy.context.scene.collection.children.link(collection)
+    objects = []
+    # Actions of both passes, removed with the objects
+    actions = []
+    try:
+        for i in range(object_count):
+            obj = bpy.data.objects.new(f"4D_KeyframeBenchmark_{i}", None)
+            collection.objects.link(obj)
+            objects.append(obj)
+
+        timeline = []
+        for k in range(keys_per_object):
+            hide = k % 2 == 0
+            shade = k / max(1, keys_per_object - 1)
+            timeline.append((k * 10, hide, (shade, 1.0 - shade, 0.5, 1.0)))
+        keyframes_per_path = object_count * keys_per_object * (len(VISIBILITY_DATA_PATHS) + 4)
+
+        start = time.time()
+        for obj in objects:
+            for frame, hide, color in timeline:
+                obj.hide_viewport = hide
+                obj.hide_render = hide
+                obj.keyframe_insert(data_path="hide_viewport", frame=frame)
+                obj.keyframe_insert(data_path="hide_render", frame=frame)
+                obj.color = color
+                obj.keyframe_insert(data_path="color", frame=frame)
+        legacy_time = time.time() - start
+
+        for obj in objects:
+            if obj.animation_data and obj.animation_data.action:
+                actions.append(obj.animation_data.action)
+            obj.animation_data_clear()
+
+        start = time.time()
+        writer = BulkKeyframeWriter()
+        for obj in objects:
+            for frame, hide, color in timeline:
+                writer.add_visibility(obj, frame, hide)
+                writer.add_color(obj, frame, color)
+        writer.write()
+        bulk_time = time.time() - start
+
+        return {
+            "keyframe_insert": {
+                "keyframes": keyframes_per_path,
+                "time": legacy_time,
+                "keyframes_per_second": keyframes_per_path / legacy_time if legacy_time > 0 else 0,
+            },
+            "bulk_writer": {
+                "keyframes": keyframes_per_path,
+                "time": bulk_time,
+                "keyframes_per_second": keyframes_per_path / bulk_time if bulk_time > 0 else 0,
+            },
+        }
+    finally:
+        for obj in objects:
+            if obj.animation_data and obj.animation_data.action:
+                actions.append(obj.animation_data.action)
+            bpy.data.objects.remove(obj, do_unlink=True)
+        # Shared actions of the bulk pass are listed once per object
+        for action in {action.as_pointer(): action for action in actions}.values():
+            if action.users == 0:
+                bpy.data.actions.remove(action)
+        bpy.data.collections.remove(collection)
@@ -0,0 +1,283 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# Binary Live Update Store.
+# The product frame table played by the live color handler is kept in memory
+# and saved as packed NumPy columns in a side-car file next to the .blend
+# (<name>.blend.bim4d-live) instead of a JSON-like scene ID property. The scene
+# only holds a small marker (token, format version, sizes) so a side-car of a
+# different save is never picked up. The side-car is read once per session and
+# its columns are mapped onto the loaded bytes without copying.
+
+import json
+import os
+import struct
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+import bpy
+import numpy as np
+from bpy.app.handlers import persistent
+
+from bonsai.bim.module.sequence import frame_table
+
+MAGIC = b"BIM4DLV\x00"
+FORMAT_VERSION = 1
+SIDECAR_SUFFIX = ".bim4d-live"
+
+# Scene marker of the stored table and the JSON property it replaces
+SCENE_MARKER = "BIM_LiveUpdateStore"
+LEGACY_PROPERTY = "BIM_LiveUpdateProductFrames"
+
+# magic, format version, header length
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGNMENT = 8
+
+_COLUMNS = (
+    "product_id", "task_id", "relationship", "started", "completed", "start_frame",
+    "finish_frame", "states", "start_date", "finish_date", "type_code", "priority",
+)
+
+
+class LiveStoreFormatError(ValueError):
+    pass
+
+
+def pack_table(table: frame_table.ProductFrameTable, token: str = "") -> bytes:
+    """Preamble + JSON header (column dtypes, shapes, offsets) + 8-byte aligned raw columns"""
+    columns = []
+    offset = 0
+    for name in _COLUMNS:
+        array = np.ascontiguousarray(getattr(table, name))
+        columns.append((name, array, offset))
+        offset += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+    header = json.dumps({
+        "token": token,
+        "rows": table.row_count,
+        "products": len(table),
+        "animation_start": table.animation_start,
+        "animation_end": table.animation_end,
+        "type_names": list(table.type_names),
+        "columns": [
+            {"name": name, "dtype": array.dtype.str, "shape": list(array.shape), "offset": start}
+            for name, array, start in columns
+        ],
+    }).encode("utf-8")
+    header += b" " * (-(_PREAMBLE.size + len(header)) % _ALIGNMENT)
+
+    data = bytearray(_PREAMBLE.size + len(header) + offset)
+    _PREAMBLE.pack_into(data, 0, MAGIC, FORMAT_VERSION, len(header))
+    data[_PREAMBLE.size:_PREAMBLE.size + len(header)] = header
+    base = _PREAMBLE.size + len(header)
+    for name, array, start in columns:
+        data[base + start:base + start + array.nbytes] = array.tobytes()
+    return bytes(data)
+
+
+def unpack_table(blob: bytes) -> Tuple[frame_table.ProductFrameTable, Dict[str, Any]]:
+    """Table whose columns are read-only views into blob, and the header"""
+    if len(blob) < _PREAMBLE.size:
+        raise LiveStoreFormatError("Truncated live update store")
+    magic, version, header_size = _PREAMBLE.unpack_from(blob, 0)
+    if magic != MAGIC:
+        raise LiveStoreFormatError("Not a live update store")
+    if version != FORMAT_VERSION:
+        raise LiveStoreFormatError(f"Unsupported live update store version {version}")
+    base = _PREAMBLE.size + header_size
+    if len(blob) < base:
+        raise LiveStoreFormatError("Truncated live update store")
+    header = json.loads(bytes(blob[_PREAMBLE.size:base]).decode("utf-8"))
+
+    arrays = {}
+    for column in header["columns"]:
+        dtype = np.dtype(column["dtype"])
+        count = int(np.prod(column["shape"], dtype=np.int64))
+        start = base + column["offset"]
+        if start + count * dtype.itemsize > len(blob):
+            raise LiveStoreFormatError("Truncated live update store")
+        arrays[column["name"]] = np.frombuffer(blob, dtype=dtype, count=count, offset=start).reshape(column["shape"])
+    missing = set(_COLUMNS) - set(arrays)
+    if missing:
+        raise LiveStoreFormatError(f"Live update store misses columns: {', '.join(sorted(missing))}")
+
+    table = frame_table.ProductFrameTable(
+        type_names=tuple(header["type_names"]),
+        animation_start=header["animation_start"],
+        animation_end=header["animation_end"],
+        **{name: arrays[name] for name in _COLUMNS},
+    )
+    return table, header
+
+
+def get_sidecar_path(blend_filepath: Optional[str] = None) -> Optional[str]:
+    blend_filepath = bpy.data.filepath if blend_filepath is None else blend_filepath
+    return blend_filepath + SIDECAR_SUFFIX if blend_filepath else None
+
+
+class LiveUpdateStore:
+    """In-memory product frame table of the live color handler, persisted as a binary side-car"""
+
+    def __init__(self) -> None:
+        self.table: Optional[frame_table.ProductFrameTable] = None
+        self.token: Optional[str] = None
+        # The side-car of the open file is read at most once
+        self.loaded = False
+        self.stats = {"sidecar_reads": 0, "sidecar_writes": 0, "legacy_migrations": 0, "bytes": 0}
+
+    def set_table(self, scene, table) -> None:
+        self.table = frame_table.as_frame_table(table)
+        self.token = uuid.uuid4().hex
+        self.loaded = True
+        scene[SCENE_MARKER] = {
+            "token": self.token,
+            "version": FORMAT_VERSION,
+            "products": len(self.table),
+            "rows": self.table.row_count,
+        }
+        if scene.get(LEGACY_PROPERTY) is not None:
+            del scene[LEGACY_PROPERTY]
+
+    def get_table(self, scene) -> Optional[frame_table.ProductFrameTable]:
+        """Stored table of the scene, loading the side-car or migrating the legacy property on first use"""
+        marker = scene.get(SCENE_MARKER)
+        token = marker.get("token") if marker else None
+        if self.table is not None and token == self.token:
+            return self.table
+        if not self.loaded:
+            self.loaded = True
+            if token:
+                self._read_sidecar(token)
+            elif scene.get(LEGACY_PROPERTY):
+                self._migrate_legacy(scene)
+            if self.table is not None and scene.get(SCENE_MARKER, {}).get("token") == self.token:
+                return self.table
+        return None
+
+    def has_table(self, scene) -> bool:
+        return self.get_table(scene) is not None
+
+    def clear(self, scene=None) -> None:
+        self.table = None
+        self.token = None
+        if scene is not None:
+            for key in (SCENE_MARKER, LEGACY_PROPERTY):
+                if scene.get(key) is not None:
+                    del scene[key]
+
+    def reset(self) -> None:
+        """Forgets everything of the previous file"""
+        self.clear()
+        self.loaded = False
+
+    def _read_sidecar(self, token: str) -> None:
+        path = get_sidecar_path()
+        if not path or not os.path.exists(path):
+            print(f"⚠️ Live update store side-car not found: {path}")
+            return
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+            table, header = unpack_table(blob)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read live update store {path}: {e}")
+            return
+        if header.get("token") != token:
+            print("⚠️ Live update store side-car belongs to a different save, ignored")
+            return
+        self.table = table
+        self.token = token
+        self.stats["sidecar_reads"] += 1
+        self.stats["bytes"] = len(blob)
+
+    def _migrate_legacy(self, scene) -> None:
+        legacy = scene.get(LEGACY_PROPERTY)
+        try:
+            data = legacy.to_dict() if hasattr(legacy, "to_dict") else dict(legacy)
+            product_frames = data.get("product_frames", {})
+            if product_frames:
+                self.set_table(scene, frame_table.as_frame_table(product_frames))
+                self.stats["legacy_migrations"] += 1
+                print(f"🔄 Live update cache migrated to the binary store ({len(self.table)} products)")
+        except Exception as e:
+            print(f"⚠️ Could not migrate legacy live update cache: {e}")
+
+    def write_sidecar(self, scene, blend_filepath: str) -> None:
+        """Writes the side-car of a saved .blend, or removes a stale one when nothing is stored"""
+        path = get_sidecar_path(blend_filepath)
+        if not path:
+            return
+        if self.get_table(scene) is None:
+            if scene.get(SCENE_MARKER) is None and os.path.exists(path):
+                os.remove(path)
+            return
+        blob = pack_table(self.table, self.token)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(blob)
+        os.replace(tmp_path, path)
+        self.stats["sidecar_writes"] += 1
+        self.stats["bytes"] = len(blob)
+
+
+# Global instance
+_live_update_store = None
+
+
+def get_live_update_store() -> LiveUpdateStore:
+    global _live_update_store
+    if _live_update_store is None:
+        _live_update_store = LiveUpdateStore()
+    return _live_update_store
+
+
+def invalidate_live_update_store() -> None:
+    if _live_update_store is not None:
+        _live_update_store.reset()
+
+
+@persistent
+def live_update_store_load_handler(*args):
+    # The next get_table() reads the side-car of the new file
+    invalidate_live_update_store()
+
+
+@persistent
+def live_update_store_save_handler(filepath, *args):
+    if _live_update_store is None:
+        return
+    try:
+        # Older Blender versions pass no file path to save handlers
+        blend_filepath = filepath if isinstance(filepath, str) and filepath else bpy.data.filepath
+        _live_update_store.write_sidecar(bpy.context.scene, blend_filepath)
+    except Exception as e:
+        print(f"⚠️ Could not write live update store: {e}")
+
+
+def register() -> None:
+    if live_update_store_load_handler not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(live_update_store_load_handler)
+    if live_update_store_save_handler not in bpy.app.handlers.save_post:
+        bpy.app.handlers.save_post.append(live_update_store_save_handler)
+
+
+def unregister() -> None:
+    if live_update_store_load_handler in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(live_update_store_load_handler)
+    if live_update_store_save_handler in bpy.app.handlers.save_post:
+        bpy.app.handlers.save_post.remove(live_update_store_save_handler)
+    invalidate_live_update_store()
@@ -60,6 +60,7 @@ classes = (
     io_operators.ImportMSP,
     io_operators.ExportMSP,
     io_operators.ExportP6,
+    io_operators.ExportAnimationEvents,
 
     # from schedule_task_operators.py
     schedule_task_operators.LoadTaskProperties,
@@ -237,6 +238,7 @@ classes = (
 
     # from animation_operators.py
     animation_operators.CreateAnimation,
+    animation_operators.CreateAnimationModal,
     animation_operators.ClearAnimation,
     animation_operators.AddAnimationTaskType,
     animation_operators.RemoveAnimationTaskType,
@@ -262,7 +264,11 @@ classes = (
     config_operators.RefreshSnapshotTexts,
     config_operators.CreateStaticSnapshotTexts,
     config_operators.BIM_OT_show_performance_stats,
+    config_operators.BIM_OT_export_animation_profile,
+    config_operators.BIM_OT_compare_animation_profile,
+    config_operators.BIM_OT_toggle_frame_subscriber,
     config_operators.BIM_OT_clear_performance_cache,
+    config_operators.BIM_OT_benchmark_keyframe_writer,
 )
 
 # Add test operator if available (always first for debugging)
@@ -296,6 +302,7 @@ def unregister():
 # Explicit imports for main module access
 ExportP6 = io_operators.ExportP6
 ExportMSP = io_operators.ExportMSP
+ExportAnimationEvents = io_operators.ExportAnimationEvents
 ImportWorkScheduleCSV = io_operators.ImportWorkScheduleCSV
 ImportP6 = io_operators.ImportP6
 ImportP6XER = io_operators.ImportP6XER
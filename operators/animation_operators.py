@@ -46,11 +46,16 @@ class CreateAnimation(bpy.types.Operator, tool.Ifc.Operator):
 
         settings = _get_animation_settings(context)
         print("🚀 STARTING CORRECTED 4D ANIMATION CREATION") # This seems to be a debug print, I'll leave it as is but it could be translated to "STARTING CORRECTED 4D ANIMATION CREATION"
+        from .. import incremental_animation, stage_profiler
+        profiler = stage_profiler.get_stage_profiler()
 
         try:
             # --- STAGE 1: FRAME COMPUTATION ---
             frames_start = time.time()
             frames = {}
+            # Frame builder and keyframing path that succeeded, for the incremental updates
+            frame_builder = "get_animation_product_frames_optimized"
+            appearance = incremental_animation.APPEARANCE_OPTIMIZED
             try:
                 print("[OPTIMIZED] Attempting to use FULL optimization path for frames...")
                 from . import ifc_lookup
@@ -59,19 +64,24 @@ class CreateAnimation(bpy.types.Operator, tool.Ifc.Operator):
 
                 if not lookup.lookup_built:
                     print("[OPTIMIZED] Building lookup tables...")
-                    lookup.build_lookup_tables(work_schedule)
+                    with profiler.stage(stage_profiler.STAGE_LOOKUP):
+                        lookup.build_lookup_tables(work_schedule)
 
                 print("[OPTIMIZED] Using enhanced optimized frame computation...")
-                frames = tool.Sequence.get_animation_product_frames_enhanced_optimized(
-                    work_schedule, settings, lookup, date_cache
-                )
+                with profiler.stage(stage_profiler.STAGE_FRAMES):
+                    frames = tool.Sequence.get_animation_product_frames_enhanced_optimized(
+                        work_schedule, settings, lookup, date_cache
+                    )
                 print("[SUCCESS] Optimized frame computation was successful.")
 
             except Exception as e:
                 print(f"[CRITICAL WARNING] Optimized frames method failed, falling back to slow method: {e}")
-                frames = _compute_product_frames(context, work_schedule, settings)
+                frame_builder = "get_animation_product_frames"
+                with profiler.stage(stage_profiler.STAGE_FRAMES):
+                    frames = _compute_product_frames(context, work_schedule, settings)
 
             frames_time = time.time() - frames_start
+            profiler.add_items(stage_profiler.STAGE_FRAMES, len(frames))
             print(f"📊 FRAMES COMPUTED: {len(frames)} products in {frames_time:.3f}s")
 
             if not frames:
@@ -108,6 +118,7 @@ class CreateAnimation(bpy.types.Operator, tool.Ifc.Operator):
 
                 # Fallback to standard method
                 print("🔥 [OPERATOR DEBUG] Using FALLBACK method...")
+                appearance = incremental_animation.APPEARANCE_STANDARD
                 tool.Sequence.animate_objects_with_ColorTypes(settings, frames)
                 print("🔥 [OPERATOR DEBUG] FALLBACK method completed!")
 
@@ -127,25 +138,42 @@ class CreateAnimation(bpy.types.Operator, tool.Ifc.Operator):
         print("-" * 60)
         print(f"✅ TOTAL TIME: {total_time:.2f}s")
         print("-" * 60)
-        self.report({'INFO'}, f"Animation created for {len(frames)} elements in {total_time:.2f}s.")
+        self.report({'INFO'}, f"Animation created for {len(frames)} elements in {total_time:.2f}s.{tool.Sequence.get_culling_report()}")
 
         anim_props.is_animation_created = True
 
+        try:
+            # Keep the compiled frames so task edits can be applied incrementally
+            tool.Sequence.store_compiled_animation(work_schedule, settings, frames, frame_builder, appearance)
+        except Exception as e:
+            print(f"⚠️ Could not store compiled animation for incremental updates: {e}")
+
         try:
             camera_props = tool.Sequence.get_animation_props().camera_orbit
             if camera_props.enable_3d_legend_hud:
-                bpy.ops.bim.setup_3d_legend_hud()
+                with profiler.stage(stage_profiler.STAGE_HUD):
+                    bpy.ops.bim.setup_3d_legend_hud()
         except Exception as e:
             print(f"⚠️ Could not auto-create 3D Legend HUD: {e}")
 
+        profiler.end_run(products=len(frames), frames=int(settings.get("total_frames", 0)))
         return {'FINISHED'}
 
     def execute(self, context):
+        from .. import stage_profiler
+        profiler = stage_profiler.get_stage_profiler()
+        profiler.begin_run("create_animation")
+        result = {'CANCELLED'}
         try:
-            return self._execute(context)
+            result = self._execute(context)
+            return result
         except Exception as e:
             self.report({'ERROR'}, f"Unexpected error: {e}")
             return {'CANCELLED'}
+        finally:
+            # Cancelled builds are not kept as profiles
+            if result != {'FINISHED'}:
+                profiler.abort_run()
 
     def _get_unified_date_range(self, work_schedule):
         from datetime import datetime
@@ -171,6 +199,224 @@ class CreateAnimation(bpy.types.Operator, tool.Ifc.Operator):
         if not all_starts or not all_finishes: return None, None
         return min(all_starts), max(all_finishes)
 
+class CreateAnimationModal(bpy.types.Operator):
+    """Create the 4D animation in chunks without freezing Blender. ESC cancels and rolls back"""
+    bl_idname = "bim.create_animation_modal"
+    bl_label = "Create 4D Animation (Interruptible)"
+    bl_options = {"REGISTER"}
+
+    products_per_tick: bpy.props.IntProperty(
+        name="Products per Tick",
+        description="Number of products keyframed on every timer tick. Lower values keep the UI more responsive",
+        default=250,
+        min=1,
+    )
+    preserve_current_frame: bpy.props.BoolProperty(default=False)
+
+    def invoke(self, context, event):
+        import time
+
+        self.work_schedule = tool.Sequence.get_active_work_schedule()
+        if not self.work_schedule:
+            self.report({'ERROR'}, "No active work schedule found.")
+            return {'CANCELLED'}
+
+        self.settings = _get_animation_settings(context)
+        self.stored_frame = context.scene.frame_current
+        self.stage_times = {}
+        self.total_start_time = time.time()
+
+        from .. import stage_profiler
+        self.profiler = stage_profiler.get_stage_profiler()
+        self.profiler.begin_run("create_animation_modal", products_per_tick=self.products_per_tick)
+
+        # --- STAGE 1: FRAME COMPUTATION ---
+        stage_start = time.time()
+        try:
+            with self.profiler.stage(stage_profiler.STAGE_FRAMES):
+                self.frames = _compute_product_frames(context, self.work_schedule, self.settings)
+        except Exception as e:
+            self.profiler.abort_run()
+            self.report({'ERROR'}, f"Animation process failed: {e}")
+            return {'CANCELLED'}
+        self.profiler.add_items(stage_profiler.STAGE_FRAMES, len(self.frames))
+        self._track_stage("frames", stage_start, len(self.frames))
+        if not self.frames:
+            self.profiler.abort_run()
+            self.report({'INFO'}, "No frames found to animate.")
+            return {'CANCELLED'}
+
+        # --- STAGE 2: PREPARATION ---
+        stage_start = time.time()
+        from .. import frame_table
+        self.table = frame_table.as_frame_table(self.frames)
+        self.animation_props = tool.Sequence.get_animation_props()
+        self.active_group_name = tool.Sequence._get_active_group_optimized(self.animation_props)
+        if not context.scene.get('BIM_VarianceOriginalObjectColors'):
+            tool.Sequence._save_original_object_colors()
+
+        self.rollback_states = []
+        self.rollback_pointers = set()
+        self.existing_actions = {action.as_pointer() for action in bpy.data.actions}
+        self.pending_products = []
+        unscheduled_objects = []
+        relevant_objects = []
+        for obj in bpy.data.objects:
+            if obj.type != 'MESH':
+                continue
+            element = tool.Ifc.get_entity(obj)
+            if not element:
+                continue
+            if element.is_a("IfcSpace") or element.id() not in self.table:
+                unscheduled_objects.append(obj)
+                continue
+            relevant_objects.append(obj)
+            self.pending_products.append(element.id())
+        self.original_colors = tool.Sequence.save_animation_original_colors(relevant_objects)
+        self.colortypes = {}
+        self.culled = tool.Sequence.get_window_culled_products(self.table, self.settings)
+
+        # Unscheduled products and spaces are hidden without keyframes, like the synchronous operator
+        for obj in unscheduled_objects:
+            self._remember(obj)
+            obj.hide_viewport = True
+            obj.hide_render = True
+
+        self.product_count = len(self.pending_products)
+        self.products_done = 0
+        self.animate_time = 0.0
+        self._track_stage("prepare", stage_start, len(relevant_objects) + len(unscheduled_objects))
+
+        wm = context.window_manager
+        wm.progress_begin(0, max(1, self.product_count))
+        self._timer = wm.event_timer_add(0.01, window=context.window)
+        wm.modal_handler_add(self)
+        self._update_status(context)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        import time
+
+        if event.type == 'ESC':
+            self._cancel(context)
+            self.report({'WARNING'}, f"Animation cancelled after {self.products_done}/{self.product_count} products, changes rolled back.")
+            return {'CANCELLED'}
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        # --- STAGE 3: CHUNKED KEYFRAMING ---
+        chunk = self.pending_products[self.products_done:self.products_done + self.products_per_tick]
+        if chunk:
+            stage_start = time.time()
+            ifc_file = tool.Ifc.get()
+            for product_id in chunk:
+                obj = tool.Ifc.get_object(ifc_file.by_id(product_id))
+                if obj:
+                    self._remember(obj)
+            try:
+                tool.Sequence.animate_products(
+                    self.table, chunk, self.settings, self.animation_props, self.active_group_name,
+                    original_colors=self.original_colors, colortypes=self.colortypes, culled=self.culled,
+                )
+            except Exception as e:
+                self._cancel(context)
+                self.report({'ERROR'}, f"Animation process failed: {e}")
+                return {'CANCELLED'}
+            self.products_done += len(chunk)
+            self.animate_time += time.time() - stage_start
+            context.window_manager.progress_update(self.products_done)
+            self._update_status(context)
+            return {'RUNNING_MODAL'}
+
+        self._finish(context)
+        return {'FINISHED'}
+
+    def _remember(self, obj):
+        """Saves the state of an object before it's first touched so ESC can restore it"""
+        if obj.as_pointer() in self.rollback_pointers:
+            return
+        self.rollback_pointers.add(obj.as_pointer())
+        action = obj.animation_data.action if obj.animation_data else None
+        self.rollback_states.append((obj, action, obj.hide_viewport, obj.hide_render, tuple(obj.color)))
+
+    def _update_status(self, context):
+        percent = 100 * self.products_done / max(1, self.product_count)
+        context.workspace.status_text_set(
+            f"4D Animation: {self.products_done}/{self.product_count} products ({percent:.0f}%) - ESC to cancel"
+        )
+
+    def _end_modal(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+    def _track_stage(self, stage, stage_start, items):
+        import time
+        from ..data import SequenceCache
+        elapsed = time.time() - stage_start
+        self.stage_times[stage] = elapsed
+        SequenceCache._track_performance(f"create_animation_modal_{stage}", elapsed, items, "modal_chunked")
+
+    def _cancel(self, context):
+        """Removes the keyframes written so far and restores every touched object"""
+        from ..data import SequenceCache
+        SequenceCache._track_performance("create_animation_modal_animate", self.animate_time, self.products_done, "modal_chunked")
+        self.profiler.abort_run()
+        self._end_modal(context)
+        for obj, action, hide_viewport, hide_render, color in reversed(self.rollback_states):
+            try:
+                if obj.animation_data:
+                    obj.animation_data_clear()
+                if action is not None:
+                    obj.animation_data_create().action = action
+                obj.hide_viewport = hide_viewport
+                obj.hide_render = hide_render
+                obj.color = color
+            except ReferenceError:
+                continue
+        for action in list(bpy.data.actions):
+            if action.as_pointer() not in self.existing_actions and action.users == 0:
+                bpy.data.actions.remove(action)
+        context.scene.frame_set(self.stored_frame)
+
+    def _finish(self, context):
+        import time
+        from ..data import SequenceCache
+        SequenceCache._track_performance("create_animation_modal_animate", self.animate_time, self.products_done, "modal_chunked")
+        self.stage_times["animate"] = self.animate_time
+        self._end_modal(context)
+
+        # --- STAGE 4: FINALIZE ---
+        stage_start = time.time()
+        area = tool.Blender.get_view3d_area()
+        try:
+            area.spaces[0].shading.color_type = "OBJECT"
+        except Exception:
+            pass
+        context.scene.frame_start = self.settings["start_frame"]
+        context.scene.frame_end = int(self.settings["start_frame"] + self.settings["total_frames"] + 1)
+        if self.preserve_current_frame:
+            context.scene.frame_set(self.stored_frame)
+
+        self.animation_props.is_animation_created = True
+        try:
+            tool.Sequence.store_compiled_animation(self.work_schedule, self.settings, self.table, "get_animation_product_frames")
+        except Exception as e:
+            print(f"⚠️ Could not store compiled animation for incremental updates: {e}")
+        self._track_stage("finalize", stage_start, self.product_count)
+        self.profiler.end_run(products=self.product_count, frames=int(self.settings.get("total_frames", 0)))
+
+        total_time = time.time() - self.total_start_time
+        print("-" * 60)
+        for stage, elapsed in self.stage_times.items():
+            print(f"   {stage}: {elapsed:.3f}s")
+        print(f"✅ TOTAL TIME: {total_time:.2f}s")
+        print("-" * 60)
+        self.report({'INFO'}, f"Animation created for {self.product_count} elements in {total_time:.2f}s.{tool.Sequence.get_culling_report()}")
+
+
 class ClearAnimation(bpy.types.Operator, tool.Ifc.Operator):
     bl_idname = "bim.clear_animation"
     bl_label = "Clear 4D Animation"
@@ -830,13 +1076,16 @@ class SyncAnimationByDate(bpy.types.Operator):
             print(f"3. Handler exists: {handler_registered}")
 
             if handler_registered:
-                handler_in_post = tool.Sequence.live_color_update_handler in bpy.app.handlers.frame_change_post
-                handler_in_pre = tool.Sequence.live_color_update_handler in bpy.app.handlers.frame_change_pre
-                print(f"4. Handler in frame_change_post: {handler_in_post}")
-                print(f"5. Handler in frame_change_pre: {handler_in_pre}")
+                from .. import frame_dispatcher
+                dispatcher = frame_dispatcher.get_frame_dispatcher()
+                handler_subscribed = dispatcher.is_subscribed(frame_dispatcher.SUBSCRIBER_LIVE_COLORS)
+                dispatcher_installed = frame_dispatcher.frame_change_dispatch_handler in bpy.app.handlers.frame_change_post
+                print(f"4. Handler subscribed to frame dispatcher: {handler_subscribed}")
+                print(f"5. Frame dispatcher in frame_change_post: {dispatcher_installed}")
 
             # 4. Check cache
-            cache_exists = context.scene.get('BIM_LiveUpdateProductFrames') is not None
+            from .. import live_cache_store
+            cache_exists = live_cache_store.get_live_update_store().has_table(context.scene)
             print(f"6. Cache exists: {cache_exists}")
 
             # 5. Manually trigger the handler
@@ -891,6 +1140,8 @@ def _clear_previous_animation(context) -> None:
             tool.Sequence.unregister_live_color_update_handler()
         if hasattr(tool.Sequence, '_unregister_frame_change_handler'):
             tool.Sequence._unregister_frame_change_handler()
+        from .. import incremental_animation
+        incremental_animation.invalidate_compiled_animation()
 
         # --- 2. CLEAN COLLECTIONS AND ANIMATION OBJECTS (Same as before) ---
         for coll_name in ["Schedule_Display_Texts", "Bar Visual", "Schedule_Display_3D_Legend"]:
@@ -23,6 +23,7 @@ import calendar
 from mathutils import Matrix
 from datetime import datetime
 from dateutil import relativedelta
+from bpy_extras.io_utils import ImportHelper, ExportHelper
 import bonsai.tool as tool
 
 try:
@@ -623,11 +624,44 @@ class BIM_OT_show_performance_stats(bpy.types.Operator):
             # Import the cache class
             from bonsai.bim.module.sequence.data import SequenceCache
             
+            from bonsai.bim.module.sequence import stage_profiler
+
             # Get performance stats
             stats = SequenceCache.get_performance_stats()
-            
+            profiler = stage_profiler.get_stage_profiler()
+            last_run = profiler.last_run
+
+            # Stage profile of the last animation build, compared with the previous build of the same kind
+            profile_lines = []
+            if last_run:
+                profile_lines.extend(["", "⏱️ LAST ANIMATION BUILD PROFILE", "=" * 50])
+                profile_lines.extend(stage_profiler.format_run(last_run))
+                previous = profiler.previous_run(last_run)
+                if previous:
+                    profile_lines.extend(["", f"Compared with previous run @ {previous['timestamp']}:"])
+                    profile_lines.extend(stage_profiler.format_comparison(stage_profiler.compare_runs(previous, last_run)))
+
+            # Per-subscriber timings of the frame change dispatcher
+            from bonsai.bim.module.sequence import frame_dispatcher
+            dispatcher = frame_dispatcher.get_frame_dispatcher()
+            if dispatcher.subscribers or dispatcher.stats["dispatches"]:
+                profile_lines.extend(["", "🎞️ FRAME CHANGE SUBSCRIBERS", "=" * 50])
+                profile_lines.extend(dispatcher.format_stats())
+                from bonsai.bim.module.sequence import scrub_prefetch
+                profile_lines.append(scrub_prefetch.get_scrub_prefetcher().format_stats())
+
+            from bonsai.bim.module.sequence import construction_state
+            bitmap_cache = construction_state.get_state_bitmap_cache()
+            if bitmap_cache.bitmaps or bitmap_cache.stats["misses"]:
+                profile_lines.extend(["", bitmap_cache.format_stats()])
+
             if "message" in stats:
-                self.report({'INFO'}, stats["message"])
+                if profile_lines:
+                    print("\n".join(profile_lines))
+                message = stats["message"]
+                if last_run:
+                    message += f" Last build: {last_run['label']} in {last_run['total_time']:.2f}s"
+                self.report({'INFO'}, message)
                 return {'FINISHED'}
             
             # Format and display stats
@@ -653,11 +687,15 @@ class BIM_OT_show_performance_stats(bpy.types.Operator):
                     ""
                 ])
             
+            report_lines.extend(profile_lines)
+
             # Print to console for detailed view
             print("\n".join(report_lines))
             
             # Show summary in UI
             summary = f"Optimization calls: {stats['total_optimization_calls']}, Time saved: {stats['total_time_saved_seconds']}s"
+            if last_run:
+                summary += f", Last build: {last_run['label']} in {last_run['total_time']:.2f}s"
             self.report({'INFO'}, summary)
             
             return {'FINISHED'}
@@ -667,6 +705,99 @@ class BIM_OT_show_performance_stats(bpy.types.Operator):
             return {'CANCELLED'}
 
 
+class BIM_OT_export_animation_profile(bpy.types.Operator, ExportHelper):
+    """Export the stage profiles of the recent 4D animation builds as JSON"""
+    bl_idname = "bim.export_animation_profile"
+    bl_label = "Export Animation Profile"
+    bl_description = "Save the stage timings of the recent 4D animation builds to a JSON file for comparison between runs"
+    bl_options = {'REGISTER'}
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={"HIDDEN"})
+
+    def execute(self, context):
+        from bonsai.bim.module.sequence import stage_profiler
+        profiler = stage_profiler.get_stage_profiler()
+        if not profiler.runs:
+            self.report({'WARNING'}, "No animation build has been profiled yet")
+            return {'CANCELLED'}
+        try:
+            profiler.export_json(self.filepath)
+        except Exception as e:
+            self.report({'ERROR'}, f"Could not export profile: {e}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"{len(profiler.runs)} animation profiles exported to {self.filepath}")
+        return {'FINISHED'}
+
+
+class BIM_OT_compare_animation_profile(bpy.types.Operator, ImportHelper):
+    """Compare the last 4D animation build against a previously exported profile"""
+    bl_idname = "bim.compare_animation_profile"
+    bl_label = "Compare Animation Profile"
+    bl_description = "Compare the stage timings of the last 4D animation build against the matching run of an exported profile"
+    bl_options = {'REGISTER'}
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={"HIDDEN"})
+
+    def execute(self, context):
+        from bonsai.bim.module.sequence import stage_profiler
+        current = stage_profiler.get_stage_profiler().last_run
+        if not current:
+            self.report({'WARNING'}, "No animation build has been profiled yet")
+            return {'CANCELLED'}
+        try:
+            runs = stage_profiler.load_runs(self.filepath)
+        except Exception as e:
+            self.report({'ERROR'}, f"Could not read profile: {e}")
+            return {'CANCELLED'}
+        # Prefer the latest baseline run of the same build kind
+        baseline = next((run for run in reversed(runs) if run.get("label") == current["label"]), runs[-1] if runs else None)
+        if not baseline:
+            self.report({'WARNING'}, "The profile contains no runs")
+            return {'CANCELLED'}
+
+        rows = stage_profiler.compare_runs(baseline, current)
+        print("\n".join(
+            [f"⏱️ PROFILE COMPARISON: {baseline['label']} @ {baseline['timestamp']} -> {current['label']} @ {current['timestamp']}"]
+            + stage_profiler.format_comparison(rows)
+            + [f"   {'total':<26} {baseline['total_time']:8.3f}s -> {current['total_time']:8.3f}s"]
+        ))
+        regressions = [row["stage"] for row in rows if row["regression"]]
+        if regressions:
+            self.report({'WARNING'}, f"Slower stages: {', '.join(regressions)}")
+        else:
+            self.report({'INFO'}, f"No stage regressions ({baseline['total_time']:.2f}s -> {current['total_time']:.2f}s)")
+        return {'FINISHED'}
+
+
+def _frame_subscriber_items(self, context):
+    from bonsai.bim.module.sequence import frame_dispatcher
+    names = sorted(frame_dispatcher.get_frame_dispatcher().subscribers)
+    return [(name, name.replace("_", " ").title(), "") for name in names] or [("NONE", "No Subscribers", "")]
+
+
+class BIM_OT_toggle_frame_subscriber(bpy.types.Operator):
+    """Enable or disable one subscriber of the 4D frame change dispatcher"""
+    bl_idname = "bim.toggle_frame_subscriber"
+    bl_label = "Toggle Frame Subscriber"
+    bl_description = "Switch a 4D frame change handler (schedule texts, live colors...) on or off without unregistering it"
+    bl_options = {'REGISTER'}
+    subscriber: bpy.props.EnumProperty(name="Subscriber", items=_frame_subscriber_items)
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        from bonsai.bim.module.sequence import frame_dispatcher
+        dispatcher = frame_dispatcher.get_frame_dispatcher()
+        subscriber = dispatcher.subscribers.get(self.subscriber)
+        if subscriber is None:
+            self.report({'WARNING'}, "No frame change subscriber selected")
+            return {'CANCELLED'}
+        dispatcher.set_enabled(subscriber.name, not subscriber.enabled)
+        self.report({'INFO'}, f"{subscriber.name}: {'enabled' if subscriber.enabled else 'disabled'}")
+        return {'FINISHED'}
+
+
 class BIM_OT_clear_performance_cache(bpy.types.Operator):
     """Clear all performance cache and statistics"""
     bl_idname = "bim.clear_performance_cache"
@@ -684,4 +815,43 @@ class BIM_OT_clear_performance_cache(bpy.types.Operator):
             
         except Exception as e:
             self.report({'ERROR'}, f"Error clearing cache: {e}")
-            return {'CANCELLED'}
\ No newline at end of file
+            return {'CANCELLED'}
+
+class BIM_OT_benchmark_keyframe_writer(bpy.types.Operator):
+    """Compare keyframe throughput of obj.keyframe_insert() against the bulk F-curve writer"""
+    bl_idname = "bim.benchmark_keyframe_writer"
+    bl_label = "Benchmark Keyframe Writer"
+    bl_description = "Write the same 4D visibility/color timeline with keyframe_insert() and with the bulk F-curve writer on temporary objects"
+    bl_options = {'REGISTER'}
+
+    object_count: bpy.props.IntProperty(name="Objects", default=200, min=1, max=100000)
+    keys_per_object: bpy.props.IntProperty(name="Keys per Object", default=20, min=1, max=1000)
+
+    def execute(self, context):
+        try:
+            from bonsai.bim.module.sequence.data import SequenceCache
+            from bonsai.bim.module.sequence import keyframe_writer
+
+            results = keyframe_writer.benchmark_keyframe_throughput(self.object_count, self.keys_per_object)
+            legacy = results["keyframe_insert"]
+            bulk = results["bulk_writer"]
+
+            SequenceCache._track_performance("keyframe_insert", legacy["time"], legacy["keyframes"], "rna_keyframe_insert")
+            SequenceCache._track_performance("bulk_keyframe_writer", bulk["time"], bulk["keyframes"], "bulk_fcurve_foreach_set")
+
+            speedup = legacy["time"] / bulk["time"] if bulk["time"] > 0 else 0
+            report_lines = [
+                "🚀 KEYFRAME THROUGHPUT BENCHMARK",
+                "=" * 50,
+                f"Objects: {self.object_count}, keys per object: {self.keys_per_object}",
+                f"keyframe_insert(): {legacy['keyframes']:,} keyframes in {legacy['time']:.3f}s ({legacy['keyframes_per_second']:,.0f}/s)",
+                f"Bulk writer:       {bulk['keyframes']:,} keyframes in {bulk['time']:.3f}s ({bulk['keyframes_per_second']:,.0f}/s)",
+                f"Speedup: {speedup:.1f}x",
+            ]
+            print("\n".join(report_lines))
+            self.report({'INFO'}, f"Bulk writer {speedup:.1f}x faster ({bulk['keyframes_per_second']:,.0f} vs {legacy['keyframes_per_second']:,.0f} keyframes/s)")
+            return {'FINISHED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"Keyframe benchmark failed: {e}")
+            return {'CANCELLED'}
@@ -384,8 +384,9 @@ class Setup3DLegendHUD(bpy.types.Operator):
     
     def _get_active_colortype_data(self):
         try:
-            hud_instance = hud_overlay.schedule_hud if hasattr(hud_overlay, 'schedule_hud') and hud_overlay.schedule_hud else hud_overlay.ScheduleHUD()
-            return hud_instance.get_active_colortype_legend_data(include_hidden=False)
+            # Same legend data as the viewport Legend HUD, computed once for both
+            from ..hud.legend_data import get_legend_data_provider
+            return get_legend_data_provider().get(include_hidden=False)
         except Exception as e:
             print(f"Exception in _get_active_colortype_data: {e}")
             return []
@@ -769,13 +770,12 @@ class LegendHudcolortypeScrollDown(bpy.types.Operator):
         anim_props = tool.Sequence.get_animation_props()
         camera_props = anim_props.camera_orbit
         current_offset = getattr(camera_props, 'legend_hud_colortype_scroll_offset', 0)
-        from .. import hud
-        if hasattr(hud_overlay, 'schedule_hud') and hud_overlay.schedule_hud:
-            all_colortype_data = hud_overlay.schedule_hud.get_active_colortype_legend_data(include_hidden=True)
-            total_colortypes = len(all_colortype_data) if all_colortype_data else 0
-            max_offset = max(0, total_colortypes - 5)
-            if current_offset < max_offset:
-                camera_props.legend_hud_colortype_scroll_offset = current_offset + 1
+        from ..hud.legend_data import get_legend_data_provider
+        all_colortype_data = get_legend_data_provider().get(include_hidden=True)
+        total_colortypes = len(all_colortype_data) if all_colortype_data else 0
+        max_offset = max(0, total_colortypes - 5)
+        if current_offset < max_offset:
+            camera_props.legend_hud_colortype_scroll_offset = current_offset + 1
         return {'FINISHED'}
 
 
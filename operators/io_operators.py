@@ -234,4 +234,42 @@ class ExportP6(bpy.types.Operator, ExportHelper):
         ifc2p6.execute()
         self.report({"INFO"}, "Export finished in {:.2f} seconds".format(time.time() - start))
         return {"FINISHED"}
-    
\ No newline at end of file
+    
+
+class ExportAnimationEvents(bpy.types.Operator, ExportHelper):
+    bl_idname = "bim.export_animation_events"
+    bl_label = "Export 4D Animation Events"
+    bl_description = (
+        "Export the 4D animation of the active work schedule as a frame-indexed stream of visibility and color "
+        "changes per IFC GlobalId (.json), for players outside Blender"
+    )
+    bl_options = {"REGISTER"}
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={"HIDDEN"})
+
+    @classmethod
+    def poll(cls, context):
+        if tool.Ifc.get() is None:
+            cls.poll_message_set("No IFC file is loaded.")
+            return False
+        if not tool.Sequence.get_active_work_schedule():
+            cls.poll_message_set("No active work schedule.")
+            return False
+        return True
+
+    def execute(self, context):
+        start = time.time()
+        settings = tool.Sequence.get_animation_settings()
+        if not settings:
+            self.report({"ERROR"}, "Could not compute the animation settings.")
+            return {"CANCELLED"}
+        stream = tool.Sequence.export_animation_events(
+            tool.Sequence.get_active_work_schedule(), settings, bpy.path.ensure_ext(self.filepath, ".json")
+        )
+        self.report(
+            {"INFO"},
+            "Exported {} state changes of {} objects in {:.2f} seconds".format(
+                len(stream), len(stream.objects), time.time() - start
+            ),
+        )
+        return {"FINISHED"}
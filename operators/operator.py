@@ -156,7 +156,7 @@ def _ensure_local_text_settings_on_obj(_obj, _settings):
     except Exception:
         pass
 
-def _local_schedule_texts_update_handler(scene, depsgraph):
+def _local_schedule_texts_update_handler(scene, depsgraph, frame_context=None):
     '''Update schedule text objects each frame. Week/Day/Progress use the same robust logic as HUD Schedule.'''
     print("🎬 3D Text Handler: Starting update...")
     try:
@@ -218,8 +218,12 @@ def _local_schedule_texts_update_handler(scene, depsgraph):
                 cur_dt = None
                 if wnd_start and wnd_finish:
                     try:
-                        delta_w = (wnd_finish - wnd_start)
-                        cur_dt = wnd_start + prog * delta_w
+                        if frame_context is not None:
+                            # Shared with every subscriber on the same timeline
+                            cur_dt = frame_context.date_for(wnd_start, wnd_finish, start_frame, total_frames)
+                        else:
+                            delta_w = (wnd_finish - wnd_start)
+                            cur_dt = wnd_start + prog * delta_w
                     except Exception:
                         cur_dt = wnd_start
                         
@@ -383,9 +387,8 @@ def _update_single_3d_text_object(obj, cdata, cur_dt):
 def _local_unregister_text_handler():
     global _LOCAL_TEXT_HANDLER
     try:
-
-        if _LOCAL_TEXT_HANDLER and _LOCAL_TEXT_HANDLER in bpy.app.handlers.frame_change_post:
-            bpy.app.handlers.frame_change_post.remove(_LOCAL_TEXT_HANDLER)
+        from .. import frame_dispatcher
+        frame_dispatcher.get_frame_dispatcher().unsubscribe(frame_dispatcher.SUBSCRIBER_LOCAL_TEXTS)
     except Exception:
         pass
 
@@ -406,8 +409,12 @@ def _local_register_text_handler(settings=None):
         pass
     _LOCAL_TEXT_HANDLER = _local_schedule_texts_update_handler
     try:
-        if _LOCAL_TEXT_HANDLER not in bpy.app.handlers.frame_change_post:
-            bpy.app.handlers.frame_change_post.append(_LOCAL_TEXT_HANDLER)
+        from .. import frame_dispatcher
+        frame_dispatcher.get_frame_dispatcher().subscribe(
+            frame_dispatcher.SUBSCRIBER_LOCAL_TEXTS,
+            lambda frame_context: _LOCAL_TEXT_HANDLER(frame_context.scene, frame_context.depsgraph, frame_context),
+            frame_dispatcher.ORDER_TEXTS,
+        )
         # Immediate refresh
         _LOCAL_TEXT_HANDLER(bpy.context.scene, None)
     except Exception:
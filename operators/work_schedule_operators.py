@@ -892,6 +892,7 @@ class VisualiseWorkScheduleDateRange(bpy.types.Operator):
         return has_start and has_finish
 
     def execute(self, context):
+        profiler = None
         try:
             # --- INICIO DE LA CORRECCIÓN ---
             # Es crucial capturar el estado actual de la UI de tareas (asignaciones
@@ -931,6 +932,10 @@ class VisualiseWorkScheduleDateRange(bpy.types.Operator):
             if not work_schedule or not settings:
                 self.report({'ERROR'}, "Work schedule or animation settings are invalid.")
                 return {'CANCELLED'}
+
+            from .. import stage_profiler
+            profiler = stage_profiler.get_stage_profiler()
+            profiler.begin_run("visualise_work_schedule_date_range", engine=getattr(tool.Sequence.get_animation_props(), 'animation_engine', 'KEYFRAME'))
             
             # Add schedule name to settings for the handler
             if work_schedule and hasattr(work_schedule, 'Name'):
@@ -982,11 +987,18 @@ class VisualiseWorkScheduleDateRange(bpy.types.Operator):
             else:
                 # Use traditional keyframe animation system
                 print("🎞️ Creating animation with Keyframe engine...")
-                product_frames = tool.Sequence.get_animation_product_frames_enhanced(work_schedule, settings)
+                with profiler.stage(stage_profiler.STAGE_FRAMES):
+                    product_frames = tool.Sequence.get_animation_product_frames_enhanced(work_schedule, settings)
+                profiler.add_items(stage_profiler.STAGE_FRAMES, len(product_frames))
                 if not product_frames:
                     self.report({'WARNING'}, "No products found to animate.")
                 else:
                     tool.Sequence.animate_objects_with_ColorTypes(settings, product_frames)
+                    try:
+                        # Keep the compiled frames so task edits can be applied incrementally
+                        tool.Sequence.store_compiled_animation(work_schedule, settings, product_frames)
+                    except Exception as e:
+                        print(f"⚠️ Could not store compiled animation for incremental updates: {e}")
 
             # Add text animation handler (common for both engines)
             tool.Sequence.add_text_animation_handler(settings)
@@ -1092,6 +1104,8 @@ class VisualiseWorkScheduleDateRange(bpy.types.Operator):
                     tool.Sequence.add_animation_camera()
 
                         # --- CONFIGURACIÓN AUTOMÁTICA DEL HUD (Sistema Dual) ---
+            import time
+            hud_start = time.perf_counter()
             try:
                 if settings and settings.get("start") and settings.get("finish"):
                     print("🎬 Auto-configuring HUD Compositor for high-quality renders...")
@@ -1155,13 +1169,17 @@ class VisualiseWorkScheduleDateRange(bpy.types.Operator):
                     print("🎨 colortype group visibility restored in HUD Legend")
             except Exception as legend_e:
                 print(f"⚠️ Could not restore colortype group visibility: {legend_e}")
-            
-            self.report({'INFO'}, f"Animation created successfully for {len(product_frames)} products.")
+            profiler.record(stage_profiler.STAGE_HUD, time.perf_counter() - hud_start)
+            profiler.end_run(products=len(product_frames), frames=int(settings.get("total_frames", 0)))
+
+            self.report({'INFO'}, f"Animation created successfully for {len(product_frames)} products.{tool.Sequence.get_culling_report()}")
             return {'FINISHED'}
 
         except Exception as e:
             import traceback
             traceback.print_exc()
+            if profiler is not None:
+                profiler.abort_run()
             self.report({'ERROR'}, f"Animation failed: {str(e)}")
             return {'CANCELLED'}
 
@@ -0,0 +1,183 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# Original Appearance Cache.
+# Base color of every material read once and shared by all objects using it,
+# plus an object -> material index. Animation planning, snapshots and variance
+# coloring read original colors from here instead of walking material nodes of
+# every mesh. Entries are keyed by ID session_uid, which stays the same across
+# undo steps (as_pointer() does not). Material edits invalidate their entry
+# through depsgraph updates; undo and redo drop the material entries, as they
+# may restore a previous material or slot assignment.
+
+import bpy
+import bonsai.tool as tool
+from bpy.app.handlers import persistent
+from typing import Dict, Iterable, Optional, Tuple
+
+Color = Tuple[float, float, float, float]
+
+# Index value of objects without a first-slot material
+_NO_MATERIAL = 0
+
+
+class OriginalAppearanceCache:
+    """Material-keyed original base colors with an object -> material index"""
+
+    def __init__(self) -> None:
+        # material session_uid -> base color (None when the material has no Principled BSDF)
+        self.material_colors: Dict[int, Optional[Color]] = {}
+        # object session_uid -> material session_uid of the first slot
+        self.object_materials: Dict[int, int] = {}
+        # object session_uid -> viewport color when first seen, used without a material color
+        self.object_fallback_colors: Dict[int, Color] = {}
+        self.stats = {"hits": 0, "material_reads": 0, "invalidations": 0}
+
+    def _material_key(self, obj) -> int:
+        key = obj.session_uid
+        material_key = self.object_materials.get(key)
+        if material_key is None:
+            material_key = _NO_MATERIAL
+            try:
+                if obj.material_slots and obj.material_slots[0].material:
+                    material_key = obj.material_slots[0].material.session_uid
+                    self._read_material(obj.material_slots[0].material)
+            except Exception:
+                pass
+            self.object_materials[key] = material_key
+        return material_key
+
+    def _read_material(self, material) -> None:
+        key = material.session_uid
+        if key in self.material_colors:
+            return
+        color = None
+        try:
+            if material.use_nodes:
+                principled = tool.Blender.get_material_node(material, "BSDF_PRINCIPLED")
+                if principled and principled.inputs.get("Base Color"):
+                    base_color = principled.inputs["Base Color"].default_value
+                    color = (base_color[0], base_color[1], base_color[2], base_color[3])
+        except Exception:
+            pass
+        self.material_colors[key] = color
+        self.stats["material_reads"] += 1
+
+    def color_for(self, obj) -> Color:
+        """Material base color of the object, else its viewport color when first seen"""
+        material_key = self._material_key(obj)
+        if material_key != _NO_MATERIAL:
+            if material_key not in self.material_colors:
+                # Material entry was invalidated, read it again
+                self._read_material(obj.material_slots[0].material)
+            color = self.material_colors.get(material_key)
+            if color is not None:
+                self.stats["hits"] += 1
+                return color
+        key = obj.session_uid
+        color = self.object_fallback_colors.get(key)
+        if color is None:
+            color = tuple(obj.color)
+            self.object_fallback_colors[key] = color
+        return color
+
+    def colors_for(self, objects: Iterable) -> Dict[str, Color]:
+        """{object name: original color} for the given objects"""
+        return {obj.name: self.color_for(obj) for obj in objects}
+
+    def invalidate_material(self, material) -> None:
+        if self.material_colors.pop(material.session_uid, False) is not False:
+            self.stats["invalidations"] += 1
+
+    def invalidate_object(self, obj) -> None:
+        """Forgets the material of an object (slot assignment may have changed); keeps its original viewport color"""
+        self.object_materials.pop(obj.session_uid, None)
+
+    def invalidate_materials(self) -> None:
+        """Forgets every material color and slot assignment; keeps the original viewport colors"""
+        if self.material_colors:
+            self.stats["invalidations"] += 1
+        self.material_colors.clear()
+        self.object_materials.clear()
+
+    def clear(self) -> None:
+        self.material_colors.clear()
+        self.object_materials.clear()
+        self.object_fallback_colors.clear()
+
+
+# Global instance
+_original_appearance = None
+
+
+def get_original_appearance() -> OriginalAppearanceCache:
+    global _original_appearance
+    if _original_appearance is None:
+        _original_appearance = OriginalAppearanceCache()
+    return _original_appearance
+
+
+def invalidate_original_appearance() -> None:
+    if _original_appearance is not None:
+        _original_appearance.clear()
+
+
+@persistent
+def original_appearance_depsgraph_handler(scene, depsgraph):
+    if _original_appearance is None:
+        return
+    for update in depsgraph.updates:
+        data = update.id.original
+        if isinstance(data, bpy.types.Material):
+            _original_appearance.invalidate_material(data)
+        elif isinstance(data, bpy.types.Object) and update.is_updated_shading:
+            _original_appearance.invalidate_object(data)
+
+
+@persistent
+def original_appearance_load_handler(*args):
+    # Session uids of a previous file are meaningless
+    invalidate_original_appearance()
+
+
+@persistent
+def original_appearance_undo_handler(*args):
+    # Undo / redo may restore a previous material or slot assignment
+    if _original_appearance is not None:
+        _original_appearance.invalidate_materials()
+
+
+def register() -> None:
+    if original_appearance_depsgraph_handler not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(original_appearance_depsgraph_handler)
+    if original_appearance_load_handler not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(original_appearance_load_handler)
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if original_appearance_undo_handler not in handlers:
+            handlers.append(original_appearance_undo_handler)
+
+
+def unregister() -> None:
+    if original_appearance_depsgraph_handler in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(original_appearance_depsgraph_handler)
+    if original_appearance_load_handler in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(original_appearance_load_handler)
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if original_appearance_undo_handler in handlers:
+            handlers.remove(original_appearance_undo_handler)
+    invalidate_original_appearance()
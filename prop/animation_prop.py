@@ -194,6 +194,21 @@ class BIMAnimationProperties(PropertyGroup):
         default=False,
         update=callbacks.toggle_live_color_updates
     )
+    share_identical_actions: BoolProperty(
+        name="Share Identical Actions",
+        description="Assign one shared Action to all objects whose 4D timelines are identical. Reduces Action datablocks and file size for large models",
+        default=False,
+    )
+    cull_outside_visualization: BoolProperty(
+        name="Cull Outside Visualization",
+        description="Products whose tasks finish before the visualization start are shown completed, and products whose tasks start after its finish are hidden, without keyframes. Only products intersecting the visualization range are animated",
+        default=False,
+    )
+    adaptive_playback: BoolProperty(
+        name="Adaptive Playback",
+        description="When live 4D updates (colors, schedule texts) cannot keep up with playback, skip intermediate frames instead of slowing the timeline down. The exact state is always applied once playback stops",
+        default=False,
+    )
 
 
 class BIM_GN_Controller_Properties(bpy.types.PropertyGroup):
@@ -257,6 +272,9 @@ class BIM_GN_Controller_Properties(bpy.types.PropertyGroup):
         show_saved_task_colortypes_panel: bool
         should_show_task_bar_options: bool
         enable_live_color_updates: bool
+        share_identical_actions: bool
+        cull_outside_visualization: bool
+        adaptive_playback: bool
         color_full: Color
         color_progress: Color
         saved_color_schemes: str
@@ -35,6 +35,7 @@ import bonsai.bim.module.pset.data
 from mathutils import Color
 from bonsai.bim.prop import Attribute, ISODuration
 from dateutil import parser
+from bonsai.bim.module.sequence import helper
 from typing import TYPE_CHECKING, Literal, get_args, Optional, Dict, List, Set
 
 # Importamos el manager que ya separamos
@@ -999,12 +1000,12 @@ def updateTaskTimeDateTime(
         task_time = ifcopenshell.api.sequence.add_task_time(ifc_file, task=task)
         SequenceData.load()
 
-    ifc_attribute_name = "Schedule" + startfinish.capitalize()
+    ifc_attribute_name = ifc_date_type + ("Finish" if prop_name.endswith("finish") else "Start")
 
     if SequenceData.data["task_times"][task_time.id()][ifc_attribute_name] == dt_value:
-        canonical_value = canonicalise_time(dt_value)
+        canonical_value = helper.canonicalise_time(dt_value)
         if prop_value != canonical_value:
-            setattr(self, startfinish, canonical_value)
+            setattr(self, prop_name, canonical_value)
         return
 
     ifcopenshell.api.sequence.edit_task_time(
@@ -1014,6 +1015,7 @@ def updateTaskTimeDateTime(
     )
     SequenceData.load()
     bpy.ops.bim.load_task_properties()
+    tool.Sequence.request_incremental_animation_update()
 
 
 
@@ -1043,6 +1045,7 @@ def updateTaskDuration(self: "Task", context: bpy.types.Context) -> None:
     )
     core.load_task_properties(tool.Sequence)
     tool.Sequence.refresh_task_resources()
+    tool.Sequence.request_incremental_animation_update()
 
 
 def updateTaskPredefinedType(self: "Task", context: bpy.types.Context) -> None:
@@ -1226,6 +1229,8 @@ def update_task_colortype_group_selector(self, context):
             except Exception as e:
                 print(f"⚠ Error syncing task colortypes: {e}")
 
+            tool.Sequence.request_incremental_animation_update()
+
     except Exception as e:
         print(f"❌ Error in update_task_colortype_group_selector: {e}")
 
@@ -1335,6 +1340,7 @@ def update_use_active_colortype_group(self: "Task", context):
             if entry:
                 entry.enabled = bool(self.use_active_colortype_group)
                 print(f"📄 Task {self.ifc_definition_id}: Group {selected_group} enabled = {entry.enabled}")
+        tool.Sequence.request_incremental_animation_update()
     except Exception as e:
         print(f"❌ Error updating use_active_colortype_group: {e}")
 
@@ -1485,6 +1491,7 @@ def update_selected_colortype_in_active_group(self: "Task", context):
             if entry:
                 entry.selected_colortype = self.selected_colortype_in_active_group
                 print(f"📄 Task {self.ifc_definition_id}: Selected colortype = {entry.selected_colortype} in group {selected_group}")
+        tool.Sequence.request_incremental_animation_update()
     except Exception as e:
         print(f"❌ Error updating selected_colortype_in_active_group: {e}")
 
@@ -0,0 +1,116 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# Precompiled Schedule Text Tables.
+# The body of every Schedule_Display_Texts object is compiled once per
+# animation into a per-frame string table (formatted once per calendar day),
+# so the frame handler only looks up a string and writes the text curve when
+# the body actually changes, avoiding re-tessellation on unchanged frames.
+
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+def frame_dates(start_date: datetime, finish_date: datetime, start_frame: int, total_frames: int) -> List[datetime]:
+    """Date shown at each frame of start_frame..start_frame + total_frames"""
+    total_frames = max(int(total_frames), 0)
+    duration = finish_date - start_date
+    return [start_date + duration * (i / float(total_frames or 1)) for i in range(total_frames + 1)]
+
+
+def compile_bodies(dates: List[datetime], format_body: Callable[[datetime], str], per_day: bool = True) -> List[str]:
+    """
+    Body for each date. With per_day, format_body is called once per calendar day and frames
+    of the same day share the string (formats depending only on the day, e.g. week or progress).
+    """
+    if not per_day:
+        return [format_body(date) for date in dates]
+    by_day: Dict[Any, str] = {}
+    bodies = []
+    for date in dates:
+        day = date.date()
+        body = by_day.get(day)
+        if body is None:
+            body = by_day[day] = format_body(date)
+        bodies.append(body)
+    return bodies
+
+
+class CompiledText:
+    """Per-frame bodies of one text object; frames outside the table clamp to its ends"""
+
+    def __init__(self, signature: Hashable, start_frame: int, bodies: Optional[List[str]]) -> None:
+        self.signature = signature
+        self.start_frame = int(start_frame)
+        # None: nothing to write for this text (unknown type or unparsable settings)
+        self.bodies = bodies
+
+    def body_at(self, frame: int) -> Optional[str]:
+        if not self.bodies:
+            return None
+        i = min(max(int(frame) - self.start_frame, 0), len(self.bodies) - 1)
+        return self.bodies[i]
+
+
+class ScheduleTextTables:
+    """Compiled bodies of the schedule texts, keyed by text object name"""
+
+    def __init__(self) -> None:
+        self.texts: Dict[str, CompiledText] = {}
+        self.stats = {"compiles": 0, "writes": 0, "unchanged": 0}
+
+    def get(self, name: str, signature: Hashable, compile_text: Callable[[], CompiledText]) -> CompiledText:
+        """Compiled table of a text, recompiled only when its signature (type, timeline, content) changed"""
+        compiled = self.texts.get(name)
+        if compiled is None or compiled.signature != signature:
+            compiled = self.texts[name] = compile_text()
+            self.stats["compiles"] += 1
+        return compiled
+
+    def apply(self, text_data, compiled: CompiledText, frame: int) -> bool:
+        """
+        Writes the body of the frame to the text curve only if it differs; True when written.
+        The current body is compared rather than the last written one, so bodies set elsewhere
+        (snapshots, manual edits) are still corrected.
+        """
+        body = compiled.body_at(frame)
+        if body is None or text_data.body == body:
+            self.stats["unchanged"] += 1
+            return False
+        text_data.body = body
+        self.stats["writes"] += 1
+        return True
+
+    def clear(self) -> None:
+        self.texts.clear()
+
+
+# Global instance
+_schedule_text_tables = None
+
+
+def get_schedule_text_tables() -> ScheduleTextTables:
+    global _schedule_text_tables
+    if _schedule_text_tables is None:
+        _schedule_text_tables = ScheduleTextTables()
+    return _schedule_text_tables
+
+
+def invalidate_schedule_text_tables() -> None:
+    if _schedule_text_tables is not None:
+        _schedule_text_tables.clear()
@@ -0,0 +1,168 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# Scrub Prefetch of Live State Vectors.
+# While the timeline is dragged, the (row, state) vector of every product is
+# precomputed for the frames ahead of the cursor in the scrub direction (and a
+# few behind) from the live interval index, in short idle-time slices. Vectors
+# are cached within a memory budget, evicting the frames farthest from the
+# cursor, so scrubbing back and forth over a region reuses them instead of
+# resolving products again.
+
+import time
+from typing import Dict, Optional, Tuple
+
+import bpy
+import numpy as np
+
+from bonsai.bim.module.sequence import interval_index
+
+StateVector = Tuple[np.ndarray, np.ndarray]
+
+# Frames prefetched ahead of the cursor in the scrub direction, and behind it
+PREFETCH_AHEAD = 24
+PREFETCH_BEHIND = 6
+# Memory budget of the cached vectors and time slice of one prefetch tick
+DEFAULT_BUDGET_BYTES = 64 * 1024 * 1024
+SLICE_SECONDS = 0.004
+TICK_INTERVAL = 0.01
+
+
+class ScrubPrefetcher:
+    """Memory-bounded cache of per-frame product state vectors with direction-aware prefetching"""
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_BYTES) -> None:
+        self.budget_bytes = budget_bytes
+        self.index: Optional[interval_index.ProductIntervalIndex] = None
+        self.vectors: Dict[int, StateVector] = {}
+        self.nbytes = 0
+        self.last_frame: Optional[int] = None
+        self.direction = 1
+        self.queue = []
+        self._tick_scheduled = False
+        self.stats = {"hits": 0, "misses": 0, "prefetched": 0, "evicted": 0}
+
+    def attach(self, index: interval_index.ProductIntervalIndex) -> None:
+        """Vectors belong to one index; a rebuilt index drops them"""
+        if index is not self.index:
+            self.clear()
+            self.index = index
+
+    def compute(self, frame: int) -> StateVector:
+        rows, states = self.index.state_at(np.arange(len(self.index.products), dtype=np.int64), frame)
+        return rows.astype(np.int32), states
+
+    def lookup(self, frame: int) -> Optional[StateVector]:
+        vector = self.vectors.get(frame)
+        if vector is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return vector
+
+    def store(self, frame: int, vector: StateVector) -> bool:
+        """Caches a vector, evicting the frames farthest from the cursor to stay within the budget"""
+        if frame in self.vectors:
+            return True
+        size = vector[0].nbytes + vector[1].nbytes
+        if size > self.budget_bytes:
+            return False
+        cursor = frame if self.last_frame is None else self.last_frame
+        while self.vectors and self.nbytes + size > self.budget_bytes:
+            farthest = max(self.vectors, key=lambda f: abs(f - cursor))
+            if abs(farthest - cursor) <= abs(frame - cursor):
+                return False
+            old = self.vectors.pop(farthest)
+            self.nbytes -= old[0].nbytes + old[1].nbytes
+            self.stats["evicted"] += 1
+        self.vectors[frame] = vector
+        self.nbytes += size
+        return True
+
+    def note_frame(self, frame: int) -> None:
+        """Records the cursor position and queues the frames around it, ahead in the scrub direction first"""
+        if self.index is None:
+            return
+        if self.last_frame is not None and frame != self.last_frame:
+            self.direction = 1 if frame > self.last_frame else -1
+        self.last_frame = frame
+        ahead = [frame + self.direction * i for i in range(1, PREFETCH_AHEAD + 1)]
+        behind = [frame - self.direction * i for i in range(1, PREFETCH_BEHIND + 1)]
+        first, last = self.index.table.animation_start, self.index.table.animation_end
+        self.queue = [f for f in ahead + behind if first <= f <= last and f not in self.vectors]
+        if self.queue:
+            self._schedule_tick()
+
+    def prefetch(self, max_seconds: float = SLICE_SECONDS) -> int:
+        """Computes queued vectors until the time slice is used; returns how many were computed"""
+        if self.index is None:
+            self.queue = []
+            return 0
+        started = time.perf_counter()
+        computed = 0
+        while self.queue and time.perf_counter() - started < max_seconds:
+            frame = self.queue.pop(0)
+            if frame not in self.vectors:
+                if not self.store(frame, self.compute(frame)):
+                    # Out of budget: the remaining queued frames are even farther
+                    self.queue = []
+                computed += 1
+        self.stats["prefetched"] += computed
+        return computed
+
+    def _schedule_tick(self) -> None:
+        if not self._tick_scheduled:
+            self._tick_scheduled = True
+            bpy.app.timers.register(self._tick, first_interval=TICK_INTERVAL)
+
+    def _tick(self):
+        self.prefetch()
+        if self.queue:
+            return TICK_INTERVAL
+        self._tick_scheduled = False
+        return None
+
+    def clear(self) -> None:
+        self.index = None
+        self.vectors.clear()
+        self.nbytes = 0
+        self.last_frame = None
+        self.queue = []
+
+    def format_stats(self) -> str:
+        return (
+            f"🔮 Scrub prefetch: {len(self.vectors)} frames cached ({self.nbytes / 1024 / 1024:.1f} MB),"
+            f" hits={self.stats['hits']} misses={self.stats['misses']}"
+            f" prefetched={self.stats['prefetched']} evicted={self.stats['evicted']}"
+        )
+
+
+# Global instance
+_scrub_prefetcher = None
+
+
+def get_scrub_prefetcher() -> ScrubPrefetcher:
+    global _scrub_prefetcher
+    if _scrub_prefetcher is None:
+        _scrub_prefetcher = ScrubPrefetcher()
+    return _scrub_prefetcher
+
+
+def invalidate_scrub_prefetcher() -> None:
+    if _scrub_prefetcher is not None:
+        _scrub_prefetcher.clear()
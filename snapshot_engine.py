@@ -0,0 +1,313 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# Index-Based Snapshot Engine.
+# Object -> task, task -> dates and task -> ColorType appearance are resolved
+# once into arrays; a snapshot at a date is then a vectorized state comparison
+# producing per-object visibility and color, applied in one pass. Follows the
+# visibility/color rules of Sequence.show_snapshot.
+# The evaluated state is compared with the last applied snapshot, so moving
+# the snapshot date only writes the objects that differ. The paths that change
+# object states behind the engine (live updates, animation builds, resets,
+# undo, file loads) invalidate the applied state; the next snapshot then reads
+# the states back from the objects once.
+
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import bpy
+import numpy as np
+from bpy.app.handlers import persistent
+
+from bonsai.bim.module.sequence import date_frames, frame_table
+
+NO_TASK = -1
+_NAT = np.datetime64("NaT", "s")
+
+DEMOLITION_TYPES = {"DEMOLITION", "REMOVAL", "DISPOSAL", "DISMANTLE"}
+
+# ColorType settings read by the snapshot, with the defaults show_snapshot assumed
+_FLAG_DEFAULTS = (
+    ("consider_start", False),
+    ("consider_active", True),
+    ("consider_end", True),
+    ("hide_at_end", False),
+    ("use_start_original_color", False),
+    ("use_active_original_color", False),
+    ("use_end_original_color", True),
+)
+_COLOR_NAMES = ("start_color", "in_progress_color", "end_color")
+_TRANSPARENCY_NAMES = ("start_transparency", "active_start_transparency", "end_transparency")
+
+
+class SnapshotState:
+    """Visibility and color of every indexed object at one date"""
+
+    def __init__(self, date, states: np.ndarray, hidden: np.ndarray, colors: np.ndarray) -> None:
+        self.date = date
+        # frame_table.STATE_* per object, -1 without task or dates
+        self.states = states
+        self.hidden = hidden
+        # RGBA, only meaningful where not hidden
+        self.colors = colors
+
+
+class SnapshotIndex:
+    """Per-object task index plus per-task dates and ColorType appearance arrays"""
+
+    def __init__(self, key: Hashable, objects: List[Any], task_of: np.ndarray, task_ids: np.ndarray,
+                 task_start: np.ndarray, task_finish: np.ndarray, task_demolition: np.ndarray,
+                 task_flags: Dict[str, np.ndarray], task_colors: np.ndarray, task_transparency: np.ndarray,
+                 original_colors: np.ndarray) -> None:
+        self.key = key
+        self.objects = objects
+        self.task_of = task_of
+        self.task_ids = task_ids
+        self.task_start = task_start
+        self.task_finish = task_finish
+        self.task_demolition = task_demolition
+        self.task_flags = task_flags
+        # (tasks, 3 states, RGB) and (tasks, 3 states)
+        self.task_colors = task_colors
+        self.task_transparency = task_transparency
+        self.original_colors = original_colors
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    @classmethod
+    def build(cls, key: Hashable, objects: Sequence[Any], tasks: Sequence[Any],
+              task_dates: Callable[[Any], Tuple[Any, Any]], task_colortype: Callable[[Any], Any],
+              original_color: Callable[[Any], Sequence[float]]) -> "SnapshotIndex":
+        """
+        objects[i] is assigned tasks[i] (None without task). task_dates(task) -> (start, finish),
+        task_colortype(task) -> ColorType or None and original_color(obj) -> RGBA are called
+        once per distinct task / object.
+        """
+        task_index: Dict[int, int] = {}
+        unique_tasks = []
+        task_of = np.full(len(objects), NO_TASK, dtype=np.int32)
+        for i, task in enumerate(tasks):
+            if task is None:
+                continue
+            j = task_index.get(task.id())
+            if j is None:
+                j = task_index[task.id()] = len(unique_tasks)
+                unique_tasks.append(task)
+            task_of[i] = j
+
+        n_tasks = len(unique_tasks)
+        task_start = np.full(n_tasks, _NAT)
+        task_finish = np.full(n_tasks, _NAT)
+        task_demolition = np.zeros(n_tasks, dtype=bool)
+        task_flags = {name: np.full(n_tasks, default, dtype=bool) for name, default in _FLAG_DEFAULTS}
+        task_colors = np.ones((n_tasks, 3, 3), dtype=np.float32)
+        task_transparency = np.zeros((n_tasks, 3), dtype=np.float32)
+        for j, task in enumerate(unique_tasks):
+            start, finish = task_dates(task)
+            if start and finish:
+                task_start[j] = date_frames.to_datetime64(start)
+                task_finish[j] = date_frames.to_datetime64(finish)
+            task_demolition[j] = (getattr(task, "PredefinedType", "") or "").upper() in DEMOLITION_TYPES
+            colortype = task_colortype(task)
+            if colortype is None:
+                # No ColorType: keep the original colors
+                task_flags["use_start_original_color"][j] = True
+                task_flags["use_active_original_color"][j] = True
+                task_flags["use_end_original_color"][j] = True
+                continue
+            for name, default in _FLAG_DEFAULTS:
+                task_flags[name][j] = bool(getattr(colortype, name, default))
+            for s, name in enumerate(_COLOR_NAMES):
+                color = getattr(colortype, name, None)
+                if color is not None:
+                    task_colors[j, s] = tuple(color)[:3]
+            for s, name in enumerate(_TRANSPARENCY_NAMES):
+                task_transparency[j, s] = getattr(colortype, name, 0.0)
+
+        original_colors = np.ones((len(objects), 4), dtype=np.float32)
+        for i, obj in enumerate(objects):
+            color = tuple(original_color(obj))
+            original_colors[i, :len(color[:4])] = color[:4]
+
+        return cls(
+            key, list(objects), task_of, np.array([t.id() for t in unique_tasks], dtype=np.int64),
+            task_start, task_finish, task_demolition, task_flags, task_colors, task_transparency, original_colors,
+        )
+
+    def evaluate(self, date) -> SnapshotState:
+        """Vectorized show_snapshot rules at a date"""
+        n = len(self.objects)
+        date = date_frames.to_datetime64(date)
+        has_task = self.task_of != NO_TASK
+        t = np.where(has_task, self.task_of, 0)
+        if not len(self.task_ids):
+            return SnapshotState(date, np.full(n, -1, dtype=np.int8), np.ones(n, dtype=bool), self.original_colors.copy())
+
+        start = self.task_start[t]
+        finish = self.task_finish[t]
+        dated = has_task & ~np.isnat(start) & ~np.isnat(finish)
+        states = np.where(date < start, frame_table.STATE_BEFORE_START,
+                          np.where(date <= finish, frame_table.STATE_ACTIVE, frame_table.STATE_AFTER_END)).astype(np.int8)
+
+        flags = {name: values[t] for name, values in self.task_flags.items()}
+        consider_start = flags["consider_start"]
+        # Priority mode (only START considered): always visible in the START state
+        priority = consider_start & ~flags["consider_active"] & ~flags["consider_end"]
+        states[priority] = frame_table.STATE_BEFORE_START
+
+        hidden = np.select(
+            [states == frame_table.STATE_BEFORE_START, states == frame_table.STATE_ACTIVE],
+            [~consider_start & ~self.task_demolition[t], ~flags["consider_active"]],
+            ~flags["consider_end"] | flags["hide_at_end"],
+        )
+        hidden[priority] = False
+        hidden |= ~dated
+        states[~dated] = -1
+
+        state_index = np.clip(states, 0, 2)
+        use_original = np.select(
+            [state_index == 0, state_index == 1],
+            [flags["use_start_original_color"], flags["use_active_original_color"]],
+            flags["use_end_original_color"],
+        )
+        colors = np.empty((n, 4), dtype=np.float32)
+        colors[:, :3] = np.where(use_original[:, None], self.original_colors[:, :3], self.task_colors[t, state_index])
+        colors[:, 3] = 1.0 - self.task_transparency[t, state_index]
+        return SnapshotState(date, states, hidden, colors)
+
+
+def changed_objects(previous: SnapshotState, current: SnapshotState, tolerance: float = 1e-6) -> np.ndarray:
+    """Indices of the objects whose visibility changed, or whose color changed while visible"""
+    hidden_changed = previous.hidden != current.hidden
+    color_changed = ~current.hidden & (np.abs(previous.colors - current.colors) > tolerance).any(axis=1)
+    return np.flatnonzero(hidden_changed | color_changed)
+
+
+def read_object_state(objects: Sequence[Any]) -> Tuple[SnapshotState, np.ndarray]:
+    """
+    Visibility and color the objects hold now, plus a mask of the objects that can't be
+    compared (hide_viewport and hide_render differ, or the object was removed).
+    """
+    n = len(objects)
+    hidden = np.zeros(n, dtype=bool)
+    colors = np.zeros((n, 4), dtype=np.float32)
+    unknown = np.zeros(n, dtype=bool)
+    for i, obj in enumerate(objects):
+        try:
+            hide = obj.hide_viewport
+            hidden[i] = hide
+            unknown[i] = obj.hide_render != hide
+            colors[i] = obj.color
+        except ReferenceError:
+            unknown[i] = True
+    return SnapshotState(None, None, hidden, colors), unknown
+
+
+class SnapshotEngine:
+    """
+    Snapshot index of the current file, rebuilt when its key changes or on invalidation,
+    and the state last applied to its objects
+    """
+
+    def __init__(self) -> None:
+        self.index: Optional[SnapshotIndex] = None
+        # State the index objects hold, None when something else may have changed them
+        self.applied: Optional[SnapshotState] = None
+        self.stats = {"builds": 0, "snapshots": 0, "written": 0, "skipped": 0, "reads": 0}
+
+    def get_index(self, key: Hashable, build: Callable[[], SnapshotIndex]) -> SnapshotIndex:
+        if self.index is None or self.index.key != key:
+            self.index = build()
+            self.applied = None
+            self.stats["builds"] += 1
+        return self.index
+
+    def objects_to_write(self, index: SnapshotIndex, state: SnapshotState) -> np.ndarray:
+        """
+        Objects whose visibility or color differs from state: compared with the last applied
+        snapshot, or with the states read back from the objects after an invalidation
+        """
+        if self.applied is not None:
+            return changed_objects(self.applied, state)
+        self.stats["reads"] += 1
+        current, unknown = read_object_state(index.objects)
+        return np.union1d(changed_objects(current, state), np.flatnonzero(unknown))
+
+    def record_snapshot(self, index: SnapshotIndex, state: SnapshotState, written: int) -> None:
+        self.applied = state
+        self.stats["snapshots"] += 1
+        self.stats["written"] += written
+        self.stats["skipped"] += len(index) - written
+
+    def invalidate_state(self) -> None:
+        self.applied = None
+
+    def clear(self) -> None:
+        self.index = None
+        self.applied = None
+
+
+# Global instance
+_snapshot_engine = None
+
+
+def get_snapshot_engine() -> SnapshotEngine:
+    global _snapshot_engine
+    if _snapshot_engine is None:
+        _snapshot_engine = SnapshotEngine()
+    return _snapshot_engine
+
+
+def invalidate_snapshot_index() -> None:
+    if _snapshot_engine is not None:
+        _snapshot_engine.clear()
+
+
+def invalidate_snapshot_state() -> None:
+    """Called by the paths that change object visibility or color outside the snapshot engine"""
+    if _snapshot_engine is not None:
+        _snapshot_engine.invalidate_state()
+
+
+@persistent
+def snapshot_engine_load_handler(*args):
+    # The index holds the objects of the previous file
+    invalidate_snapshot_index()
+
+
+@persistent
+def snapshot_engine_undo_handler(*args):
+    # Undo / redo may restore earlier object states or animation data
+    invalidate_snapshot_state()
+
+
+def register() -> None:
+    if snapshot_engine_load_handler not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(snapshot_engine_load_handler)
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if snapshot_engine_undo_handler not in handlers:
+            handlers.append(snapshot_engine_undo_handler)
+
+
+def unregister() -> None:
+    if snapshot_engine_load_handler in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(snapshot_engine_load_handler)
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if snapshot_engine_undo_handler in handlers:
+            handlers.remove(snapshot_engine_undo_handler)
+    invalidate_snapshot_index()
@@ -0,0 +1,231 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# Stage Profiler for the 4D Animation Build.
+# Records wall time, call count and item count of every build stage (lookup,
+# frames, ColorType resolution, planning, keyframe writes, live-cache
+# serialization, HUD/legend) per run. Runs are kept in a short history,
+# exported as JSON and compared against each other or an exported baseline.
+
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Known stages, in build order
+STAGE_LOOKUP = "lookup_build"
+STAGE_FRAMES = "frames"
+STAGE_COLORTYPES = "colortype_resolution"
+STAGE_PLANNING = "planning"
+STAGE_KEYFRAMES = "keyframe_writes"
+STAGE_LIVE_CACHE = "live_cache_serialization"
+STAGE_HUD = "hud_legend"
+STAGES = (STAGE_LOOKUP, STAGE_FRAMES, STAGE_COLORTYPES, STAGE_PLANNING, STAGE_KEYFRAMES, STAGE_LIVE_CACHE, STAGE_HUD)
+
+PROFILE_FORMAT_VERSION = 1
+
+# A stage counts as a regression when it is this much slower and above the noise floor
+REGRESSION_RATIO = 1.2
+REGRESSION_MIN_SECONDS = 0.01
+
+
+class StageProfiler:
+    """Per-run stage timings of the 4D animation build"""
+
+    def __init__(self, history_size: int = 20) -> None:
+        self.runs = deque(maxlen=history_size)
+        self._current: Optional[Dict[str, Any]] = None
+        self._depth = 0
+        self._started = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._current is not None
+
+    def begin_run(self, label: str, **metadata) -> None:
+        """Starts a run. Nested calls (an operator calling another profiled entry point) join the outer run."""
+        self._depth += 1
+        if self._depth > 1:
+            return
+        self._started = time.perf_counter()
+        self._current = {
+            "label": label,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "metadata": dict(metadata),
+            "total_time": 0.0,
+            "stages": {},
+        }
+
+    def end_run(self, **metadata) -> Optional[Dict[str, Any]]:
+        """Closes the run and stores it in the history"""
+        if self._depth == 0:
+            return None
+        self._depth -= 1
+        if self._depth > 0 or self._current is None:
+            if self._current is not None:
+                self._current["metadata"].update(metadata)
+            return None
+        run = self._current
+        run["metadata"].update(metadata)
+        run["total_time"] = time.perf_counter() - self._started
+        self._current = None
+        self.runs.append(run)
+        return run
+
+    def abort_run(self) -> None:
+        """Closes a run without keeping it (e.g. a cancelled build); a nested abort leaves the outer run alone"""
+        if self._depth == 0:
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            self._current = None
+
+    def discard_run(self) -> None:
+        """Drops the active run whatever its nesting"""
+        self._depth = 0
+        self._current = None
+
+    def record(self, stage: str, seconds: float, items: int = 0, calls: int = 1) -> None:
+        """Adds time/items to a stage of the active run; no-op outside a run"""
+        if self._current is None:
+            return
+        stats = self._current["stages"].get(stage)
+        if stats is None:
+            stats = self._current["stages"][stage] = {"time": 0.0, "calls": 0, "items": 0}
+        stats["time"] += seconds
+        stats["calls"] += calls
+        stats["items"] += int(items)
+
+    def add_items(self, stage: str, items: int) -> None:
+        self.record(stage, 0.0, items, calls=0)
+
+    @contextmanager
+    def stage(self, stage: str, items: int = 0):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started, items)
+
+    # --- Queries --------------------------------------------------------
+
+    @property
+    def last_run(self) -> Optional[Dict[str, Any]]:
+        return self.runs[-1] if self.runs else None
+
+    def previous_run(self, run: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Most recent earlier run with the same label"""
+        runs = list(self.runs)
+        index = next((i for i in range(len(runs) - 1, -1, -1) if runs[i] is run), len(runs))
+        return next((r for r in reversed(runs[:index]) if r["label"] == run["label"]), None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"version": PROFILE_FORMAT_VERSION, "runs": list(self.runs)}
+
+    def export_json(self, filepath: str) -> None:
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def clear(self) -> None:
+        self.runs.clear()
+        self.discard_run()
+
+
+def load_runs(filepath: str) -> List[Dict[str, Any]]:
+    """Runs of a profile exported with StageProfiler.export_json"""
+    with open(filepath, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict) and "runs" in data:
+        return list(data["runs"])
+    if isinstance(data, dict) and "stages" in data:
+        return [data]
+    raise ValueError("Not a 4D animation profile")
+
+
+def _ordered_stages(*runs: Dict[str, Any]) -> List[str]:
+    names = set()
+    for run in runs:
+        names.update(run.get("stages", {}))
+    return [s for s in STAGES if s in names] + sorted(names - set(STAGES))
+
+
+def compare_runs(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Per-stage comparison. Time per item is included so runs on schedules of different size
+    can be compared; regression is flagged on time per item when both runs have items.
+    """
+    rows = []
+    for name in _ordered_stages(baseline, current):
+        a = baseline.get("stages", {}).get(name, {"time": 0.0, "calls": 0, "items": 0})
+        b = current.get("stages", {}).get(name, {"time": 0.0, "calls": 0, "items": 0})
+        per_item_a = a["time"] / a["items"] if a["items"] else None
+        per_item_b = b["time"] / b["items"] if b["items"] else None
+        if per_item_a and per_item_b:
+            ratio = per_item_b / per_item_a
+        else:
+            ratio = b["time"] / a["time"] if a["time"] else None
+        rows.append({
+            "stage": name,
+            "baseline_time": a["time"], "current_time": b["time"],
+            "delta_time": b["time"] - a["time"],
+            "baseline_items": a["items"], "current_items": b["items"],
+            "baseline_calls": a["calls"], "current_calls": b["calls"],
+            "baseline_time_per_item": per_item_a, "current_time_per_item": per_item_b,
+            "ratio": ratio,
+            "regression": bool(ratio and ratio > REGRESSION_RATIO and b["time"] > REGRESSION_MIN_SECONDS),
+        })
+    return rows
+
+
+def format_run(run: Dict[str, Any]) -> List[str]:
+    lines = [f"⏱️ {run['label']} @ {run['timestamp']}: {run['total_time']:.3f}s total"]
+    if run.get("metadata"):
+        lines.append("   " + ", ".join(f"{k}={v}" for k, v in run["metadata"].items()))
+    for name in _ordered_stages(run):
+        stats = run["stages"][name]
+        share = stats["time"] / run["total_time"] * 100 if run["total_time"] else 0.0
+        rate = f", {stats['items'] / stats['time']:,.0f} items/s" if stats["items"] and stats["time"] else ""
+        lines.append(
+            f"   {name:<26} {stats['time']:8.3f}s {share:5.1f}%  calls={stats['calls']:<6} items={stats['items']:,}{rate}"
+        )
+    return lines
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> List[str]:
+    lines = []
+    for row in rows:
+        ratio = f"x{row['ratio']:.2f}" if row["ratio"] else "  -  "
+        flag = " ⚠️ REGRESSION" if row["regression"] else ""
+        lines.append(
+            f"   {row['stage']:<26} {row['baseline_time']:8.3f}s -> {row['current_time']:8.3f}s"
+            f" ({row['delta_time']:+.3f}s, {ratio}){flag}"
+        )
+    return lines
+
+
+# Global instance
+_stage_profiler = None
+
+
+def get_stage_profiler() -> StageProfiler:
+    global _stage_profiler
+    if _stage_profiler is None:
+        _stage_profiler = StageProfiler()
+    return _stage_profiler
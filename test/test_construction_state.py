@@ -0,0 +1,268 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# Parity of the vectorized construction states with the recursive
+# Sequence.process_task_status, on generated task trees with outputs and
+# demolition inputs. The parity tests drive the real classmethod with its IFC
+# lookups stubbed, so they need bonsai.tool (run them inside Blender).
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+construction_state = pytest.importorskip("bonsai.bim.module.sequence.construction_state")
+
+BASE = datetime(2024, 1, 1, 8, 0, 0)
+
+
+class Entity:
+    def __init__(self, step_id: int) -> None:
+        self._id = step_id
+
+    def id(self) -> int:
+        return self._id
+
+    def __repr__(self) -> str:
+        return f"#{self._id}"
+
+
+class Rel:
+    def __init__(self, related_objects) -> None:
+        self.RelatedObjects = related_objects
+
+
+class Task(Entity):
+    def __init__(self, step_id: int, start=None, finish=None) -> None:
+        super().__init__(step_id)
+        self.start = start
+        self.finish = finish
+        self.outputs = []
+        self.inputs = []
+        self.IsNestedBy = []
+
+    def nest(self, *tasks) -> "Task":
+        self.IsNestedBy.append(Rel(list(tasks)))
+        return self
+
+
+def derive_date(task, attribute):
+    """Own date, else earliest start / latest finish of the nested tasks (derive_date with is_earliest / is_latest)"""
+    own = getattr(task, attribute)
+    if own:
+        return own
+    dates = [derive_date(t, attribute) for rel in task.IsNestedBy for t in rel.RelatedObjects]
+    dates = [d for d in dates if d]
+    if not dates:
+        return None
+    return min(dates) if attribute == "start" else max(dates)
+
+
+_STATE_SETS = ("to_build", "in_construction", "completed", "to_demolish", "in_demolition", "demolished")
+
+
+@pytest.fixture
+def sequence(monkeypatch):
+    """Sequence with its IFC lookups answered by the fake entities"""
+    tool = pytest.importorskip("bonsai.tool")
+    import ifcopenshell.util.sequence
+
+    def fake_derive_date(task, attribute, is_earliest=False, is_latest=False):
+        return derive_date(task, "start" if attribute.endswith("Start") else "finish")
+
+    monkeypatch.setattr(ifcopenshell.util.sequence, "derive_date", fake_derive_date)
+    monkeypatch.setattr(ifcopenshell.util.sequence, "get_task_outputs", lambda task: task.outputs)
+    monkeypatch.setattr(tool.Sequence, "get_task_inputs", classmethod(lambda cls, task: task.inputs))
+    monkeypatch.setattr(tool.Ifc, "get_object", staticmethod(lambda element: element))
+    for name in _STATE_SETS:
+        monkeypatch.setattr(tool.Sequence, name, set(), raising=False)
+    return tool.Sequence
+
+
+def recursive_states(sequence, root_tasks, date, viz_start=None, viz_finish=None):
+    """States of Sequence.process_task_status run on every root task"""
+    for name in _STATE_SETS:
+        setattr(sequence, name, set())
+    for task in root_tasks:
+        sequence.process_task_status(task, date, viz_start, viz_finish)
+    return {key: set(products) for key, products in sequence._get_construction_state_sets().items()}
+
+
+def build_index(root_tasks):
+    return construction_state.ConstructionStateIndex.build(
+        root_tasks,
+        task_dates=lambda task: (derive_date(task, "start"), derive_date(task, "finish")),
+        task_outputs=lambda task: task.outputs,
+        task_inputs=lambda task: task.inputs,
+    )
+
+
+def vectorized_states(index, date, viz_start=None, viz_finish=None):
+    return index.to_sets(index.evaluate(date, viz_start, viz_finish))
+
+
+def generate_schedule(seed: int, n_products: int = 120):
+    rng = random.Random(seed)
+    ids = iter(range(1, 100000))
+    products = [Entity(next(ids)) for _ in range(n_products)]
+
+    def make_task(depth):
+        task = Task(next(ids))
+        if depth < 3 and rng.random() < 0.35:
+            task.nest(*[make_task(depth + 1) for _ in range(rng.randint(1, 4))])
+            if rng.random() < 0.3:
+                # Summary task with its own dates
+                task.start = BASE + timedelta(days=rng.randint(0, 60))
+                task.finish = task.start + timedelta(days=rng.randint(0, 30))
+        elif rng.random() < 0.9:
+            task.start = BASE + timedelta(days=rng.randint(0, 120), hours=rng.randint(0, 8))
+            task.finish = task.start + timedelta(days=rng.randint(0, 20))
+        task.outputs = rng.sample(products, rng.randint(0, 6))
+        # Demolition work: inputs are removed by the task
+        if rng.random() < 0.4:
+            task.inputs = rng.sample(products, rng.randint(1, 5))
+        return task
+
+    return [make_task(0) for _ in range(rng.randint(3, 8))]
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_parity_with_recursive_processing(sequence, seed):
+    root_tasks = generate_schedule(seed)
+    index = build_index(root_tasks)
+    for day in range(-5, 160, 4):
+        date = BASE + timedelta(days=day, hours=3)
+        assert vectorized_states(index, date) == recursive_states(sequence, root_tasks, date)
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_parity_with_visualization_range(sequence, seed):
+    root_tasks = generate_schedule(seed)
+    index = build_index(root_tasks)
+    ranges = [
+        (BASE + timedelta(days=20), BASE + timedelta(days=90)),
+        (BASE + timedelta(days=20), None),
+        (None, BASE + timedelta(days=50)),
+    ]
+    for viz_start, viz_finish in ranges:
+        for day in range(0, 140, 7):
+            date = BASE + timedelta(days=day)
+            expected = recursive_states(sequence, root_tasks, date, viz_start, viz_finish)
+            assert vectorized_states(index, date, viz_start, viz_finish) == expected
+
+
+def test_demolition_inputs_follow_task_states():
+    wall, slab = Entity(1), Entity(2)
+    task = Task(10, BASE, BASE + timedelta(days=10))
+    task.outputs = [slab]
+    task.inputs = [wall]
+    index = build_index([task])
+
+    before = vectorized_states(index, BASE - timedelta(days=1))
+    assert before["TO_BUILD"] == {slab} and before["TO_DEMOLISH"] == {wall}
+    during = vectorized_states(index, BASE + timedelta(days=5))
+    assert during["IN_CONSTRUCTION"] == {slab} and during["IN_DEMOLITION"] == {wall}
+    after = vectorized_states(index, BASE + timedelta(days=11))
+    assert after["COMPLETED"] == {slab} and after["DEMOLISHED"] == {wall}
+
+
+def test_task_dates_are_inclusive():
+    product = Entity(1)
+    task = Task(10, BASE, BASE + timedelta(days=2))
+    task.outputs = [product]
+    index = build_index([task])
+    assert vectorized_states(index, BASE)["IN_CONSTRUCTION"] == {product}
+    assert vectorized_states(index, BASE + timedelta(days=2))["IN_CONSTRUCTION"] == {product}
+
+
+def test_summary_task_derives_dates_from_nested_tasks():
+    product = Entity(1)
+    child = Task(11, BASE + timedelta(days=5), BASE + timedelta(days=8))
+    summary = Task(10).nest(child)
+    summary.outputs = [product]
+    index = build_index([summary])
+    assert vectorized_states(index, BASE + timedelta(days=6))["IN_CONSTRUCTION"] == {product}
+    assert vectorized_states(index, BASE)["TO_BUILD"] == {product}
+
+
+def test_product_of_several_tasks_is_in_several_states():
+    product = Entity(1)
+    first = Task(10, BASE, BASE + timedelta(days=1))
+    second = Task(11, BASE + timedelta(days=5), BASE + timedelta(days=6))
+    first.outputs = second.outputs = [product]
+    states = vectorized_states(build_index([first, second]), BASE + timedelta(days=3))
+    assert states["COMPLETED"] == {product}
+    assert states["TO_BUILD"] == {product}
+
+
+def test_undated_tasks_are_ignored():
+    product = Entity(1)
+    task = Task(10)
+    task.outputs = [product]
+    index = build_index([task])
+    assert len(index.task_ids) == 0
+    assert all(not products for products in vectorized_states(index, BASE).values())
+
+
+def test_shared_nested_task_is_indexed_once():
+    child = Task(11, BASE, BASE + timedelta(days=1))
+    child.outputs = [Entity(1)]
+    index = build_index([Task(10).nest(child), Task(12).nest(child)])
+    assert index.task_ids.tolist().count(11) == 1
+
+
+def test_to_sets_converts_products():
+    product = Entity(1)
+    task = Task(10, BASE, BASE + timedelta(days=1))
+    task.outputs = [product]
+    index = build_index([task])
+    states = index.to_sets(index.evaluate(BASE), convert=lambda p: f"object-{p.id()}")
+    assert states["IN_CONSTRUCTION"] == {"object-1"}
+
+
+def test_state_bitmaps_round_trip():
+    root_tasks = generate_schedule(3)
+    index = build_index(root_tasks)
+    cache = construction_state.StateBitmapCache()
+    date = BASE + timedelta(days=40)
+    masks = cache.evaluate(index, ("schedule", date), date)
+    assert cache.stats["misses"] == 1
+    cached = cache.evaluate(index, ("schedule", date), date)
+    assert cache.stats["hits"] == 1
+    assert (cached == masks).all()
+    assert index.to_sets(cached) == vectorized_states(index, date)
+
+
+def test_state_bitmaps_evict_least_recently_used():
+    index = build_index(generate_schedule(4))
+    entry_size = len(construction_state.STATE_KEYS) * -(-index.product_count // 8)
+    cache = construction_state.StateBitmapCache(budget_bytes=2 * entry_size)
+    dates = [BASE + timedelta(days=day) for day in (10, 20, 30)]
+    cache.evaluate(index, dates[0], dates[0])
+    cache.evaluate(index, dates[1], dates[1])
+    cache.evaluate(index, dates[0], dates[0])
+    cache.evaluate(index, dates[2], dates[2])
+    assert list(cache.bitmaps) == [dates[0], dates[2]]
+    assert cache.stats["evicted"] == 1
+
+
+def test_state_bitmaps_belong_to_one_index():
+    date = BASE + timedelta(days=10)
+    cache = construction_state.StateBitmapCache()
+    cache.evaluate(build_index(generate_schedule(5)), date, date)
+    assert cache.get(build_index(generate_schedule(5)), date) is None
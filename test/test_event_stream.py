@@ -0,0 +1,149 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# The event stream compiled from a build_animation_plan plan must reproduce,
+# at every frame, the state the keyframe writer gives the objects (constant
+# interpolation: the last key at or before the frame, the first key before
+# any), and a transition between two frames must name exactly the objects
+# whose state differs. The exported JSON replays to the same states.
+
+import json
+import random
+from collections import defaultdict
+
+import pytest
+
+event_stream = pytest.importorskip("bonsai.bim.module.sequence.event_stream")
+
+COLORS = [(1.0, 0.0, 0.0, 1.0), (0.0, 1.0, 0.0, 0.5), (0.0, 0.0, 1.0, 1.0)]
+
+
+class Object:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def as_pointer(self) -> int:
+        return id(self)
+
+
+def random_plan(seed: int, object_count: int = 12, frame_count: int = 40):
+    rng = random.Random(seed)
+    objects = [Object(f"Product{i}") for i in range(object_count)]
+    plan = defaultdict(lambda: defaultdict(list))
+    for obj in objects:
+        plan[0]["HIDE"].append(obj)
+        for frame in rng.sample(range(1, frame_count), 6):
+            action = rng.choice(("HIDE", "REVEAL", "SET_COLOR"))
+            if action == "SET_COLOR":
+                plan[frame][action].append((obj, rng.choice(COLORS)))
+            else:
+                plan[frame][action].append(obj)
+    return objects, {frame: dict(actions) for frame, actions in plan.items()}
+
+
+def planned_state(plan, obj, frame):
+    """(visibility, color) of an object at a frame, applying the plan like the keyframe writer"""
+    keys = {"visibility": {}, "color": {}}
+    for key_frame, actions in plan.items():
+        if obj in actions.get("HIDE", []):
+            keys["visibility"][key_frame] = event_stream.HIDDEN
+        if obj in actions.get("REVEAL", []):
+            keys["visibility"][key_frame] = event_stream.VISIBLE
+        for target, color in actions.get("SET_COLOR", []):
+            if target is obj:
+                keys["color"][key_frame] = tuple(color)
+    state = []
+    for channel in ("visibility", "color"):
+        frames = sorted(keys[channel])
+        if not frames:
+            state.append(None)
+            continue
+        before = [f for f in frames if f <= frame]
+        state.append(keys[channel][before[-1] if before else frames[0]])
+    return tuple(state)
+
+
+def stream_state(stream, obj_index, frame):
+    visibility, color_index = stream.state_at(frame)
+    color = color_index[obj_index]
+    return (
+        int(visibility[obj_index]),
+        tuple(stream.colors[color].tolist()) if color != event_stream.UNCHANGED else None,
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_stream_matches_the_plan_at_every_frame(seed):
+    objects, plan = random_plan(seed)
+    stream = event_stream.AnimationEventStream.from_animation_plan(plan)
+    assert stream.objects == objects
+    for frame in range(0, 42):
+        for obj_index, obj in enumerate(objects):
+            assert stream_state(stream, obj_index, frame) == planned_state(plan, obj, frame)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_transition_names_only_the_changed_objects(seed):
+    objects, plan = random_plan(seed)
+    stream = event_stream.AnimationEventStream.from_animation_plan(plan)
+    rng = random.Random(seed)
+    for _ in range(30):
+        frame_a, frame_b = rng.randrange(42), rng.randrange(42)
+        obj_indices, visibility, color_index = stream.transition(frame_a, frame_b)
+        expected = {
+            i for i, obj in enumerate(objects) if planned_state(plan, obj, frame_a) != planned_state(plan, obj, frame_b)
+        }
+        assert set(obj_indices.tolist()) == expected
+        for i, obj_index in enumerate(obj_indices.tolist()):
+            assert (int(visibility[i]), int(color_index[i])) == tuple(
+                int(v[obj_index]) for v in stream.state_at(frame_b)
+            )
+
+
+def test_exported_json_replays_the_plan(tmp_path):
+    objects, plan = random_plan(7)
+    stream = event_stream.AnimationEventStream.from_animation_plan(plan)
+    filepath = tmp_path / "events.json"
+    stream.export_json(str(filepath), [obj.name for obj in objects], (1, 41))
+    data = json.loads(filepath.read_text())
+    assert data["version"] == event_stream.EVENT_STREAM_FORMAT_VERSION
+    assert (data["frame_start"], data["frame_end"]) == (1, 41)
+
+    # A player walks the per-frame offsets, applying each frame's events in order
+    state = {name: [None, None] for name in data["objects"]}
+    for i, frame in enumerate(data["frames"]):
+        for row in range(data["offsets"][i], data["offsets"][i + 1]):
+            target = state[data["objects"][data["object"][row]]]
+            if data["visibility"][row] != event_stream.UNCHANGED:
+                target[0] = data["visibility"][row]
+            if data["color"][row] != event_stream.UNCHANGED:
+                target[1] = tuple(data["colors"][data["color"][row]])
+        for obj in objects:
+            visibility, color = planned_state(plan, obj, frame)
+            played = state[obj.name]
+            assert played[0] == visibility
+            # Until its first color event a player keeps the object's own color
+            if played[1] is not None:
+                assert played[1] == pytest.approx(color)
+
+
+def test_export_requires_one_key_per_object():
+    objects, plan = random_plan(1)
+    stream = event_stream.AnimationEventStream.from_animation_plan(plan)
+    with pytest.raises(ValueError):
+        stream.to_dict([obj.name for obj in objects[1:]])
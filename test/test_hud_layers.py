@@ -0,0 +1,169 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# Offscreen drawing tests of the static HUD layers. They run inside Blender,
+# background mode included (blender -b --python-expr "import pytest; pytest.main([...])"),
+# and are skipped where no GPU backend is available for offscreen drawing.
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+gpu = pytest.importorskip("gpu")
+
+from bonsai.bim.module.sequence.hud import offscreen_layers, timeline_hud
+
+WIDTH, HEIGHT = 64, 48
+
+
+@pytest.fixture
+def target():
+    try:
+        offscreen = gpu.types.GPUOffScreen(WIDTH, HEIGHT)
+    except Exception as e:
+        pytest.skip(f"Offscreen drawing not available: {e}")
+    yield offscreen
+    offscreen.free()
+
+
+@pytest.fixture
+def layer():
+    layer = offscreen_layers.OffscreenLayer("test")
+    yield layer
+    layer.free()
+
+
+def draw_into(target, draw):
+    """Runs draw() with region pixel coordinates, as a POST_PIXEL callback, and reads the pixels back"""
+    with target.bind():
+        framebuffer = gpu.state.active_framebuffer_get()
+        framebuffer.clear(color=(0.0, 0.0, 0.0, 0.0))
+        with gpu.matrix.push_pop(), gpu.matrix.push_pop_projection():
+            gpu.matrix.load_identity()
+            gpu.matrix.load_projection_matrix(offscreen_layers.pixel_projection(WIDTH, HEIGHT))
+            draw()
+        pixels = framebuffer.read_color(0, 0, WIDTH, HEIGHT, 4, 0, 'FLOAT')
+    pixels.dimensions = WIDTH * HEIGHT * 4
+    return np.array(pixels.to_list(), dtype=np.float32).reshape(HEIGHT, WIDTH, 4)
+
+
+def draw_rects():
+    geometry = timeline_hud.TimelineGeometry()
+    geometry.add_rect(4, 4, 20, 16, (0.2, 0.6, 1.0, 1.0))
+    geometry.add_rect(14, 10, 30, 20, (1.0, 0.5, 0.0, 0.5))
+    geometry.add_line(50, 2, 40, (1.0, 1.0, 1.0, 0.8), 2.0)
+    geometry.finish().draw(0)
+
+
+# Bounding box of draw_rects
+RECTS_BOUNDS = (4, 2, 51, 42)
+
+
+def test_layer_matches_direct_drawing(target, layer):
+    direct = draw_into(target, draw_rects)
+    layered = draw_into(target, lambda: layer.draw("rects", RECTS_BOUNDS, draw_rects))
+    assert layer.stats["renders"] == 1
+    assert np.allclose(direct, layered, atol=2.0 / 255.0)
+
+
+def test_layer_texture_covers_only_the_bounds(target, layer):
+    draw_into(target, lambda: layer.draw("rects", RECTS_BOUNDS, draw_rects))
+    padding = offscreen_layers.BOUNDS_PADDING
+    assert layer.size == (51 - 4 + 2 * padding, 42 - 2 + 2 * padding)
+    assert layer.rect[:2] == (4 - padding, 2 - padding)
+
+
+def test_layer_is_transparent_outside_its_content(target, layer):
+    pixels = draw_into(target, lambda: layer.draw("rects", RECTS_BOUNDS, draw_rects))
+    assert pixels[10, 10, 3] > 0.99
+    assert np.allclose(pixels[40:, :10], 0.0)
+
+
+def test_layer_renders_once_per_key(target, layer):
+    renders = []
+
+    def content():
+        renders.append(True)
+        draw_rects()
+
+    for key in ("a", "a", "a", "b", "b"):
+        draw_into(target, lambda: layer.draw(key, RECTS_BOUNDS, content))
+    assert len(renders) == 2
+    assert layer.stats["blits"] == 5
+
+
+def test_layer_renders_again_after_invalidate_and_move(target, layer):
+    draw_into(target, lambda: layer.draw("a", RECTS_BOUNDS, draw_rects))
+    layer.invalidate()
+    draw_into(target, lambda: layer.draw("a", RECTS_BOUNDS, draw_rects))
+    draw_into(target, lambda: layer.draw("a", (0, 0, 20, 20), draw_rects))
+    assert layer.stats["renders"] == 3
+    padding = offscreen_layers.BOUNDS_PADDING
+    assert layer.size == (20 + 2 * padding, 20 + 2 * padding)
+
+
+def test_unavailable_layer_draws_directly(target, layer):
+    layer.unavailable = True
+    direct = draw_into(target, draw_rects)
+    pixels = draw_into(target, lambda: layer.draw("rects", RECTS_BOUNDS, draw_rects))
+    assert layer.stats == {"renders": 0, "blits": 0, "direct": 1}
+    assert np.allclose(direct, pixels)
+
+
+def test_layer_set_keeps_one_layer_per_viewport_size(target):
+    layers = offscreen_layers.OffscreenLayerSet("test", max_layers=2)
+    # Two regions of different sizes drawn alternately don't re-render each other's layer
+    for _ in range(3):
+        for size in ((WIDTH, HEIGHT), (WIDTH // 2, HEIGHT // 2)):
+            draw_into(target, lambda: layers.draw(("rects", size), size[0], size[1], RECTS_BOUNDS, draw_rects))
+    assert layers.stats["renders"] == 2
+    assert layers.stats["blits"] == 6
+    # The least recently used size is freed beyond max_layers
+    draw_into(target, lambda: layers.draw("other", 10, 10, RECTS_BOUNDS, draw_rects))
+    assert list(layers.layers) == [(WIDTH // 2, HEIGHT // 2), (10, 10)]
+    layers.free()
+    assert not layers.layers
+
+
+def test_freeze_makes_settings_hashable():
+    settings = {'color': [1.0, 0.5, 0.0, 1.0], 'title': 'Legend', 'items': [{'name': 'A', 'color': (1, 0, 0, 1)}]}
+    assert hash(offscreen_layers.freeze(settings)) == hash(offscreen_layers.freeze(dict(reversed(settings.items()))))
+
+
+def test_timeline_scale_is_rendered_once_across_frames(target):
+    hud = timeline_hud.TimelineHUD(0)
+    start = datetime(2024, 1, 1)
+    data = {
+        'full_schedule_start': start,
+        'full_schedule_end': start + timedelta(days=90),
+        'viz_start': start,
+        'viz_finish': start + timedelta(days=90),
+    }
+    settings = {'position': 'BOTTOM', 'height': 20.0, 'width': 0.8, 'color_progress': (0.1, 0.6, 1.0, 0.1)}
+    frames = []
+    for day in (10, 40, 70):
+        data['current_date'] = start + timedelta(days=day)
+        frames.append(draw_into(target, lambda: hud.draw(data, settings, WIDTH, HEIGHT)))
+
+    assert hud.stats["builds"] == 1
+    assert hud.scale_layer.stats["renders"] == 1
+    assert hud.scale_layer.stats["blits"] == 3
+    hud.scale_layer.free()
+    # The playhead still moves every frame
+    assert not np.allclose(frames[0], frames[2])
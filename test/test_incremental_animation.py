@@ -0,0 +1,227 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# Parity of the incremental animation update with a full rebuild: after one
+# task is edited, re-keying only the affected products through the stored
+# frame builder and appearance path must leave every object with the keys a
+# full animate_objects_with_ColorTypes_optimized or animate_objects_with_ColorTypes
+# build writes. The keyframe writer records the queued keys instead of writing
+# F-curves, and the IFC and ColorType lookups are stubbed, so the test needs
+# bonsai.tool (run it inside Blender).
+
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+tool = pytest.importorskip("bonsai.tool")
+import bpy
+
+from bonsai.bim.module.sequence import incremental_animation, keyframe_writer
+
+SETTINGS = {"start_frame": 1, "total_frames": 249}
+
+
+class Entity:
+    def __init__(self, step_id: int) -> None:
+        self._id = step_id
+
+    def id(self) -> int:
+        return self._id
+
+    def is_a(self, ifc_class: str) -> bool:
+        return False
+
+
+class Object:
+    type = "MESH"
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.animation_data = None
+        self.keys = ()
+
+    def animation_data_clear(self) -> None:
+        self.animation_data = None
+        self.keys = ()
+
+
+class RecordingWriter:
+    """BulkKeyframeWriter that keeps the queued keys on the objects"""
+
+    def __init__(self) -> None:
+        self.keys = {}
+
+    def discard(self, obj) -> None:
+        self.keys.pop(obj, None)
+
+    def add(self, obj, data_path, frame, value) -> None:
+        self.keys.setdefault(obj, {})[(data_path, float(frame))] = value
+
+    def add_visibility(self, obj, frame, hide) -> None:
+        for data_path in ("hide_viewport", "hide_render"):
+            self.add(obj, data_path, frame, bool(hide))
+
+    def add_color(self, obj, frame, color) -> None:
+        self.add(obj, "color", frame, tuple(color))
+
+    def add_operations(self, visibility_ops, color_ops) -> None:
+        for op in visibility_ops:
+            self.add_visibility(op["obj"], op["frame"], op["hide"])
+        for op in color_ops:
+            self.add_color(op["obj"], op["frame"], op["color"])
+
+    def write(self, replace_existing: bool = True, share_identical: bool = False) -> None:
+        for obj, keys in self.keys.items():
+            merged = dict(keys) if replace_existing else {**dict(obj.keys), **keys}
+            obj.keys = tuple(sorted(merged.items()))
+            obj.animation_data = True
+
+
+def build_frames(tasks, schedule, assignments):
+    """Product frames of products assigned to tasks scheduled (start frame, finish frame)"""
+    frames = {}
+    for product_id, task_id in assignments.items():
+        start, finish = schedule[task_id]
+        frames.setdefault(product_id, []).append({
+            "task": tasks[task_id],
+            "relationship": "output",
+            "states": {"before_start": (1, start - 1), "active": (start, finish), "after_end": (finish + 1, 250)},
+        })
+    return frames
+
+
+@pytest.fixture
+def scene(monkeypatch):
+    schedule = {10: (20, 60), 11: (50, 120), 12: (100, 200)}
+    assignments = {101: 10, 102: 10, 103: 11, 104: 12, 105: 12}
+    tasks = {task_id: Entity(task_id) for task_id in schedule}
+    products = {product_id: Entity(product_id) for product_id in assignments}
+    objects = {product_id: Object(f"Product{product_id}") for product_id in assignments}
+    entities = {**tasks, **products}
+    work_schedule = Entity(1)
+    animation_props = SimpleNamespace(
+        animation_group_stack=[], enable_live_color_updates=False,
+        share_identical_actions=False, cull_outside_visualization=False,
+    )
+
+    def get_colortype(cls, task, animation_props, active_group_name):
+        shade = task.id() / 100.0
+        return {
+            "consider_start": True, "consider_active": True, "consider_end": True,
+            "start_color": (shade, 0.2, 0.2, 1.0), "in_progress_color": (0.2, shade, 0.2, 1.0),
+            "end_color": (0.2, 0.2, shade, 1.0), "use_end_original_color": False,
+        }
+
+    def get_assigned_colortype(cls, task, animation_props, active_group_name):
+        return SimpleNamespace(**get_colortype(cls, task, animation_props, active_group_name))
+
+    file = SimpleNamespace(by_id=entities.__getitem__)
+    monkeypatch.setattr(tool.Ifc, "get", staticmethod(lambda: file))
+    monkeypatch.setattr(tool.Ifc, "get_object", staticmethod(lambda entity: objects.get(entity.id())))
+    monkeypatch.setattr(tool.Ifc, "get_entity", staticmethod(lambda obj: products[int(obj.name[len("Product"):])]))
+    monkeypatch.setattr(tool.Sequence, "get_animation_props", classmethod(lambda cls: animation_props))
+    monkeypatch.setattr(tool.Sequence, "get_active_work_schedule", classmethod(lambda cls: work_schedule))
+    monkeypatch.setattr(tool.Sequence, "get_animation_settings", classmethod(lambda cls: dict(SETTINGS)))
+    monkeypatch.setattr(tool.Sequence, "get_assigned_ColorType_for_task", classmethod(get_assigned_colortype))
+    monkeypatch.setattr(tool.Sequence, "_get_colortype_optimized", classmethod(get_colortype))
+    monkeypatch.setattr(tool.Sequence, "_save_original_colors_optimized", classmethod(lambda cls, cache: None))
+    monkeypatch.setattr(tool.Sequence, "_save_original_object_colors", classmethod(lambda cls: None))
+    monkeypatch.setattr(tool.Sequence, "save_animation_original_colors", classmethod(lambda cls, objects: {}))
+    for frame_builder in ("get_animation_product_frames", "get_animation_product_frames_optimized"):
+        monkeypatch.setattr(
+            tool.Sequence, frame_builder,
+            classmethod(lambda cls, ws, settings: build_frames(tasks, schedule, assignments)),
+        )
+    # animate_objects_with_ColorTypes walks bpy.data.objects for the scheduled meshes
+    monkeypatch.setattr(
+        sys.modules[tool.Sequence.__module__], "bpy",
+        SimpleNamespace(context=bpy.context, app=bpy.app, data=SimpleNamespace(objects=list(objects.values()))),
+    )
+    monkeypatch.setattr(keyframe_writer, "BulkKeyframeWriter", RecordingWriter)
+    incremental_animation.invalidate_compiled_animation()
+    yield SimpleNamespace(
+        schedule=schedule, objects=objects, work_schedule=work_schedule,
+        frames=lambda: build_frames(tasks, schedule, assignments),
+        cache=SimpleNamespace(get_objects_for_product=lambda product_id: [objects[product_id]]),
+    )
+    incremental_animation.invalidate_compiled_animation()
+
+
+def full_build(scene, appearance=incremental_animation.APPEARANCE_OPTIMIZED):
+    for obj in scene.objects.values():
+        obj.animation_data_clear()
+    frames = scene.frames()
+    if appearance == incremental_animation.APPEARANCE_OPTIMIZED:
+        tool.Sequence.animate_objects_with_ColorTypes_optimized(dict(SETTINGS), frames, scene.cache)
+    else:
+        tool.Sequence.animate_objects_with_ColorTypes(dict(SETTINGS), frames)
+    return frames
+
+
+def object_keys(scene):
+    return {product_id: obj.keys for product_id, obj in scene.objects.items()}
+
+
+def test_incremental_update_matches_full_rebuild(scene):
+    frames = full_build(scene)
+    tool.Sequence.store_compiled_animation(
+        scene.work_schedule, dict(SETTINGS), frames,
+        "get_animation_product_frames_optimized", incremental_animation.APPEARANCE_OPTIMIZED,
+    )
+    before = object_keys(scene)
+
+    scene.schedule[11] = (70, 140)
+    assert tool.Sequence.update_animation_incremental() == 1
+    incremental = object_keys(scene)
+    assert incremental[103] != before[103]
+
+    full_build(scene)
+    assert incremental == object_keys(scene)
+
+
+def test_standard_incremental_update_matches_full_rebuild(scene):
+    frames = full_build(scene, incremental_animation.APPEARANCE_STANDARD)
+    tool.Sequence.store_compiled_animation(
+        scene.work_schedule, dict(SETTINGS), frames,
+        "get_animation_product_frames", incremental_animation.APPEARANCE_STANDARD,
+    )
+    before = object_keys(scene)
+    assert all(before.values())
+
+    scene.schedule[11] = (70, 140)
+    assert tool.Sequence.update_animation_incremental() == 1
+    incremental = object_keys(scene)
+    assert incremental[103] != before[103]
+
+    full_build(scene, incremental_animation.APPEARANCE_STANDARD)
+    assert incremental == object_keys(scene)
+
+
+def test_incremental_update_keeps_the_build_paths(scene):
+    frames = full_build(scene)
+    tool.Sequence.store_compiled_animation(
+        scene.work_schedule, dict(SETTINGS), frames,
+        "get_animation_product_frames_optimized", incremental_animation.APPEARANCE_OPTIMIZED,
+    )
+    scene.schedule[12] = (90, 200)
+    assert tool.Sequence.update_animation_incremental() == 2
+    state = incremental_animation.get_compiled_animation()
+    assert state.frame_builder == "get_animation_product_frames_optimized"
+    assert state.appearance == incremental_animation.APPEARANCE_OPTIMIZED
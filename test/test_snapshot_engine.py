@@ -0,0 +1,112 @@
+# Bonsai - OpenBIM Blender Add-on
+# Copyright (C) 2021, 2022 Dion Moult <dion@thinkmoult.com>, Yassine Oualid <yassine@sigmadimensions.com>, Federico Eraso <feraso@svisuals.net
+#
+# This file is part of Bonsai.
+#
+# Bonsai is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Bonsai is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Bonsai.  If not, see <http://www.gnu.org/licenses/>.
+
+# Snapshot date steps compare against the last applied snapshot instead of
+# reading every object back; the objects are read again only after the
+# applied state was invalidated or the index rebuilt.
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+snapshot_engine = pytest.importorskip("bonsai.bim.module.sequence.snapshot_engine")
+
+COLORTYPE = SimpleNamespace(
+    consider_start=False, consider_active=True, consider_end=True,
+    start_color=(1.0, 0.0, 0.0, 1.0), in_progress_color=(0.0, 1.0, 0.0, 1.0), end_color=(0.0, 0.0, 1.0, 1.0),
+    use_end_original_color=False,
+)
+
+
+class Task:
+    def __init__(self, step_id: int, start: datetime, finish: datetime) -> None:
+        self._id = step_id
+        self.start = start
+        self.finish = finish
+        self.PredefinedType = "CONSTRUCTION"
+
+    def id(self) -> int:
+        return self._id
+
+
+class Object:
+    def __init__(self) -> None:
+        self.hide_viewport = False
+        self.hide_render = False
+        self.color = (1.0, 1.0, 1.0, 1.0)
+
+
+def build_index(key="file"):
+    tasks = [Task(1, datetime(2024, 1, 1), datetime(2024, 1, 10)), Task(2, datetime(2024, 1, 5), datetime(2024, 1, 20))]
+    objects = [Object() for _ in range(4)]
+    return snapshot_engine.SnapshotIndex.build(
+        key, objects, [tasks[0], tasks[0], tasks[1], None],
+        lambda task: (task.start, task.finish), lambda task: COLORTYPE, lambda obj: (0.5, 0.5, 0.5, 1.0),
+    )
+
+
+def apply(engine, index, date):
+    """Evaluates and writes a snapshot like Sequence.show_snapshot, returning the written objects"""
+    state = index.evaluate(date)
+    to_write = engine.objects_to_write(index, state)
+    for i in to_write.tolist():
+        obj = index.objects[i]
+        obj.hide_viewport = obj.hide_render = bool(state.hidden[i])
+        if not state.hidden[i]:
+            obj.color = tuple(state.colors[i].tolist())
+    engine.record_snapshot(index, state, len(to_write))
+    return set(to_write.tolist())
+
+
+def test_date_steps_compare_against_the_applied_snapshot():
+    engine = snapshot_engine.SnapshotEngine()
+    index = engine.get_index("file", build_index)
+    assert apply(engine, index, datetime(2023, 12, 1)) == {0, 1, 2, 3}
+    assert engine.stats["reads"] == 1
+
+    # Task 1 becomes active: only its two objects change
+    assert apply(engine, index, datetime(2024, 1, 2)) == {0, 1}
+    assert apply(engine, index, datetime(2024, 1, 3)) == set()
+    assert engine.stats["reads"] == 1
+
+
+def test_invalidated_state_is_read_back_from_the_objects():
+    engine = snapshot_engine.SnapshotEngine()
+    index = engine.get_index("file", build_index)
+    apply(engine, index, datetime(2024, 1, 2))
+
+    # A live update or animation build shows a hidden object behind the engine
+    index.objects[2].hide_viewport = index.objects[2].hide_render = False
+    assert apply(engine, index, datetime(2024, 1, 2)) == set()
+    engine.invalidate_state()
+    assert apply(engine, index, datetime(2024, 1, 2)) == {2}
+    assert engine.stats["reads"] == 2
+    assert np.array_equal(engine.applied.hidden, index.evaluate(datetime(2024, 1, 2)).hidden)
+
+
+def test_index_rebuild_drops_the_applied_state():
+    engine = snapshot_engine.SnapshotEngine()
+    index = engine.get_index("file", build_index)
+    apply(engine, index, datetime(2024, 1, 2))
+    assert engine.applied is not None
+    engine.get_index("file", build_index)
+    assert engine.applied is not None
+    engine.get_index("other file", lambda: build_index("other file"))
+    assert engine.applied is None
@@ -2811,56 +2811,47 @@ class Sequence(bonsai.core.tool.Sequence):
             return
 
 
-        def process_task_data(task, settings):
-            # CRITICAL VALIDATION: verify valid task
-            if not cls.validate_task_object(task, "process_task_data"):
-                return None
-
-            try:
-                task_start_date = ifcopenshell.util.sequence.derive_date(task, "ScheduleStart", is_earliest=True)
-                finish_date = ifcopenshell.util.sequence.derive_date(task, "ScheduleFinish", is_latest=True)
-            except Exception as e:
-                print(f"[WARNING]️ Error deriving dates for task {getattr(task, 'Name', 'Unknown')}: {e}")
-                return None
-
-            if not (task_start_date and finish_date):
-                print(f"[WARNING]️ Warning: Task {getattr(task, 'Name', 'Unknown')} has no valid dates")
-                return None
-
-            try:
-                # CORRECTION: Use the schedule dates for calculations
-                schedule_start = settings["viz_start"]
-                schedule_finish = settings["viz_finish"]
-                schedule_duration = schedule_finish - schedule_start
-
-                if schedule_duration.total_seconds() <= 0:
-                    print(f"[WARNING]️ Invalid schedule duration: {schedule_duration}")
-                    return None
-
-                total_frames = settings["end_frame"] - settings["start_frame"]
-
-                # Calculate task position within the full schedule
-                task_start_progress = (task_start_date - schedule_start).total_seconds() / schedule_duration.total_seconds()
-                task_finish_progress = (finish_date - schedule_start).total_seconds() / schedule_duration.total_seconds()
-
-                # Convert to frames
-                task_start_frame = round(settings["start_frame"] + (task_start_progress * total_frames))
-                task_finish_frame = round(settings["start_frame"] + (task_finish_progress * total_frames))
-
-                # Validate that frames are in valid range
-                task_start_frame = max(settings["start_frame"], min(settings["end_frame"], task_start_frame))
-                task_finish_frame = max(settings["start_frame"], min(settings["end_frame"], task_finish_frame))
-
-                return {
+        def process_tasks_data(tasks, settings):
+            """Bar data for every task (None where a task can't be drawn), frames converted in one call"""
+            dated_tasks = []
+            for index, task in enumerate(tasks):
+                # CRITICAL VALIDATION: verify valid task
+                if not cls.validate_task_object(task, "process_task_data"):
+                    continue
+                try:
+                    task_start_date = ifcopenshell.util.sequence.derive_date(task, "ScheduleStart", is_earliest=True)
+                    finish_date = ifcopenshell.util.sequence.derive_date(task, "ScheduleFinish", is_latest=True)
+                except Exception as e:
+                    print(f"[WARNING]️ Error deriving dates for task {getattr(task, 'Name', 'Unknown')}: {e}")
+                    continue
+                if not (task_start_date and finish_date):
+                    print(f"[WARNING]️ Warning: Task {getattr(task, 'Name', 'Unknown')} has no valid dates")
+                    continue
+                dated_tasks.append((index, task, task_start_date, finish_date))
+
+            results = [None] * len(tasks)
+            # CORRECTION: Use the schedule dates for calculations
+            from bonsai.bim.module.sequence import date_frames
+            converter = date_frames.DateFrameConverter.from_settings(settings)
+            if not converter.is_valid:
+                print(f"[WARNING]️ Invalid schedule duration: {settings['viz_finish'] - settings['viz_start']}")
+                return results
+
+            # Task position within the full schedule, rounded and kept in the valid frame range
+            start_frames, finish_frames = converter.task_frames(
+                [d[2] for d in dated_tasks], [d[3] for d in dated_tasks], clamp=True, rounding=True
+            )
+            for (index, task, task_start_date, finish_date), task_start_frame, task_finish_frame in zip(
+                dated_tasks, start_frames.astype(int).tolist(), finish_frames.astype(int).tolist()
+            ):
+                results[index] = {
                     "name": getattr(task, "Name", "Unnamed"),
                     "start_date": task_start_date,
                     "finish_date": finish_date,
                     "start_frame": task_start_frame,
                     "finish_frame": task_finish_frame,
                 }
-            except Exception as e:
-                print(f"[WARNING]️ Error calculating frames for task {getattr(task, 'Name', 'Unknown')}: {e}")
-                return None
+            return results
         def create_task_bar_data(tasks, vertical_increment, collection):
             # CORRECTION: Use active schedule dates, NOT visualization dates
             schedule_start, schedule_finish = cls.get_schedule_date_range()
@@ -2887,8 +2878,7 @@ class Sequence(bonsai.core.tool.Sequence):
             empty = bpy.data.objects.new("collection_origin", None)
             link_collection(empty, collection)
 
-            for task in tasks:
-                task_data = process_task_data(task, settings)
+            for task, task_data in zip(tasks, process_tasks_data(tasks, settings)):
                 if task_data:
                     position_shift = task_data["start_frame"] * size_to_duration_ratio
                     bar_size = (task_data["finish_frame"] - task_data["start_frame"]) * size_to_duration_ratio
@@ -3290,7 +3280,8 @@ class Sequence(bonsai.core.tool.Sequence):
         date_source: str = "SCHEDULE") -> dict[str, Any]:
         """
         OPTIMIZED: Processes states considering the configured visualization range.
-        Now uses cached data structures for massive performance improvement.
+        Uses the vectorized construction state index (same results as process_task_status,
+        demolition included) and falls back to the recursive processing.
 
         Args:
             work_schedule: Work schedule
@@ -3309,66 +3300,25 @@ class Sequence(bonsai.core.tool.Sequence):
 
         # SAFE OPTIMIZATION: Try NumPy vectorized computation with robust fallbacks
         work_schedule_id = work_schedule.id()
-        optimization_used = None
         
         try:
-            # ULTRA-FAST PATH: NumPy vectorized computation
+            # ULTRA-FAST PATH: NumPy vectorized computation (outputs and inputs, all six states)
             vectorized_result = SequenceCache.get_vectorized_task_states(
                 work_schedule_id, date, date_source, viz_start, viz_finish
             )
             
             if vectorized_result and vectorized_result.get('vectorized'):
-                # SUCCESS: Use NumPy vectorized operations
                 cls.to_build = vectorized_result["TO_BUILD"]
                 cls.in_construction = vectorized_result["IN_CONSTRUCTION"] 
                 cls.completed = vectorized_result["COMPLETED"]
-                cls.to_demolish = vectorized_result.get("TO_DEMOLISH", set())
-                cls.in_demolition = vectorized_result.get("IN_DEMOLITION", set())
-                cls.demolished = vectorized_result.get("DEMOLISHED", set())
-                optimization_used = f"NumPy vectorized: {vectorized_result['tasks_processed']} tasks, {vectorized_result['products_processed']} products"
-                print(f"[OPTIMIZED] {optimization_used}")
-                return  # Early return - optimization successful
+                cls.to_demolish = vectorized_result["TO_DEMOLISH"]
+                cls.in_demolition = vectorized_result["IN_DEMOLITION"]
+                cls.demolished = vectorized_result["DEMOLISHED"]
+                print(f"[OPTIMIZED] NumPy vectorized: {vectorized_result['tasks_processed']} tasks, {vectorized_result['products_processed']} products")
+                return cls._get_construction_state_sets()
         except Exception as e:
             print(f"[WARNING]️ NumPy optimization failed (safe fallback): {e}")
         
-        # FAST FALLBACK PATH: Use cached data if available
-        try:
-            cached_dates = SequenceCache.get_schedule_dates(work_schedule_id, date_source)
-            cached_products = SequenceCache.get_task_products(work_schedule_id)
-            
-            if cached_dates and cached_products:
-                # CACHED OPTIMIZATION: Process using cached data (faster than full iteration)
-                tasks_data = cached_dates.get('tasks_dates', [])
-                optimization_used = f"Cached data: {len(tasks_data)} tasks from cache"
-                print(f"[FAST] {optimization_used}")
-                
-                # Process cached data efficiently
-                for task_id, start_date, finish_date in tasks_data:
-                    if not start_date or not finish_date:
-                        continue
-                        
-                    # Apply visualization range filtering first (if any)
-                    if viz_start and viz_finish:
-                        if finish_date < viz_start:
-                            # Task completed before visualization range
-                            cls.completed.update(cached_products.get(task_id, []))
-                            continue
-                        elif start_date > viz_finish:
-                            # Task starts after visualization range - skip
-                            continue
-                    
-                    # Normal date-based state determination
-                    if start_date > date:
-                        cls.to_build.update(cached_products.get(task_id, []))
-                    elif finish_date < date:
-                        cls.completed.update(cached_products.get(task_id, []))
-                    else:
-                        cls.in_construction.update(cached_products.get(task_id, []))
-                
-                return  # Early return - cached optimization successful
-        except Exception as e:
-            print(f"[WARNING]️ Cache optimization failed (safe fallback): {e}")
-        
         # TRADITIONAL FALLBACK PATH: Use original logic if optimizations fail
         print("🔄 Using original processing logic")
         for rel in work_schedule.Controls or []:
@@ -3376,6 +3326,10 @@ class Sequence(bonsai.core.tool.Sequence):
                 if related_object.is_a("IfcTask"):
                     cls.process_task_status(related_object, date, viz_start, viz_finish, date_source=date_source)
 
+        return cls._get_construction_state_sets()
+
+    @classmethod
+    def _get_construction_state_sets(cls) -> dict[str, Any]:
         return {
             "TO_BUILD": cls.to_build,
             "IN_CONSTRUCTION": cls.in_construction,
@@ -3497,46 +3451,39 @@ class Sequence(bonsai.core.tool.Sequence):
         # --- START OF MODIFICATION: SAVE ORIGINAL SNAPSHOT STATE ---
         import bpy
         import json
+        from bonsai.bim.module.sequence import snapshot_engine
+
+        engine = snapshot_engine.get_snapshot_engine()
+        # Animation builds invalidate the applied snapshot state; while it is valid no object has keyframes
+        animated_objects = []
+        if engine.applied is None:
+            animated_objects = [obj for obj in bpy.data.objects if getattr(obj, "animation_data", None)]
 
         # --- GUARDAR COLORES ORIGINALES USANDO SISTEMA EXISTENTE ---
         # Solo guardar si no existen ya colores originales guardados
         if not bpy.context.scene.get('BIM_VarianceOriginalObjectColors'):
             cls._save_original_object_colors()
 
-        original_properties = {}
-        for obj in bpy.data.objects:
-            if obj.type == 'MESH' and tool.Ifc.get_entity(obj):
-                # Intentar obtener el color del material IFC original primero
-                original_color = None
-                try:
-                    if obj.material_slots and obj.material_slots[0].material:
-                        material = obj.material_slots[0].material
-                        if material.use_nodes:
-                            principled = tool.Blender.get_material_node(material, "BSDF_PRINCIPLED")
-                            if principled and principled.inputs.get("Base Color"):
-                                base_color = principled.inputs["Base Color"].default_value
-                                original_color = [base_color[0], base_color[1], base_color[2], base_color[3]]
-                except Exception:
-                    pass
-
-                # Fallback: usar el color actual del viewport si no se pudo obtener del material
-                if original_color is None:
-                    original_color = list(obj.color)
-
-                original_properties[obj.name] = {
-                    "color": original_color,
-                    "hide_viewport": obj.hide_viewport,
-                    "hide_render": obj.hide_render,
-                }
-        # We save the state in a different property to not overwrite the animation one.
-        bpy.context.scene['bonsai_snapshot_original_props'] = json.dumps(original_properties)
-        print(f"📸 Se ha guardado el estado original de {len(original_properties)} objetos para el snapshot.")
+        # While a snapshot is shown the objects hold its state, keep the properties saved before it
+        if not bpy.context.scene.get('bonsai_snapshot_original_props'):
+            from bonsai.bim.module.sequence import original_appearance
+            appearance = original_appearance.get_original_appearance()
+            original_properties = {}
+            for obj in bpy.data.objects:
+                if obj.type == 'MESH' and tool.Ifc.get_entity(obj):
+                    original_properties[obj.name] = {
+                        "color": list(appearance.color_for(obj)),
+                        "hide_viewport": obj.hide_viewport,
+                        "hide_render": obj.hide_render,
+                    }
+            # We save the state in a different property to not overwrite the animation one.
+            bpy.context.scene['bonsai_snapshot_original_props'] = json.dumps(original_properties)
+            print(f"📸 Se ha guardado el estado original de {len(original_properties)} objetos para el snapshot.")
         # --- END OF MODIFICATION ---
 
         # 1. Limpiar keyframes
-        for obj in bpy.data.objects:
-            if getattr(obj, "animation_data", None):
-                obj.animation_data_clear()
+        for obj in animated_objects:
+            obj.animation_data_clear()
 
         # 2. Obtener la fecha del snapshot y la fuente de fechas desde la UI
         ws_props = cls.get_work_schedule_props()
@@ -3562,127 +3509,107 @@ class Sequence(bonsai.core.tool.Sequence):
             active_group_name = "DEFAULT"
         print(f"📸 Snapshot usando grupo '{active_group_name}' para fecha '{snapshot_date.strftime('%Y-%m-%d')}'")
 
-        # 4. Procesar cada objeto IFC en la escena
-        applied_count = 0
-        for obj in bpy.data.objects:
-            element = tool.Ifc.get_entity(obj)
-            if not element or not obj.type == 'MESH':
-                continue
-
-            task = cls.get_task_for_product(element)
-            if not task:
-                # Si no tiene tarea, ocultarlo para un snapshot limpio
-                obj.hide_viewport = True
-                obj.hide_render = True
-                continue
-
-            # Determinar estado del objeto en la fecha del snapshot
-            start_attr = f"{date_source.capitalize()}Start"
-            finish_attr = f"{date_source.capitalize()}Finish"
-            task_start = ifcopenshell.util.sequence.derive_date(task, start_attr, is_earliest=True)
-            task_finish = ifcopenshell.util.sequence.derive_date(task, finish_attr, is_latest=True)
+        # 4. Evaluar todos los objetos IFC a la fecha con el índice producto -> tarea -> fechas/ColorType
+        import time
+        started = time.perf_counter()
+        index = cls.get_snapshot_index(date_source, active_group_name)
+        indexed = time.perf_counter()
+        snapshot = index.evaluate(snapshot_date)
+        # Only the objects whose visibility or color differs from the last applied snapshot are written
+        to_write = engine.objects_to_write(index, snapshot)
+        applied_count = cls.apply_snapshot_state(index, snapshot, to_write)
+        engine.record_snapshot(index, snapshot, applied_count)
+        finished = time.perf_counter()
 
-            if not task_start or not task_finish:
-                obj.hide_viewport = True
-                obj.hide_render = True
-                continue
+        # 5. Configurar el 3D view
+        cls.set_object_shading()
+        print(
+            f"[OK] Snapshot aplicado. {applied_count} de {len(index)} objetos actualizados"
+            f" (índice {(indexed - started) * 1000:.1f}ms, evaluación y aplicación {(finished - indexed) * 1000:.1f}ms)."
+        )
 
-            state = ""
-            if snapshot_date < task_start:
-                state = "start"
-            elif task_start <= snapshot_date <= task_finish:
-                state = "in_progress"
-            else: # snapshot_date > task_finish
-                state = "end"
+    @classmethod
+    def get_snapshot_index(cls, date_source: str, active_group_name: str):
+        """
+        Product -> task, task -> dates and task -> ColorType arrays of the IFC objects, reused
+        until the date source, group, ColorType data or objects change or the index is invalidated.
+        """
+        import bpy
+        from bonsai.bim.module.sequence import original_appearance, snapshot_engine
 
-            # Obtener el perfil de color correcto
-            ColorType = cls.get_assigned_ColorType_for_task(task, anim_props, active_group_name)
-            original_color = original_properties.get(obj.name, {}).get("color", [1,1,1,1])
+        scene = bpy.context.scene
+        ifc_file = tool.Ifc.get()
+        key = (
+            id(ifc_file),
+            date_source,
+            active_group_name,
+            hash(str(scene.get("BIM_AnimationColorSchemesSets", ""))),
+            hash(str(scene.get("_task_colortype_snapshot_cache_json", ""))),
+            len(bpy.data.objects),
+        )
 
-            # PRIORITY MODE CHECK for snapshot
-            consider_start = getattr(ColorType, 'consider_start', False)
-            consider_active = getattr(ColorType, 'consider_active', True)
-            consider_end = getattr(ColorType, 'consider_end', True)
-            is_priority_mode = (consider_start and not consider_active and not consider_end)
+        def build():
+            objects = []
+            tasks = []
+            for obj in bpy.data.objects:
+                element = tool.Ifc.get_entity(obj)
+                if not element or obj.type != "MESH":
+                    continue
+                objects.append(obj)
+                tasks.append(cls.get_task_for_product(element))
 
-            # Aplicar apariencia
-            is_demolition = (getattr(task, "PredefinedType", "") or "").upper() in {"DEMOLITION", "REMOVAL", "DISPOSAL", "DISMANTLE"}
-            is_construction = not is_demolition
+            start_attr = f"{date_source.capitalize()}Start"
+            finish_attr = f"{date_source.capitalize()}Finish"
+            anim_props = cls.get_animation_props()
+            appearance = original_appearance.get_original_appearance()
+            return snapshot_engine.SnapshotIndex.build(
+                key,
+                objects,
+                tasks,
+                task_dates=lambda task: (
+                    ifcopenshell.util.sequence.derive_date(task, start_attr, is_earliest=True),
+                    ifcopenshell.util.sequence.derive_date(task, finish_attr, is_latest=True),
+                ),
+                task_colortype=lambda task: cls.get_assigned_ColorType_for_task(task, anim_props, active_group_name),
+                original_color=appearance.color_for,
+            )
 
-            if is_priority_mode:
-                # PRIORITY MODE: START solo activado - siempre aplicar estado START
-                print(f"🔍 SNAPSHOT PRIORITY MODE: {obj.name} using START state regardless of date")
-                obj.hide_viewport = False  # Siempre visible en priority mode
-                state = "start"  # Force START state for coloring
-            else:
-                # NORMAL MODE: Apply consider flags logic
-                if state == "start":
-                    if consider_start:
-                        # START activado: mostrar objeto en estado START
-                        obj.hide_viewport = False
-                    else:
-                        # START disabled: apply traditional logic
-                        if is_construction:
-                            obj.hide_viewport = True  # Hide construction elements if consider_start=False
-                        else:
-                            obj.hide_viewport = False # Demolition elements remain visible
-                elif state == "in_progress" and not consider_active:
-                    obj.hide_viewport = True  # Ocultar durante fase activa si consider_active=False
-                elif state == "end":
-                    if not consider_end:
-                        obj.hide_viewport = True  # Ocultar al final si consider_end=False
-                    elif getattr(ColorType, 'hide_at_end', False):
-                        obj.hide_viewport = True  # Ocultar al final si hide_at_end=True
-                    else:
-                        obj.hide_viewport = False  # Visible al final
-                else:
-                    # Apply traditional demolition vs construction logic
-                    if is_demolition:
-                        if state == "start": obj.hide_viewport = False # Visible antes de demoler
-                        elif state == "in_progress": obj.hide_viewport = False # Visible during demolition
-                        else: obj.hide_viewport = True # Hidden after demolition
-                    else: # Construction
-                        if state == "start": obj.hide_viewport = True # Oculto antes de construir
-                        else: obj.hide_viewport = False # Visible during and after
-
-            # Color logic (only if visible)
-            if not obj.hide_viewport:
-                color_to_apply = original_color
-                transparency = 0.0  # Valor por defecto
+        return snapshot_engine.get_snapshot_engine().get_index(key, build)
 
-                if state == "start":
-                    if not getattr(ColorType, 'use_start_original_color', False):
-                        color_to_apply = list(ColorType.start_color)
-                    transparency = getattr(ColorType, 'start_transparency', 0.0)
-                elif state == "in_progress":
-                    if not getattr(ColorType, 'use_active_original_color', False):
-                        color_to_apply = list(ColorType.in_progress_color)
-                    transparency = getattr(ColorType, 'active_start_transparency', 0.0)
-                else: # end
-                    if getattr(ColorType, 'hide_at_end', False):
-                        obj.hide_viewport = True
-                    elif not getattr(ColorType, 'use_end_original_color', True):
-                        color_to_apply = list(ColorType.end_color)
-                    transparency = getattr(ColorType, 'end_transparency', 0.0)
+    @classmethod
+    def invalidate_schedule_state_indexes(cls) -> None:
+        """Drops the snapshot, construction state, schedule text and HUD schedule data after task, date or assignment edits"""
+        from bonsai.bim.module.sequence import schedule_text_tables, snapshot_engine
+        from bonsai.bim.module.sequence.hud import schedule_data
+        snapshot_engine.invalidate_snapshot_index()
+        SequenceCache.invalidate_construction_states()
+        # Week, day counter and progress texts are compiled against the schedule date range
+        schedule_text_tables.invalidate_schedule_text_tables()
+        schedule_data.invalidate_hud_schedule_data()
 
-                if not obj.hide_viewport:
-                    # --- START OF MODIFICATION: APPLY COLOR WITH ALPHA AND TRANSPARENCY ---
-                    # Calcular alpha desde transparencia (igual que en live update)
-                    alpha = 1.0 - transparency
-                    # Asegurar que el color tenga 3 componentes RGB
-                    color_rgb = list(color_to_apply[:3])
-                    while len(color_rgb) < 3:
-                        color_rgb.append(1.0)
-                    # Aplicar color con transparencia calculada
-                    obj.color = (color_rgb[0], color_rgb[1], color_rgb[2], alpha)
-                    # --- END OF MODIFICATION ---
-
-            obj.hide_render = obj.hide_viewport
+    @classmethod
+    def apply_snapshot_state(cls, index, snapshot, indices=None) -> int:
+        """Writes the visibility and color of an evaluated snapshot to the indexed objects (or only those at indices)"""
+        if indices is None:
+            objects = index.objects
+            hidden = snapshot.hidden.tolist()
+            colors = snapshot.colors.tolist()
+        else:
+            objects = [index.objects[i] for i in indices.tolist()]
+            hidden = snapshot.hidden[indices].tolist()
+            colors = snapshot.colors[indices].tolist()
+        applied_count = 0
+        for obj, is_hidden, color in zip(objects, hidden, colors):
+            try:
+                obj.hide_viewport = is_hidden
+                obj.hide_render = is_hidden
+                if not is_hidden:
+                    obj.color = color
+            except ReferenceError:
+                # Object removed since the index was built
+                continue
             applied_count += 1
-
-        # 5. Configurar el 3D view
-        cls.set_object_shading()
-        print(f"[OK] Snapshot aplicado. {applied_count} objetos procesados.")
+        return applied_count
 
     @classmethod
     def get_task_for_product(cls, product):
@@ -3872,10 +3799,9 @@ class Sequence(bonsai.core.tool.Sequence):
     def get_animation_product_frames(self, work_schedule, settings):
         """
         VERSIÓN FINAL OPTIMIZADA: Calcula los fotogramas de la animación con un enfoque de alto rendimiento.
-        Utiliza caché de fechas y reduce drásticamente las operaciones repetitivas.
+        Convierte las fechas de todas las tareas a frames en una sola llamada vectorizada.
         """
         import time
-        from datetime import datetime
 
         print("🚀 TOOL: Iniciando cálculo de frames con optimización final...")
         start_time = time.time()
@@ -3887,10 +3813,10 @@ class Sequence(bonsai.core.tool.Sequence):
         if not products:
             return {}
 
-        start_date_str = settings.get("start")
-        finish_date_str = settings.get("finish")
+        start_date = settings.get("start")
+        finish_date = settings.get("finish")
 
-        if not start_date_str or not finish_date_str:
+        if not start_date or not finish_date:
             print("   - TOOL WARNING: No se proporcionaron fechas de inicio/fin. Calculando desde tareas...")
             all_tasks = core_sequence.get_tasks(self, work_schedule, recursive=True)
             all_dates = []
@@ -3903,62 +3829,46 @@ class Sequence(bonsai.core.tool.Sequence):
             if not all_dates: return {}
             start_date = min(all_dates)
             finish_date = max(all_dates)
-        else:
-            start_date = datetime.fromisoformat(start_date_str)
-            finish_date = datetime.fromisoformat(finish_date_str)
 
-        duration = (finish_date - start_date).total_seconds()
-        if duration <= 0:
-            return {}
-            
         total_frames = settings.get("total_frames", 250)
         start_frame = settings.get("start_frame", 1)
-        
-        # --- KEY OPTIMIZATION: DATE CACHE ---
-        date_to_frame_cache = {}
-        def date_to_frame(d):
-            # Avoid recalculating if the date was already processed
-            if d in date_to_frame_cache:
-                return date_to_frame_cache[d]
-            
-            progress = (d - start_date).total_seconds() / duration
-            frame = start_frame + (total_frames * progress)
-            result = max(start_frame, min(start_frame + total_frames, frame))
-            date_to_frame_cache[d] = result
-            return result
 
-        result = {}
-        
-        # --- BUCLE OPTIMIZADO ---
+        from bonsai.bim.module.sequence import date_frames
+        converter = date_frames.DateFrameConverter(start_date, finish_date, start_frame, total_frames)
+        if not converter.is_valid:
+            return {}
+
+        # Collect every product/task pair first, then convert all dates in one call
+        rows = []
         for product in products:
             tasks = core_sequence.get_tasks(self, product)
             if not tasks:
                 continue
-
-            product_frames = []
             for task, rel in tasks.items():
                 task_start = core_sequence.get_start(self, task)
                 task_end = core_sequence.get_end(self, task)
-
                 if not task_start or not task_end or task_start >= task_end:
                     continue
-                    
-                frame_start = date_to_frame(task_start)
-                frame_end = date_to_frame(task_end)
-                
-                product_frames.append({
-                    "task": task,
-                    "relationship": rel,
-                    "states": {
-                        "before_start": (start_frame, frame_start - 1),
-                        "active": (frame_start, frame_end),
-                        "after_end": (frame_end + 1, start_frame + total_frames),
-                    },
-                })
+                rows.append((product.id(), task, rel, task_start, task_end))
+
+        start_frames, finish_frames = converter.task_frames(
+            [row[3] for row in rows], [row[4] for row in rows], clamp=True
+        )
+
+        result = {}
+        for (product_id, task, rel, task_start, task_end), frame_start, frame_end in zip(rows, start_frames.tolist(), finish_frames.tolist()):
+            result.setdefault(product_id, []).append({
+                "task": task,
+                "relationship": rel,
+                "start_date": task_start,
+                "finish_date": task_end,
+                "states": {
+                    "before_start": (start_frame, frame_start - 1),
+                    "active": (frame_start, frame_end),
+                    "after_end": (frame_end + 1, start_frame + total_frames),
+                },
+            })
 
-            if product_frames:
-                result[product.id()] = product_frames
-                
         end_time = time.time()
         print(f"   - TOOL: Cálculo de frames completado en {end_time - start_time:.3f}s para {len(result)} productos.")
         return result
@@ -4034,7 +3944,6 @@ class Sequence(bonsai.core.tool.Sequence):
         animation_end = int(settings["start_frame"] + settings["total_frames"])
         viz_start = settings["start"]
         viz_finish = settings["finish"]
-        viz_duration = settings["duration"]
         product_frames: dict[int, list] = {}
         
         # --- NUEVO: Obtener la fuente de fechas desde las propiedades ---
@@ -4125,33 +4034,43 @@ class Sequence(bonsai.core.tool.Sequence):
             # If it is priority mode, IGNORE DATES and use the full range.
             if is_priority_mode:
                 print(f"🔒 Tarea '{task.Name}' en modo prioritario. Ignorando fechas.")
-                for output in ifcopenshell.util.sequence.get_task_outputs(task):
-                    add_product_frame_full_range(output.id(), task, "output")
-                for input_prod in cls.get_task_inputs(task):
-                    add_product_frame_full_range(input_prod.id(), task, "input")
+                pending_tasks.append((task, None, None))
                 return
 
             # If it is NOT priority mode, use the task dates to calculate the frames.
             if task_start > viz_finish:
                 return
+            pending_tasks.append((task, task_start, task_finish))
 
-            if viz_duration.total_seconds() > 0:
-                start_progress = (task_start - viz_start).total_seconds() / viz_duration.total_seconds()
-                finish_progress = (task_finish - viz_start).total_seconds() / viz_duration.total_seconds()
-            else:
-                start_progress, finish_progress = 0.0, 1.0
+        # Tasks are collected in traversal order and their dates converted in one call
+        pending_tasks = []
+        for root_task in ifcopenshell.util.sequence.get_root_tasks(work_schedule):
+            preprocess_task(root_task)
 
-            sf = int(round(settings["start_frame"] + (start_progress * settings["total_frames"])))
-            ff = int(round(settings["start_frame"] + (finish_progress * settings["total_frames"])))
+        from bonsai.bim.module.sequence import date_frames
+        converter = date_frames.DateFrameConverter.from_settings(settings)
+        dated = [(task_start, task_finish) for _, task_start, task_finish in pending_tasks if task_start is not None]
+        if converter.is_valid:
+            start_frames, finish_frames = converter.task_frames(
+                [d[0] for d in dated], [d[1] for d in dated], rounding=True
+            )
+            frame_pairs = iter(zip(start_frames.astype(int).tolist(), finish_frames.astype(int).tolist()))
+        else:
+            frame_pairs = iter([(converter.start_frame, converter.end_frame)] * len(dated))
 
+        for task, task_start, task_finish in pending_tasks:
+            if task_start is None:
+                for output in ifcopenshell.util.sequence.get_task_outputs(task):
+                    add_product_frame_full_range(output.id(), task, "output")
+                for input_prod in cls.get_task_inputs(task):
+                    add_product_frame_full_range(input_prod.id(), task, "input")
+                continue
+            sf, ff = next(frame_pairs)
             for output in ifcopenshell.util.sequence.get_task_outputs(task):
                 add_product_frame_enhanced(output.id(), task, task_start, task_finish, sf, ff, "output")
             for input_prod in cls.get_task_inputs(task):
                 add_product_frame_enhanced(input_prod.id(), task, task_start, task_finish, sf, ff, "input")
 
-        for root_task in ifcopenshell.util.sequence.get_root_tasks(work_schedule):
-            preprocess_task(root_task)
-
         return product_frames
 
     @classmethod
@@ -4482,8 +4401,12 @@ class Sequence(bonsai.core.tool.Sequence):
         Structure: {frame_number: {action_type: [object_list]}}
         """
         from collections import defaultdict
+        from bonsai.bim.module.sequence import frame_table
 
         animation_props = cls.get_animation_props()
+        table = frame_table.as_frame_table(product_frames)
+        if table.task_resolver is None:
+            table.task_resolver = tool.Ifc.get().by_id
 
         # Active group logic (stack → DEFAULT)
         active_group_name = None
@@ -4499,23 +4422,19 @@ class Sequence(bonsai.core.tool.Sequence):
         # Initialize plan structure
         animation_plan = defaultdict(lambda: defaultdict(list))
 
-        # Store original colors for planning
-        original_colors = {}
-        for obj in bpy.data.objects:
-            if obj.type == 'MESH':
-                try:
-                    if obj.material_slots and obj.material_slots[0].material:
-                        material = obj.material_slots[0].material
-                        if material.use_nodes:
-                            principled = tool.Blender.get_material_node(material, "BSDF_PRINCIPLED")
-                            if principled and principled.inputs.get("Base Color"):
-                                base_color = principled.inputs["Base Color"].default_value
-                                original_colors[obj.name] = [base_color[0], base_color[1], base_color[2], base_color[3]]
-                except Exception:
-                    pass
+        # Rows are read from the table columns; ColorTypes are resolved once per task
+        row_states = table.row_states()
+        row_task_ids = table.task_id.tolist()
+        row_is_output = (table.relationship == frame_table.REL_OUTPUT).tolist()
+        colortypes = {}
 
-                if obj.name not in original_colors:
-                    original_colors[obj.name] = list(obj.color)
+        # Store original colors for planning
+        from bonsai.bim.module.sequence import original_appearance
+        appearance = original_appearance.get_original_appearance()
+        original_colors = {
+            name: list(color)
+            for name, color in appearance.colors_for(obj for obj in bpy.data.objects if obj.type == 'MESH').items()
+        }
 
         # Plan object animations
         for obj in bpy.data.objects:
@@ -4526,7 +4445,7 @@ class Sequence(bonsai.core.tool.Sequence):
                     animation_plan[0]["HIDE"].append(obj)
                 continue
 
-            if element.id() not in product_frames:
+            if element.id() not in table:
                 # Plan to hide objects not in animation
                 animation_plan[0]["HIDE"].append(obj)
                 continue
@@ -4534,28 +4453,36 @@ class Sequence(bonsai.core.tool.Sequence):
             # Plan to hide all objects initially
             animation_plan[0]["HIDE"].append(obj)
 
-            # Process each frame data for this object
+            # Process each row of this object
             original_color = original_colors.get(obj.name, [1.0, 1.0, 1.0, 1.0])
 
-            for frame_data in product_frames[element.id()]:
-                task = frame_data.get("task") or tool.Ifc.get().by_id(frame_data.get("task_id"))
-                ColorType = cls.get_assigned_ColorType_for_task(task, animation_props, active_group_name)
+            rows = table.rows_for_product(element.id())
+            for row in range(rows.start, rows.stop):
+                task_id = row_task_ids[row]
+                if task_id not in colortypes:
+                    colortypes[task_id] = cls.get_assigned_ColorType_for_task(
+                        table.resolve_task(task_id), animation_props, active_group_name
+                    )
 
                 # Plan keyframes for each state
-                cls._plan_object_animation(animation_plan, obj, frame_data, ColorType, original_color)
+                cls._plan_object_animation(
+                    animation_plan, obj, row_states[row], row_is_output[row], colortypes[task_id], original_color
+                )
 
         print(f"🎯 PLANNING COMPLETE: Plan contains {len(animation_plan)} frames")
         return dict(animation_plan)
 
     @classmethod
-    def _plan_object_animation(cls, animation_plan, obj, frame_data, ColorType, original_color):
-        """Helper function to plan animation keyframes for a single object"""
+    def _plan_object_animation(cls, animation_plan, obj, states, is_construction, ColorType, original_color):
+        """
+        Helper function to plan animation keyframes for a single object from one product-frame row:
+        states are its [start, end] frames per frame_table.STATE_NAMES, as in ProductFrameTable.row_states()
+        """
+        from bonsai.bim.module.sequence import frame_table
 
         # Plan START state
-        start_state_frames = frame_data["states"]["before_start"]
-        start_f, end_f = start_state_frames
+        start_f, end_f = states[frame_table.STATE_BEFORE_START]
 
-        is_construction = frame_data.get("relationship") == "output"
         # FIXED: Lógica corregida para START
         consider_start = getattr(ColorType, 'consider_start', False)
         should_be_visible_at_start = not is_construction or consider_start
@@ -4573,8 +4500,7 @@ class Sequence(bonsai.core.tool.Sequence):
                 animation_plan[start_f]["HIDE"].append(obj)
 
         # Plan ACTIVE state
-        active_state_frames = frame_data["states"]["active"]
-        start_f, end_f = active_state_frames
+        start_f, end_f = states[frame_table.STATE_ACTIVE]
 
         if end_f >= start_f and getattr(ColorType, 'consider_active', True):
             animation_plan[start_f]["REVEAL"].append(obj)
@@ -4593,8 +4519,7 @@ class Sequence(bonsai.core.tool.Sequence):
                 animation_plan[end_f]["SET_COLOR"].append((obj, end_color))
 
         # Plan END state
-        end_state_frames = frame_data["states"]["after_end"]
-        start_f, end_f = end_state_frames
+        start_f, end_f = states[frame_table.STATE_AFTER_END]
 
         if end_f >= start_f and getattr(ColorType, 'consider_end', True):
             should_hide_at_end = getattr(ColorType, 'hide_at_end', False)
@@ -4614,6 +4539,10 @@ class Sequence(bonsai.core.tool.Sequence):
         """
         Phase 2: Execution - Applies the animation plan efficiently using batch operations.
         """
+        from bonsai.bim.module.sequence import keyframe_writer, snapshot_engine
+        # Keyframed objects no longer hold the last applied snapshot
+        snapshot_engine.invalidate_snapshot_state()
+
         print(f"[OPTIMIZED] EXECUTING ANIMATION: Processing {len(animation_plan)} frames")
 
         # Clear existing animation data first
@@ -4621,46 +4550,395 @@ class Sequence(bonsai.core.tool.Sequence):
             if obj.animation_data:
                 obj.animation_data_clear()
 
-        # Process frames in order
+        # Visibility and color keyframes are grouped per object and written
+        # as whole F-curves instead of one keyframe_insert() per key
+        writer = keyframe_writer.BulkKeyframeWriter()
+        writer.add_animation_plan(animation_plan)
+        for frame_actions in animation_plan.values():
+            for obj in frame_actions.get("SET_MATERIAL_ACTIVE", []):
+                writer.keep_unique(obj)
+        writer.write(share_identical=cls.should_share_identical_actions())
+
+        # Material keyframes are rare, keep them on the RNA path
         for frame_num in sorted(animation_plan.keys()):
             frame_actions = animation_plan[frame_num]
+            if "SET_MATERIAL_ACTIVE" in frame_actions:
+                for obj in frame_actions["SET_MATERIAL_ACTIVE"]:
+                    if obj.material_slots and obj.material_slots[0].material:
+                        obj.keyframe_insert(data_path='material_slots[0].material', frame=frame_num)
 
-            # Batch hide operations
-            if "HIDE" in frame_actions:
-                for obj in frame_actions["HIDE"]:
-                    obj.hide_viewport = True
-                    obj.hide_render = True
-                    obj.keyframe_insert(data_path="hide_viewport", frame=frame_num)
-                    obj.keyframe_insert(data_path="hide_render", frame=frame_num)
+        # Reset all objects to hidden state to avoid initial visibility issues
+        for obj in bpy.data.objects:
+            element = tool.Ifc.get_entity(obj)
+            if element and not element.is_a("IfcSpace"):
+                obj.hide_viewport = True
+                obj.hide_render = True
 
-            # Batch reveal operations
-            if "REVEAL" in frame_actions:
-                for obj in frame_actions["REVEAL"]:
-                    obj.hide_viewport = False
-                    obj.hide_render = False
-                    obj.keyframe_insert(data_path="hide_viewport", frame=frame_num)
-                    obj.keyframe_insert(data_path="hide_render", frame=frame_num)
+        print(f"[OPTIMIZED] EXECUTION COMPLETE: Animation applied successfully")
 
-            # Batch color operations
-            if "SET_COLOR" in frame_actions:
-                for obj, color in frame_actions["SET_COLOR"]:
-                    obj.color = color
-                    obj.keyframe_insert(data_path="color", frame=frame_num)
+    @classmethod
+    def export_animation_events(cls, work_schedule, settings, filepath: str):
+        """
+        Writes the animation build_animation_plan plans for a schedule as a frame-indexed
+        event stream (event_stream.AnimationEventStream) with the objects keyed by IFC GlobalId.
+        Returns the stream.
+        """
+        from bonsai.bim.module.sequence import event_stream
+        product_frames = cls.get_animation_product_frames(work_schedule, settings)
+        animation_plan = cls.build_animation_plan(bpy.context, settings, product_frames)
+        stream = event_stream.AnimationEventStream.from_animation_plan(animation_plan)
+        global_ids = [tool.Ifc.get_entity(obj).GlobalId for obj in stream.objects]
+        frame_range = (settings["start_frame"], int(settings["start_frame"] + settings["total_frames"]))
+        stream.export_json(filepath, global_ids, frame_range)
+        return stream
+
+    @classmethod
+    def should_share_identical_actions(cls) -> bool:
+        """Objects with identical 4D timelines get one shared Action when enabled in the animation settings"""
+        try:
+            return bool(cls.get_animation_props().share_identical_actions)
+        except Exception:
+            return False
+
+    @classmethod
+    def should_cull_outside_visualization(cls) -> bool:
+        """Products outside the visualization range get a static appearance instead of keyframes when enabled"""
+        try:
+            return bool(cls.get_animation_props().cull_outside_visualization)
+        except Exception:
+            return False
+
+    @classmethod
+    def get_window_culled_products(cls, product_frames, settings) -> tuple:
+        """
+        (before, after) sets of product ids lying entirely before / after the visualization range,
+        both empty unless culling is enabled.
+        """
+        cls._last_culling_stats = {"completed": 0, "hidden": 0, "keyframes_avoided": 0}
+        if not product_frames or not cls.should_cull_outside_visualization():
+            return set(), set()
+        from bonsai.bim.module.sequence import frame_table
+        table = frame_table.as_frame_table(
+            product_frames, int(settings["start_frame"]), int(settings["start_frame"] + settings["total_frames"])
+        )
+        before, after = table.window_culling(settings.get("start"), settings.get("finish"))
+        return set(before.tolist()), set(after.tolist())
+
+    @classmethod
+    def count_ColorType_keyframes(cls, frame_data, ColorType) -> int:
+        """Keyframe points apply_ColorType_animation writes for a frame_data (color counts its 4 channels)"""
+        if frame_data.get("consider_start_active", False):
+            start_f, end_f = frame_data["states"]["active"]
+            return 6 + (6 if end_f > start_f else 0)
+        count = 0
+        for state_name, (start_f, end_f) in frame_data["states"].items():
+            if end_f < start_f:
+                continue
+            span = end_f > start_f
+            if state_name == "before_start":
+                if getattr(ColorType, 'consider_start', False):
+                    count += 6 + (6 if span else 0)
+                elif frame_data.get("relationship") == "output":
+                    count += 2 + (2 if span else 0)
+            elif state_name == "active" and getattr(ColorType, 'consider_active', True):
+                count += 6 + (4 if span else 0)
+            elif state_name == "after_end" and getattr(ColorType, 'consider_end', True):
+                if getattr(ColorType, 'hide_at_end', False):
+                    count += 2
+                else:
+                    count += 6 + (6 if span else 0)
+        return count
+
+    @classmethod
+    def apply_culled_product_appearance(cls, obj, frame_data, ColorType, original_color, completed: bool) -> int:
+        """
+        Static appearance of a product outside the visualization range: its end state when its tasks
+        finished before the range (hidden unless the ColorType shows the end state), hidden when they start
+        after it. Returns the keyframe points the animated path would have written, frame-0 hide keys included.
+        """
+        if obj.animation_data:
+            obj.animation_data_clear()
+        visible = completed and getattr(ColorType, 'consider_end', True) and not getattr(ColorType, 'hide_at_end', False)
+        if visible:
+            use_original = getattr(ColorType, 'use_end_original_color', True)
+            color = original_color if use_original else list(ColorType.end_color)
+            alpha = 1.0 - getattr(ColorType, 'end_transparency', 0.0)
+            obj.color = (color[0], color[1], color[2], alpha)
+        obj.hide_viewport = not visible
+        obj.hide_render = not visible
+
+        stats = getattr(cls, "_last_culling_stats", None)
+        avoided = 2 + cls.count_ColorType_keyframes(frame_data, ColorType)
+        if stats is not None:
+            stats["completed" if completed else "hidden"] += 1
+            stats["keyframes_avoided"] += avoided
+        return avoided
+
+    @classmethod
+    def get_last_culling_stats(cls) -> dict:
+        """Products culled and keyframes avoided by the last animation build"""
+        return dict(getattr(cls, "_last_culling_stats", None) or {"completed": 0, "hidden": 0, "keyframes_avoided": 0})
+
+    @classmethod
+    def get_culling_report(cls) -> str:
+        """Suffix for operator reports, empty when nothing was culled"""
+        stats = cls.get_last_culling_stats()
+        if not stats["completed"] and not stats["hidden"]:
+            return ""
+        return (
+            f" Culled {stats['completed']} completed and {stats['hidden']} future products outside the"
+            f" visualization range, {stats['keyframes_avoided']} keyframes avoided."
+        )
+
+    @classmethod
+    def save_animation_original_colors(cls, objects) -> dict:
+        """
+        Original color (material base color, else viewport color) of every object, stored in
+        'bonsai_animation_original_colors' for restoration when the animation is cleared.
+        """
+        import json
+        from bonsai.bim.module.sequence import original_appearance
+        appearance = original_appearance.get_original_appearance()
+        original_colors = {name: list(color) for name, color in appearance.colors_for(objects).items()}
+
+        try:
+            # Esta propiedad actuará como nuestra "memoria" para la restauración.
+            bpy.context.scene['bonsai_animation_original_colors'] = json.dumps(original_colors)
+            print(f"🎨 Se han guardado los colores originales de {len(original_colors)} objetos para la animación.")
+        except Exception as e:
+            print(f"[WARNING]️ No se pudieron guardar los colores originales de la animación: {e}")
+        return original_colors
+
+    @classmethod
+    def get_task_colortype_signatures(cls, table, animation_props, active_group_name: str) -> dict:
+        """ColorType signature of every task referenced by a product-frame table"""
+        from bonsai.bim.module.sequence import incremental_animation
+        ifc_file = tool.Ifc.get()
+        signatures = {}
+        for task_id in table.task_ids().tolist():
+            if not task_id:
+                continue
+            try:
+                task = ifc_file.by_id(task_id)
+            except RuntimeError:
+                continue
+            colortype = cls.get_assigned_ColorType_for_task(task, animation_props, active_group_name)
+            signatures[task_id] = incremental_animation.colortype_signature(colortype)
+        return signatures
+
+    @classmethod
+    def store_compiled_animation(cls, work_schedule, settings, product_frames,
+                                 frame_builder: str = "get_animation_product_frames_enhanced",
+                                 appearance: str = "standard") -> None:
+        """
+        Keeps the compiled product frames so later schedule edits can be applied incrementally.
+        frame_builder names the Sequence method (work_schedule, settings) that produced product_frames,
+        appearance the keyframing path that animated them (incremental_animation.APPEARANCE_*).
+        """
+        from bonsai.bim.module.sequence import frame_table, incremental_animation
+        animation_props = cls.get_animation_props()
+        active_group_name = cls._get_active_group_optimized(animation_props)
+        table = frame_table.as_frame_table(product_frames)
+        signatures = cls.get_task_colortype_signatures(table, animation_props, active_group_name)
+        incremental_animation.get_compiled_animation().store(
+            table, settings, work_schedule.id(), active_group_name, signatures, frame_builder, appearance
+        )
+
+    @classmethod
+    def request_incremental_animation_update(cls) -> None:
+        """Schedules a debounced incremental update after a task date or ColorType edit"""
+        from bonsai.bim.module.sequence import incremental_animation
+        cls.invalidate_schedule_state_indexes()
+        state = incremental_animation.get_compiled_animation()
+        if not state.is_valid or state.update_pending:
+            return
+
+        def _run_incremental_update():
+            try:
+                cls.update_animation_incremental()
+            except Exception as e:
+                state.update_pending = False
+                print(f"⚠️ Incremental animation update failed: {e}")
+            return None
+
+        # Several property callbacks fire for one edit, apply them as one update
+        state.update_pending = True
+        bpy.app.timers.register(_run_incremental_update, first_interval=0.3)
+
+    @classmethod
+    def update_animation_incremental(cls) -> Optional[int]:
+        """
+        Recomputes the product frames, diffs them and the task ColorTypes against the last
+        compiled animation and re-keyframes only the affected products.
+        Returns the number of products rewritten, or None when no compiled animation exists.
+        """
+        import time
+        from bonsai.bim.module.sequence import frame_table, incremental_animation
+
+        state = incremental_animation.get_compiled_animation()
+        state.update_pending = False
+        if not state.is_valid:
+            return None
+
+        work_schedule = cls.get_active_work_schedule()
+        if not work_schedule or work_schedule.id() != state.work_schedule_id:
+            incremental_animation.invalidate_compiled_animation()
+            return None
+
+        start_time = time.time()
+        settings = cls.get_animation_settings()
+        if not settings:
+            return None
+        animation_props = cls.get_animation_props()
+        active_group_name = cls._get_active_group_optimized(animation_props)
+
+        from bonsai.bim.module.sequence import stage_profiler
+        profiler = stage_profiler.get_stage_profiler()
+        profiler.begin_run("incremental_animation")
+        try:
+            frame_builder = getattr(cls, state.frame_builder)
+            with profiler.stage(stage_profiler.STAGE_FRAMES):
+                new_table = frame_table.as_frame_table(frame_builder(work_schedule, settings))
+            profiler.add_items(stage_profiler.STAGE_FRAMES, len(new_table))
+            with profiler.stage(stage_profiler.STAGE_COLORTYPES):
+                signatures = cls.get_task_colortype_signatures(new_table, animation_props, active_group_name)
+            profiler.add_items(stage_profiler.STAGE_COLORTYPES, len(signatures))
+            affected = state.affected_products(new_table, signatures).tolist()
+
+            if affected:
+                cls.animate_products(
+                    new_table, affected, settings, animation_props, active_group_name, appearance=state.appearance
+                )
+                # The compiled schedule texts no longer match the schedule
+                from bonsai.bim.module.sequence import schedule_text_tables
+                schedule_text_tables.invalidate_schedule_text_tables()
+                bpy.context.scene.frame_start = settings["start_frame"]
+                bpy.context.scene.frame_end = int(settings["start_frame"] + settings["total_frames"] + 1)
+                from bonsai.bim.module.sequence import live_cache_store
+                store = live_cache_store.get_live_update_store()
+                if store.has_table(bpy.context.scene):
+                    with profiler.stage(stage_profiler.STAGE_LIVE_CACHE, len(new_table)):
+                        store.set_table(bpy.context.scene, new_table)
+        finally:
+            profiler.end_run()
+
+        state.store(new_table, settings, work_schedule.id(), active_group_name, signatures)
+        elapsed = time.time() - start_time
+        state.record_update(len(affected), elapsed)
+        SequenceCache._track_performance("incremental_animation", elapsed, len(affected), "animation")
+        print(f"[INFO] INCREMENTAL ANIMATION: {len(affected)} of {len(new_table)} products rewritten in {elapsed:.3f}s")
+        return len(affected)
+
+    @classmethod
+    def animate_products(cls, table, product_ids, settings, animation_props, active_group_name: str,
+                         original_colors: Optional[dict] = None, colortypes: Optional[dict] = None,
+                         culled: Optional[tuple] = None, appearance: str = "standard") -> int:
+        """
+        (Re)writes the keyframes of the given products exactly as the full build does:
+        animate_objects_with_ColorTypes for the "standard" appearance, animate_objects_with_ColorTypes_optimized
+        for "optimized". Used by the incremental update and by the chunked bim.create_animation_modal,
+        which passes original_colors, a shared colortypes cache and the (before, after) window-culled
+        products to avoid recomputing them for every chunk.
+        """
+        import json
+        import time
+        from bonsai.bim.module.sequence import frame_table, keyframe_writer, snapshot_engine, stage_profiler
+
+        # Keyframed objects no longer hold the last applied snapshot
+        snapshot_engine.invalidate_snapshot_state()
+        profiler = stage_profiler.get_stage_profiler()
+        colortype_time = 0.0
+        keyframe_start = time.perf_counter()
+        ifc_file = tool.Ifc.get()
+        if original_colors is None:
+            try:
+                original_colors = json.loads(bpy.context.scene.get('bonsai_animation_original_colors') or "{}")
+            except Exception:
+                original_colors = {}
+        if colortypes is None:
+            colortypes = {}
+        culled_before, culled_after = culled if culled is not None else cls.get_window_culled_products(table, settings)
+        optimized = appearance == "optimized"
+        optimized_colortypes = {}
+        row_states = row_is_output = None
+        visibility_ops = []
+        color_ops = []
+        animated_objects = []
+        writer = keyframe_writer.BulkKeyframeWriter()
+        for product_id in product_ids:
+            try:
+                obj = tool.Ifc.get_object(ifc_file.by_id(int(product_id)))
+            except RuntimeError:
+                continue
+            if not obj or obj.type != 'MESH':
+                continue
+            if obj.animation_data:
+                obj.animation_data_clear()
+            original_color = original_colors.get(obj.name, [1.0, 1.0, 1.0, 1.0])
+            if product_id in culled_before or product_id in culled_after:
+                frame_data = list(table.iter_frame_data(int(product_id)))[-1]
+                task = frame_data.get("task")
+                task_key = task.id() if task else None
+                if task_key not in colortypes:
+                    resolve_start = time.perf_counter()
+                    colortypes[task_key] = cls.get_assigned_ColorType_for_task(task, animation_props, active_group_name)
+                    colortype_time += time.perf_counter() - resolve_start
+                cls.apply_culled_product_appearance(
+                    obj, frame_data, colortypes[task_key], original_color, product_id in culled_before
+                )
+                continue
+            if optimized:
+                # The optimized build only animates scheduled products
+                if product_id not in table:
+                    continue
+                animated_objects.append((obj, True))
+                if row_states is None:
+                    row_states = table.row_states()
+                    row_is_output = (table.relationship == frame_table.REL_OUTPUT).tolist()
+                rows = table.rows_for_product(int(product_id))
+                for row in range(rows.start, rows.stop):
+                    task_id = int(table.task_id[row])
+                    if task_id not in optimized_colortypes:
+                        task = table.resolve_task(task_id)
+                        resolve_start = time.perf_counter()
+                        optimized_colortypes[task_id] = cls._get_colortype_optimized(task, animation_props, active_group_name) if task else None
+                        colortype_time += time.perf_counter() - resolve_start
+                    if optimized_colortypes[task_id] is None:
+                        continue
+                    cls._plan_state_animation_optimized(
+                        obj, zip(frame_table.STATE_NAMES, row_states[row]), row_is_output[row],
+                        optimized_colortypes[task_id], visibility_ops, color_ops,
+                    )
+                continue
 
-            # Batch material operations
-            if "SET_MATERIAL_ACTIVE" in frame_actions:
-                for obj in frame_actions["SET_MATERIAL_ACTIVE"]:
-                    if obj.material_slots and obj.material_slots[0].material:
-                        obj.keyframe_insert(data_path='material_slots[0].material', frame=frame_num)
+            # Products that left the schedule stay hidden, like any unscheduled product
+            animated_objects.append((obj, product_id in table))
+            if product_id not in table:
+                continue
 
-        # Reset all objects to hidden state to avoid initial visibility issues
-        for obj in bpy.data.objects:
-            element = tool.Ifc.get_entity(obj)
-            if element and not element.is_a("IfcSpace"):
+            for frame_data in table.iter_frame_data(int(product_id)):
+                task = frame_data.get("task")
+                task_key = task.id() if task else None
+                if task_key not in colortypes:
+                    resolve_start = time.perf_counter()
+                    colortypes[task_key] = cls.get_assigned_ColorType_for_task(task, animation_props, active_group_name)
+                    colortype_time += time.perf_counter() - resolve_start
+                cls.apply_ColorType_animation(obj, frame_data, colortypes[task_key], original_color, settings, writer)
+
+        if optimized:
+            writer.add_operations(visibility_ops, color_ops)
+            writer.write(share_identical=cls.should_share_identical_actions())
+        else:
+            for obj, is_scheduled in animated_objects:
                 obj.hide_viewport = True
                 obj.hide_render = True
-
-        print(f"[OPTIMIZED] EXECUTION COMPLETE: Animation applied successfully")
+                if is_scheduled:
+                    writer.add(obj, "hide_viewport", 0, True)
+                    writer.add(obj, "hide_render", 0, True)
+            writer.write(replace_existing=False)
+        profiler.record(stage_profiler.STAGE_COLORTYPES, colortype_time, calls=0)
+        profiler.record(stage_profiler.STAGE_KEYFRAMES, time.perf_counter() - keyframe_start - colortype_time, len(animated_objects))
+        return len(animated_objects)
 
     @classmethod
     def animate_objects_with_ColorTypes_new(cls, settings, product_frames):
@@ -4698,11 +4976,16 @@ class Sequence(bonsai.core.tool.Sequence):
         # ORIGINAL STABLE LOGIC - Use original build_animation_plan approach
         print("🔧 [SAFE] Using original stable animation system...")
 
+        from bonsai.bim.module.sequence import stage_profiler
+        profiler = stage_profiler.get_stage_profiler()
+
         # Phase 1: Build animation plan (original approach)
-        animation_plan = cls.build_animation_plan(bpy.context, settings, product_frames)
+        with profiler.stage(stage_profiler.STAGE_PLANNING, len(product_frames)):
+            animation_plan = cls.build_animation_plan(bpy.context, settings, product_frames)
 
         # Phase 2: Execute animation plan (original approach)
-        cls.execute_animation_plan(bpy.context, animation_plan)
+        with profiler.stage(stage_profiler.STAGE_KEYFRAMES, len(assigned_objects)):
+            cls.execute_animation_plan(bpy.context, animation_plan)
 
         # Set viewport shading and frame range (preserve existing functionality)
         area = tool.Blender.get_view3d_area()
@@ -4808,7 +5091,10 @@ class Sequence(bonsai.core.tool.Sequence):
         - 100% original functionality maintained
         """
         import time
+        from bonsai.bim.module.sequence import snapshot_engine
         start_time = time.time()
+        # Keyframed objects no longer hold the last applied snapshot
+        snapshot_engine.invalidate_snapshot_state()
 
         print(f"🚀 [ULTRA-OPTIMIZED] Starting animation for {len(product_frames)} products")
 
@@ -4871,8 +5157,6 @@ class Sequence(bonsai.core.tool.Sequence):
             cls._save_original_object_colors()
 
         # === 3. OPTIMIZED OBJECT PROCESSING ===
-        original_colors = {}
-
         # OPTIMIZATION 1: Pre-filter relevant objects (avoid processing all scene objects)
         print("🔍 Pre-filtering relevant objects...")
         relevant_objects = []
@@ -4898,44 +5182,41 @@ class Sequence(bonsai.core.tool.Sequence):
 
         # OPTIMIZATION 3: Batch color extraction
         print("🎨 Extracting original colors (optimized)...")
-        for obj in relevant_objects:
-            # Intentar obtener el color del material IFC original primero - PRESERVED LOGIC
-            original_color = None
-            try:
-                if obj.material_slots and obj.material_slots[0].material:
-                    material = obj.material_slots[0].material
-                    if material.use_nodes:
-                        principled = tool.Blender.get_material_node(material, "BSDF_PRINCIPLED")
-                        if principled and principled.inputs.get("Base Color"):
-                            base_color = principled.inputs["Base Color"].default_value
-                            original_color = [base_color[0], base_color[1], base_color[2], base_color[3]]
-            except Exception:
-                pass
-
-            # Fallback: usar el color actual del viewport si no se pudo obtener del material - PRESERVED
-            if original_color is None:
-                original_color = list(obj.color)
-
-            original_colors[obj.name] = original_color
-
-        # --- INICIO DE LA MODIFICACIÓN: GUARDAR ESTADO DE ANIMACIÓN - PRESERVED ---
-        import json
-        try:
-            # Guardamos una copia serializada de los colores en la escena.
-            # Esta propiedad actuará como nuestra "memoria" para la restauración.
-            bpy.context.scene['bonsai_animation_original_colors'] = json.dumps(original_colors)
-            print(f"🎨 Se han guardado los colores originales de {len(original_colors)} objetos para la animación.")
-        except Exception as e:
-            print(f"[WARNING]️ No se pudieron guardar los colores originales de la animación: {e}")
-        # --- FIN DE LA MODIFICACIÓN - PRESERVED ---
+        original_colors = cls.save_animation_original_colors(relevant_objects)
 
         # === 4. ULTRA-OPTIMIZED OBJECT PROCESSING ===
         print("🚀 Processing objects with ultra-optimizations...")
 
         # OPTIMIZATION 4: Cache ColorTypes to avoid repeated lookups
         colortype_cache_dict = {}
+        from bonsai.bim.module.sequence import stage_profiler
+        profiler = stage_profiler.get_stage_profiler()
+        colortype_time = [0.0]
+        keyframe_start = time.perf_counter()
+
+        def get_colortype(task):
+            task_key = f"{task.id() if task else 'None'}_{active_group_name}"
+            if task_key not in colortype_cache_dict:
+                resolve_start = time.perf_counter()
+                if colortype_cache and task:
+                    # Use ColorType cache if available
+                    try:
+                        cached_colortype = colortype_cache.get_task_colortype(task.id())
+                        colortype_cache_dict[task_key] = cached_colortype
+                    except:
+                        colortype_cache_dict[task_key] = cls.get_assigned_ColorType_for_task(task, animation_props, active_group_name)
+                else:
+                    # Fallback to original method
+                    colortype_cache_dict[task_key] = cls.get_assigned_ColorType_for_task(task, animation_props, active_group_name)
+                colortype_time[0] += time.perf_counter() - resolve_start
+            return colortype_cache_dict[task_key]
+
+        # Products entirely outside the visualization range get a static appearance
+        culled_before, culled_after = cls.get_window_culled_products(product_frames, settings)
 
         # OPTIMIZATION 5: Batch operations for visibility and colors
+        from bonsai.bim.module.sequence import keyframe_writer
+        writer = keyframe_writer.BulkKeyframeWriter()
         objects_to_hide = []
         objects_to_show = []
         keyframe_operations = []
@@ -4957,6 +5238,16 @@ class Sequence(bonsai.core.tool.Sequence):
                 objects_to_hide.append(obj)
                 continue
 
+            if element.id() in culled_before or element.id() in culled_after:
+                # The last frame_data wins, as apply_ColorType_animation clears previous keyframes
+                frame_data = product_frames[element.id()][-1]
+                task = frame_data.get("task") or tool.Ifc.get().by_id(frame_data.get("task_id"))
+                cls.apply_culled_product_appearance(
+                    obj, frame_data, get_colortype(task), original_colors.get(obj.name, [1.0, 1.0, 1.0, 1.0]),
+                    element.id() in culled_before,
+                )
+                continue
+
             # CORRECCIÓN PRINCIPAL: Para objetos que SÍ van a ser animados - PRESERVED LOGIC
             objects_to_hide.append(obj)  # Will be batched
             keyframe_operations.append((obj, "hide_viewport", True, 0))
@@ -4969,23 +5260,10 @@ class Sequence(bonsai.core.tool.Sequence):
                 task = frame_data.get("task") or tool.Ifc.get().by_id(frame_data.get("task_id"))
 
                 # OPTIMIZATION 6: Cache ColorType lookups
-                task_key = f"{task.id() if task else 'None'}_{active_group_name}"
-                if task_key not in colortype_cache_dict:
-                    if colortype_cache and task:
-                        # Use ColorType cache if available
-                        try:
-                            cached_colortype = colortype_cache.get_task_colortype(task.id())
-                            colortype_cache_dict[task_key] = cached_colortype
-                        except:
-                            colortype_cache_dict[task_key] = cls.get_assigned_ColorType_for_task(task, animation_props, active_group_name)
-                    else:
-                        # Fallback to original method
-                        colortype_cache_dict[task_key] = cls.get_assigned_ColorType_for_task(task, animation_props, active_group_name)
-
-                ColorType = colortype_cache_dict[task_key]
+                ColorType = get_colortype(task)
 
                 # Apply animation - PRESERVED FUNCTIONALITY
-                cls.apply_ColorType_animation(obj, frame_data, ColorType, original_color, settings)
+                cls.apply_ColorType_animation(obj, frame_data, ColorType, original_color, settings, writer)
 
         # === 5. EXECUTE BATCH OPERATIONS ===
         print(f"⚡ Executing batch operations: {len(objects_to_hide)} hide, {len(keyframe_operations)} keyframes")
@@ -4995,21 +5273,12 @@ class Sequence(bonsai.core.tool.Sequence):
             obj.hide_viewport = True
             obj.hide_render = True
 
-        # Batch keyframe insertions
-        if batch_proc:
-            try:
-                # Use batch processor if available
-                batch_proc.batch_insert_keyframes(keyframe_operations)
-            except:
-                # Fallback to individual keyframes
-                for obj, data_path, value, frame in keyframe_operations:
-                    setattr(obj, data_path, value)
-                    obj.keyframe_insert(data_path=data_path, frame=frame)
-        else:
-            # Standard keyframe insertion
-            for obj, data_path, value, frame in keyframe_operations:
-                setattr(obj, data_path, value)
-                obj.keyframe_insert(data_path=data_path, frame=frame)
+        # Frame-0 hide keys join the keys queued by apply_ColorType_animation, all written in bulk
+        for obj, data_path, value, frame in keyframe_operations:
+            writer.add(obj, data_path, frame, value)
+        writer.write(replace_existing=False)
+        profiler.record(stage_profiler.STAGE_COLORTYPES, colortype_time[0], len(colortype_cache_dict))
+        profiler.record(stage_profiler.STAGE_KEYFRAMES, time.perf_counter() - keyframe_start - colortype_time[0], len(relevant_objects))
 
         print(f"📊 Processed {len(relevant_objects)} objects with {len(colortype_cache_dict)} cached ColorTypes")
 
@@ -5039,6 +5308,9 @@ class Sequence(bonsai.core.tool.Sequence):
         print(f"   - Entity caching: ✅ ({len(ifc_entity_cache)} entities)")
         print(f"   - ColorType caching: ✅ ({len(colortype_cache_dict)} cached)")
         print(f"   - Batch operations: ✅ ({len(keyframe_operations)} keyframes)")
+        culling_stats = cls.get_last_culling_stats()
+        if culled_before or culled_after:
+            print(f"   - Window culling: ✅ ({culling_stats['completed']} completed, {culling_stats['hidden']} hidden, {culling_stats['keyframes_avoided']} keyframes avoided)")
         print("🚀 All optimizations successfully integrated maintaining 100% functionality!")
 
     @classmethod
@@ -5080,23 +5352,22 @@ class Sequence(bonsai.core.tool.Sequence):
     # === 2. (APLICACIÓN DE COLOR TYPE) ==================
     # ==================================================================
     @classmethod
-    def apply_ColorType_animation(cls, obj, frame_data, ColorType, original_color, settings):
+    def apply_ColorType_animation(cls, obj, frame_data, ColorType, original_color, settings, writer=None):
         """
         Aplica la animación a un objeto basándose en su perfil de apariencia.
         RESTAURADO: Lógica exacta de v110 para manejo de consider flags.
+        With a BulkKeyframeWriter the keys are queued on it instead of inserted one by one.
         """
         # Limpiar cualquier animación previa en este objeto para empezar de cero.
         if obj.animation_data:
             obj.animation_data_clear()
+        if writer is not None:
+            writer.discard(obj)
 
         # V110 LOGIC: Verificar consider_start_active (priority mode)
         if frame_data.get("consider_start_active", False):
-            print(f"🔒 APPLY_COLORTYPE: {obj.name} detectado consider_start_active=True (Start prioritario)")
             start_f, end_f = frame_data["states"]["active"]
-            print(f"   Range: {start_f} to {end_f}")
-            print(f"   Llamando apply_state_appearance(state='start')")
-            cls.apply_state_appearance(obj, ColorType, "start", start_f, end_f, original_color, frame_data)
-            print(f"   Visibilidad después: viewport={not obj.hide_viewport}, render={not obj.hide_render}")
+            cls.apply_state_appearance(obj, ColorType, "start", start_f, end_f, original_color, frame_data, writer)
             return
 
         # V110 LOGIC: Verificar flags una sola vez al inicio
@@ -5121,59 +5392,58 @@ class Sequence(bonsai.core.tool.Sequence):
                     # Si 'Start' NO se considera y es un objeto de construcción ('output'),
                     # debe estar OCULTO hasta que empiece su fase 'Active'.
                     if frame_data.get("relationship") == "output":
-                        obj.hide_viewport = True
-                        obj.hide_render = True
-                        obj.keyframe_insert(data_path="hide_viewport", frame=start_f)
-                        obj.keyframe_insert(data_path="hide_render", frame=start_f)
+                        cls._key_state_appearance(obj, writer, start_f, hide=True)
                         if end_f > start_f:
-                            obj.keyframe_insert(data_path="hide_viewport", frame=end_f)
-                            obj.keyframe_insert(data_path="hide_render", frame=end_f)
+                            cls._key_state_appearance(obj, writer, end_f, hide=True)
                     # Para inputs (demolición), no hacer nada los mantiene visibles, lo cual es correcto.
                     continue  # Continuar al siguiente estado.
                 # Si 'Start' SÍ se considera, aplicar su apariencia.
-                cls.apply_state_appearance(obj, ColorType, "start", start_f, end_f, original_color, frame_data)
+                cls.apply_state_appearance(obj, ColorType, "start", start_f, end_f, original_color, frame_data, writer)
 
             elif state == "in_progress":
                 if not is_active_considered:
                     continue
-                cls.apply_state_appearance(obj, ColorType, "in_progress", start_f, end_f, original_color, frame_data)
+                cls.apply_state_appearance(obj, ColorType, "in_progress", start_f, end_f, original_color, frame_data, writer)
 
             elif state == "end":
                 if not is_end_considered:
                     continue
-                cls.apply_state_appearance(obj, ColorType, "end", start_f, end_f, original_color, frame_data)
+                cls.apply_state_appearance(obj, ColorType, "end", start_f, end_f, original_color, frame_data, writer)
+
+    @classmethod
+    def _key_state_appearance(cls, obj, writer, frame, hide=None, color=None):
+        """Keys hide_viewport/hide_render (when hide is given) and color (when given) at a frame"""
+        if writer is not None:
+            if hide is not None:
+                writer.add_visibility(obj, frame, hide)
+            if color is not None:
+                writer.add_color(obj, frame, color)
+            return
+        if hide is not None:
+            obj.hide_viewport = hide
+            obj.hide_render = hide
+            obj.keyframe_insert(data_path="hide_viewport", frame=frame)
+            obj.keyframe_insert(data_path="hide_render", frame=frame)
+        if color is not None:
+            obj.color = color
+            obj.keyframe_insert(data_path="color", frame=frame)
 
     @classmethod
-    def apply_state_appearance(cls, obj, ColorType, state, start_frame, end_frame, original_color, frame_data=None):
+    def apply_state_appearance(cls, obj, ColorType, state, start_frame, end_frame, original_color, frame_data=None, writer=None):
         """V110 LOGIC: Apply appearance for a specific state"""
         if state == "start":
             # V110: Cuando consider_start=True, el objeto debe ser siempre visible
-            print(f"   📦 APPLY_STATE_APPEARANCE: Aplicando estado 'start' a {obj.name}")
-            print(f"      Antes: viewport={not obj.hide_viewport}, render={not obj.hide_render}")
-            obj.hide_viewport = False
-            obj.hide_render = False
-            print(f"      Después: viewport={not obj.hide_viewport}, render={not obj.hide_render}")
-            obj.keyframe_insert(data_path="hide_viewport", frame=start_frame)
-            obj.keyframe_insert(data_path="hide_render", frame=start_frame)
-
             use_original = getattr(ColorType, 'use_start_original_color', False)
             color = original_color if use_original else list(ColorType.start_color)
             transparency = getattr(ColorType, 'start_transparency', 0.0)
             alpha = 1.0 - transparency
-            obj.color = (color[0], color[1], color[2], alpha)
-            obj.keyframe_insert(data_path="color", frame=start_frame)
+            color = (color[0], color[1], color[2], alpha)
+            cls._key_state_appearance(obj, writer, start_frame, hide=False, color=color)
 
             if end_frame > start_frame:
-                obj.keyframe_insert(data_path="hide_viewport", frame=end_frame)
-                obj.keyframe_insert(data_path="hide_render", frame=end_frame)
-                obj.keyframe_insert(data_path="color", frame=end_frame)
+                cls._key_state_appearance(obj, writer, end_frame, hide=False, color=color)
 
         elif state == "in_progress":
-            obj.hide_viewport = False
-            obj.hide_render = False
-            obj.keyframe_insert(data_path="hide_viewport", frame=start_frame)
-            obj.keyframe_insert(data_path="hide_render", frame=start_frame)
-
             use_original = getattr(ColorType, 'use_active_original_color', False)
             color = original_color if use_original else list(ColorType.in_progress_color)
 
@@ -5182,38 +5452,26 @@ class Sequence(bonsai.core.tool.Sequence):
             start_alpha = 1.0 - start_transparency
             end_alpha = 1.0 - end_transparency
 
-            obj.color = (color[0], color[1], color[2], start_alpha)
-            obj.keyframe_insert(data_path="color", frame=start_frame)
+            cls._key_state_appearance(obj, writer, start_frame, hide=False, color=(color[0], color[1], color[2], start_alpha))
 
             if end_frame > start_frame:
-                obj.color = (color[0], color[1], color[2], end_alpha)
-                obj.keyframe_insert(data_path="color", frame=end_frame)
+                cls._key_state_appearance(obj, writer, end_frame, color=(color[0], color[1], color[2], end_alpha))
 
         elif state == "end":
             should_hide_at_end = getattr(ColorType, 'hide_at_end', False)
 
             if should_hide_at_end:
-                obj.hide_viewport = True
-                obj.hide_render = True
-                obj.keyframe_insert(data_path="hide_viewport", frame=start_frame)
-                obj.keyframe_insert(data_path="hide_render", frame=start_frame)
+                cls._key_state_appearance(obj, writer, start_frame, hide=True)
             else:
-                obj.hide_viewport = False
-                obj.hide_render = False
-                obj.keyframe_insert(data_path="hide_viewport", frame=start_frame)
-                obj.keyframe_insert(data_path="hide_render", frame=start_frame)
-
                 use_original = getattr(ColorType, 'use_end_original_color', True)
                 color = original_color if use_original else list(ColorType.end_color)
                 transparency = getattr(ColorType, 'end_transparency', 0.0)
                 alpha = 1.0 - transparency
-                obj.color = (color[0], color[1], color[2], alpha)
-                obj.keyframe_insert(data_path="color", frame=start_frame)
+                color = (color[0], color[1], color[2], alpha)
+                cls._key_state_appearance(obj, writer, start_frame, hide=False, color=color)
 
                 if end_frame > start_frame:
-                    obj.keyframe_insert(data_path="hide_viewport", frame=end_frame)
-                    obj.keyframe_insert(data_path="hide_render", frame=end_frame)
-                    obj.keyframe_insert(data_path="color", frame=end_frame)
+                    cls._key_state_appearance(obj, writer, end_frame, hide=False, color=color)
 
         # CRÍTICO: Restaurar el estado oculto después de establecer keyframes
         obj.hide_viewport = True
@@ -5841,11 +6099,11 @@ class Sequence(bonsai.core.tool.Sequence):
                 return str(current_date)
 
     @classmethod
-    def _format_week(cls, current_date, start_date):
+    def _format_week(cls, current_date, start_date, schedule_range=None):
             try:
                 # Get full schedule dates (same as HUD logic)
                 try:
-                    sch_start, sch_finish = cls.get_schedule_date_range()
+                    sch_start, sch_finish = schedule_range if schedule_range is not None else cls.get_schedule_date_range()
                     if sch_start and sch_finish:
                         # Use same logic as HUD Schedule
                         cd_d = current_date.date()
@@ -5857,7 +6115,6 @@ class Sequence(bonsai.core.tool.Sequence):
                         else:
                             week_number = max(1, (delta_days // 7) + 1)
                         
-                        print(f"[STATS] 3D Week: current={cd_d}, schedule_start={fss_d}, week={week_number}")
                         return f"Week {week_number}"
                 except Exception as e:
                     print(f"[WARNING]️ 3D Week: Could not get schedule dates, using animation range: {e}")
@@ -5870,11 +6127,11 @@ class Sequence(bonsai.core.tool.Sequence):
                 return "Week ?"
 
     @classmethod
-    def _format_day_counter(cls, current_date, start_date, finish_date):
+    def _format_day_counter(cls, current_date, start_date, finish_date, schedule_range=None):
             try:
                 # Get full schedule dates (same as HUD logic)
                 try:
-                    sch_start, sch_finish = cls.get_schedule_date_range()
+                    sch_start, sch_finish = schedule_range if schedule_range is not None else cls.get_schedule_date_range()
                     if sch_start and sch_finish:
                         # Use same logic as HUD Schedule
                         cd_d = current_date.date()
@@ -5886,7 +6143,6 @@ class Sequence(bonsai.core.tool.Sequence):
                         else:
                             day_from_schedule = max(1, delta_days + 1)
                         
-                        print(f"[STATS] 3D Day: current={cd_d}, schedule_start={fss_d}, day={day_from_schedule}")
                         return f"Day {day_from_schedule}"
                 except Exception as e:
                     print(f"[WARNING]️ 3D Day: Could not get schedule dates, using animation range: {e}")
@@ -5898,11 +6154,11 @@ class Sequence(bonsai.core.tool.Sequence):
                 return "Day ?"
 
     @classmethod
-    def _format_progress(cls, current_date, start_date, finish_date):
+    def _format_progress(cls, current_date, start_date, finish_date, schedule_range=None):
             try:
                 # Get full schedule dates (same as HUD logic)
                 try:
-                    sch_start, sch_finish = cls.get_schedule_date_range()
+                    sch_start, sch_finish = schedule_range if schedule_range is not None else cls.get_schedule_date_range()
                     if sch_start and sch_finish:
                         # Use same logic as HUD Schedule
                         cd_d = current_date.date()
@@ -5923,7 +6179,6 @@ class Sequence(bonsai.core.tool.Sequence):
                                 progress_pct = round(progress_pct)
                                 progress_pct = max(0, min(100, progress_pct))
                         
-                        print(f"[STATS] 3D Progress: current={cd_d}, schedule_start={fss_d}, end={fse_d}, progress={progress_pct}%")
                         return f"Progress: {progress_pct}%"
                 except Exception as e:
                     print(f"[WARNING]️ 3D Progress: Could not get schedule dates, using animation range: {e}")
@@ -5941,83 +6196,117 @@ class Sequence(bonsai.core.tool.Sequence):
     @classmethod
     def _register_multi_text_handler(cls, settings):
 
-            from datetime import datetime as _dt
+            from bonsai.bim.module.sequence import frame_dispatcher, schedule_text_tables
 
             cls._unregister_frame_change_handler()
+            # Texts are (re)created with the animation, compile them again
+            schedule_text_tables.invalidate_schedule_text_tables()
 
-            def update_all_schedule_texts(scene):
-                print("[ANIM] 3D Text Handler (main): Starting update...")
+            def update_all_schedule_texts(scene, frame_context=None):
                 collection_name = "Schedule_Display_Texts"
                 coll = bpy.data.collections.get(collection_name)
                 if not coll:
-                    print("[WARNING]️ 3D Text Handler (main): No 'Schedule_Display_Texts' collection found")
                     return
-                print(f"📝 3D Text Handler (main): Found collection with {len(coll.objects)} objects")
-                current_frame = int(scene.frame_current)
+                tables = schedule_text_tables.get_schedule_text_tables()
+                current_frame = frame_context.frame if frame_context is not None else int(scene.frame_current)
+                # Schedule name and range of week / day counter / progress texts follow the active schedule
+                schedule_id = getattr(cls.get_work_schedule_props(), "active_work_schedule_id", 0)
                 for text_obj in list(coll.objects):
-                    anim_settings = text_obj.data.get("animation_settings") if getattr(text_obj, "data", None) else None
+                    text_data = getattr(text_obj, "data", None)
+                    anim_settings = text_data.get("animation_settings") if text_data else None
                     if not anim_settings:
                         continue
-                    start_frame = int(anim_settings.get("start_frame", 1))
-                    total_frames = int(anim_settings.get("total_frames", 250))
-                    if current_frame < start_frame:
-                        progress = 0.0
-                    elif current_frame > start_frame + total_frames:
-                        progress = 1.0
-                    else:
-                        progress = (current_frame - start_frame) / float(total_frames or 1)
-
-                    try:
-                        start_date = _dt.fromisoformat(anim_settings.get("start_date"))
-                        finish_date = _dt.fromisoformat(anim_settings.get("finish_date"))
-                    except Exception:
-                        continue
-                    duration = finish_date - start_date
-                    current_date = start_date + (duration * progress)
-
-                    ttype = text_obj.data.get("text_type", "date")
-                    if ttype == "date":
-                        text_obj.data.body = cls._format_date(current_date)
-                    elif ttype == "week":
-                        text_obj.data.body = cls._format_week(current_date, start_date)
-                    elif ttype == "day_counter":
-                        text_obj.data.body = cls._format_day_counter(current_date, start_date, finish_date)
-                    elif ttype == "progress":
-                        text_obj.data.body = cls._format_progress(current_date, start_date, finish_date)
-                    elif ttype == "schedule_name":
-                        # Schedule name is static, get it from the original content if available
-                        if "content" in text_obj.data:
-                            text_obj.data.body = text_obj.data["content"]
-                        else:
-                            # Fallback: get schedule name dynamically
-                            try:
-                                import bonsai.tool as tool
-                                ws_props = cls.get_work_schedule_props()
-                                if ws_props and hasattr(ws_props, 'active_work_schedule_id'):
-                                    ws_id = ws_props.active_work_schedule_id
-                                    if ws_id:
-                                        work_schedule = tool.Ifc.get().by_id(ws_id)
-                                        if work_schedule and hasattr(work_schedule, 'Name'):
-                                            schedule_name = work_schedule.Name or "Unnamed Schedule"
-                                            text_obj.data.body = f"Schedule: {schedule_name}"
-                                        else:
-                                            text_obj.data.body = "Schedule: Unknown"
-                                    else:
-                                        text_obj.data.body = "Schedule: Unknown"
-                                else:
-                                    text_obj.data.body = "Schedule: Unknown"
-                            except Exception:
-                                text_obj.data.body = "Schedule: Unknown"
+                    ttype = text_data.get("text_type", "date")
+                    signature = (
+                        ttype,
+                        anim_settings.get("start_date"),
+                        anim_settings.get("finish_date"),
+                        int(anim_settings.get("start_frame", 1)),
+                        int(anim_settings.get("total_frames", 250)),
+                        text_data.get("content"),
+                        schedule_id,
+                    )
+                    compiled = tables.get(
+                        text_obj.name, signature, lambda: cls._compile_schedule_text(signature)
+                    )
+                    tables.apply(text_data, compiled, current_frame)
 
-            bpy.app.handlers.frame_change_post.append(update_all_schedule_texts)
+            dispatcher = frame_dispatcher.get_frame_dispatcher()
+            if settings:
+                dispatcher.set_timeline(settings)
+            dispatcher.subscribe(
+                frame_dispatcher.SUBSCRIBER_SCHEDULE_TEXTS,
+                lambda frame_context: update_all_schedule_texts(frame_context.scene, frame_context),
+                frame_dispatcher.ORDER_TEXTS,
+            )
             cls._frame_change_handler = update_all_schedule_texts
 
     @classmethod
-    def _unregister_frame_change_handler(cls):
+    def _compile_schedule_text(cls, signature):
+        """
+        Per-frame bodies of a schedule text from its signature
+        (text_type, start_date, finish_date, start_frame, total_frames, content, schedule_id).
+        """
+        from datetime import datetime as _dt
+        from bonsai.bim.module.sequence import schedule_text_tables
+
+        ttype, start_iso, finish_iso, start_frame, total_frames, content, _ = signature
+        if ttype == "schedule_name":
+            # Schedule name is static, get it from the original content if available
+            body = content if content is not None else cls._get_schedule_name_text()
+            return schedule_text_tables.CompiledText(signature, start_frame, [body])
+
+        try:
+            start_date = _dt.fromisoformat(start_iso)
+            finish_date = _dt.fromisoformat(finish_iso)
+        except Exception:
+            return schedule_text_tables.CompiledText(signature, start_frame, None)
+
+        schedule_range = None
+        if ttype in ("week", "day_counter", "progress"):
             try:
+                schedule_range = cls.get_schedule_date_range()
+            except Exception:
+                schedule_range = (None, None)
+
+        if ttype == "date":
+            format_body = cls._format_date
+        elif ttype == "week":
+            format_body = lambda date: cls._format_week(date, start_date, schedule_range)
+        elif ttype == "day_counter":
+            format_body = lambda date: cls._format_day_counter(date, start_date, finish_date, schedule_range)
+        elif ttype == "progress":
+            format_body = lambda date: cls._format_progress(date, start_date, finish_date, schedule_range)
+        else:
+            return schedule_text_tables.CompiledText(signature, start_frame, None)
+
+        dates = schedule_text_tables.frame_dates(start_date, finish_date, start_frame, total_frames)
+        # Without the schedule range week/day/progress fall back to elapsed timedeltas, which
+        # depend on the time of day, so those are formatted per frame
+        per_day = ttype == "date" or bool(schedule_range and schedule_range[0] and schedule_range[1])
+        bodies = schedule_text_tables.compile_bodies(dates, format_body, per_day=per_day)
+        return schedule_text_tables.CompiledText(signature, start_frame, bodies)
+
+    @classmethod
+    def _get_schedule_name_text(cls):
+        try:
+            ws_props = cls.get_work_schedule_props()
+            if ws_props and hasattr(ws_props, 'active_work_schedule_id'):
+                ws_id = ws_props.active_work_schedule_id
+                if ws_id:
+                    work_schedule = tool.Ifc.get().by_id(ws_id)
+                    if work_schedule and hasattr(work_schedule, 'Name'):
+                        schedule_name = work_schedule.Name or "Unnamed Schedule"
+                        return f"Schedule: {schedule_name}"
+            return "Schedule: Unknown"
+        except Exception:
+            return "Schedule: Unknown"
 
-                if getattr(cls, "_frame_change_handler", None) in bpy.app.handlers.frame_change_post:
-                    bpy.app.handlers.frame_change_post.remove(cls._frame_change_handler)
+    @classmethod
+    def _unregister_frame_change_handler(cls):
+            try:
+                from bonsai.bim.module.sequence import frame_dispatcher
+                frame_dispatcher.get_frame_dispatcher().unsubscribe(frame_dispatcher.SUBSCRIBER_SCHEDULE_TEXTS)
             except Exception:
                 pass
             cls._frame_change_handler = None
@@ -6026,6 +6315,188 @@ class Sequence(bonsai.core.tool.Sequence):
     # Object creation in Blender causes instability and crashes
     # Only visibility control is safe
 
+    # --- Live Color Update Handler ---
+    _live_color_update_handler = None
+
+    @classmethod
+    def get_live_interval_index(cls, scene):
+        """
+        Interval index of the animation played by the live handler: the animation compiled in
+        this session, else the live update cache stored in the scene.
+        """
+        from bonsai.bim.module.sequence import incremental_animation, interval_index, live_cache_store
+        cache = interval_index.get_live_interval_index_cache()
+        state = incremental_animation.get_compiled_animation()
+        if state.is_valid:
+            return cache.get(("compiled", id(state.table)), lambda: state.table)
+
+        store = live_cache_store.get_live_update_store()
+        table = store.get_table(scene)
+        if table is None:
+            cache.clear()
+            return None
+        return cache.get(("store", store.token), lambda: table)
+
+    @classmethod
+    def take_live_changed_products(cls, frame_context):
+        """Changed products provider of the frame dispatcher, backed by the live interval index"""
+        index = cls.get_live_interval_index(frame_context.scene)
+        if index is None:
+            return None
+        active_group_name = cls._get_active_group_optimized(cls.get_animation_props())
+        return index.take_changes(frame_context.frame, active_group_name)
+
+    @classmethod
+    def live_color_update_handler(cls, scene, depsgraph=None, frame_context=None):
+        """
+        Frame change handler updating colors and visibility without keyframes. Only products whose
+        state changed since the last applied frame are touched (all of them after a group switch).
+        """
+        from bonsai.bim.module.sequence import snapshot_engine
+        # Both update modes rewrite states the snapshot engine compares against
+        snapshot_engine.invalidate_snapshot_state()
+        if scene.get('BIM_VarianceColorModeActive', False):
+            cls._variance_aware_color_update()
+            return
+
+        index = cls.get_live_interval_index(scene)
+        if index is None:
+            return
+
+        from bonsai.bim.module.sequence import frame_table, interval_index, original_appearance
+        anim_props = cls.get_animation_props()
+        active_group_name = cls._get_active_group_optimized(anim_props)
+        current_frame = scene.frame_current
+        if frame_context is not None and frame_context.dispatcher.changed_products_provider is not None:
+            changed = frame_context.changed_products
+        else:
+            changed = index.take_changes(current_frame, active_group_name)
+        # Scrubbing reuses the state vectors prefetched around the cursor
+        from bonsai.bim.module.sequence import frame_dispatcher, scrub_prefetch
+        prefetcher = scrub_prefetch.get_scrub_prefetcher()
+        prefetcher.attach(index)
+        scrubbing = not frame_dispatcher.is_animation_playing()
+        vector = prefetcher.lookup(current_frame) if scrubbing else None
+        if scrubbing:
+            prefetcher.note_frame(current_frame)
+        if changed is None or not len(changed):
+            return
+        if vector is not None:
+            rows, states = vector[0][changed], vector[1][changed]
+        else:
+            rows, states = index.state_at(changed, current_frame)
+
+        ifc_file = tool.Ifc.get()
+        appearance = original_appearance.get_original_appearance()
+        table = index.table
+        state_map = {
+            frame_table.STATE_BEFORE_START: "start",
+            frame_table.STATE_ACTIVE: "in_progress",
+            frame_table.STATE_AFTER_END: "end",
+        }
+        for product_index, row, state_code in zip(changed.tolist(), rows.tolist(), states.tolist()):
+            if row == interval_index.NO_STATE:
+                continue
+
+            obj = index.objects.get(product_index)
+            if obj is None:
+                try:
+                    obj = tool.Ifc.get_object(ifc_file.by_id(int(index.products[product_index])))
+                except RuntimeError:
+                    obj = None
+                index.objects[product_index] = obj or False
+            if not obj:
+                continue
+
+            task_id = int(table.task_id[row])
+            if task_id not in index.colortypes:
+                try:
+                    task = ifc_file.by_id(task_id) if task_id else None
+                except RuntimeError:
+                    task = None
+                ColorType = None
+                if task:
+                    ColorType = cls.get_assigned_ColorType_for_task(task, anim_props, active_group_name)
+                    if not ColorType:
+                        predefined_type = getattr(task, "PredefinedType", "NOTDEFINED") or "NOTDEFINED"
+                        ColorType = cls.load_ColorType_from_group(active_group_name, predefined_type) or cls.create_fallback_ColorType(predefined_type)
+                index.colortypes[task_id] = ColorType
+            ColorType = index.colortypes[task_id]
+            if not ColorType:
+                # Cannot determine ColorType without task - skip coloring for this object
+                continue
+
+            state = state_map[state_code]
+            try:
+                # --- Live Visibility Logic ---
+                is_hidden = False
+                if state == "start":
+                    if not getattr(ColorType, 'consider_start', True) and table.relationship[row] == frame_table.REL_OUTPUT:
+                        is_hidden = True
+                elif state == "end":
+                    if getattr(ColorType, 'hide_at_end', False):
+                        is_hidden = True
+
+                obj.hide_viewport = is_hidden
+                obj.hide_render = is_hidden
+                if is_hidden:
+                    continue
+
+                original_color = appearance.color_for(obj)
+                if state == "start":
+                    use_original = getattr(ColorType, 'use_start_original_color', False)
+                    color = original_color if use_original else list(ColorType.start_color[:])
+                    transparency = getattr(ColorType, 'start_transparency', 0.0)
+                elif state == "in_progress":
+                    use_original = getattr(ColorType, 'use_active_original_color', False)
+                    color = original_color if use_original else list(ColorType.in_progress_color[:])
+                    transparency = getattr(ColorType, 'active_start_transparency', 0.0) # Simplified for live view
+                else: # end
+                    use_original = getattr(ColorType, 'use_end_original_color', True)
+                    color = original_color if use_original else list(ColorType.end_color[:])
+                    transparency = getattr(ColorType, 'end_transparency', 0.0)
+                obj.color = (color[0], color[1], color[2], 1.0 - transparency)
+            except ReferenceError:
+                # Object removed since the index was built
+                index.objects[product_index] = False
+
+    @classmethod
+    def register_live_color_update_handler(cls):
+        from bonsai.bim.module.sequence import frame_dispatcher
+        dispatcher = frame_dispatcher.get_frame_dispatcher()
+        dispatcher.set_changed_products_provider(cls.take_live_changed_products)
+        dispatcher.subscribe(
+            frame_dispatcher.SUBSCRIBER_LIVE_COLORS,
+            lambda frame_context: cls.live_color_update_handler(frame_context.scene, frame_context.depsgraph, frame_context),
+            frame_dispatcher.ORDER_OBJECTS,
+        )
+        cls._live_color_update_handler = cls.live_color_update_handler
+
+        # Colors are only visible with object color shading
+        try:
+            area = tool.Blender.get_view3d_area()
+            if area and area.spaces[0].shading.color_type != "OBJECT":
+                area.spaces[0].shading.color_type = "OBJECT"
+        except Exception:
+            pass
+
+        # Re-evaluate every product on the next frame change
+        from bonsai.bim.module.sequence import interval_index
+        index = interval_index.get_live_interval_index_cache().index
+        if index is not None:
+            index.reset_playback()
+
+    @classmethod
+    def unregister_live_color_update_handler(cls):
+        from bonsai.bim.module.sequence import frame_dispatcher, interval_index, live_cache_store
+        dispatcher = frame_dispatcher.get_frame_dispatcher()
+        dispatcher.unsubscribe(frame_dispatcher.SUBSCRIBER_LIVE_COLORS)
+        dispatcher.set_changed_products_provider(None)
+        cls._live_color_update_handler = None
+
+        interval_index.invalidate_live_interval_index()
+        live_cache_store.get_live_update_store().clear(bpy.context.scene)
+
     @classmethod
     def create_live_update_cache_from_existing(cls, context):
         """
@@ -6049,16 +6520,10 @@ class Sequence(bonsai.core.tool.Sequence):
 
             print(f"📋 Found {len(animated_objects)} animated objects")
 
-            # Create basic cache structure
-            live_update_props = {"product_frames": {}, "original_colors": {}}
-
             # For each animated object, create basic frame data
+            from bonsai.bim.module.sequence import frame_table
+            builder = frame_table.ProductFrameTableBuilder(0, 200)
             for obj, element in animated_objects:
-                pid_str = str(element.id())
-
-                # Store original color
-                live_update_props["original_colors"][pid_str] = list(obj.color)
-
                 # Create basic frame data (simplified)
                 # This is a minimal implementation - doesn't recreate full animation analysis
                 frame_data = {
@@ -6072,10 +6537,12 @@ class Sequence(bonsai.core.tool.Sequence):
                     "element_id": element.id()
                 }
 
-                live_update_props["product_frames"][pid_str] = [frame_data]
+                builder.add_frame_data(element.id(), frame_data)
 
-            # Store in scene
-            context.scene['BIM_LiveUpdateProductFrames'] = live_update_props
+            # Store in the binary live update store
+            from bonsai.bim.module.sequence import interval_index, live_cache_store
+            live_cache_store.get_live_update_store().set_table(context.scene, builder.build())
+            interval_index.invalidate_live_interval_index()
             print(f"✅ Live update cache created with {len(animated_objects)} objects")
             return True
 
@@ -6107,6 +6574,10 @@ class Sequence(bonsai.core.tool.Sequence):
 
         # 1. Desregistrar handlers de actualización por frame para evitar errores
         cls._unregister_frame_change_handler()
+        from bonsai.bim.module.sequence import incremental_animation, snapshot_engine
+        incremental_animation.invalidate_compiled_animation()
+        snapshot_engine.invalidate_snapshot_state()
+        cls._last_culling_stats = None
 
         # 2. Limpiar elementos visuales auxiliares (textos, barras)
         if clear_texts:
@@ -8008,6 +8479,8 @@ class Sequence(bonsai.core.tool.Sequence):
         """
         try:
             print("🎯 Updating individual variance colors...")
+            from bonsai.bim.module.sequence import snapshot_engine
+            snapshot_engine.invalidate_snapshot_state()
             
             # Asegurar viewport correcto
             cls._ensure_viewport_shading()
@@ -8020,28 +8493,12 @@ class Sequence(bonsai.core.tool.Sequence):
             
             # Guardar colores originales la primera vez (si no están guardados)
             if not hasattr(cls, '_original_colors'):
-                cls._original_colors = {}
-                for obj in bpy.context.scene.objects:
-                    if obj.type == 'MESH' and tool.Ifc.get_entity(obj):
-                        if hasattr(obj, 'color'):
-                            # Intentar obtener el color del material IFC original primero
-                            original_color = None
-                            try:
-                                if obj.material_slots and obj.material_slots[0].material:
-                                    material = obj.material_slots[0].material
-                                    if material.use_nodes:
-                                        principled = tool.Blender.get_material_node(material, "BSDF_PRINCIPLED")
-                                        if principled and principled.inputs.get("Base Color"):
-                                            base_color = principled.inputs["Base Color"].default_value
-                                            original_color = tuple([base_color[0], base_color[1], base_color[2], base_color[3]])
-                            except Exception:
-                                pass
-
-                            # Fallback: usar el color actual del viewport si no se pudo obtener del material
-                            if original_color is None:
-                                original_color = tuple(obj.color)
-
-                            cls._original_colors[obj.name] = original_color
+                from bonsai.bim.module.sequence import original_appearance
+                appearance = original_appearance.get_original_appearance()
+                cls._original_colors = appearance.colors_for(
+                    obj for obj in bpy.context.scene.objects
+                    if obj.type == 'MESH' and tool.Ifc.get_entity(obj)
+                )
                 print(f"[CACHE] Saved original colors for {len(cls._original_colors)} objects (from materials where possible)")
             
             # Identificar tareas con checkbox activo
@@ -8170,27 +8627,9 @@ class Sequence(bonsai.core.tool.Sequence):
     def _save_original_object_colors(cls):
         """Guardar los colores originales de todos los objetos desde material IFC si es posible"""
         try:
-            original_colors = {}
-            for obj in bpy.context.scene.objects:
-                if obj.type == 'MESH' and hasattr(obj, 'color'):
-                    # Intentar obtener el color del material IFC original primero
-                    original_color = None
-                    try:
-                        if obj.material_slots and obj.material_slots[0].material:
-                            material = obj.material_slots[0].material
-                            if material.use_nodes:
-                                principled = tool.Blender.get_material_node(material, "BSDF_PRINCIPLED")
-                                if principled and principled.inputs.get("Base Color"):
-                                    base_color = principled.inputs["Base Color"].default_value
-                                    original_color = tuple([base_color[0], base_color[1], base_color[2], base_color[3]])
-                    except Exception:
-                        pass
-
-                    # Fallback: usar el color actual del viewport si no se pudo obtener del material
-                    if original_color is None:
-                        original_color = tuple(obj.color)
-
-                    original_colors[obj.name] = original_color
+            from bonsai.bim.module.sequence import original_appearance
+            appearance = original_appearance.get_original_appearance()
+            original_colors = appearance.colors_for(obj for obj in bpy.context.scene.objects if obj.type == 'MESH')
 
             bpy.context.scene['BIM_VarianceOriginalObjectColors'] = original_colors
             print(f"🔄 Saved original colors for {len(original_colors)} objects (from materials where possible)")
@@ -8704,10 +9143,28 @@ class Sequence(bonsai.core.tool.Sequence):
 
 
 
+    @classmethod
+    def get_animation_product_frames_optimized(cls, work_schedule, settings):
+        """
+        get_animation_product_frames_enhanced_optimized with freshly built task lookups and dates,
+        so it can be called again after schedule edits (e.g. as the incremental update's frame builder)
+        """
+        from bonsai.bim.module.sequence import ifc_lookup
+        ifc_lookup.invalidate_all_lookups()
+        lookup = ifc_lookup.get_ifc_lookup()
+        lookup.build_lookup_tables(work_schedule)
+        return cls.get_animation_product_frames_enhanced_optimized(
+            work_schedule, settings, lookup, ifc_lookup.get_date_cache()
+        )
+
     @classmethod
     def get_animation_product_frames_enhanced_optimized(cls, work_schedule, settings, lookup_optimizer, date_cache):
-        """ULTRA-OPTIMIZED version using pre-computed lookup tables and cache"""
+        """
+        ULTRA-OPTIMIZED version using pre-computed lookup tables and cache.
+        Returns a columnar ProductFrameTable (read-only Mapping[int, List[dict]]).
+        """
         import time
+        from bonsai.bim.module.sequence import frame_table
         start_time = time.time()
         print(f"🚀 USING get_animation_product_frames_enhanced_OPTIMIZED with priority mode support")
 
@@ -8715,8 +9172,7 @@ class Sequence(bonsai.core.tool.Sequence):
         animation_end = int(settings["start_frame"] + settings["total_frames"])
         viz_start = settings["start"]
         viz_finish = settings["finish"]
-        viz_duration = settings["duration"]
-        product_frames = {}
+        product_frames = frame_table.ProductFrameTableBuilder(animation_start, animation_end)
 
         # Get date source from properties
         props = cls.get_work_schedule_props()
@@ -8726,8 +9182,9 @@ class Sequence(bonsai.core.tool.Sequence):
 
         print(f"[OPTIMIZED] OPTIMIZED FRAMES: Processing {len(lookup_optimizer.get_all_tasks())} tasks")
 
-        # Process all tasks using pre-computed lookup
-        tasks_processed = 0
+        # Process all tasks using pre-computed lookup. Tasks are collected in order first so
+        # the dates of the whole schedule are converted to frames in one vectorized call.
+        pending_tasks = []
         for task in lookup_optimizer.get_all_tasks():
             try:
                 # PRIORITY MODE DETECTION: Check if only START is activated
@@ -8745,7 +9202,39 @@ class Sequence(bonsai.core.tool.Sequence):
                     print(f"   consider_start: {getattr(ColorType, 'consider_start', False)}")
                     print(f"   consider_active: {getattr(ColorType, 'consider_active', True)}")
                     print(f"   consider_end: {getattr(ColorType, 'consider_end', True)}")
+                    pending_tasks.append((task, None, None))
+                    continue
+
+                # Use date cache for instant access
+                task_start = date_cache.get_date(task, start_date_type, is_earliest=True)
+                task_finish = date_cache.get_date(task, finish_date_type, is_latest=True)
+
+                if not task_start or not task_finish or task_start > viz_finish:
+                    continue
+                pending_tasks.append((task, task_start, task_finish))
+
+            except Exception as e:
+                print(f"[WARNING]️ Error processing task {task.id()}: {e}")
+                continue
+
+        # Calculate frame positions for every dated task at once
+        from bonsai.bim.module.sequence import date_frames
+        converter = date_frames.DateFrameConverter.from_settings(settings)
+        dated = [(task_start, task_finish) for _, task_start, task_finish in pending_tasks if task_start is not None]
+        if converter.is_valid:
+            start_frames, finish_frames = converter.task_frames(
+                [d[0] for d in dated], [d[1] for d in dated], rounding=True
+            )
+            frame_pairs = iter(zip(start_frames.astype(int).tolist(), finish_frames.astype(int).tolist()))
+        else:
+            frame_pairs = iter([(converter.start_frame, converter.end_frame)] * len(dated))
 
+        tasks_processed = 0
+        for task, task_start, task_finish in pending_tasks:
+            # The frame pair is taken before the task is processed so a failing task doesn't shift the others
+            frame_pair = next(frame_pairs) if task_start is not None else None
+            try:
+                if frame_pair is None:
                     outputs_processed = 0
                     for output in lookup_optimizer.get_outputs_for_task(task.id()):
                         cls._add_optimized_priority_frame(
@@ -8763,22 +9252,7 @@ class Sequence(bonsai.core.tool.Sequence):
                     print(f"   Products added: {outputs_processed} outputs, {inputs_processed} inputs")
                     continue
 
-                # Use date cache for instant access
-                task_start = date_cache.get_date(task, start_date_type, is_earliest=True)
-                task_finish = date_cache.get_date(task, finish_date_type, is_latest=True)
-
-                if not task_start or not task_finish or task_start > viz_finish:
-                    continue
-
-                # Calculate frame positions
-                if viz_duration.total_seconds() > 0:
-                    start_progress = (task_start - viz_start).total_seconds() / viz_duration.total_seconds()
-                    finish_progress = (task_finish - viz_start).total_seconds() / viz_duration.total_seconds()
-                else:
-                    start_progress, finish_progress = 0.0, 1.0
-
-                sf = int(round(settings["start_frame"] + (start_progress * settings["total_frames"])))
-                ff = int(round(settings["start_frame"] + (finish_progress * settings["total_frames"])))
+                sf, ff = frame_pair
 
                 # Use lookup for instant access to outputs and inputs
                 for output in lookup_optimizer.get_outputs_for_task(task.id()):
@@ -8799,34 +9273,31 @@ class Sequence(bonsai.core.tool.Sequence):
                 print(f"[WARNING]️ Error processing task {task.id()}: {e}")
                 continue
 
+        table = product_frames.build()
+        table.task_resolver = tool.Ifc.get().by_id
+
         elapsed = time.time() - start_time
-        print(f"[OK] OPTIMIZED FRAMES: {len(product_frames)} products, {tasks_processed} tasks in {elapsed:.2f}s")
-        return product_frames
+        print(f"[OK] OPTIMIZED FRAMES: {len(table)} products ({table.row_count} rows, {table.nbytes / 1024:.0f} KB), {tasks_processed} tasks in {elapsed:.2f}s")
+        return table
 
     @classmethod
     def _add_optimized_priority_frame(cls, product_frames, product_id, task, relationship, animation_start, animation_end):
-        """Add priority mode frame (START only activated) to optimized product frames"""
+        """Add priority mode frame (START only activated) to the ProductFrameTableBuilder"""
         states = { "active": (animation_start, animation_end) }
 
-        frame_data = {
-            "task": task, "task_id": task.id(),
-            "type": getattr(task, "PredefinedType", "NOTDEFINED"),
-            "relationship": relationship,
-            "start_date": None, "finish_date": None,  # Dates ignored in priority mode
-            "STARTED": animation_start, "COMPLETED": animation_end,
-            "start_frame": animation_start, "finish_frame": animation_end,
-            "states": states,
-            "consider_start_active": True,  # KEY FLAG for priority mode
-        }
-
-        product_frames.setdefault(product_id, []).append(frame_data)
-        print(f"   🔧 Added priority frame for product {product_id}: consider_start_active={frame_data['consider_start_active']}")
+        # Dates are ignored in priority mode; priority=True is the consider_start_active flag
+        product_frames.add(
+            product_id, task.id(), relationship,
+            animation_start, animation_end, animation_start, animation_end,
+            states, predefined_type=getattr(task, "PredefinedType", "NOTDEFINED"), priority=True,
+        )
+        print(f"   🔧 Added priority frame for product {product_id}: consider_start_active=True")
 
     @classmethod
     def _add_optimized_product_frame(cls, product_frames, product_id, task, start_date, finish_date,
                                    start_frame, finish_frame, relationship, animation_start, animation_end,
                                    viz_start, viz_finish):
-        """Optimized version of add_product_frame_enhanced"""
+        """Optimized version of add_product_frame_enhanced writing into a ProductFrameTableBuilder"""
         # Fast state calculation
         if finish_date < viz_start:
             states = {
@@ -8850,22 +9321,14 @@ class Sequence(bonsai.core.tool.Sequence):
                 "after_end": (after_start if after_start <= animation_end else animation_end + 1, animation_end),
             }
 
-        # Create optimized frame data
-        frame_data = {
-            "task": task,
-            "task_id": task.id(),
-            "type": getattr(task, "PredefinedType", "NOTDEFINED"),
-            "relationship": relationship,
-            "start_date": start_date,
-            "finish_date": finish_date,
-            "STARTED": int(start_frame),
-            "COMPLETED": int(finish_frame),
-            "start_frame": max(animation_start, int(start_frame)),
-            "finish_frame": min(animation_end, int(finish_frame)),
-            "states": states,
-        }
-
-        product_frames.setdefault(product_id, []).append(frame_data)
+        # Append a columnar row to the ProductFrameTableBuilder
+        product_frames.add(
+            product_id, task.id(), relationship,
+            int(start_frame), int(finish_frame),
+            max(animation_start, int(start_frame)), min(animation_end, int(finish_frame)),
+            states, start_date=start_date, finish_date=finish_date,
+            predefined_type=getattr(task, "PredefinedType", "NOTDEFINED"),
+        )
 
     @classmethod
 
@@ -8875,8 +9338,10 @@ class Sequence(bonsai.core.tool.Sequence):
         MODIFIED to execute directly with Live Color Update support.
         """
         import time
-        from datetime import datetime
+        from bonsai.bim.module.sequence import snapshot_engine
         start_time = time.time()
+        # Keyframed objects no longer hold the last applied snapshot
+        snapshot_engine.invalidate_snapshot_state()
 
         print(f"[OPTIMIZED] OPTIMIZED ANIMATION: Planning for {len(product_frames)} products")
 
@@ -8893,89 +9358,86 @@ class Sequence(bonsai.core.tool.Sequence):
         color_ops = []
         total_objects_processed = 0
 
+        # Products entirely outside the visualization range get a static appearance
+        culled_before, culled_after = cls.get_window_culled_products(product_frames, settings)
+        from bonsai.bim.module.sequence import original_appearance, stage_profiler
+        appearance = original_appearance.get_original_appearance()
+        profiler = stage_profiler.get_stage_profiler()
+        colortype_time = 0.0
+        keyframe_start = time.perf_counter()
+
+        # Rows are read from the table columns; ColorTypes are resolved once per task
+        from bonsai.bim.module.sequence import frame_table
+        table = frame_table.as_frame_table(product_frames)
+        row_states = table.row_states()
+        row_task_ids = table.task_id.tolist()
+        row_is_output = (table.relationship == frame_table.REL_OUTPUT).tolist()
+        offsets = table.offsets.tolist()
+        colortypes = {}
+
         # Use cache for direct product->objects mapping
-        for product_id, frame_data_list in product_frames.items():
+        for product_index, product_id in enumerate(table.products.tolist()):
             objects = cache.get_objects_for_product(product_id)
             if not objects:
                 continue
+            rows = range(offsets[product_index], offsets[product_index + 1])
 
             for obj in objects:
                 total_objects_processed += 1
 
-                # Process frame data for this object
-                for frame_data in frame_data_list:
-                    task = frame_data.get("task")
-                    if not task:
-                        continue
+                if product_id in culled_before or product_id in culled_after:
+                    frame_data = table.frame_data(rows[-1])
+                    cls.apply_culled_product_appearance(
+                        obj, frame_data,
+                        cls.get_assigned_ColorType_for_task(frame_data.get("task"), animation_props, active_group_name),
+                        list(appearance.color_for(obj)), product_id in culled_before,
+                    )
+                    continue
 
-                    # Get ColorType with caching
-                    colortype = cls._get_colortype_optimized(task, animation_props, active_group_name)
+                # Process the rows of this object
+                for row in rows:
+                    task_id = row_task_ids[row]
+                    if task_id not in colortypes:
+                        task = table.resolve_task(task_id)
+                        resolve_start = time.perf_counter()
+                        colortypes[task_id] = cls._get_colortype_optimized(task, animation_props, active_group_name) if task else None
+                        colortype_time += time.perf_counter() - resolve_start
+                    colortype = colortypes[task_id]
+                    if colortype is None:
+                        continue
 
                     # MODIFICADO: Pasamos las listas para que se llenen con operaciones
-                    cls._apply_object_animation_optimized(
-                        obj, frame_data, colortype, settings,
+                    cls._plan_state_animation_optimized(
+                        obj, zip(frame_table.STATE_NAMES, row_states[row]), row_is_output[row], colortype,
                         visibility_ops, color_ops # Pasamos las listas del plan
                     )
 
         # EXECUTE THE PLAN DIRECTLY (instead of returning it)
         print(f"[OPTIMIZED] Executing animation plan: {len(visibility_ops)} visibility ops, {len(color_ops)} color ops")
 
-        # Execute visibility operations
-        for op in visibility_ops:
-            op['obj'].hide_viewport = op['hide']
-            op['obj'].hide_render = op['hide']
-            op['obj'].keyframe_insert(data_path="hide_viewport", frame=op['frame'])
-            op['obj'].keyframe_insert(data_path="hide_render", frame=op['frame'])
-
-        # Execute color operations
-        for op in color_ops:
-            op['obj'].color = op['color']
-            op['obj'].keyframe_insert(data_path="color", frame=op['frame'])
+        # Execute visibility and color operations as bulk F-curve writes
+        from bonsai.bim.module.sequence import keyframe_writer
+        writer = keyframe_writer.BulkKeyframeWriter()
+        writer.add_operations(visibility_ops, color_ops)
+        writer.write(share_identical=cls.should_share_identical_actions())
+        profiler.record(stage_profiler.STAGE_COLORTYPES, colortype_time, calls=0)
+        profiler.record(stage_profiler.STAGE_KEYFRAMES, time.perf_counter() - keyframe_start - colortype_time, total_objects_processed)
 
         elapsed = time.time() - start_time
         print(f"[OK] OPTIMIZED ANIMATION: {total_objects_processed} objects processed in {elapsed:.2f}s")
 
         # === LIVE COLOR UPDATE INTEGRATION ===
         if animation_props.enable_live_color_updates:
+            live_cache_start = time.perf_counter()
 
-            # Convert product_frames keys to strings for scene storage
-            string_keyed_product_frames = {str(k): v for k, v in product_frames.items()}
-
-            # Create serializable version avoiding non-serializable objects
-            serializable_product_frames = {}
-            for pid_str, frame_data_list in string_keyed_product_frames.items():
-                serializable_frame_data_list = []
-                for frame_data_item in frame_data_list:
-                    serializable_item = {}
-                    for key, value in frame_data_item.items():
-                        if key == 'task':
-                            # Store task_id to recover task in live handler
-                            if value is not None and hasattr(value, 'id') and callable(value.id):
-                                serializable_item['task_id'] = value.id()
-                            continue  # Skip non-serializable 'task' object
-                        elif isinstance(value, datetime):
-                            serializable_item[key] = value.isoformat()  # Convert datetime to string
-                        else:
-                            serializable_item[key] = value
-                    serializable_frame_data_list.append(serializable_item)
-                serializable_product_frames[pid_str] = serializable_frame_data_list
-
-            # Store original colors for live updates
-            live_update_props = {"product_frames": serializable_product_frames, "original_colors": {}}
-            for obj in bpy.data.objects:
-                if obj.type == 'MESH':
-                    element = tool.Ifc.get_entity(obj)
-                    if element:
-                        live_update_props["original_colors"][str(element.id())] = list(obj.color)
-
-            bpy.context.scene['BIM_LiveUpdateProductFrames'] = live_update_props
-            print(f"[OPTIMIZED] Created live update cache with {len(serializable_product_frames)} products")
-
-            # Immediate verification
-            if bpy.context.scene.get('BIM_LiveUpdateProductFrames'):
-                print("[OPTIMIZED] Cache verification: SUCCESS - BIM_LiveUpdateProductFrames exists")
-            else:
-                print("[OPTIMIZED] Cache verification: FAILED - BIM_LiveUpdateProductFrames missing!")
+            # The columnar table is kept as is (saved as a binary side-car next to the .blend);
+            # original colors come from the original appearance cache
+            from bonsai.bim.module.sequence import frame_table, interval_index, live_cache_store
+            live_table = frame_table.as_frame_table(product_frames)
+            live_cache_store.get_live_update_store().set_table(bpy.context.scene, live_table)
+            interval_index.invalidate_live_interval_index()
+            profiler.record(stage_profiler.STAGE_LIVE_CACHE, time.perf_counter() - live_cache_start, len(live_table))
+            print(f"[OPTIMIZED] Created live update store with {len(live_table)} products ({live_table.nbytes:,} bytes)")
 
 
         # Configure viewport and scene
@@ -9008,23 +9470,12 @@ class Sequence(bonsai.core.tool.Sequence):
     def _save_original_colors_optimized(cls, cache):
         """Save original colors using cache"""
         import json
-        original_colors = {}
-
-        for obj in cache.scene_objects_cache:
-            if obj.type == 'MESH':
-                # Get original color from material or viewport
-                original_color = list(obj.color)
-                try:
-                    if obj.material_slots and obj.material_slots[0].material:
-                        material = obj.material_slots[0].material
-                        if material.use_nodes:
-                            principled = tool.Blender.get_material_node(material, "BSDF_PRINCIPLED")
-                            if principled and principled.inputs.get("Base Color"):
-                                base_color = principled.inputs["Base Color"].default_value
-                                original_color = [base_color[0], base_color[1], base_color[2], base_color[3]]
-                except:
-                    pass
-                original_colors[obj.name] = original_color
+        from bonsai.bim.module.sequence import original_appearance
+        appearance = original_appearance.get_original_appearance()
+        original_colors = {
+            name: list(color)
+            for name, color in appearance.colors_for(obj for obj in cache.scene_objects_cache if obj.type == 'MESH').items()
+        }
 
         # Save to scene
         try:
@@ -9109,15 +9560,24 @@ class Sequence(bonsai.core.tool.Sequence):
         Apply animation to object efficiently WITH CONSIDER FLAGS SUPPORT
         RESTAURADO: Lógica de v110 para consider flags pero con optimizaciones batch
         """
-        states = frame_data.get("states", {})
+        cls._plan_state_animation_optimized(
+            obj, frame_data.get("states", {}).items(), frame_data.get("relationship") == "output",
+            colortype, visibility_ops, color_ops,
+        )
 
+    @classmethod
+    def _plan_state_animation_optimized(cls, obj, states, is_output, colortype, visibility_ops, color_ops):
+        """
+        Plans the visibility / color operations of one product-frame row from its
+        (state name, (start frame, end frame)) pairs, e.g. the ProductFrameTable.row_states() of a row
+        """
         # V110 LOGIC: Verificar consider flags exactamente como en v110
         has_consider_start = colortype.get('consider_start', True)
         is_active_considered = colortype.get('consider_active', True)
         is_end_considered = colortype.get('consider_end', True)
 
         # V110 LOGIC: Procesar cada estado con consider flags
-        for state_name, (start_f, end_f) in states.items():
+        for state_name, (start_f, end_f) in states:
             if end_f < start_f:
                 continue
 
@@ -9131,27 +9591,27 @@ class Sequence(bonsai.core.tool.Sequence):
                 if not has_consider_start:
                     # Si 'Start' NO se considera y es un objeto de construcción ('output'),
                     # debe estar OCULTO durante toda la fase start
-                    if frame_data.get("relationship") == "output":
-                        batch_processor_instance.add_visibility_operation(obj, start_f, True, True)
+                    if is_output:
+                        visibility_ops.append({'obj': obj, 'frame': start_f, 'hide': True})
                         if end_f > start_f:
-                            batch_processor_instance.add_visibility_operation(obj, end_f, True, True)
+                            visibility_ops.append({'obj': obj, 'frame': end_f, 'hide': True})
                     continue  # Saltar al siguiente estado
 
                 # Si 'Start' SÍ se considera, aplicar apariencia start
-                batch_processor_instance.add_visibility_operation(obj, start_f, False, False)
+                visibility_ops.append({'obj': obj, 'frame': start_f, 'hide': False})
                 if not colortype.get('use_start_original_color', False):
                     color = colortype.get('start_color', [1,1,1,1])
-                    objects_with_colors.append((obj, tuple(color)))
+                    color_ops.append({'obj': obj, 'frame': start_f, 'color': tuple(color)})
 
             elif state == "in_progress":
                 if not is_active_considered:
                     continue  # Saltar fase active
 
                 # Aplicar apariencia active (optimizada)
-                batch_processor_instance.add_visibility_operation(obj, start_f, False, False)
+                visibility_ops.append({'obj': obj, 'frame': start_f, 'hide': False})
                 if not colortype.get('use_active_original_color', False):
                     color = colortype.get('in_progress_color', [0.5, 0.5, 0.5, 1])
-                    objects_with_colors.append((obj, tuple(color)))
+                    color_ops.append({'obj': obj, 'frame': start_f, 'color': tuple(color)})
 
             elif state == "end":
                 if not is_end_considered:
@@ -9160,12 +9620,12 @@ class Sequence(bonsai.core.tool.Sequence):
                 # Aplicar apariencia end
                 should_hide_at_end = colortype.get('hide_at_end', False)
                 if should_hide_at_end:
-                    batch_processor_instance.add_visibility_operation(obj, start_f, True, True)
+                    visibility_ops.append({'obj': obj, 'frame': start_f, 'hide': True})
                 else:
-                    batch_processor_instance.add_visibility_operation(obj, start_f, False, False)
+                    visibility_ops.append({'obj': obj, 'frame': start_f, 'hide': False})
                     if not colortype.get('use_end_original_color', True):
                         color = colortype.get('end_color', [0.3, 0.3, 0.3, 1])
-                        objects_with_colors.append((obj, tuple(color)))
+                        color_ops.append({'obj': obj, 'frame': start_f, 'color': tuple(color)})
 
     @classmethod
 
@@ -9182,7 +9642,9 @@ class Sequence(bonsai.core.tool.Sequence):
     def clear_objects_animation_optimized(cls, include_blender_objects=True):
         """Optimized animation cleanup"""
         import time
+        from bonsai.bim.module.sequence import snapshot_engine
         start_time = time.time()
+        snapshot_engine.invalidate_snapshot_state()
 
         # Use cache to avoid massive iteration
         from . import performance_cache
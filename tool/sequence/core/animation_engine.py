@@ -1354,22 +1354,12 @@ class AnimationEngine:
         animation_plan = defaultdict(lambda: defaultdict(list))
 
         # Store original colors for planning
-        original_colors = {}
-        for obj in bpy.data.objects:
-            if obj.type == 'MESH':
-                try:
-                    if obj.material_slots and obj.material_slots[0].material:
-                        material = obj.material_slots[0].material
-                        if material.use_nodes:
-                            principled = tool.Blender.get_material_node(material, "BSDF_PRINCIPLED")
-                            if principled and principled.inputs.get("Base Color"):
-                                base_color = principled.inputs["Base Color"].default_value
-                                original_colors[obj.name] = [base_color[0], base_color[1], base_color[2], base_color[3]]
-                except Exception:
-                    pass
-
-                if obj.name not in original_colors:
-                    original_colors[obj.name] = list(obj.color)
+        from bonsai.bim.module.sequence import original_appearance
+        appearance = original_appearance.get_original_appearance()
+        original_colors = {
+            name: list(color)
+            for name, color in appearance.colors_for(obj for obj in bpy.data.objects if obj.type == 'MESH').items()
+        }
 
         # Plan object animations
         for obj in bpy.data.objects:
@@ -1462,38 +1452,24 @@ class AnimationEngine:
 
         print(f"[OPTIMIZED] EXECUTING ANIMATION: Processing {len(animation_plan)} frames")
 
+        from bonsai.bim.module.sequence import keyframe_writer
+
         # Clear existing animation data first
         for obj in bpy.data.objects:
             if obj.animation_data:
                 obj.animation_data_clear()
 
-        # Process frames in order
+        # Visibility and color keyframes are written as whole F-curves per object
+        writer = keyframe_writer.BulkKeyframeWriter()
+        writer.add_animation_plan(animation_plan)
+        for frame_actions in animation_plan.values():
+            for obj in frame_actions.get("SET_MATERIAL_ACTIVE", []):
+                writer.keep_unique(obj)
+        writer.write(share_identical=getattr(cls.get_animation_props(), "share_identical_actions", False))
+
+        # Material keyframes are rare, keep them on the RNA path
         for frame_num in sorted(animation_plan.keys()):
             frame_actions = animation_plan[frame_num]
-
-            # Batch hide operations
-            if "HIDE" in frame_actions:
-                for obj in frame_actions["HIDE"]:
-                    obj.hide_viewport = True
-                    obj.hide_render = True
-                    obj.keyframe_insert(data_path="hide_viewport", frame=frame_num)
-                    obj.keyframe_insert(data_path="hide_render", frame=frame_num)
-
-            # Batch reveal operations
-            if "REVEAL" in frame_actions:
-                for obj in frame_actions["REVEAL"]:
-                    obj.hide_viewport = False
-                    obj.hide_render = False
-                    obj.keyframe_insert(data_path="hide_viewport", frame=frame_num)
-                    obj.keyframe_insert(data_path="hide_render", frame=frame_num)
-
-            # Batch color operations
-            if "SET_COLOR" in frame_actions:
-                for obj, color in frame_actions["SET_COLOR"]:
-                    obj.color = color
-                    obj.keyframe_insert(data_path="color", frame=frame_num)
-
-            # Batch material operations
             if "SET_MATERIAL_ACTIVE" in frame_actions:
                 for obj in frame_actions["SET_MATERIAL_ACTIVE"]:
                     if obj.material_slots and obj.material_slots[0].material:
@@ -1728,7 +1704,6 @@ class AnimationEngine:
             return
 
         import time
-        from datetime import datetime
         start_time = time.time()
 
         print(f"[OPTIMIZED] OPTIMIZED ANIMATION: Planning for {len(product_frames)} products")
@@ -1790,46 +1765,13 @@ class AnimationEngine:
 
         # === LIVE COLOR UPDATE INTEGRATION ===
         if getattr(animation_props, 'enable_live_color_updates', False):
-
-            # Convert product_frames keys to strings for scene storage
-            string_keyed_product_frames = {str(k): v for k, v in product_frames.items()}
-
-            # Create serializable version avoiding non-serializable objects
-            serializable_product_frames = {}
-            for pid_str, frame_data_list in string_keyed_product_frames.items():
-                serializable_frame_data_list = []
-                for frame_data_item in frame_data_list:
-                    serializable_item = {}
-                    for key, value in frame_data_item.items():
-                        if key == 'task':
-                            # Store task_id to recover task in live handler
-                            if value is not None and hasattr(value, 'id') and callable(value.id):
-                                serializable_item['task_id'] = value.id()
-                            continue  # Skip non-serializable 'task' object
-                        elif isinstance(value, datetime):
-                            serializable_item[key] = value.isoformat()  # Convert datetime to string
-                        else:
-                            serializable_item[key] = value
-                    serializable_frame_data_list.append(serializable_item)
-                serializable_product_frames[pid_str] = serializable_frame_data_list
-
-            # Store original colors for live updates
-            live_update_props = {"product_frames": serializable_product_frames, "original_colors": {}}
-            for obj in bpy.data.objects:
-                if obj.type == 'MESH':
-                    if HAS_IFC and tool:
-                        element = tool.Ifc.get_entity(obj)
-                        if element:
-                            live_update_props["original_colors"][str(element.id())] = list(obj.color)
-
-            bpy.context.scene['BIM_LiveUpdateProductFrames'] = live_update_props
-            print(f"[OPTIMIZED] Created live update cache with {len(serializable_product_frames)} products")
-
-            # Immediate verification
-            if bpy.context.scene.get('BIM_LiveUpdateProductFrames'):
-                print("[OPTIMIZED] Cache verification: SUCCESS - BIM_LiveUpdateProductFrames exists")
-            else:
-                print("[OPTIMIZED] Cache verification: FAILED - BIM_LiveUpdateProductFrames missing!")
+            # The columnar table goes to the binary live update store (side-car next to the .blend);
+            # original colors come from the original appearance cache
+            from bonsai.bim.module.sequence import frame_table, interval_index, live_cache_store
+            live_table = frame_table.as_frame_table(product_frames)
+            live_cache_store.get_live_update_store().set_table(bpy.context.scene, live_table)
+            interval_index.invalidate_live_interval_index()
+            print(f"[OPTIMIZED] Created live update store with {len(live_table)} products ({live_table.nbytes:,} bytes)")
 
         # Configure viewport and scene
         if HAS_BLENDER and tool:
@@ -1863,26 +1805,16 @@ class AnimationEngine:
             return
 
         import json
-        original_colors = {}
+        from bonsai.bim.module.sequence import original_appearance
 
         # Use scene objects cache if available
         scene_objects = getattr(cache, 'scene_objects_cache', bpy.data.objects)
 
-        for obj in scene_objects:
-            if obj.type == 'MESH':
-                # Get original color from material or viewport
-                original_color = list(obj.color)
-                try:
-                    if obj.material_slots and obj.material_slots[0].material:
-                        material = obj.material_slots[0].material
-                        if material.use_nodes and HAS_IFC and tool:
-                            principled = tool.Blender.get_material_node(material, "BSDF_PRINCIPLED")
-                            if principled and principled.inputs.get("Base Color"):
-                                base_color = principled.inputs["Base Color"].default_value
-                                original_color = [base_color[0], base_color[1], base_color[2], base_color[3]]
-                except:
-                    pass
-                original_colors[obj.name] = original_color
+        appearance = original_appearance.get_original_appearance()
+        original_colors = {
+            name: list(color)
+            for name, color in appearance.colors_for(obj for obj in scene_objects if obj.type == 'MESH').items()
+        }
 
         # Save to scene
         try:
@@ -264,28 +264,13 @@ def show_snapshot(cls, product_states):
     if not bpy.context.scene.get('BIM_VarianceOriginalObjectColors'):
         cls._save_original_object_colors()
 
+    from bonsai.bim.module.sequence import original_appearance
+    appearance = original_appearance.get_original_appearance()
     original_properties = {}
     for obj in bpy.data.objects:
         if obj.type == 'MESH' and tool.Ifc.get_entity(obj):
-            # Intentar obtener el color del material IFC original primero
-            original_color = None
-            try:
-                if obj.material_slots and obj.material_slots[0].material:
-                    material = obj.material_slots[0].material
-                    if material.use_nodes:
-                        principled = tool.Blender.get_material_node(material, "BSDF_PRINCIPLED")
-                        if principled and principled.inputs.get("Base Color"):
-                            base_color = principled.inputs["Base Color"].default_value
-                            original_color = [base_color[0], base_color[1], base_color[2], base_color[3]]
-            except Exception:
-                pass
-
-            # Fallback: usar el color actual del viewport si no se pudo obtener del material
-            if original_color is None:
-                original_color = list(obj.color)
-
             original_properties[obj.name] = {
-                "color": original_color,
+                "color": list(appearance.color_for(obj)),
                 "hide_viewport": obj.hide_viewport,
                 "hide_render": obj.hide_render,
             }
@@ -284,27 +284,9 @@ class ObjectManager:
     def _save_original_object_colors(cls):
         """Guardar los colores originales de todos los objetos desde material IFC si es posible. EXACT COPY from sequence.py line ~7594"""
         try:
-            original_colors = {}
-            for obj in bpy.context.scene.objects:
-                if obj.type == 'MESH' and hasattr(obj, 'color'):
-                    # Intentar obtener el color del material IFC original primero
-                    original_color = None
-                    try:
-                        if obj.material_slots and obj.material_slots[0].material:
-                            material = obj.material_slots[0].material
-                            if material.use_nodes:
-                                principled = tool.Blender.get_material_node(material, "BSDF_PRINCIPLED")
-                                if principled and principled.inputs.get("Base Color"):
-                                    base_color = principled.inputs["Base Color"].default_value
-                                    original_color = tuple([base_color[0], base_color[1], base_color[2], base_color[3]])
-                    except Exception:
-                        pass
-
-                    # Fallback: usar el color actual del viewport si no se pudo obtener del material
-                    if original_color is None:
-                        original_color = tuple(obj.color)
-
-                    original_colors[obj.name] = original_color
+            from bonsai.bim.module.sequence import original_appearance
+            appearance = original_appearance.get_original_appearance()
+            original_colors = appearance.colors_for(obj for obj in bpy.context.scene.objects if obj.type == 'MESH')
 
             bpy.context.scene['BIM_VarianceOriginalObjectColors'] = original_colors
             print(f"🔄 Saved original colors for {len(original_colors)} objects (from materials where possible)")
@@ -337,23 +319,12 @@ class ObjectManager:
     def _save_original_colors_optimized(cls, cache):
         """Save original colors using cache. EXACT COPY from sequence.py line ~8432"""
         import json
-        original_colors = {}
-
-        for obj in cache.scene_objects_cache:
-            if obj.type == 'MESH':
-                # Get original color from material or viewport
-                original_color = list(obj.color)
-                try:
-                    if obj.material_slots and obj.material_slots[0].material:
-                        material = obj.material_slots[0].material
-                        if material.use_nodes:
-                            principled = tool.Blender.get_material_node(material, "BSDF_PRINCIPLED")
-                            if principled and principled.inputs.get("Base Color"):
-                                base_color = principled.inputs["Base Color"].default_value
-                                original_color = [base_color[0], base_color[1], base_color[2], base_color[3]]
-                except:
-                    pass
-                original_colors[obj.name] = original_color
+        from bonsai.bim.module.sequence import original_appearance
+        appearance = original_appearance.get_original_appearance()
+        original_colors = {
+            name: list(color)
+            for name, color in appearance.colors_for(obj for obj in cache.scene_objects_cache if obj.type == 'MESH').items()
+        }
 
         # Save to scene
         try:
@@ -230,28 +230,12 @@ def update_individual_variance_colors(cls):
         
         # Guardar colores originales la primera vez (si no están guardados)
         if not hasattr(cls, '_original_colors'):
-            cls._original_colors = {}
-            for obj in bpy.context.scene.objects:
-                if obj.type == 'MESH' and tool.Ifc.get_entity(obj):
-                    if hasattr(obj, 'color'):
-                        # Intentar obtener el color del material IFC original primero
-                        original_color = None
-                        try:
-                            if obj.material_slots and obj.material_slots[0].material:
-                                material = obj.material_slots[0].material
-                                if material.use_nodes:
-                                    principled = tool.Blender.get_material_node(material, "BSDF_PRINCIPLED")
-                                    if principled and principled.inputs.get("Base Color"):
-                                        base_color = principled.inputs["Base Color"].default_value
-                                        original_color = tuple([base_color[0], base_color[1], base_color[2], base_color[3]])
-                        except Exception:
-                            pass
-
-                        # Fallback: usar el color actual del viewport si no se pudo obtener del material
-                        if original_color is None:
-                            original_color = tuple(obj.color)
-
-                        cls._original_colors[obj.name] = original_color
+            from bonsai.bim.module.sequence import original_appearance
+            appearance = original_appearance.get_original_appearance()
+            cls._original_colors = appearance.colors_for(
+                obj for obj in bpy.context.scene.objects
+                if obj.type == 'MESH' and tool.Ifc.get_entity(obj)
+            )
             print(f"[CACHE] Saved original colors for {len(cls._original_colors)} objects (from materials where possible)")
         
         # Identificar tareas con checkbox activo
@@ -379,27 +363,9 @@ def activate_variance_color_mode(cls):
 def _save_original_object_colors(cls):
     """Guardar los colores originales de todos los objetos desde material IFC si es posible"""
     try:
-        original_colors = {}
-        for obj in bpy.context.scene.objects:
-            if obj.type == 'MESH' and hasattr(obj, 'color'):
-                # Intentar obtener el color del material IFC original primero
-                original_color = None
-                try:
-                    if obj.material_slots and obj.material_slots[0].material:
-                        material = obj.material_slots[0].material
-                        if material.use_nodes:
-                            principled = tool.Blender.get_material_node(material, "BSDF_PRINCIPLED")
-                            if principled and principled.inputs.get("Base Color"):
-                                base_color = principled.inputs["Base Color"].default_value
-                                original_color = tuple([base_color[0], base_color[1], base_color[2], base_color[3]])
-                except Exception:
-                    pass
-
-                # Fallback: usar el color actual del viewport si no se pudo obtener del material
-                if original_color is None:
-                    original_color = tuple(obj.color)
-
-                original_colors[obj.name] = original_color
+        from bonsai.bim.module.sequence import original_appearance
+        appearance = original_appearance.get_original_appearance()
+        original_colors = appearance.colors_for(obj for obj in bpy.context.scene.objects if obj.type == 'MESH')
 
         bpy.context.scene['BIM_VarianceOriginalObjectColors'] = original_colors
         print(f"🔄 Saved original colors for {len(original_colors)} objects (from materials where possible)")
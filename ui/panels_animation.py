@@ -318,6 +318,9 @@ class BIM_PT_animation_tools(Panel):
         row = self.layout.row(align=True)
         row.prop(self.animation_props, "should_show_task_bar_options", text="Task Bars", toggle=True, icon="NLA_PUSHDOWN")
         row.prop(self.animation_props, "enable_live_color_updates", text="Live Color Scheme Update", toggle=True)
+        row.prop(self.animation_props, "share_identical_actions", text="Share Actions", toggle=True, icon="LINKED")
+        row.prop(self.animation_props, "cull_outside_visualization", text="Cull", toggle=True, icon="MOD_MASK")
+        row.prop(self.animation_props, "adaptive_playback", text="Adaptive", toggle=True, icon="FF")
         row.label(text="", icon='INFO')
 
         if self.animation_props.should_show_task_bar_options:
@@ -444,6 +447,10 @@ class BIM_PT_animation_tools(Panel):
             icon="OUTLINER_OB_CAMERA")
         op.work_schedule = self.props.active_work_schedule_id
 
+        # Chunked variant for large models: keeps the UI responsive and can be cancelled with ESC
+        modal_row = main_actions_box.row()
+        modal_row.operator("bim.create_animation_modal", text="Create Keyframes (Interruptible)", icon="TIME")
+
         # Reset Button - DUPLICATE
         reset_row = main_actions_box.row()
         reset_row.operator("bim.clear_previous_animation", text="Reset", icon="TRASH")